@@ -0,0 +1,73 @@
+"""Benchmark the code_search trigram index on a synthetic tree.
+
+Usage: python benchmarks/bench_code_search.py [--files 100000] [--queries 50]
+
+Builds a tree of small Python-like files, indexes it, then times literal and
+regex queries plus a no-change rescan and a single-file update.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from nanobot.agent.tools.code_search import CodeSearchIndex
+
+_WORDS = "request response handler session cache token stream buffer parser index queue worker".split()
+
+
+def _make_tree(root: Path, n: int) -> None:
+    rng = random.Random(0)
+    for i in range(n):
+        d = root / f"pkg{i % 200}" / f"mod{i % 7}"
+        d.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for j in range(40):
+            a, b = rng.choice(_WORDS), rng.choice(_WORDS)
+            lines.append(f"def {a}_{b}_{j}(x):\n    return x  # {a} {b}\n")
+        if i % 1000 == 0:
+            lines.append(f"RARE_SYMBOL_{i} = {i}\n")
+        (d / f"f{i}.py").write_text("".join(lines))
+
+
+def _timed(label: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    for _ in range(n):
+        result = fn()
+    elapsed = time.perf_counter() - start
+    extra = f"  [{len(result['matches'])} matches]" if isinstance(result, dict) and "matches" in result else ""
+    print(f"{label:<40} {n:>5} x  {1e3 * elapsed / n:>9.2f} ms/op{extra}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "tree"
+        start = time.perf_counter()
+        _make_tree(root, args.files)
+        print(f"generated {args.files} files in {time.perf_counter() - start:.1f}s")
+
+        index = CodeSearchIndex(root, Path(tmp) / "code_index.db")
+        start = time.perf_counter()
+        index.refresh()
+        print(f"initial index: {time.perf_counter() - start:.1f}s, db {index.db_path.stat().st_size / 1e6:.0f} MB")
+
+        q = args.queries
+        _timed("literal, rare (RARE_SYMBOL_5000)", q, lambda: index.search("RARE_SYMBOL_5000"))
+        _timed("regex, rare (RARE_SYMBOL_\\d+ = 9)", q, lambda: index.search(r"RARE_SYMBOL_\d+ = 9", regex=True))
+        _timed("literal, common (capped at 100)", q, lambda: index.search("session_cache"))
+        _timed("regex, no literal (capped at 100)", q, lambda: index.search(r"\d{2}\(", regex=True))
+        _timed("rescan, nothing changed", 1, index.refresh)
+        target = next(root.rglob("f1.py"))
+        target.write_text("NEW_SYMBOL = 1\n")
+        _timed("update_paths (one file)", 1, lambda: index.update_paths([target]))
+        assert index.search("NEW_SYMBOL")["matches"]
+
+
+if __name__ == "__main__":
+    main()
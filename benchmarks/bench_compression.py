@@ -0,0 +1,85 @@
+"""Benchmark response compression on typical large payloads.
+
+Usage: python benchmarks/bench_compression.py [--events 5000] [--mbps 20] [--n 20]
+
+Builds an /events-style backlog, an export.json and a file_changes diff list,
+serves each through CompressionMiddleware and reports wire bytes and the
+estimated time to first-byte-complete (server time + transfer at --mbps) for
+identity, gzip and (if installed) brotli.
+"""
+
+import argparse
+import json
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import Response
+from fastapi.testclient import TestClient
+
+from nanobot.web.compression import CompressionMiddleware, brotli_available
+
+
+def _payloads(n_events: int) -> dict[str, bytes]:
+    events = [
+        {
+            "id": i,
+            "session_id": "ses_0f3c2a",
+            "type": "message.delta" if i % 5 else "tool.result",
+            "created_at": 1_760_000_000 + i,
+            "payload": {"text": f"Step {i}: reading nanobot/web/app.py and updating the handler", "index": i},
+        }
+        for i in range(n_events)
+    ]
+    messages = [
+        {"role": "user" if i % 2 else "assistant", "content": f"Message {i} about the compression layer. " * 6}
+        for i in range(n_events // 5)
+    ]
+    diff_lines = "\n".join(f"+    value_{i} = compute(value_{i - 1}, step={i})" for i in range(400))
+    changes = [
+        {"path": f"src/module_{i}.py", "diff": f"--- a/src/module_{i}.py\n+++ b/src/module_{i}.py\n@@ -1 +1,400 @@\n{diff_lines}"}
+        for i in range(40)
+    ]
+    return {
+        "events": json.dumps({"events": events}).encode(),
+        "export.json": json.dumps({"session": {"id": "ses_0f3c2a"}, "messages": messages, "events": events}).encode(),
+        "file_changes": json.dumps({"items": changes}).encode(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--mbps", type=float, default=20.0, help="link speed for the transfer estimate")
+    parser.add_argument("--n", type=int, default=20, help="requests per measurement")
+    args = parser.parse_args()
+
+    payloads = _payloads(args.events)
+    api = FastAPI()
+    for name, body in payloads.items():
+        api.add_api_route(f"/{name}", lambda body=body: Response(body, media_type="application/json"))
+    client = TestClient(CompressionMiddleware(api, minimum_size=1024))
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli_available() else [])
+    bytes_per_s = args.mbps * 1e6 / 8
+    print(f"link: {args.mbps} Mbit/s   brotli: {'yes' if brotli_available() else 'no (pip install brotli)'}")
+    print(f"{'payload':<14}{'encoding':<10}{'bytes':>12}{'ratio':>8}{'server ms':>11}{'est. total ms':>15}")
+    for name in payloads:
+        baseline = None
+        for enc in encodings:
+            headers = {"Accept-Encoding": enc}
+            size = 0
+            start = time.perf_counter()
+            for _ in range(args.n):
+                r = client.get(f"/{name}", headers=headers)
+                size = int(r.headers["content-length"])
+            server_ms = 1000 * (time.perf_counter() - start) / args.n
+            total_ms = server_ms + 1000 * size / bytes_per_s
+            baseline = baseline or (size, total_ms)
+            print(
+                f"{name:<14}{enc:<10}{size:>12}{baseline[0] / size:>7.1f}x{server_ms:>11.1f}"
+                f"{total_ms:>11.1f} ({total_ms - baseline[1]:+.0f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark MemoryStore with a multi-MB MEMORY.md.
+
+Usage: python benchmarks/bench_memory.py [--mb 4] [--turns 1000] [--appends 2000]
+
+Compares the cached store against a plain re-read of the files on every
+prompt build (the previous behaviour).
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from nanobot.agent.memory import MemoryStore
+
+
+def _uncached_context(store: MemoryStore) -> str:
+    parts = []
+    if store.memory_file.exists():
+        parts.append("## Long-term Memory\n" + store.memory_file.read_text(encoding="utf-8"))
+    today = store.get_today_file()
+    if today.exists():
+        parts.append("## Today's Notes\n" + today.read_text(encoding="utf-8"))
+    return "\n\n".join(parts)
+
+
+def _timed(label: str, n: int, fn) -> None:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {n:>6} x  {1e6 * elapsed / n:>10.1f} us/op  ({elapsed:.3f}s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mb", type=float, default=4.0, help="MEMORY.md size in MB")
+    parser.add_argument("--turns", type=int, default=1000, help="prompt builds to time")
+    parser.add_argument("--appends", type=int, default=2000, help="append_today calls to time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(Path(tmp))
+        line = "- The user prefers concise answers and metric units; project notes follow.\n"
+        store.write_long_term(line * int(args.mb * 1024 * 1024 / len(line)))
+        store.append_today("first note")
+        print(f"MEMORY.md: {store.memory_file.stat().st_size / 1e6:.1f} MB")
+
+        assert store.get_memory_context() == _uncached_context(store)
+        _timed("get_memory_context (re-read, old)", args.turns, lambda: _uncached_context(store))
+        _timed("get_memory_context (cached)", args.turns, store.get_memory_context)
+        _timed("append_today (O_APPEND)", args.appends, lambda: store.append_today("- note"))
+        _timed("get_memory_context after each append", args.turns // 10,
+               lambda: (store.append_today("- note"), store.get_memory_context()))
+        assert store.get_memory_context() == _uncached_context(store)
+
+
+if __name__ == "__main__":
+    main()
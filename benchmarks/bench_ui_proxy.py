@@ -0,0 +1,138 @@
+"""Benchmark the UI reverse proxy against a local upstream.
+
+Usage: python benchmarks/bench_ui_proxy.py [--bundle-mb 8] [--small 300] [--concurrency 20]
+
+Starts a local upstream (one large bundle, one small module) and two proxies
+in front of it, both on real sockets: the previous implementation (new client
+per request, whole body buffered) and UpstreamProxy (pooled client, streamed
+bodies). Reports small-file throughput, large-file time to first byte and
+total time, and peak Python memory while fetching the bundle 4x concurrently
+(the benchmark client holding the 4 bodies accounts for 4x the bundle size).
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+import tracemalloc
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+
+from nanobot.web.proxy import UpstreamProxy
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _serve(app: FastAPI) -> str:
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+def _upstream(bundle: bytes) -> FastAPI:
+    up = FastAPI()
+    small = b"export const ok = true;\n" * 40
+
+    @up.get("/assets/bundle.js")
+    def big():
+        return Response(bundle, media_type="application/javascript")
+
+    @up.get("/src/main.ts")
+    def module():
+        return Response(small, media_type="application/javascript")
+
+    return up
+
+
+def _legacy_proxy(base: str) -> FastAPI:
+    """The previous _proxy_to: per-request client, buffered request and response."""
+    app = FastAPI()
+
+    @app.get("/{full_path:path}")
+    async def proxy(full_path: str, request: Request):
+        headers = {k: v for k, v in request.headers.items() if k.lower() not in ("host", "content-length", "connection")}
+        body = await request.body()
+        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+            r = await client.request(request.method, f"{base}/{full_path}", headers=headers, content=body)
+        excluded = {"content-encoding", "transfer-encoding", "connection", "keep-alive"}
+        out_headers = {k: v for k, v in r.headers.items() if k.lower() not in excluded}
+        return Response(content=r.content, status_code=r.status_code, headers=out_headers)
+
+    return app
+
+
+def _streaming_proxy(base: str) -> FastAPI:
+    app = FastAPI()
+    proxy = UpstreamProxy(base)
+
+    @app.get("/{full_path:path}")
+    async def forward(full_path: str, request: Request):
+        return await proxy.forward(request, full_path)
+
+    return app
+
+
+async def _measure(name: str, base: str, args) -> None:
+    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        await client.get(f"{base}/src/main.ts")  # warm up
+
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one() -> None:
+            async with sem:
+                (await client.get(f"{base}/src/main.ts")).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(args.small)))
+        small_rps = args.small / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        async with client.stream("GET", f"{base}/assets/bundle.js") as r:
+            ttfb = None
+            async for _chunk in r.aiter_raw():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+        total = time.perf_counter() - start
+
+        tracemalloc.start()
+        await asyncio.gather(*(client.get(f"{base}/assets/bundle.js") for _ in range(4)))
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    print(
+        f"{name:<22}{small_rps:>10.0f} req/s{1000 * ttfb:>10.1f} ms{1000 * total:>10.1f} ms"
+        f"{peak / 1e6:>11.1f} MB"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bundle-mb", type=float, default=8.0)
+    parser.add_argument("--small", type=int, default=300, help="small-module requests")
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    bundle = b"/* minified */ var a=1;" * int(args.bundle_mb * 1e6 / 23)
+    upstream = _serve(_upstream(bundle))
+    legacy = _serve(_legacy_proxy(upstream))
+    streaming = _serve(_streaming_proxy(upstream))
+
+    print(f"bundle: {len(bundle) / 1e6:.1f} MB, {args.small} small requests at concurrency {args.concurrency}")
+    print(f"{'proxy':<22}{'small files':>16}{'bundle TTFB':>13}{'bundle':>13}{'peak mem (4x)':>14}")
+    asyncio.run(_measure("buffered (old)", legacy, args))
+    asyncio.run(_measure("streaming pooled", streaming, args))
+
+
+if __name__ == "__main__":
+    main()
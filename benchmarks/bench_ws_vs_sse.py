@@ -0,0 +1,192 @@
+"""Benchmark the multiplexed /ws transport against one SSE stream per session.
+
+Usage: python benchmarks/bench_ws_vs_sse.py [--sessions 50] [--events 40] [--text-bytes 80]
+
+Starts the server in a subprocess (FANFAN_EVENT_NOTIFIER=sqlite, throwaway data
+dir), creates --sessions sessions, then for each transport subscribes to all of
+them from the tail and writes --events events per session straight into the
+database. Reports client connections, bytes received, server CPU time (from
+/proc, so Linux only) and the time until every event was delivered. /ws is run
+with compact JSON frames and, if the optional `msgpack` package is installed,
+with msgpack frames.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import websockets
+
+from nanobot.web.database import Database
+from nanobot.web.ws import SUBPROTOCOL_JSON, SUBPROTOCOL_MSGPACK, decode_frame
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_MARKER = "bench-"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime, stime are fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _start_server(data_dir: str) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "FANFAN_DATA_DIR": data_dir,
+        "FANFAN_FS_ROOT": data_dir,
+        "FANFAN_EVENT_NOTIFIER": "sqlite",
+        "FANFAN_COMPRESSION_ENABLED": "false",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "nanobot.web.app:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "error"],
+        env=env,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(base + "/healthz", timeout=1).status_code == 200:
+                return proc, base
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def _writer(
+    db: Database, steps: dict[str, tuple[str, str]], n_events: int, text_bytes: int,
+    start: threading.Event, started: list[float],
+) -> None:
+    start.wait()
+    started.append(time.perf_counter())
+    text = "x" * text_bytes
+    for i in range(n_events):
+        for sid, (turn_id, step_id) in steps.items():
+            db.insert_event_v2(sid, turn_id, step_id, "message_delta", time.time(), {"text": f"{_MARKER}{i} {text}"})
+
+
+async def _run_sse(base: str, sids: list[str], expected: int, start: threading.Event) -> dict:
+    received = 0
+    wire = 0
+    done = asyncio.Event()
+    ready = 0
+
+    async def one(client: httpx.AsyncClient, sid: str) -> None:
+        nonlocal received, wire, ready
+        async with client.stream("GET", f"{base}/event", params={"session_id": sid, "from": "tail"}) as r:
+            async for line in r.aiter_lines():
+                wire += len(line.encode()) + 1
+                if line.startswith("data:") and '"connected"' in line:
+                    ready += 1
+                    if ready == len(sids):
+                        start.set()
+                elif line.startswith("data:") and _MARKER in line:
+                    received += 1
+                    if received >= expected:
+                        done.set()
+
+    limits = httpx.Limits(max_connections=len(sids) + 5)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        tasks = [asyncio.create_task(one(client, sid)) for sid in sids]
+        await asyncio.wait_for(done.wait(), 120)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return {"connections": len(sids), "bytes": wire}
+
+
+async def _run_ws(base: str, sids: list[str], expected: int, start: threading.Event, subprotocol: str) -> dict:
+    received = 0
+    wire = 0
+    url = base.replace("http://", "ws://") + "/ws"
+    async with websockets.connect(url, subprotocols=[subprotocol], max_size=None) as ws:
+        await ws.recv()  # hello
+        for sid in sids:
+            await ws.send(json.dumps({"op": "subscribe", "session_id": sid, "from": "tail"}))
+        subscribed = 0
+        while subscribed < len(sids):
+            if decode_frame(await ws.recv()).get("op") == "subscribed":
+                subscribed += 1
+        start.set()
+        while received < expected:
+            frame = await asyncio.wait_for(ws.recv(), 120)
+            wire += len(frame.encode() if isinstance(frame, str) else frame)
+            if decode_frame(frame).get("o") == "e":
+                received += 1
+    return {"connections": 1, "bytes": wire}
+
+
+def _measure(label: str, proc: subprocess.Popen, db: Database, steps, args, run) -> None:
+    start = threading.Event()
+    started: list[float] = []
+    writer = threading.Thread(target=_writer, args=(db, steps, args.events, args.text_bytes, start, started))
+    writer.start()
+    cpu0 = _cpu_seconds(proc.pid)
+    result = asyncio.run(run(start))
+    elapsed = time.perf_counter() - started[0]
+    writer.join()
+    cpu = _cpu_seconds(proc.pid) - cpu0
+    print(
+        f"{label:<14} conns={result['connections']:>5}  bytes={result['bytes'] / 1024:>9.1f} KiB  "
+        f"server_cpu={cpu:>6.2f}s  delivered_in={elapsed:>6.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--events", type=int, default=40, help="events per session")
+    parser.add_argument("--text-bytes", type=int, default=80)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        proc, base = _start_server(data_dir)
+        try:
+            sids = [httpx.post(base + "/api/v2/sessions", json={}).json()["id"] for _ in range(args.sessions)]
+            db = Database(os.path.join(data_dir, "fanfan.db"))
+            steps = {}
+            for sid in sids:
+                turn = db.create_turn(sid, "bench")
+                steps[sid] = (turn["id"], db.create_step(turn["id"], 0)["id"])
+            expected = args.sessions * args.events
+            print(f"{args.sessions} sessions x {args.events} events ({expected} total)\n")
+
+            _measure("sse", proc, db, steps, args, lambda s: _run_sse(base, sids, expected, s))
+            _measure("ws json", proc, db, steps, args, lambda s: _run_ws(base, sids, expected, s, SUBPROTOCOL_JSON))
+            if msgpack is not None:
+                _measure(
+                    "ws msgpack", proc, db, steps, args,
+                    lambda s: _run_ws(base, sids, expected, s, SUBPROTOCOL_MSGPACK),
+                )
+            else:
+                print("ws msgpack     skipped (pip install msgpack)")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import { useEffect, useMemo, useState } from 'react'
-import { Clock, RefreshCw, Wifi, WifiOff, ShieldAlert, FileCode, Layers, Fingerprint } from 'lucide-react'
+import { Clock, RefreshCw, Wifi, WifiOff, ShieldAlert, FileCode, Layers, Fingerprint, ChevronDown, ChevronRight } from 'lucide-react'
 import { cn, formatDuration, formatTime, truncate } from '../lib/utils'
 import {
-  fsTree,
+  fsList,
   fsRead,
   fsVersions,
   fsGetVersion,
@@ -33,7 +33,9 @@ export default function Inspector({
   const [loading, setLoading] = useState(false)
 
   // FS browser (tree + versions + rollback)
-  const [fsIndex, setFsIndex] = useState(null) // { root, items, truncated }
+  // Directories are listed lazily (one /fs/tree?dir= page each) as they are expanded.
+  const [fsDirs, setFsDirs] = useState({}) // dir -> { items, next_cursor }
+  const [fsOpen, setFsOpen] = useState({}) // dir -> true when expanded
   const [fsFilter, setFsFilter] = useState('')
   const [fsSelectedPath, setFsSelectedPath] = useState('')
   const [fsFile, setFsFile] = useState(null) // { path, size, mtime, truncated, content }
@@ -48,12 +50,55 @@ export default function Inspector({
 
   const traceBlocks = useMemo(() => blocks.slice(-100), [blocks])
 
-  const filteredFiles = useMemo(() => {
-    const items = fsIndex?.items || []
+  // Loaded part of the tree in display order; the filter applies to loaded files only.
+  const fsRows = useMemo(() => {
     const q = (fsFilter || '').trim().toLowerCase()
-    if (!q) return items
-    return items.filter(i => String(i.path || '').toLowerCase().includes(q))
-  }, [fsIndex, fsFilter])
+    const rows = []
+    const walk = (dir, depth) => {
+      const listing = fsDirs[dir]
+      if (!listing) return
+      for (const i of listing.items) {
+        if (i.type === 'dir') {
+          rows.push({ ...i, depth })
+          if (fsOpen[i.path]) walk(i.path, depth + 1)
+        } else if (!q || String(i.path || '').toLowerCase().includes(q)) {
+          rows.push({ ...i, depth })
+        }
+      }
+      if (listing.next_cursor) rows.push({ type: 'more', dir, cursor: listing.next_cursor, depth })
+    }
+    walk('', 0)
+    return rows
+  }, [fsDirs, fsOpen, fsFilter])
+
+  async function loadFsDir(dir, cursor = null) {
+    const page = await fsList(sessionId, dir, cursor)
+    setFsDirs(prev => ({
+      ...prev,
+      [dir]: {
+        items: cursor ? [...(prev[dir]?.items || []), ...page.items] : page.items,
+        next_cursor: page.next_cursor,
+      },
+    }))
+  }
+
+  async function toggleFsDir(dir) {
+    if (fsOpen[dir]) {
+      setFsOpen(prev => {
+        const next = { ...prev }
+        delete next[dir]
+        return next
+      })
+      return
+    }
+    setFsOpen(prev => ({ ...prev, [dir]: true }))
+    if (fsDirs[dir]) return
+    try {
+      await loadFsDir(dir)
+    } catch (e) {
+      setFsError(e?.message || String(e))
+    }
+  }
 
   async function refreshTabData(activeTab = tab) {
     if (!sessionId) return
@@ -62,11 +107,17 @@ export default function Inspector({
       if (activeTab === 'Files') {
         setFsError('')
         try {
-          const [tree, changes] = await Promise.all([
-            fsTree(sessionId),
+          // Reload the root and every expanded directory (first page each).
+          const dirs = ['', ...Object.keys(fsOpen)]
+          const [changes, ...pages] = await Promise.all([
             listFileChanges(sessionId),
+            ...dirs.map(dir => fsList(sessionId, dir).catch(() => null)),
           ])
-          setFsIndex(tree)
+          const next = {}
+          dirs.forEach((dir, idx) => {
+            if (pages[idx]) next[dir] = { items: pages[idx].items, next_cursor: pages[idx].next_cursor }
+          })
+          setFsDirs(next)
           setFileChanges(changes)
         } catch (e) {
           setFsError(e?.message || String(e))
@@ -103,7 +154,8 @@ export default function Inspector({
     setContextItems([])
     setPendingPerms([])
 
-    setFsIndex(null)
+    setFsDirs({})
+    setFsOpen({})
     setFsFilter('')
     setFsSelectedPath('')
     setFsFile(null)
@@ -327,7 +379,7 @@ export default function Inspector({
                 <input
                   value={fsFilter}
                   onChange={e => setFsFilter(e.target.value)}
-                  placeholder="Filter files"
+                  placeholder="Filter loaded files"
                   className={cn(
                     'flex-1 px-2 py-1 rounded border border-border-soft bg-bg text-text-secondary',
                     'placeholder:text-text-muted outline-none focus:border-border'
@@ -355,26 +407,44 @@ export default function Inspector({
 
               <div className="mt-2 rounded border border-border-soft overflow-hidden">
                 <div className="max-h-56 overflow-y-auto">
-                  {filteredFiles.length === 0 ? (
+                  {fsRows.length === 0 ? (
                     <div className="px-2.5 py-2 text-text-muted">No files</div>
                   ) : (
-                    filteredFiles.slice(0, 400).map(i => (
+                    fsRows.slice(0, 400).map(i => (
                       <button
-                        key={i.path}
+                        key={i.type === 'more' ? `${i.dir}\u0000more` : i.path}
                         onClick={() => {
-                          setFsSelectedPath(i.path)
-                          setFsPreview(null)
+                          if (i.type === 'more') {
+                            loadFsDir(i.dir, i.cursor).catch(e => setFsError(e?.message || String(e)))
+                          } else if (i.type === 'dir') {
+                            toggleFsDir(i.path).catch(() => {})
+                          } else {
+                            setFsSelectedPath(i.path)
+                            setFsPreview(null)
+                          }
                         }}
                         className={cn(
                           'w-full text-left px-2.5 py-1 border-b border-border-soft last:border-b-0',
                           'hover:bg-bg/40 transition-colors',
                           fsSelectedPath === i.path ? 'bg-bg/60' : 'bg-bg-secondary/20'
                         )}
-                        title={i.path}
+                        style={{ paddingLeft: `${10 + i.depth * 12}px` }}
+                        title={i.type === 'more' ? 'Load more entries' : i.path}
                       >
                         <div className="flex items-center justify-between gap-2">
-                          <span className="font-mono text-text-primary truncate">{i.path}</span>
-                          <span className="text-text-muted shrink-0">{formatBytes(i.size || 0)}</span>
+                          {i.type === 'more' ? (
+                            <span className="text-text-muted">Load more…</span>
+                          ) : (
+                            <span className="flex items-center gap-1 min-w-0 font-mono text-text-primary">
+                              {i.type === 'dir' && (fsOpen[i.path]
+                                ? <ChevronDown className="w-3 h-3 shrink-0" />
+                                : <ChevronRight className="w-3 h-3 shrink-0" />)}
+                              <span className="truncate">{i.type === 'dir' ? `${i.name}/` : i.name}</span>
+                            </span>
+                          )}
+                          {i.type === 'file' && (
+                            <span className="text-text-muted shrink-0">{formatBytes(i.size || 0)}</span>
+                          )}
                         </div>
                       </button>
                     ))
@@ -382,11 +452,8 @@ export default function Inspector({
                 </div>
               </div>
 
-              {fsIndex?.truncated && (
-                <div className="mt-2 text-text-muted">File list truncated.</div>
-              )}
-              {filteredFiles.length > 400 && (
-                <div className="mt-2 text-text-muted">Showing first 400 matches. Narrow your filter.</div>
+              {fsRows.length > 400 && (
+                <div className="mt-2 text-text-muted">Showing the first 400 entries. Collapse folders or narrow your filter.</div>
               )}
             </Section>
 
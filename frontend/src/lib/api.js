@@ -26,6 +26,7 @@ export const getPermissionMode = client.getPermissionMode
 export const setPermissionMode = client.setPermissionMode
 
 export const fsTree = client.fsTree
+export const fsList = client.fsList
 export const fsRead = client.fsRead
 export const fsVersions = client.fsVersions
 export const fsGetVersion = client.fsGetVersion
@@ -59,6 +60,7 @@ export function connectSSE(sessionId, lastEventId, onEvent, onError) {
   return client.subscribeEvents({
     sessionId,
     since: Number.isFinite(since) ? since : null,
+    snapshots: true,
     onEvent,
     onError,
   })
@@ -1,4 +1,13 @@
-import type { EventEnvelope, SessionRecord } from './types'
+import type {
+  EventEnvelope,
+  HistoryTurn,
+  Page,
+  PageParams,
+  SearchHit,
+  SearchKind,
+  SessionRecord,
+  TurnSnapshot,
+} from './types'
 
 type FetchLike = typeof fetch
 
@@ -6,6 +15,15 @@ export type Client = {
   baseUrl: string
   createSession: (title?: string) => Promise<SessionRecord>
   listSessions: () => Promise<SessionRecord[]>
+  listSessionsPage: (page?: PageParams) => Promise<Page<SessionRecord>>
+  listMessages: (sessionId: string, page?: PageParams) => Promise<Page<any>>
+  listTurns: (sessionId: string, page?: PageParams) => Promise<Page<any>>
+  getHistory: (sessionId: string, page?: PageParams) => Promise<Page<HistoryTurn> & { head_id: number }>
+  getTurnSnapshot: (turnId: string, opts?: { events?: boolean }) => Promise<TurnSnapshot>
+  search: (
+    q: string,
+    opts?: { sessionId?: string; kinds?: SearchKind[]; limit?: number; offset?: number },
+  ) => Promise<{ query: string; items: SearchHit[]; has_more: boolean; limit: number; offset: number }>
   getSession: (id: string) => Promise<any>
   renameSession: (id: string, title: string) => Promise<any>
   deleteSession: (id: string) => Promise<any>
@@ -25,17 +43,34 @@ export type Client = {
   getPermissionMode: () => Promise<any>
   setPermissionMode: (mode: string) => Promise<any>
 
-  getEvents: (sessionId: string, opts?: { since?: number; since_seq?: number }) => Promise<EventEnvelope[]>
+  getEvents: (
+    sessionId: string,
+    opts?: { since?: number; since_seq?: number; before?: number; limit?: number },
+  ) => Promise<EventEnvelope[]>
   subscribeEvents: (opts: {
     sessionId: string
     since?: number | null
+    sinceSeq?: number | null
+    from?: 'tail' | `turn:${string}` | null
+    types?: string[]
+    exclude?: string[]
+    fields?: string[]
+    snapshots?: boolean
     onEvent: (evt: EventEnvelope, lastEventId: string | null) => void
     onConnected?: (evt: EventEnvelope) => void
+    onReplayTruncated?: (evt: EventEnvelope) => void
     onHeartbeat?: () => void
     onError?: (err: any) => void
   }) => EventSource
+  connectSessions: (opts: {
+    onEvent: (evt: EventEnvelope) => void
+    onControl?: (msg: any) => void
+    onClose?: (ev: CloseEvent) => void
+  }) => SessionSocket
 
   fsTree: (sessionId: string) => Promise<any>
+  fsList: (sessionId: string, dir: string, cursor?: string | null) => Promise<any>
+  fsChanges: (sessionId: string, since: number, treeId?: string | null) => Promise<any>
   fsRead: (sessionId: string, path: string) => Promise<any>
   fsVersions: (sessionId: string, path: string) => Promise<any[]>
   fsGetVersion: (sessionId: string, versionId: string) => Promise<any>
@@ -44,6 +79,9 @@ export type Client = {
   listFileChanges: (sessionId: string) => Promise<any[]>
   listTerminal: (sessionId: string) => Promise<any[]>
   listContext: (sessionId: string) => Promise<any[]>
+  listFileChangesPage: (sessionId: string, page?: PageParams) => Promise<Page<any>>
+  listTerminalPage: (sessionId: string, page?: PageParams) => Promise<Page<any>>
+  listContextPage: (sessionId: string, page?: PageParams) => Promise<Page<any>>
   pinContext: (sessionId: string, contextId: string) => Promise<any>
   unpinContext: (sessionId: string, contextId: string) => Promise<any>
 
@@ -60,6 +98,33 @@ export type Client = {
   setModel: (model: string) => Promise<any>
 }
 
+export type SessionSubscribeOptions = {
+  sinceSeq?: number | null
+  from?: 'tail' | `turn:${string}` | null
+  types?: string[]
+  exclude?: string[]
+  fields?: string[]
+}
+
+export type SessionSocket = {
+  socket: WebSocket
+  subscribe: (sessionId: string, opts?: SessionSubscribeOptions) => void
+  unsubscribe: (sessionId: string) => void
+  close: () => void
+}
+
+// Short keys used by /ws event frames
+const WS_EVENT_KEYS: Record<string, keyof EventEnvelope> = {
+  s: 'session_id',
+  i: 'id',
+  n: 'seq',
+  t: 'type',
+  u: 'turn_id',
+  st: 'step_id',
+  ts: 'ts',
+  p: 'payload',
+}
+
 export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {}): Client {
   const baseUrl = opts.baseUrl || window.location.origin
   const f = opts.fetch || fetch
@@ -79,23 +144,52 @@ export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {})
     return res.json()
   }
 
+  function pageQuery(page: PageParams = {}) {
+    const q = new URLSearchParams({ limit: String(page.limit ?? 50) })
+    if (page.before) q.set('before', page.before)
+    if (page.after) q.set('after', page.after)
+    return `?${q.toString()}`
+  }
+
   function subscribeEvents({
     sessionId,
     since,
+    sinceSeq,
+    from,
+    types,
+    exclude,
+    fields,
+    snapshots,
     onEvent,
     onConnected,
+    onReplayTruncated,
     onHeartbeat,
     onError,
   }: {
     sessionId: string
     since?: number | null
+    sinceSeq?: number | null
+    from?: 'tail' | `turn:${string}` | null
+    types?: string[]
+    exclude?: string[]
+    fields?: string[]
+    snapshots?: boolean
     onEvent: (evt: EventEnvelope, lastEventId: string | null) => void
     onConnected?: (evt: EventEnvelope) => void
+    onReplayTruncated?: (evt: EventEnvelope) => void
     onHeartbeat?: () => void
     onError?: (err: any) => void
   }): EventSource {
     let url = `${baseUrl}/event?session_id=${encodeURIComponent(sessionId)}`
     if (since != null) url += `&since=${encodeURIComponent(String(since))}`
+    else if (sinceSeq != null) url += `&since_seq=${encodeURIComponent(String(sinceSeq))}`
+    else if (from) url += `&from=${encodeURIComponent(from)}`
+    // Server-side filtering/projection (id and type are always included)
+    if (types?.length) url += `&types=${encodeURIComponent(types.join(','))}`
+    if (exclude?.length) url += `&exclude=${encodeURIComponent(exclude.join(','))}`
+    if (fields?.length) url += `&fields=${encodeURIComponent(fields.join(','))}`
+    // Replay finished turns as compacted snapshots instead of every streamed delta
+    if (snapshots) url += '&snapshots=true'
 
     const es = new EventSource(url)
 
@@ -106,6 +200,13 @@ export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {})
       } catch {}
     })
 
+    // Older events were left out of the replay; load them via getEvents(sessionId, { before: payload.oldest_id }).
+    es.addEventListener('replay_truncated', (e: any) => {
+      try {
+        onReplayTruncated?.(JSON.parse(e.data))
+      } catch {}
+    })
+
     es.addEventListener('heartbeat', () => {
       onHeartbeat?.()
     })
@@ -126,10 +227,81 @@ export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {})
     return es
   }
 
+  // One WebSocket multiplexing many session subscriptions (compact JSON frames).
+  function connectSessions({
+    onEvent,
+    onControl,
+    onClose,
+  }: {
+    onEvent: (evt: EventEnvelope) => void
+    onControl?: (msg: any) => void
+    onClose?: (ev: CloseEvent) => void
+  }): SessionSocket {
+    const socket = new WebSocket(`${baseUrl.replace(/^http/, 'ws')}/ws`, ['fanfan.json'])
+    const pending: string[] = []
+    const send = (msg: any) => {
+      const data = JSON.stringify(msg)
+      if (socket.readyState === WebSocket.OPEN) socket.send(data)
+      else pending.push(data)
+    }
+
+    socket.onopen = () => {
+      for (const data of pending.splice(0)) socket.send(data)
+    }
+    socket.onmessage = (e) => {
+      try {
+        const frame = JSON.parse(e.data)
+        if (frame.o !== 'e') {
+          onControl?.(frame)
+          return
+        }
+        const evt: any = {}
+        for (const [k, v] of Object.entries(frame)) {
+          const key = WS_EVENT_KEYS[k]
+          if (key) evt[key] = v
+        }
+        onEvent(evt as EventEnvelope)
+      } catch (err) {
+        console.error('WS parse error:', err)
+      }
+    }
+    socket.onclose = (ev) => onClose?.(ev)
+
+    return {
+      socket,
+      subscribe: (sessionId, o = {}) =>
+        send({
+          op: 'subscribe',
+          session_id: sessionId,
+          since_seq: o.sinceSeq ?? undefined,
+          from: o.from ?? undefined,
+          types: o.types,
+          exclude: o.exclude,
+          fields: o.fields,
+        }),
+      unsubscribe: (sessionId) => send({ op: 'unsubscribe', session_id: sessionId }),
+      close: () => socket.close(),
+    }
+  }
+
   return {
     baseUrl,
     createSession: (title = 'New Chat') => api('/sessions', { method: 'POST', body: { title } }),
     listSessions: () => api('/sessions'),
+    listSessionsPage: (page) => api(`/sessions${pageQuery(page)}`),
+    listMessages: (sessionId, page) => api(`/sessions/${encodeURIComponent(sessionId)}/messages${pageQuery(page)}`),
+    listTurns: (sessionId, page) => api(`/sessions/${encodeURIComponent(sessionId)}/turns${pageQuery(page)}`),
+    getHistory: (sessionId, page) => api(`/sessions/${encodeURIComponent(sessionId)}/history${pageQuery(page)}`),
+    getTurnSnapshot: (turnId, o = {}) =>
+      api(`/turns/${encodeURIComponent(turnId)}/snapshot${o.events ? '?events=true' : ''}`),
+    search: (q, o = {}) => {
+      const params = new URLSearchParams({ q })
+      if (o.sessionId) params.set('session_id', o.sessionId)
+      if (o.kinds?.length) params.set('kinds', o.kinds.join(','))
+      if (o.limit != null) params.set('limit', String(o.limit))
+      if (o.offset != null) params.set('offset', String(o.offset))
+      return api(`/search?${params.toString()}`)
+    },
     getSession: (id) => api(`/sessions/${encodeURIComponent(id)}`),
     renameSession: (id, title) => api(`/sessions/${encodeURIComponent(id)}`, { method: 'PATCH', body: { title } }),
     deleteSession: (id) => api(`/sessions/${encodeURIComponent(id)}`, { method: 'DELETE' }),
@@ -155,13 +327,26 @@ export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {})
       const q = new URLSearchParams()
       if (opts2.since != null) q.set('since', String(opts2.since))
       if (opts2.since_seq != null) q.set('since_seq', String(opts2.since_seq))
+      if (opts2.before != null) q.set('before', String(opts2.before))
+      if (opts2.limit != null) q.set('limit', String(opts2.limit))
       const qs = q.toString()
       return api(`/sessions/${encodeURIComponent(sessionId)}/events${qs ? `?${qs}` : ''}`)
     },
 
     subscribeEvents,
+    connectSessions,
 
     fsTree: (sessionId) => api(`/sessions/${encodeURIComponent(sessionId)}/fs/tree`),
+    fsList: (sessionId, dir, cursor) => {
+      const q = new URLSearchParams({ dir })
+      if (cursor) q.set('cursor', cursor)
+      return api(`/sessions/${encodeURIComponent(sessionId)}/fs/tree?${q.toString()}`)
+    },
+    fsChanges: (sessionId, since, treeId) => {
+      const q = new URLSearchParams({ since: String(since) })
+      if (treeId) q.set('tree_id', treeId)
+      return api(`/sessions/${encodeURIComponent(sessionId)}/fs/changes?${q.toString()}`)
+    },
     fsRead: (sessionId, path) => api(`/sessions/${encodeURIComponent(sessionId)}/fs/read?path=${encodeURIComponent(path)}`),
     fsVersions: (sessionId, path) => api(`/sessions/${encodeURIComponent(sessionId)}/fs/versions?path=${encodeURIComponent(path)}`),
     fsGetVersion: (sessionId, versionId) => api(`/sessions/${encodeURIComponent(sessionId)}/fs/version/${encodeURIComponent(versionId)}`),
@@ -171,6 +356,10 @@ export function createClient(opts: { baseUrl?: string; fetch?: FetchLike } = {})
     listFileChanges: (sessionId) => api(`/sessions/${encodeURIComponent(sessionId)}/file_changes`),
     listTerminal: (sessionId) => api(`/sessions/${encodeURIComponent(sessionId)}/terminal`),
     listContext: (sessionId) => api(`/sessions/${encodeURIComponent(sessionId)}/context`),
+    listFileChangesPage: (sessionId, page) =>
+      api(`/sessions/${encodeURIComponent(sessionId)}/file_changes${pageQuery(page)}`),
+    listTerminalPage: (sessionId, page) => api(`/sessions/${encodeURIComponent(sessionId)}/terminal${pageQuery(page)}`),
+    listContextPage: (sessionId, page) => api(`/sessions/${encodeURIComponent(sessionId)}/context${pageQuery(page)}`),
     pinContext: (sessionId, contextId) =>
       api(`/sessions/${encodeURIComponent(sessionId)}/context/pin`, { method: 'POST', body: { context_id: contextId } }),
     unpinContext: (sessionId, contextId) =>
@@ -31,3 +31,68 @@ export type SessionRecord = {
   status?: 'idle' | 'running' | 'error'
 }
 
+// Keyset page from list endpoints called with before/after/limit.
+// `before` / `after` are the cursors of the oldest / newest item on the page.
+export type Page<T> = {
+  items: T[]
+  has_more: boolean
+  before: string | null
+  after: string | null
+}
+
+export type PageParams = { before?: string | null; after?: string | null; limit?: number }
+
+// Materialized view of a finished turn (GET /api/v2/turns/{id}/snapshot).
+export type TurnSnapshot = {
+  turn_id: string
+  session_id: string
+  first_event_id: number
+  last_event_id: number
+  last_seq: number | null
+  raw_event_count: number
+  status: 'completed' | 'error' | 'cancelled'
+  text: string
+  thinking: string
+  thinking_ms: number
+  tool_calls: Array<{
+    tool_call_id: string
+    tool_name?: string
+    input?: any
+    status?: string
+    ok?: boolean
+    output?: string
+    error?: string
+    duration_ms?: number
+    diff_paths: string[]
+  }>
+  diffs: Array<{ tool_call_id?: string; path: string; diff: string }>
+  usage: Record<string, number>
+  finish_reason: string | null
+  error: { code?: string; message?: string } | null
+  events?: EventEnvelope[]
+}
+
+// One turn of GET /api/v2/sessions/{id}/history: a snapshot when finished,
+// raw events while in progress.
+export type HistoryTurn = {
+  id: string
+  session_id: string
+  user_text: string
+  created_at: string
+  snapshot: TurnSnapshot | null
+  events?: EventEnvelope[]
+}
+
+export type SearchKind = 'session' | 'message' | 'turn' | 'final' | 'tool'
+
+// One hit of GET /api/v2/search. `snippet` is HTML-escaped with matches in <mark>.
+export type SearchHit = {
+  kind: SearchKind
+  session_id: string
+  turn_id: string | null
+  ref_id: string | null
+  label: string
+  session_title: string | null
+  snippet: string
+  rank: number | null
+}
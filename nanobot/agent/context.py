@@ -4,11 +4,14 @@ import base64
 import mimetypes
 import platform
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory import get_memory_store
 from nanobot.agent.skills import SkillsLoader
 
+if TYPE_CHECKING:
+    from nanobot.config.schema import MemoryConfig
+
 
 class ContextBuilder:
     """
@@ -20,17 +23,26 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, memory_config: "MemoryConfig | None" = None):
+        from nanobot.config.schema import MemoryConfig
         self.workspace = workspace
-        self.memory = MemoryStore(workspace)
+        self.memory = get_memory_store(workspace)
+        self.memory_config = memory_config or MemoryConfig()
         self.skills = SkillsLoader(workspace)
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(
+        self,
+        skill_names: list[str] | None = None,
+        current_message: str | None = None,
+    ) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
         Args:
             skill_names: Optional list of skills to include.
+            current_message: The user message being answered; when memory is
+                larger than the configured budget, only chunks relevant to it
+                are included.
         
         Returns:
             Complete system prompt.
@@ -46,7 +58,12 @@ class ContextBuilder:
             parts.append(bootstrap)
         
         # Memory context
-        memory = self.memory.get_memory_context()
+        memory = self.memory.get_memory_context(
+            current_message,
+            token_budget=self.memory_config.token_budget,
+            top_k=self.memory_config.top_k,
+            pinned_sections=self.memory_config.pinned_sections,
+        )
         if memory:
             parts.append(f"# Memory\n\n{memory}")
         
@@ -158,7 +175,7 @@ Safety:
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, current_message)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
         messages.append({"role": "system", "content": system_prompt})
@@ -7,6 +7,8 @@ import difflib
 import json
 import time
 import uuid
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Awaitable, Callable
@@ -47,7 +49,7 @@ from nanobot.web.protocol import (
 )
 
 if TYPE_CHECKING:
-    from nanobot.config.schema import ExecToolConfig
+    from nanobot.config.schema import ExecToolConfig, MemoryConfig
     from nanobot.cron.service import CronService
 
 
@@ -92,12 +94,26 @@ def _generate_diff(path: str) -> str | None:
 _PATCH_TOOLS = {"write_file", "edit_file"}
 
 
+@dataclass
+class _SessionLane:
+    """Pending messages and counters for one session key in the dispatcher."""
+    pending: deque[tuple[InboundMessage, float]] = field(default_factory=deque)
+    worker: asyncio.Task[None] | None = None
+    running: bool = False
+    processed: int = 0
+    cancelled: int = 0
+    errors: int = 0
+    last_wait_s: float = 0.0
+    total_wait_s: float = 0.0
+
+
 class AgentLoop:
     """
     The agent loop is the core processing engine.
     
     It:
-    1. Receives messages from the bus
+    1. Receives messages from the bus (different sessions run concurrently,
+       messages within a session strictly in order)
     2. Builds context with history, memory, skills
     3. Calls the LLM (with true streaming)
     4. Executes tool calls (emitting status events)
@@ -117,6 +133,8 @@ class AgentLoop:
         event_callback: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
         stream_final_events: bool = True,
         final_event_chunk_size: int = 160,
+        max_concurrent_sessions: int = 4,
+        memory_config: "MemoryConfig | None" = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         from nanobot.cron.service import CronService
@@ -132,7 +150,7 @@ class AgentLoop:
         self._stream_final_events = stream_final_events
         self._final_event_chunk_size = final_event_chunk_size
         
-        self.context = ContextBuilder(workspace)
+        self.context = ContextBuilder(workspace, memory_config=memory_config)
         self.sessions = SessionManager(workspace)
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
@@ -146,6 +164,12 @@ class AgentLoop:
         
         self._running = False
         self._active_tasks: dict[str, asyncio.Task[None]] = {}
+        self.max_concurrent_sessions = max(1, int(max_concurrent_sessions))
+        self._slots = asyncio.Semaphore(self.max_concurrent_sessions)
+        self._lanes: dict[str, _SessionLane] = {}
+        self._totals = {"processed": 0, "cancelled": 0, "errors": 0}
+        self._lane_freed = asyncio.Event()
+        self._run_task: asyncio.Task[None] | None = None
         self._register_default_tools()
 
     # ── Event emission ────────────────────────────────────────────
@@ -213,44 +237,156 @@ class AgentLoop:
 
     async def run(self) -> None:
         self._running = True
-        logger.info("Agent loop started")
+        logger.info(f"Agent loop started (max {self.max_concurrent_sessions} concurrent sessions)")
         
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_inbound(),
-                    timeout=1.0
-                )
-                try:
-                    response = await self._process_message(msg)
-                    if response:
-                        await self.bus.publish_outbound(response)
-                except Exception as e:
-                    logger.error(f"Error processing message: {e}")
-                    if msg.channel == "web":
-                        await self._emit_event(
-                            msg.chat_id, "error", "error",
-                            {"code": "AGENT_RUNTIME_ERROR", "message": str(e)},
-                        )
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel,
-                        chat_id=msg.chat_id,
-                        content=f"Sorry, I encountered an error: {str(e)}"
-                    ))
-            except asyncio.TimeoutError:
-                continue
+        self._run_task = asyncio.current_task()
+        try:
+            while self._running:
+                # Only pull from the bus while a session slot is free, so the backlog
+                # stays in the bus's priority lanes (and backpressure reaches channels).
+                while len(self._lanes) >= self.max_concurrent_sessions:
+                    self._lane_freed.clear()
+                    await self._lane_freed.wait()
+                self._dispatch(await self.bus.consume_inbound())
+        except asyncio.CancelledError:
+            if self._running:
+                raise
+        finally:
+            self._run_task = None
+            workers = [lane.worker for lane in self._lanes.values() if lane.worker]
+            for task in workers:
+                task.cancel()
+            if workers:
+                await asyncio.gather(*workers, return_exceptions=True)
+            self.sessions.flush()
     
     def stop(self) -> None:
         self._running = False
+        if self._run_task is not None:
+            self._run_task.cancel()
         logger.info("Agent loop stopping")
 
-    def cancel_run(self, session_id: str) -> bool:
-        """Cancel an active run for a session. Returns True if cancelled."""
+    def cancel_run(self, session_id: str, drop_queued: bool = False) -> bool:
+        """Cancel an active run for a session (optionally dropping its queued messages).
+
+        `session_id` is the session key ("channel:chat_id"). Returns True if anything was cancelled.
+        """
+        dropped = 0
+        lane = self._lanes.get(session_id)
+        if drop_queued and lane is not None:
+            dropped = len(lane.pending)
+            lane.pending.clear()
+            lane.cancelled += dropped
+            self._totals["cancelled"] += dropped
         task = self._active_tasks.get(session_id)
         if task and not task.done():
             task.cancel()
             return True
-        return False
+        return dropped > 0
+
+    # ── Dispatcher ────────────────────────────────────────────────
+
+    @staticmethod
+    def _dispatch_key(msg: InboundMessage) -> str:
+        # Subagent announcements (channel "system") belong to their origin session.
+        if msg.channel == "system":
+            return msg.chat_id if ":" in msg.chat_id else f"cli:{msg.chat_id}"
+        return msg.session_key
+
+    def _dispatch(self, msg: InboundMessage) -> None:
+        """Queue a message on its session lane; start the lane worker if idle."""
+        key = self._dispatch_key(msg)
+        lane = self._lanes.setdefault(key, _SessionLane())
+        lane.pending.append((msg, time.monotonic()))
+        if lane.worker is None or lane.worker.done():
+            lane.worker = asyncio.create_task(self._drain_lane(key, lane))
+
+    async def _drain_lane(self, key: str, lane: _SessionLane) -> None:
+        """Process one session's messages in order, holding a global slot per message."""
+        try:
+            while lane.pending:
+                msg, enqueued_at = lane.pending.popleft()
+                async with self._slots:
+                    wait = time.monotonic() - enqueued_at
+                    lane.last_wait_s = wait
+                    lane.total_wait_s += wait
+                    lane.running = True
+                    task = asyncio.create_task(self._handle_message(msg))
+                    self._active_tasks[key] = task
+                    try:
+                        await asyncio.shield(task)
+                    except asyncio.CancelledError:
+                        if not task.done():
+                            # The lane itself is being cancelled (loop shutdown).
+                            task.cancel()
+                            raise
+                        lane.cancelled += 1
+                        self._totals["cancelled"] += 1
+                    else:
+                        lane.processed += 1
+                        self._totals["processed"] += 1
+                        if task.result() is False:
+                            lane.errors += 1
+                            self._totals["errors"] += 1
+                    finally:
+                        lane.running = False
+                        if self._active_tasks.get(key) is task:
+                            self._active_tasks.pop(key, None)
+        finally:
+            if not lane.pending and self._lanes.get(key) is lane:
+                self._lanes.pop(key, None)
+                self._lane_freed.set()
+
+    async def _handle_message(self, msg: InboundMessage) -> bool:
+        """Process one message and publish the reply. Returns False on error."""
+        try:
+            response = await self._process_message(msg)
+            if response:
+                await self.bus.publish_outbound(response)
+            return True
+        except asyncio.CancelledError:
+            logger.info(f"Run cancelled for {msg.session_key}")
+            if msg.channel == "web":
+                await self._emit_event(
+                    msg.chat_id, "error", "error",
+                    {"code": "CANCELLED", "message": "Run cancelled"},
+                )
+            raise
+        except Exception as e:
+            logger.error(f"Error processing message: {e}")
+            if msg.channel == "web":
+                await self._emit_event(
+                    msg.chat_id, "error", "error",
+                    {"code": "AGENT_RUNTIME_ERROR", "message": str(e)},
+                )
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel,
+                chat_id=msg.chat_id,
+                content=f"Sorry, I encountered an error: {str(e)}"
+            ))
+            return False
+
+    def dispatch_stats(self) -> dict[str, Any]:
+        """Per-session queue metrics for the dispatcher."""
+        sessions = {
+            key: {
+                "running": lane.running,
+                "queued": len(lane.pending),
+                "processed": lane.processed,
+                "cancelled": lane.cancelled,
+                "errors": lane.errors,
+                "last_wait_s": round(lane.last_wait_s, 3),
+                "avg_wait_s": round(lane.total_wait_s / max(1, lane.processed + lane.cancelled), 3),
+            }
+            for key, lane in self._lanes.items()
+        }
+        return {
+            "max_concurrent": self.max_concurrent_sessions,
+            "running": sum(1 for lane in self._lanes.values() if lane.running),
+            "queued": sum(len(lane.pending) for lane in self._lanes.values()),
+            **self._totals,
+            "sessions": sessions,
+        }
 
     # ── Message processing (streaming) ────────────────────────────
     
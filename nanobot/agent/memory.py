@@ -1,8 +1,11 @@
 """Memory system for persistent agent memory."""
 
+import os
+import threading
 from pathlib import Path
 from datetime import datetime
 
+from nanobot.agent.memory_index import MemoryIndex, estimate_tokens
 from nanobot.utils.helpers import ensure_dir, today_date
 
 
@@ -11,12 +14,82 @@ class MemoryStore:
     Memory system for the agent.
     
     Supports daily notes (memory/YYYY-MM-DD.md) and long-term memory (MEMORY.md).
+    
+    Reads go through a cache validated by (mtime, size), so edits made by
+    tools or by hand are picked up while unchanged files cost one stat().
+    Appends use O_APPEND and update the cached content in place.
+    
+    All memory (MEMORY.md, daily notes and external entries such as the web
+    UI's global memory) is also kept in a BM25 index, so prompts can carry
+    only the chunks relevant to the current message (see get_memory_context).
     """
     
     def __init__(self, workspace: Path):
         self.workspace = workspace
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
+        self._lock = threading.Lock()
+        # path -> ((mtime_ns, size), content)
+        self._files: dict[Path, tuple[tuple[int, int], str]] = {}
+        # rendered get_memory_context() and the file signatures it was built from
+        self._context: tuple[tuple, str] | None = None
+        self.index = MemoryIndex()
+        # indexed source name -> file signature it was indexed at
+        self._indexed: dict[str, tuple[int, int]] = {}
+        self._external: dict[str, str] = {}
+        self._external_version = 0
+    
+    # ── Cached file access ───────────────────────────────────────
+    
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int] | None:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+    
+    def _read(self, path: Path) -> str:
+        """Read a file through the (mtime, size)-validated cache ("" if missing)."""
+        sig = self._signature(path)
+        if sig is None:
+            with self._lock:
+                self._files.pop(path, None)
+            return ""
+        with self._lock:
+            cached = self._files.get(path)
+            if cached is not None and cached[0] == sig:
+                return cached[1]
+        content = path.read_text(encoding="utf-8")
+        with self._lock:
+            self._files[path] = (sig, content)
+        return content
+    
+    def _append(self, path: Path, text: str, header: str = "") -> None:
+        """Append with a single O_APPEND write; `header` is written first if the file is new."""
+        data = text
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+            data = header + text
+        except FileExistsError:
+            fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+        try:
+            before = os.fstat(fd).st_size
+            os.write(fd, data.encode("utf-8"))
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        with self._lock:
+            cached = self._files.get(path)
+            if before == 0:
+                self._files[path] = ((st.st_mtime_ns, st.st_size), data)
+            elif cached is not None and cached[0][1] == before:
+                # Cache was current up to our write: extend it instead of re-reading.
+                self._files[path] = ((st.st_mtime_ns, st.st_size), cached[1] + data)
+            else:
+                self._files.pop(path, None)
+    
+    # ── Daily notes / long-term memory ───────────────────────────
     
     def get_today_file(self) -> Path:
         """Get path to today's memory file."""
@@ -24,34 +97,28 @@ class MemoryStore:
     
     def read_today(self) -> str:
         """Read today's memory notes."""
-        today_file = self.get_today_file()
-        if today_file.exists():
-            return today_file.read_text(encoding="utf-8")
-        return ""
+        return self._read(self.get_today_file())
     
     def append_today(self, content: str) -> None:
         """Append content to today's memory notes."""
+        # Add header for new day; existing notes get a newline separator.
         today_file = self.get_today_file()
-        
-        if today_file.exists():
-            existing = today_file.read_text(encoding="utf-8")
-            content = existing + "\n" + content
+        if self._signature(today_file) is None:
+            self._append(today_file, content, header=f"# {today_date()}\n\n")
         else:
-            # Add header for new day
-            header = f"# {today_date()}\n\n"
-            content = header + content
-        
-        today_file.write_text(content, encoding="utf-8")
+            self._append(today_file, "\n" + content)
     
     def read_long_term(self) -> str:
         """Read long-term memory (MEMORY.md)."""
-        if self.memory_file.exists():
-            return self.memory_file.read_text(encoding="utf-8")
-        return ""
+        return self._read(self.memory_file)
     
     def write_long_term(self, content: str) -> None:
         """Write to long-term memory (MEMORY.md)."""
         self.memory_file.write_text(content, encoding="utf-8")
+        sig = self._signature(self.memory_file)
+        with self._lock:
+            if sig is not None:
+                self._files[self.memory_file] = (sig, content)
     
     def get_recent_memories(self, days: int = 7) -> str:
         """
@@ -71,10 +138,8 @@ class MemoryStore:
         for i in range(days):
             date = today - timedelta(days=i)
             date_str = date.strftime("%Y-%m-%d")
-            file_path = self.memory_dir / f"{date_str}.md"
-            
-            if file_path.exists():
-                content = file_path.read_text(encoding="utf-8")
+            content = self._read(self.memory_dir / f"{date_str}.md")
+            if content:
                 memories.append(content)
         
         return "\n\n---\n\n".join(memories)
@@ -87,13 +152,74 @@ class MemoryStore:
         files = list(self.memory_dir.glob("????-??-??.md"))
         return sorted(files, reverse=True)
     
-    def get_memory_context(self) -> str:
+    def set_external_memory(self, entries: dict[str, str]) -> None:
+        """Replace the key/value memory entries kept outside the workspace (e.g. web global memory)."""
+        entries = {str(k): str(v) for k, v in entries.items()}
+        with self._lock:
+            if entries == self._external:
+                return
+            previous, self._external = self._external, entries
+            self._external_version += 1
+        for key in previous.keys() - entries.keys():
+            self.index.remove(f"global:{key}")
+        for key, value in entries.items():
+            if previous.get(key) != value:
+                self.index.update(f"global:{key}", value)
+    
+    def _sync_index(self) -> None:
+        """Re-index memory files whose (mtime, size) changed since they were last indexed."""
+        files = [self.memory_file] + self.list_memory_files()
+        seen = set()
+        for path in files:
+            sig = self._signature(path)
+            if sig is None:
+                continue
+            seen.add(path.name)
+            if self._indexed.get(path.name) != sig:
+                self.index.update(path.name, self._read(path))
+                self._indexed[path.name] = sig
+        for name in list(self._indexed):
+            if name not in seen:
+                self.index.remove(name)
+                self._indexed.pop(name, None)
+    
+    def get_memory_context(
+        self,
+        query: str | None = None,
+        *,
+        token_budget: int = 0,
+        top_k: int = 8,
+        pinned_sections: list[str] | tuple[str, ...] = (),
+    ) -> str:
         """
         Get memory context for the agent.
         
+        Without a query (or with token_budget=0) this is the full long-term
+        memory plus today's notes, cached until a file changes. When that
+        exceeds `token_budget`, only MEMORY.md sections listed in
+        `pinned_sections` plus the `top_k` chunks most relevant to `query`
+        (from all memory sources) are returned, within the budget.
+        
         Returns:
-            Formatted memory context including long-term and recent memories.
+            Formatted memory context.
         """
+        full = self._full_context()
+        if not query or token_budget <= 0 or estimate_tokens(full) <= token_budget:
+            return full
+        return self._retrieved_context(query, token_budget, top_k, pinned_sections)
+    
+    def _full_context(self) -> str:
+        today_file = self.get_today_file()
+        key = (
+            today_file.name,
+            self._signature(self.memory_file),
+            self._signature(today_file),
+            self._external_version,
+        )
+        cached = self._context
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
         parts = []
         
         # Long-term memory
@@ -106,4 +232,69 @@ class MemoryStore:
         if today:
             parts.append("## Today's Notes\n" + today)
         
-        return "\n\n".join(parts) if parts else ""
+        # External entries
+        if self._external:
+            lines = [f"- {k}: {v}" for k, v in sorted(self._external.items())]
+            parts.append("## Global Memory\n" + "\n".join(lines))
+        
+        rendered = "\n\n".join(parts) if parts else ""
+        self._context = (key, rendered)
+        return rendered
+    
+    def _retrieved_context(
+        self,
+        query: str,
+        token_budget: int,
+        top_k: int,
+        pinned_sections: list[str] | tuple[str, ...],
+    ) -> str:
+        self._sync_index()
+        pinned_names = {p.strip().lower() for p in pinned_sections if p.strip()}
+        pinned = [c for c in self.index.chunks(self.memory_file.name) if c.heading.lower() in pinned_names]
+        
+        parts = []
+        used = 0
+        if pinned:
+            text = "## Pinned Memory\n" + "\n\n".join(f"### {c.heading}\n{c.text}" for c in pinned)
+            parts.append(text)
+            used += estimate_tokens(text)
+        
+        relevant = []
+        for _score, chunk in self.index.search(query, k=top_k + len(pinned)):
+            if len(relevant) >= top_k:
+                break
+            if any(chunk is p for p in pinned):
+                continue
+            text = f"### {_source_label(chunk.source)}{f' / {chunk.heading}' if chunk.heading else ''}\n{chunk.text}"
+            cost = estimate_tokens(text)
+            if used + cost > token_budget:
+                continue
+            relevant.append(text)
+            used += cost
+        if relevant:
+            parts.append("## Relevant Memory\n" + "\n\n".join(relevant))
+        
+        return "\n\n".join(parts)
+
+
+def _source_label(source: str) -> str:
+    if source == "MEMORY.md":
+        return "Long-term Memory"
+    if source.startswith("global:"):
+        return f"Global Memory: {source[len('global:'):]}"
+    return f"Notes {source.removesuffix('.md')}"
+
+
+_stores: dict[Path, MemoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_memory_store(workspace: Path) -> MemoryStore:
+    """Return the process-wide MemoryStore for a workspace (keeps its caches and index warm)."""
+    key = Path(workspace).expanduser().resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = MemoryStore(workspace)
+            _stores[key] = store
+        return store
@@ -0,0 +1,171 @@
+"""Offline BM25 retrieval over memory chunks (MEMORY.md, daily notes, global memory)."""
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+
+# ASCII-ish words plus single CJK characters (no tokenizer dependency).
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its me my of on or so "
+    "that the this to was we were what when where which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens, stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count (~4 chars per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def chunk_markdown(text: str, max_chars: int = 1200) -> list[tuple[str, str]]:
+    """
+    Split markdown into (heading, body) chunks.
+
+    Sections are cut at headings; sections longer than `max_chars` are split
+    further at blank lines. The heading is the nearest enclosing one ("" for
+    text before the first heading).
+    """
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in text.splitlines():
+        m = _HEADING_RE.match(line)
+        if m:
+            sections.append((m.group(2), []))
+        else:
+            sections[-1][1].append(line)
+
+    chunks: list[tuple[str, str]] = []
+    for heading, lines in sections:
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+        if len(body) <= max_chars:
+            chunks.append((heading, body))
+            continue
+        buf = ""
+        for para in re.split(r"\n\s*\n", body):
+            para = para.strip()
+            if not para:
+                continue
+            if buf and len(buf) + len(para) + 2 > max_chars:
+                chunks.append((heading, buf))
+                buf = ""
+            buf = f"{buf}\n\n{para}" if buf else para
+        if buf:
+            chunks.append((heading, buf))
+    return chunks
+
+
+@dataclass
+class MemoryChunk:
+    """One indexed piece of memory."""
+
+    source: str
+    heading: str
+    text: str
+    tf: Counter = field(repr=False)
+    length: int = 0
+
+
+class MemoryIndex:
+    """
+    In-memory BM25 index, updated per source.
+
+    A source is a named document (e.g. "MEMORY.md", "2026-01-31.md",
+    "global:editor"). `update()` re-chunks only the source whose text changed
+    and adjusts document frequencies incrementally.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75, max_chunk_chars: int = 1200):
+        self.k1 = k1
+        self.b = b
+        self.max_chunk_chars = max_chunk_chars
+        self._lock = threading.Lock()
+        self._sources: dict[str, tuple[str, list[MemoryChunk]]] = {}  # source -> (text digest, chunks)
+        self._df: Counter = Counter()
+        self._n_chunks = 0
+        self._total_len = 0
+
+    def update(self, source: str, text: str) -> bool:
+        """(Re)index a source. Returns False if its text is unchanged."""
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        with self._lock:
+            current = self._sources.get(source)
+            if current is not None and current[0] == digest:
+                return False
+            if current is not None:
+                self._drop(current[1])
+            chunks = []
+            for heading, body in chunk_markdown(text, self.max_chunk_chars):
+                tokens = tokenize(f"{heading}\n{body}")
+                chunk = MemoryChunk(source=source, heading=heading, text=body, tf=Counter(tokens), length=len(tokens))
+                chunks.append(chunk)
+                self._df.update(chunk.tf.keys())
+                self._n_chunks += 1
+                self._total_len += chunk.length
+            self._sources[source] = (digest, chunks)
+            return True
+
+    def remove(self, source: str) -> bool:
+        with self._lock:
+            current = self._sources.pop(source, None)
+            if current is None:
+                return False
+            self._drop(current[1])
+            return True
+
+    def _drop(self, chunks: list[MemoryChunk]) -> None:
+        for chunk in chunks:
+            self._df.subtract(chunk.tf.keys())
+            self._n_chunks -= 1
+            self._total_len -= chunk.length
+        self._df += Counter()  # drop zero counts
+
+    def sources(self) -> list[str]:
+        with self._lock:
+            return list(self._sources)
+
+    def chunks(self, source: str) -> list[MemoryChunk]:
+        with self._lock:
+            current = self._sources.get(source)
+            return list(current[1]) if current else []
+
+    def search(self, query: str, k: int = 8) -> list[tuple[float, MemoryChunk]]:
+        """Top-k chunks by BM25 score (only chunks sharing a term with the query)."""
+        terms = set(tokenize(query))
+        if not terms or k <= 0:
+            return []
+        with self._lock:
+            n = self._n_chunks
+            if n == 0:
+                return []
+            avg_len = self._total_len / n or 1.0
+            idf = {t: math.log(1 + (n - self._df[t] + 0.5) / (self._df[t] + 0.5)) for t in terms if self._df[t]}
+            if not idf:
+                return []
+            scored = []
+            for _digest, chunks in self._sources.values():
+                for chunk in chunks:
+                    score = 0.0
+                    norm = self.k1 * (1 - self.b + self.b * chunk.length / avg_len)
+                    for t, w in idf.items():
+                        f = chunk.tf.get(t)
+                        if f:
+                            score += w * f * (self.k1 + 1) / (f + norm)
+                    if score > 0:
+                        scored.append((score, chunk))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored[:k]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"sources": len(self._sources), "chunks": self._n_chunks, "terms": len(self._df)}
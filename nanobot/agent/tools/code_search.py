@@ -0,0 +1,452 @@
+"""Code search: persistent trigram index over a directory tree plus the `code_search` tool.
+
+The index is an SQLite FTS5 table with the trigram tokenizer (detail=none, so
+it stores only which files contain each trigram). A query is turned into the
+trigrams of the literal text it requires; FTS5 intersects their posting lists
+to get candidate files, and only those are scanned line by line with the real
+pattern. Patterns without a usable literal (shorter than 3 characters, pure
+alternations, ...) fall back to scanning every indexed file, still bounded by
+the match cap.
+
+The index is refreshed incrementally: a rescan compares (mtime, size) against
+what was indexed and only re-reads changed files. Rescans run in a background
+thread at most every `rescan_interval_s`; callers that change files themselves
+(write_file/apply_patch) report them with `update_paths()` so results stay
+exact without waiting for the next rescan.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from loguru import logger
+
+from nanobot.agent.tools.base import Tool
+
+try:  # Python 3.11+
+    import re._constants as _sre_c
+    import re._parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_constants as _sre_c  # type: ignore[no-redef]
+    import sre_parse as _sre_parse  # type: ignore[no-redef]
+
+
+# Directories never indexed (also hidden from the web file tree).
+FS_IGNORE_DIRS = frozenset(
+    {
+        ".git",
+        ".hg",
+        ".svn",
+        ".venv",
+        "node_modules",
+        "__pycache__",
+        "dist",
+        "build",
+        ".mypy_cache",
+        ".ruff_cache",
+        ".pytest_cache",
+        "data",
+    }
+)
+
+_MAX_QUERY_TRIGRAMS = 32
+_COMMIT_EVERY = 500
+
+
+def _literal_runs(parsed: Any) -> list[str]:
+    """Literal substrings every match of a parsed regex sequence must contain."""
+    runs: list[str] = []
+    cur: list[str] = []
+    for op, av in parsed:
+        if op is _sre_c.LITERAL:
+            cur.append(chr(av))
+            continue
+        if cur:
+            runs.append("".join(cur))
+            cur = []
+        if op is _sre_c.SUBPATTERN:
+            runs.extend(_literal_runs(av[-1]))
+        elif op in (_sre_c.MAX_REPEAT, _sre_c.MIN_REPEAT) and av[0] >= 1:
+            runs.extend(_literal_runs(av[2]))
+    if cur:
+        runs.append("".join(cur))
+    return runs
+
+
+def required_literals(pattern: str, *, regex: bool) -> list[str]:
+    """Literal strings a match must contain (empty list = no trigram filter possible)."""
+    if not regex:
+        return [pattern] if len(pattern) >= 3 else []
+    try:
+        runs = _literal_runs(_sre_parse.parse(pattern))
+    except Exception:
+        return []
+    return [r for r in runs if len(r) >= 3]
+
+
+def _trigram_query(literals: list[str]) -> str:
+    grams: list[str] = []
+    seen: set[str] = set()
+    for lit in literals:
+        for i in range(len(lit) - 2):
+            g = lit[i : i + 3]
+            key = g.lower()
+            if key not in seen:
+                seen.add(key)
+                grams.append(g)
+    # Spread the sample over the literal instead of only using its prefix.
+    if len(grams) > _MAX_QUERY_TRIGRAMS:
+        step = len(grams) / _MAX_QUERY_TRIGRAMS
+        grams = [grams[int(i * step)] for i in range(_MAX_QUERY_TRIGRAMS)]
+    return " AND ".join('"' + g.replace('"', '""') + '"' for g in grams)
+
+
+class CodeSearchIndex:
+    """Persistent, incrementally refreshed trigram index of text files under `root`."""
+
+    def __init__(
+        self,
+        root: Path,
+        db_path: Path,
+        *,
+        rescan_interval_s: float = 30.0,
+        max_file_bytes: int = 1_000_000,
+    ):
+        self.root = Path(root).expanduser().resolve()
+        self.db_path = Path(db_path)
+        self.rescan_interval_s = max(0.0, float(rescan_interval_s))
+        self.max_file_bytes = int(max_file_bytes)
+        self._lock = threading.RLock()
+        self._scan_lock = threading.Lock()
+        self._scan_thread: threading.Thread | None = None
+        self._last_scan = 0.0
+        self.last_scan_stats: dict[str, Any] = {}
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                id       INTEGER PRIMARY KEY,
+                path     TEXT NOT NULL UNIQUE,
+                mtime_ns INTEGER NOT NULL,
+                size     INTEGER NOT NULL,
+                indexed  INTEGER NOT NULL DEFAULT 1
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS code_fts USING fts5(
+                content, tokenize='trigram', detail='none'
+            );
+            """
+        )
+        self._conn.commit()
+
+    # ── Indexing ─────────────────────────────────────────────────
+
+    def _walk(self) -> Iterator[tuple[str, os.stat_result]]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in FS_IGNORE_DIRS and not d.startswith(".")]
+            rel_dir = os.path.relpath(dirpath, self.root)
+            for fn in filenames:
+                if fn.startswith("."):
+                    continue
+                full = os.path.join(dirpath, fn)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                rel = fn if rel_dir == "." else f"{rel_dir}/{fn}".replace(os.sep, "/")
+                yield rel, st
+
+    def _read_text(self, rel: str, size: int) -> str | None:
+        """File content, or None for binary/oversized/unreadable files (kept as unindexed rows)."""
+        if size > self.max_file_bytes:
+            return None
+        try:
+            data = (self.root / rel).read_bytes()
+        except OSError:
+            return None
+        if b"\0" in data[:8192]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    def _store(self, rel: str, st: os.stat_result, file_id: int | None) -> None:
+        text = self._read_text(rel, st.st_size)
+        conn = self._conn
+        if file_id is None:
+            cur = conn.execute(
+                "INSERT INTO files (path, mtime_ns, size, indexed) VALUES (?, ?, ?, ?)",
+                (rel, st.st_mtime_ns, st.st_size, 0 if text is None else 1),
+            )
+            file_id = int(cur.lastrowid)
+        else:
+            conn.execute(
+                "UPDATE files SET mtime_ns = ?, size = ?, indexed = ? WHERE id = ?",
+                (st.st_mtime_ns, st.st_size, 0 if text is None else 1, file_id),
+            )
+            conn.execute("DELETE FROM code_fts WHERE rowid = ?", (file_id,))
+        if text is not None:
+            conn.execute("INSERT INTO code_fts (rowid, content) VALUES (?, ?)", (file_id, text))
+
+    def _delete(self, file_id: int) -> None:
+        self._conn.execute("DELETE FROM code_fts WHERE rowid = ?", (file_id,))
+        self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def refresh(self) -> dict[str, Any]:
+        """Rescan the tree and re-index changed files. Returns counters for this scan."""
+        with self._scan_lock:
+            start = time.perf_counter()
+            with self._lock:
+                known = {
+                    r[0]: (int(r[1]), int(r[2]), int(r[3]))
+                    for r in self._conn.execute("SELECT path, id, mtime_ns, size FROM files")
+                }
+            added = updated = pending = 0
+            seen: set[str] = set()
+            for rel, st in self._walk():
+                seen.add(rel)
+                row = known.get(rel)
+                if row is not None and row[1] == st.st_mtime_ns and row[2] == st.st_size:
+                    continue
+                with self._lock:
+                    self._store(rel, st, row[0] if row else None)
+                    pending += 1
+                    if pending >= _COMMIT_EVERY:
+                        self._conn.commit()
+                        pending = 0
+                if row is None:
+                    added += 1
+                else:
+                    updated += 1
+            removed = [row[0] for rel, row in known.items() if rel not in seen]
+            with self._lock:
+                for file_id in removed:
+                    self._delete(file_id)
+                self._conn.commit()
+            self._last_scan = time.monotonic()
+            self.last_scan_stats = {
+                "files": len(seen),
+                "added": added,
+                "updated": updated,
+                "removed": len(removed),
+                "elapsed_ms": round(1000 * (time.perf_counter() - start), 1),
+            }
+            if added or updated or removed:
+                logger.debug(f"code index refreshed: {self.last_scan_stats}")
+            return self.last_scan_stats
+
+    def update_paths(self, paths: Iterable[str | Path]) -> None:
+        """Re-index specific files now (after the agent wrote them)."""
+        with self._lock:
+            for raw in paths:
+                p = Path(raw)
+                full = p if p.is_absolute() else self.root / p
+                try:
+                    rel = full.resolve().relative_to(self.root).as_posix()
+                except (OSError, ValueError):
+                    continue
+                row = self._conn.execute("SELECT id FROM files WHERE path = ?", (rel,)).fetchone()
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    if row is not None:
+                        self._delete(int(row[0]))
+                    continue
+                self._store(rel, st, int(row[0]) if row else None)
+            self._conn.commit()
+
+    def ensure_fresh(self) -> None:
+        """Build the index on first use; afterwards rescan in the background when stale."""
+        if self._last_scan == 0.0:
+            with self._lock:
+                has_rows = self._conn.execute("SELECT 1 FROM files LIMIT 1").fetchone() is not None
+            if not has_rows:
+                self.refresh()
+                return
+            self._last_scan = -1.0  # persisted index from an earlier run: serve it, rescan now
+        if time.monotonic() - self._last_scan < self.rescan_interval_s and self._last_scan > 0:
+            return
+        if self._scan_thread is not None and self._scan_thread.is_alive():
+            return
+        self._scan_thread = threading.Thread(target=self._background_refresh, name="code-index", daemon=True)
+        self._scan_thread.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"code index refresh failed: {e}")
+
+    # ── Querying ─────────────────────────────────────────────────
+
+    def search(
+        self,
+        pattern: str,
+        *,
+        regex: bool = False,
+        ignore_case: bool = False,
+        glob: str | None = None,
+        max_results: int = 100,
+        max_per_file: int = 10,
+    ) -> dict[str, Any]:
+        """
+        Find matching lines.
+
+        Returns {"matches": [{"path", "line", "text"}], "files": n,
+        "candidates": n, "truncated": bool, "indexed": bool, "elapsed_ms": x}.
+        Raises re.error for invalid regular expressions.
+        """
+        start = time.perf_counter()
+        flags = re.IGNORECASE if ignore_case else 0
+        matcher = re.compile(pattern if regex else re.escape(pattern), flags)
+        literals = required_literals(pattern, regex=regex)
+
+        if literals:
+            sql = (
+                "SELECT f.path, c.content FROM code_fts c JOIN files f ON f.id = c.rowid "
+                "WHERE code_fts MATCH ?"
+            )
+            params: tuple[Any, ...] = (_trigram_query(literals),)
+        else:
+            sql = "SELECT f.path, c.content FROM code_fts c JOIN files f ON f.id = c.rowid"
+            params = ()
+
+        matches: list[dict[str, Any]] = []
+        files = candidates = 0
+        truncated = False
+        with self._lock:
+            for path, content in self._conn.execute(sql, params):
+                if glob and not _glob_match(path, glob):
+                    continue
+                candidates += 1
+                if not matcher.search(content):
+                    continue
+                files += 1
+                per_file = 0
+                for lineno, line in enumerate(content.splitlines(), 1):
+                    if not matcher.search(line):
+                        continue
+                    if len(matches) >= max_results:
+                        truncated = True
+                        break
+                    matches.append({"path": path, "line": lineno, "text": line.strip()[:300]})
+                    per_file += 1
+                    if per_file >= max_per_file:
+                        break
+                if truncated:
+                    break
+        # Rows stream in index order so a capped query stops early; sort only what is returned.
+        matches.sort(key=lambda m: (m["path"], m["line"]))
+        return {
+            "matches": matches,
+            "files": files,
+            "candidates": candidates,
+            "truncated": truncated,
+            "indexed": bool(literals),
+            "elapsed_ms": round(1000 * (time.perf_counter() - start), 2),
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total, indexed = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(indexed), 0) FROM files").fetchone()
+        return {"root": str(self.root), "files": int(total), "indexed_files": int(indexed), "last_scan": self.last_scan_stats}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _glob_match(path: str, pattern: str) -> bool:
+    if "/" not in pattern:
+        return fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+    return fnmatch.fnmatch(path, pattern)
+
+
+_indexes: dict[tuple[Path, Path], CodeSearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_code_index(root: Path, db_path: Path, **kwargs: Any) -> CodeSearchIndex:
+    """Return the process-wide index for (root, db_path) (shared across runners and turns)."""
+    key = (Path(root).expanduser().resolve(), Path(db_path).expanduser().resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = CodeSearchIndex(key[0], key[1], **kwargs)
+            _indexes[key] = index
+        return index
+
+
+class CodeSearchTool(Tool):
+    """Grep-like search over the file root, backed by CodeSearchIndex."""
+
+    def __init__(self, index: CodeSearchIndex, *, max_results: int = 100):
+        self._index = index
+        self._max_results = max_results
+
+    @property
+    def name(self) -> str:
+        return "code_search"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Search file contents under the workspace root (like grep, but indexed). "
+            "Returns matching lines as path:line: text. Use this to locate code before reading files."
+        )
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {
+            "type": "object",
+            "properties": {
+                "query": {"type": "string", "description": "Text to find (or a regular expression if regex=true)"},
+                "regex": {"type": "boolean", "description": "Treat query as a Python regular expression"},
+                "ignore_case": {"type": "boolean", "description": "Case-insensitive match"},
+                "glob": {"type": "string", "description": "Only search paths matching this glob, e.g. '*.py' or 'src/*'"},
+                "max_results": {"type": "integer", "description": "Maximum matching lines (default 100)", "minimum": 1},
+            },
+            "required": ["query"],
+        }
+
+    async def execute(
+        self,
+        query: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        glob: str | None = None,
+        max_results: int | None = None,
+        **kwargs: Any,
+    ) -> str:
+        import asyncio
+
+        if not query:
+            return "Error: query is required"
+        limit = max(1, min(int(max_results or self._max_results), 1000))
+
+        def _run() -> dict[str, Any]:
+            self._index.ensure_fresh()
+            return self._index.search(query, regex=regex, ignore_case=ignore_case, glob=glob, max_results=limit)
+
+        try:
+            result = await asyncio.to_thread(_run)
+        except re.error as e:
+            return f"Error: invalid regular expression: {e}"
+        except Exception as e:
+            return f"Error searching code: {e}"
+
+        if not result["matches"]:
+            return f"No matches for {query!r}."
+        lines = [f"{m['path']}:{m['line']}: {m['text']}" for m in result["matches"]]
+        summary = f"{len(lines)} match(es) in {result['files']} file(s)"
+        if result["truncated"]:
+            summary += f" (stopped at {limit}; narrow the query or use glob)"
+        return summary + "\n" + "\n".join(lines)
@@ -1,5 +1,6 @@
 """Message tool for sending messages to users."""
 
+import contextvars
 from typing import Any, Callable, Awaitable
 
 from nanobot.agent.tools.base import Tool
@@ -16,13 +17,14 @@ class MessageTool(Tool):
         default_chat_id: str = ""
     ):
         self._send_callback = send_callback
-        self._default_channel = default_channel
-        self._default_chat_id = default_chat_id
+        # Per-task context: the agent loop processes several sessions concurrently.
+        self._context: contextvars.ContextVar[tuple[str, str]] = contextvars.ContextVar(
+            f"message_tool_context_{id(self)}", default=(default_channel, default_chat_id)
+        )
     
     def set_context(self, channel: str, chat_id: str) -> None:
-        """Set the current message context."""
-        self._default_channel = channel
-        self._default_chat_id = chat_id
+        """Set the current message context (for the running task only)."""
+        self._context.set((channel, chat_id))
     
     def set_send_callback(self, callback: Callable[[OutboundMessage], Awaitable[None]]) -> None:
         """Set the callback for sending messages."""
@@ -64,8 +66,9 @@ class MessageTool(Tool):
         chat_id: str | None = None,
         **kwargs: Any
     ) -> str:
-        channel = channel or self._default_channel
-        chat_id = chat_id or self._default_chat_id
+        default_channel, default_chat_id = self._context.get()
+        channel = channel or default_channel
+        chat_id = chat_id or default_chat_id
         
         if not channel or not chat_id:
             return "Error: No target channel/chat specified"
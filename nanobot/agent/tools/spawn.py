@@ -1,5 +1,6 @@
 """Spawn tool for creating background subagents."""
 
+import contextvars
 from typing import Any, TYPE_CHECKING
 
 from nanobot.agent.tools.base import Tool
@@ -18,13 +19,14 @@ class SpawnTool(Tool):
     
     def __init__(self, manager: "SubagentManager"):
         self._manager = manager
-        self._origin_channel = "cli"
-        self._origin_chat_id = "direct"
+        # Per-task context: the agent loop processes several sessions concurrently.
+        self._origin: contextvars.ContextVar[tuple[str, str]] = contextvars.ContextVar(
+            f"spawn_tool_origin_{id(self)}", default=("cli", "direct")
+        )
     
     def set_context(self, channel: str, chat_id: str) -> None:
-        """Set the origin context for subagent announcements."""
-        self._origin_channel = channel
-        self._origin_chat_id = chat_id
+        """Set the origin context for subagent announcements (for the running task only)."""
+        self._origin.set((channel, chat_id))
     
     @property
     def name(self) -> str:
@@ -57,9 +59,10 @@ class SpawnTool(Tool):
     
     async def execute(self, task: str, label: str | None = None, **kwargs: Any) -> str:
         """Spawn a subagent to execute the given task."""
+        origin_channel, origin_chat_id = self._origin.get()
         return await self._manager.spawn(
             task=task,
             label=label,
-            origin_channel=self._origin_channel,
-            origin_chat_id=self._origin_chat_id,
+            origin_channel=origin_channel,
+            origin_chat_id=origin_chat_id,
         )
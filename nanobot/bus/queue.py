@@ -1,81 +1,184 @@
 """Async message queue for decoupled channel-agent communication."""
 
 import asyncio
-from typing import Callable, Awaitable
+import time
+from collections import deque
+from typing import Any, Callable, Awaitable
 
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 
 
+# Inbound priority lanes, highest first.
+LANES = ("interactive", "subagent", "background")
+
+
+class BusFullError(Exception):
+    """Raised by non-blocking publishes when the target lane is at capacity."""
+
+
+def lane_for(msg: InboundMessage) -> str:
+    """Pick the inbound lane: explicit metadata["lane"], else by channel."""
+    lane = msg.metadata.get("lane") if msg.metadata else None
+    if lane in LANES:
+        return lane
+    if msg.channel == "system":
+        return "subagent"
+    if msg.channel in ("cron", "heartbeat"):
+        return "background"
+    return "interactive"
+
+
+class _LaneStats:
+    """Depth/latency counters for one lane."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.published = 0
+        self.consumed = 0
+        self.blocked = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.waits: deque[float] = deque(maxlen=512)
+
+    def snapshot(self, depth: int) -> dict[str, Any]:
+        waits = sorted(self.waits)
+        return {
+            "depth": depth,
+            "capacity": self.capacity,
+            "max_depth": self.max_depth,
+            "published": self.published,
+            "consumed": self.consumed,
+            "blocked": self.blocked,
+            "rejected": self.rejected,
+            "wait_avg_ms": round(1000 * sum(waits) / len(waits), 1) if waits else 0.0,
+            "wait_p95_ms": round(1000 * waits[min(len(waits) - 1, int(0.95 * len(waits)))], 1) if waits else 0.0,
+        }
+
+
 class MessageBus:
     """
     Async message bus that decouples chat channels from the agent core.
-    
-    Channels push messages to the inbound queue, and the agent processes
-    them and pushes responses to the outbound queue.
+
+    Channels push messages to bounded inbound lanes (interactive user messages,
+    subagent announcements, background work); the agent always consumes from the
+    highest-priority non-empty lane. When a lane is full, publishers wait
+    (backpressure) or get `BusFullError` with `block=False`. Responses go through a
+    bounded outbound queue.
     """
-    
-    def __init__(self):
-        self.inbound: asyncio.Queue[InboundMessage] = asyncio.Queue()
-        self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
+
+    def __init__(self, inbound_maxsize: int = 1000, outbound_maxsize: int = 1000):
+        self.inbound_maxsize = max(1, int(inbound_maxsize))
+        self._lanes: dict[str, deque[tuple[InboundMessage, float]]] = {lane: deque() for lane in LANES}
+        self._lane_stats = {lane: _LaneStats(self.inbound_maxsize) for lane in LANES}
+        self._inbound_cond = asyncio.Condition()
+        self.outbound: asyncio.Queue[tuple[OutboundMessage, float]] = asyncio.Queue(maxsize=max(1, int(outbound_maxsize)))
+        self._outbound_stats = _LaneStats(self.outbound.maxsize)
         self._outbound_subscribers: dict[str, list[Callable[[OutboundMessage], Awaitable[None]]]] = {}
-        self._running = False
-    
-    async def publish_inbound(self, msg: InboundMessage) -> None:
-        """Publish a message from a channel to the agent."""
-        await self.inbound.put(msg)
-    
+        self._dispatch_task: asyncio.Task[None] | None = None
+
+    async def publish_inbound(
+        self,
+        msg: InboundMessage,
+        *,
+        lane: str | None = None,
+        block: bool = True,
+    ) -> None:
+        """Publish a message from a channel to the agent (waits while the lane is full)."""
+        lane = lane if lane in LANES else lane_for(msg)
+        queue = self._lanes[lane]
+        stats = self._lane_stats[lane]
+        async with self._inbound_cond:
+            if len(queue) >= self.inbound_maxsize:
+                if not block:
+                    stats.rejected += 1
+                    raise BusFullError(f"inbound lane '{lane}' is full ({self.inbound_maxsize})")
+                stats.blocked += 1
+                logger.warning(f"Inbound lane '{lane}' full; applying backpressure to {msg.channel}")
+                await self._inbound_cond.wait_for(lambda: len(queue) < self.inbound_maxsize)
+            queue.append((msg, time.monotonic()))
+            stats.published += 1
+            stats.max_depth = max(stats.max_depth, len(queue))
+            self._inbound_cond.notify_all()
+
     async def consume_inbound(self) -> InboundMessage:
-        """Consume the next inbound message (blocks until available)."""
-        return await self.inbound.get()
-    
+        """Consume the next inbound message, highest-priority lane first (blocks until available)."""
+        async with self._inbound_cond:
+            await self._inbound_cond.wait_for(lambda: any(self._lanes.values()))
+            for lane in LANES:
+                queue = self._lanes[lane]
+                if queue:
+                    msg, enqueued_at = queue.popleft()
+                    stats = self._lane_stats[lane]
+                    stats.consumed += 1
+                    stats.waits.append(time.monotonic() - enqueued_at)
+                    self._inbound_cond.notify_all()  # wake publishers waiting for space
+                    return msg
+        raise RuntimeError("unreachable")
+
     async def publish_outbound(self, msg: OutboundMessage) -> None:
-        """Publish a response from the agent to channels."""
-        await self.outbound.put(msg)
-    
+        """Publish a response from the agent to channels (waits while the queue is full)."""
+        if self.outbound.full():
+            self._outbound_stats.blocked += 1
+        await self.outbound.put((msg, time.monotonic()))
+        self._outbound_stats.published += 1
+        self._outbound_stats.max_depth = max(self._outbound_stats.max_depth, self.outbound.qsize())
+
     async def consume_outbound(self) -> OutboundMessage:
         """Consume the next outbound message (blocks until available)."""
-        return await self.outbound.get()
-    
+        msg, enqueued_at = await self.outbound.get()
+        self._outbound_stats.consumed += 1
+        self._outbound_stats.waits.append(time.monotonic() - enqueued_at)
+        return msg
+
     def subscribe_outbound(
-        self, 
-        channel: str, 
+        self,
+        channel: str,
         callback: Callable[[OutboundMessage], Awaitable[None]]
     ) -> None:
         """Subscribe to outbound messages for a specific channel."""
         if channel not in self._outbound_subscribers:
             self._outbound_subscribers[channel] = []
         self._outbound_subscribers[channel].append(callback)
-    
+
     async def dispatch_outbound(self) -> None:
         """
         Dispatch outbound messages to subscribed channels.
-        Run this as a background task.
+        Run this as a background task; `stop()` cancels it.
         """
-        self._running = True
-        while self._running:
-            try:
-                msg = await asyncio.wait_for(self.outbound.get(), timeout=1.0)
+        self._dispatch_task = asyncio.current_task()
+        try:
+            while True:
+                msg = await self.consume_outbound()
                 subscribers = self._outbound_subscribers.get(msg.channel, [])
                 for callback in subscribers:
                     try:
                         await callback(msg)
                     except Exception as e:
                         logger.error(f"Error dispatching to {msg.channel}: {e}")
-            except asyncio.TimeoutError:
-                continue
-    
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._dispatch_task = None
+
     def stop(self) -> None:
         """Stop the dispatcher loop."""
-        self._running = False
-    
+        if self._dispatch_task is not None:
+            self._dispatch_task.cancel()
+
     @property
     def inbound_size(self) -> int:
-        """Number of pending inbound messages."""
-        return self.inbound.qsize()
-    
+        """Number of pending inbound messages (all lanes)."""
+        return sum(len(q) for q in self._lanes.values())
+
     @property
     def outbound_size(self) -> int:
         """Number of pending outbound messages."""
         return self.outbound.qsize()
+
+    def stats(self) -> dict[str, Any]:
+        """Per-lane depth, throughput, backpressure and queueing latency."""
+        lanes = {lane: self._lane_stats[lane].snapshot(len(self._lanes[lane])) for lane in LANES}
+        lanes["outbound"] = self._outbound_stats.snapshot(self.outbound.qsize())
+        return lanes
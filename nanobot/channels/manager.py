@@ -91,24 +91,18 @@ class ChannelManager:
         
         while True:
             try:
-                msg = await asyncio.wait_for(
-                    self.bus.consume_outbound(),
-                    timeout=1.0
-                )
-                
-                channel = self.channels.get(msg.channel)
-                if channel:
-                    try:
-                        await channel.send(msg)
-                    except Exception as e:
-                        logger.error(f"Error sending to {msg.channel}: {e}")
-                else:
-                    logger.warning(f"Unknown channel: {msg.channel}")
-                    
-            except asyncio.TimeoutError:
-                continue
+                msg = await self.bus.consume_outbound()
             except asyncio.CancelledError:
                 break
+
+            channel = self.channels.get(msg.channel)
+            if channel:
+                try:
+                    await channel.send(msg)
+                except Exception as e:
+                    logger.error(f"Error sending to {msg.channel}: {e}")
+            else:
+                logger.warning(f"Unknown channel: {msg.channel}")
     
     def get_channel(self, name: str) -> BaseChannel | None:
         """Get a channel by name."""
@@ -1,6 +1,9 @@
 """CLI commands for fanfan (legacy module name: nanobot)."""
 
 import asyncio
+import json
+import os
+import time
 from pathlib import Path
 
 import typer
@@ -152,6 +155,14 @@ This file stores important information that should persist across sessions.
 # ============================================================================
 
 
+_GATEWAY_STATUS_INTERVAL_S = 5.0
+
+
+def _gateway_status_path() -> Path:
+    from nanobot.config.loader import get_data_dir
+    return get_data_dir() / "gateway_status.json"
+
+
 @app.command()
 def gateway(
     port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
@@ -161,6 +172,7 @@ def gateway(
     from nanobot.config.loader import load_config, get_data_dir
     from nanobot.bus.queue import MessageBus
     from nanobot.providers.litellm_provider import LiteLLMProvider
+    from nanobot.providers.governor import llm_priority
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
     from nanobot.cron.service import CronService
@@ -176,7 +188,10 @@ def gateway(
     config = load_config()
     
     # Create components
-    bus = MessageBus()
+    bus = MessageBus(
+        inbound_maxsize=config.gateway.inbound_queue_size,
+        outbound_maxsize=config.gateway.outbound_queue_size,
+    )
     
     # Create provider (supports OpenRouter, Anthropic, OpenAI, Bedrock)
     api_key = config.get_api_key()
@@ -192,7 +207,8 @@ def gateway(
     provider = LiteLLMProvider(
         api_key=api_key,
         api_base=api_base,
-        default_model=config.agents.defaults.model
+        default_model=config.agents.defaults.model,
+        llm_config=config.llm,
     )
     
     # Create cron service first (callback set after agent creation)
@@ -209,17 +225,20 @@ def gateway(
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        memory_config=config.agents.defaults.memory,
     )
     
     # Set cron callback (needs agent)
     async def on_cron_job(job: CronJob) -> str | None:
         """Execute a cron job through the agent."""
-        response = await agent.process_direct(
-            job.payload.message,
-            session_key=f"cron:{job.id}",
-            channel=job.payload.channel or "cli",
-            chat_id=job.payload.to or "direct",
-        )
+        with llm_priority("background"):
+            response = await agent.process_direct(
+                job.payload.message,
+                session_key=f"cron:{job.id}",
+                channel=job.payload.channel or "cli",
+                chat_id=job.payload.to or "direct",
+            )
         if job.payload.deliver and job.payload.to:
             from nanobot.bus.events import OutboundMessage
             await bus.publish_outbound(OutboundMessage(
@@ -233,7 +252,8 @@ def gateway(
     # Create heartbeat service
     async def on_heartbeat(prompt: str) -> str:
         """Execute heartbeat through the agent."""
-        return await agent.process_direct(prompt, session_key="heartbeat")
+        with llm_priority("background"):
+            return await agent.process_direct(prompt, session_key="heartbeat")
     
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
@@ -256,7 +276,25 @@ def gateway(
     
     console.print(f"[green]✓[/green] Heartbeat: every 30m")
     
+    status_path = _gateway_status_path()
+
+    async def write_status():
+        # Snapshot for `fanfan status` (separate process).
+        while True:
+            snapshot = {
+                "updated_at": time.time(),
+                "pid": os.getpid(),
+                "bus": bus.stats(),
+                "agent": agent.dispatch_stats(),
+            }
+            try:
+                status_path.write_text(json.dumps(snapshot))
+            except OSError:
+                pass
+            await asyncio.sleep(_GATEWAY_STATUS_INTERVAL_S)
+
     async def run():
+        status_task = asyncio.create_task(write_status())
         try:
             await cron.start()
             await heartbeat.start()
@@ -270,6 +308,8 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+        finally:
+            status_task.cancel()
     
     asyncio.run(run())
 
@@ -308,6 +348,17 @@ def web(
     uvicorn.run(app, host=host, port=port, log_level="info")
 
 
+@app.command()
+def worker(
+    concurrency: int = typer.Option(None, "--concurrency", "-c", help="Turns to run at once (default: FANFAN_WORKER_CONCURRENCY)"),
+):
+    """Run an agent worker for web worker mode (FANFAN_TURN_EXECUTION=worker)."""
+    from nanobot.web.worker import run_worker
+
+    console.print(f"{__logo__} Starting fanfan agent worker")
+    asyncio.run(run_worker(concurrency))
+
+
 # ============================================================================
 # Agent Commands
 # ============================================================================
@@ -339,7 +390,8 @@ def agent(
     provider = LiteLLMProvider(
         api_key=api_key,
         api_base=api_base,
-        default_model=config.agents.defaults.model
+        default_model=config.agents.defaults.model,
+        llm_config=config.llm,
     )
     
     agent_loop = AgentLoop(
@@ -348,6 +400,7 @@ def agent(
         workspace=config.workspace_path,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
+        memory_config=config.agents.defaults.memory,
     )
     
     if message:
@@ -574,6 +627,63 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+def _session_manager():
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import SessionManager
+    return SessionManager(load_config().workspace_path)
+
+
+@sessions_app.command("list")
+def sessions_list(
+    limit: int = typer.Option(20, "--limit", "-n", help="Sessions per page"),
+    page: int = typer.Option(1, "--page", "-p", help="Page number (1-based)"),
+    sort: str = typer.Option("updated_at", "--sort", help="updated_at, created_at, message_count, bytes or key"),
+):
+    """List sessions, most recently updated first."""
+    manager = _session_manager()
+    try:
+        rows = manager.list_sessions(limit=limit, offset=max(0, page - 1) * limit, order_by=sort)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(1)
+    
+    if not rows:
+        console.print("No sessions.")
+        return
+    
+    table = Table(title=f"Sessions (page {page}, {manager.index.count()} total)")
+    table.add_column("Key", style="cyan")
+    table.add_column("Updated")
+    table.add_column("Created")
+    table.add_column("Messages", justify="right")
+    table.add_column("Size", justify="right")
+    for row in rows:
+        table.add_row(
+            row["key"],
+            row["updated_at"][:19],
+            row["created_at"][:19],
+            str(row["message_count"]),
+            f"{row['bytes'] / 1024:.1f} KB",
+        )
+    console.print(table)
+
+
+@sessions_app.command("reindex")
+def sessions_reindex():
+    """Rebuild the session index from the session files."""
+    count = _session_manager().rebuild_index()
+    console.print(f"[green]✓[/green] Indexed {count} sessions")
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
@@ -610,6 +720,51 @@ def status():
         vllm_status = f"[green]✓ {config.providers.vllm.api_base}[/green]" if has_vllm else "[dim]not set[/dim]"
         console.print(f"vLLM/Local: {vllm_status}")
 
+    sessions_dir = Path.home() / ".fanfan" / "sessions"
+    if (sessions_dir / "index.db").exists():
+        from nanobot.session.index import SessionIndex
+        console.print(f"Sessions: {SessionIndex(sessions_dir / 'index.db').count()}")
+
+    _print_gateway_status()
+
+
+def _print_gateway_status() -> None:
+    """Bus lanes and agent dispatch stats from a running gateway's status snapshot."""
+    path = _gateway_status_path()
+    try:
+        snapshot = json.loads(path.read_text())
+    except (OSError, ValueError):
+        console.print("Gateway: [dim]not running[/dim]")
+        return
+    age = time.time() - float(snapshot.get("updated_at") or 0)
+    if age > 3 * _GATEWAY_STATUS_INTERVAL_S:
+        console.print(f"Gateway: [dim]not running (last seen {int(age)}s ago)[/dim]")
+        return
+
+    agent = snapshot.get("agent") or {}
+    console.print(
+        f"Gateway: [green]running[/green] (pid {snapshot.get('pid')}), "
+        f"{agent.get('running', 0)}/{agent.get('max_concurrent', 0)} sessions busy, "
+        f"{agent.get('queued', 0)} queued in sessions"
+    )
+
+    table = Table(title="Message bus lanes")
+    table.add_column("Lane", style="cyan")
+    for col in ("Depth", "Max", "Published", "Consumed", "Blocked", "Wait avg ms", "Wait p95 ms"):
+        table.add_column(col, justify="right")
+    for lane, s in (snapshot.get("bus") or {}).items():
+        table.add_row(
+            lane,
+            f"{s['depth']}/{s['capacity']}",
+            str(s["max_depth"]),
+            str(s["published"]),
+            str(s["consumed"]),
+            str(s["blocked"] + s["rejected"]),
+            str(s["wait_avg_ms"]),
+            str(s["wait_p95_ms"]),
+        )
+    console.print(table)
+
 
 if __name__ == "__main__":
     app()
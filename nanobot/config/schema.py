@@ -19,6 +19,13 @@ class ChannelsConfig(BaseModel):
     telegram: TelegramConfig = Field(default_factory=TelegramConfig)
 
 
+class MemoryConfig(BaseModel):
+    """Memory retrieval for the system prompt."""
+    token_budget: int = 2000  # Above this, only pinned + relevant memory chunks are injected (0 = always full memory)
+    top_k: int = 8  # Max retrieved chunks per prompt
+    pinned_sections: list[str] = Field(default_factory=list)  # MEMORY.md headings always included
+
+
 class AgentDefaults(BaseModel):
     """Default agent configuration."""
     workspace: str = "~/.fanfan/workspace"
@@ -26,6 +33,8 @@ class AgentDefaults(BaseModel):
     max_tokens: int = 8192
     temperature: float = 0.7
     max_tool_iterations: int = 20
+    max_concurrent_sessions: int = 4  # Gateway: sessions processed at once (in order within a session)
+    memory: MemoryConfig = Field(default_factory=MemoryConfig)
 
 
 class AgentsConfig(BaseModel):
@@ -52,10 +61,56 @@ class ProvidersConfig(BaseModel):
     moonshot: ProviderConfig = Field(default_factory=ProviderConfig)
 
 
+class LLMModelConfig(BaseModel):
+    """Per-model LLM call settings (retries, circuit breaker, hedging, rate limits)."""
+    max_retries: int = 2  # Extra attempts for transient errors (429/5xx/timeouts)
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 8.0
+    breaker_failure_threshold: int = 5  # Consecutive transient failures before the breaker opens
+    breaker_cooldown_s: float = 30.0
+    fallback_model: str = ""  # Used when retries are exhausted or the breaker is open
+    hedge_after_s: float = 0.0  # Start a fallback stream when TTFT exceeds this (0 = off)
+    rpm: int = 0  # Requests per minute per provider (0 = unlimited)
+    tpm: int = 0  # Estimated tokens per minute per provider (0 = unlimited)
+    max_in_flight: int = 0  # Concurrent requests per provider (0 = unlimited)
+    first_chunk_timeout_s: float = 120.0  # Stream watchdog: wait for the first chunk (0 = off)
+    chunk_timeout_s: float = 60.0  # Stream watchdog: max silence between chunks (0 = off)
+    max_stall_retries: int = 2  # Resume attempts after a mid-stream stall
+
+
+class LLMCacheConfig(BaseModel):
+    """Exact-match response cache for calls that opt in (heartbeat, cron, naming, summaries)."""
+    enabled: bool = False
+    path: str = ""  # SQLite file; defaults to ~/.fanfan/llm_cache.db
+    ttl_s: float = 86400.0
+    max_entries: int = 5000
+    max_bytes: int = 64 * 1024 * 1024
+
+
+class LLMConfig(BaseModel):
+    """LLM call configuration. `models` entries override `defaults` field by field."""
+    defaults: LLMModelConfig = Field(default_factory=LLMModelConfig)
+    models: dict[str, LLMModelConfig] = Field(default_factory=dict)  # Exact model name or prefix
+    cache: LLMCacheConfig = Field(default_factory=LLMCacheConfig)
+
+    def for_model(self, model: str) -> LLMModelConfig:
+        """Resolve the effective settings for a model (exact match, then longest prefix)."""
+        override = self.models.get(model)
+        if override is None:
+            prefixes = [k for k in self.models if k and model.startswith(k)]
+            if prefixes:
+                override = self.models[max(prefixes, key=len)]
+        if override is None:
+            return self.defaults
+        return self.defaults.model_copy(update=override.model_dump(exclude_unset=True))
+
+
 class GatewayConfig(BaseModel):
     """Gateway/server configuration."""
     host: str = "0.0.0.0"
     port: int = 18790
+    inbound_queue_size: int = 1000  # Per priority lane; channels wait when a lane is full
+    outbound_queue_size: int = 1000
 
 
 class WebSearchConfig(BaseModel):
@@ -86,6 +141,7 @@ class Config(BaseSettings):
     agents: AgentsConfig = Field(default_factory=AgentsConfig)
     channels: ChannelsConfig = Field(default_factory=ChannelsConfig)
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
+    llm: LLMConfig = Field(default_factory=LLMConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
     
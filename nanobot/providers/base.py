@@ -39,6 +39,7 @@ class StreamChunk:
     tool_calls_delta: list[dict[str, Any]] | None = None  # incremental tool call
     finish_reason: str | None = None   # set on last chunk
     usage: dict[str, int] | None = None  # set on last chunk
+    event: dict[str, Any] | None = None  # provider notice, e.g. {"type": "llm_retry", ...}
 
 
 class LLMProvider(ABC):
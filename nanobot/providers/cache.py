@@ -0,0 +1,237 @@
+"""Opt-in exact-match LLM response cache (SQLite, TTL + size bounds)."""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMResponse, StreamChunk, ToolCallRequest
+
+_cacheable: contextvars.ContextVar[float | None] = contextvars.ContextVar("llm_cacheable", default=None)
+
+
+@contextlib.contextmanager
+def llm_cacheable(ttl_s: float = 0.0) -> Iterator[None]:
+    """
+    Mark the enclosed LLM calls as cacheable (ttl_s=0 uses the configured TTL).
+
+    Only wrap single-shot prompts whose answer may be replayed verbatim. Calls
+    that offer tools are never cached, so an agent tool loop inside this block
+    still sees fresh tool output.
+    """
+    token = _cacheable.set(max(0.0, float(ttl_s)))
+    try:
+        yield
+    finally:
+        _cacheable.reset(token)
+
+
+def cacheable_ttl() -> float | None:
+    """TTL override for the current call, 0 for the default TTL, or None when not cacheable."""
+    return _cacheable.get()
+
+
+def cache_key(
+    model: str,
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """Canonical sha256 over everything that determines the completion."""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "tools": tools or [],
+        "temperature": round(float(temperature), 4),
+        "max_tokens": int(max_tokens),
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def response_to_json(resp: LLMResponse) -> str:
+    return json.dumps(
+        {
+            "content": resp.content,
+            "tool_calls": [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in resp.tool_calls],
+            "finish_reason": resp.finish_reason,
+            "usage": resp.usage,
+            "thinking": resp.thinking,
+        },
+        ensure_ascii=False,
+    )
+
+
+def response_from_json(raw: str) -> LLMResponse:
+    data = json.loads(raw)
+    return LLMResponse(
+        content=data.get("content"),
+        tool_calls=[ToolCallRequest(**tc) for tc in data.get("tool_calls") or []],
+        finish_reason=data.get("finish_reason") or "stop",
+        usage=dict(data.get("usage") or {}),
+        thinking=data.get("thinking"),
+    )
+
+
+def replay_chunks(resp: LLMResponse) -> list[StreamChunk]:
+    """Synthetic stream for a cached response (same shape as a live LiteLLM stream)."""
+    chunks: list[StreamChunk] = []
+    if resp.thinking:
+        chunks.append(StreamChunk(thinking_delta=resp.thinking))
+    if resp.content:
+        chunks.append(StreamChunk(delta=resp.content))
+    if resp.tool_calls:
+        chunks.append(StreamChunk(tool_calls_delta=[
+            {"id": tc.id, "type": "function", "function": {"name": tc.name, "arguments": tc.arguments}}
+            for tc in resp.tool_calls
+        ]))
+    chunks.append(StreamChunk(finish_reason=resp.finish_reason, usage={"cache_hit": 1}))
+    return chunks
+
+
+class ResponseCache:
+    """SQLite-backed response cache bounded by TTL, entry count and total bytes."""
+
+    def __init__(self, db_path: str | Path, *, ttl_s: float, max_entries: int, max_bytes: int):
+        self._db_path = str(db_path)
+        Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False, timeout=30.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key         TEXT PRIMARY KEY,
+                model       TEXT NOT NULL,
+                response    TEXT NOT NULL,
+                bytes       INTEGER NOT NULL,
+                created_at  REAL NOT NULL,
+                expires_at  REAL NOT NULL,
+                last_hit_at REAL NOT NULL,
+                hits        INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_expires ON llm_cache(expires_at);
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_last_hit ON llm_cache(last_hit_at);
+            """
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> LLMResponse | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE llm_cache SET hits = hits + 1, last_hit_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+        try:
+            return response_from_json(row[0])
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Dropping unreadable LLM cache entry {key[:12]}: {e}")
+            self.delete(key)
+            return None
+
+    def put(self, key: str, model: str, resp: LLMResponse, ttl_s: float = 0.0) -> None:
+        raw = response_to_json(resp)
+        size = len(raw.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache (key, model, response, bytes, created_at, expires_at, last_hit_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, model, raw, size, now, now + (ttl_s or self.ttl_s), now),
+            )
+            self._prune(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _prune(self, now: float) -> None:
+        """Drop expired entries, then least-recently-used ones until within bounds."""
+        conn = self._conn
+        conn.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        if self.max_entries:
+            conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+        if self.max_bytes:
+            total = int(conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()[0])
+            if total > self.max_bytes:
+                rows = conn.execute("SELECT key, bytes FROM llm_cache ORDER BY last_hit_at ASC").fetchall()
+                drop: list[str] = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    drop.append(key)
+                    total -= int(size)
+                conn.executemany("DELETE FROM llm_cache WHERE key = ?", [(k,) for k in drop])
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM llm_cache").fetchone()
+        return {
+            "path": self._db_path,
+            "entries": int(row[0]),
+            "bytes": int(row[1]),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_caches: dict[str, ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_response_cache(db_path: str | Path, *, ttl_s: float, max_entries: int, max_bytes: int) -> ResponseCache:
+    """Return the process-wide cache for a database path (shared across provider instances)."""
+    path = str(Path(db_path).expanduser())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = ResponseCache(path, ttl_s=ttl_s, max_entries=max_entries, max_bytes=max_bytes)
+            _caches[path] = cache
+        else:
+            cache.ttl_s, cache.max_entries, cache.max_bytes = ttl_s, max_entries, max_bytes
+        return cache
+
+
+def response_cache_stats() -> list[dict[str, Any]]:
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [c.stats() for c in caches]
@@ -0,0 +1,258 @@
+"""Per-provider rate/concurrency governor for LLM calls (RPM/TPM token buckets + priorities)."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import heapq
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator
+
+# Lower value = served first.
+PRIORITIES = {"interactive": 0, "background": 1}
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default="interactive")
+
+
+@contextlib.contextmanager
+def llm_priority(name: str) -> Iterator[None]:
+    """Run the enclosed LLM calls under a priority class ("interactive" or "background")."""
+    if name not in PRIORITIES:
+        raise ValueError(f"unknown LLM priority: {name}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+def estimate_tokens(messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None) -> int:
+    """Rough prompt-token estimate (~4 chars per token) used for TPM accounting."""
+    try:
+        chars = len(json.dumps(messages, ensure_ascii=False, default=str))
+        if tools:
+            chars += len(json.dumps(tools, ensure_ascii=False, default=str))
+    except (TypeError, ValueError):
+        chars = sum(len(str(m.get("content") or "")) for m in messages)
+    return max(1, chars // 4)
+
+
+@dataclass
+class TokenBucket:
+    """Per-minute token bucket. Balance may go negative to absorb post-hoc usage corrections."""
+
+    per_minute: float
+    tokens: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.per_minute
+
+    def _refill(self, now: float) -> None:
+        rate = self.per_minute / 60.0
+        self.tokens = min(self.per_minute, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` (capped at capacity) is available; 0 if available now."""
+        self._refill(now)
+        need = min(amount, self.per_minute)
+        if self.tokens >= need:
+            return 0.0
+        return (need - self.tokens) / (self.per_minute / 60.0)
+
+    def consume(self, amount: float) -> None:
+        self.tokens -= amount
+
+
+class _Waiter:
+    __slots__ = ("priority", "tokens", "future")
+
+    def __init__(self, priority: int, tokens: int, future: asyncio.Future[None]):
+        self.priority = priority
+        self.tokens = tokens
+        self.future = future
+
+
+class Governor:
+    """Admission control for one provider: RPM/TPM buckets, max in-flight, priority queue."""
+
+    def __init__(self, key: str, *, rpm: int = 0, tpm: int = 0, max_in_flight: int = 0):
+        self.key = key
+        self.in_flight = 0
+        self._heap: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._rpm: TokenBucket | None = None
+        self._tpm: TokenBucket | None = None
+        self.max_in_flight = 0
+        self.configure(rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+
+        # Metrics
+        self.admitted = 0
+        self.waited = 0
+        self.wait_total_s = 0.0
+        self.wait_max_s = 0.0
+        self.recent_waits: dict[str, deque[float]] = {p: deque(maxlen=256) for p in PRIORITIES}
+
+    def configure(self, *, rpm: int, tpm: int, max_in_flight: int) -> None:
+        if (self._rpm.per_minute if self._rpm else 0) != rpm:
+            self._rpm = TokenBucket(float(rpm)) if rpm > 0 else None
+        if (self._tpm.per_minute if self._tpm else 0) != tpm:
+            self._tpm = TokenBucket(float(tpm)) if tpm > 0 else None
+        self.max_in_flight = max(0, int(max_in_flight))
+
+    @property
+    def limited(self) -> bool:
+        return bool(self._rpm or self._tpm or self.max_in_flight)
+
+    def _admit_wait(self, tokens: int, now: float) -> float | None:
+        """0 if the request may start now, seconds to wait for buckets, or None if blocked on a slot."""
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return None
+        wait = 0.0
+        if self._rpm:
+            wait = max(wait, self._rpm.wait_time(1, now))
+        if self._tpm:
+            wait = max(wait, self._tpm.wait_time(tokens, now))
+        return wait
+
+    def _dispatch(self) -> None:
+        """Admit waiters in priority order until the head one has to wait."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._heap:
+            _, _, waiter = self._heap[0]
+            if waiter.future.done():  # cancelled while queued
+                heapq.heappop(self._heap)
+                continue
+            wait = self._admit_wait(waiter.tokens, time.monotonic())
+            if wait is None:
+                return
+            if wait > 0:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(wait, self._dispatch)
+                return
+            heapq.heappop(self._heap)
+            self._start(waiter.tokens)
+            waiter.future.set_result(None)
+
+    def _start(self, tokens: int) -> None:
+        self.in_flight += 1
+        if self._rpm:
+            self._rpm.consume(1)
+        if self._tpm:
+            self._tpm.consume(tokens)
+
+    def _record_wait(self, priority: str, waited_s: float) -> None:
+        self.admitted += 1
+        if waited_s > 0.001:
+            self.waited += 1
+        self.wait_total_s += waited_s
+        self.wait_max_s = max(self.wait_max_s, waited_s)
+        self.recent_waits[priority].append(waited_s)
+
+    async def acquire(self, tokens: int, priority: str | None = None) -> float:
+        """Wait for admission. Returns the queue wait in seconds."""
+        prio_name = priority or current_priority()
+        started = time.monotonic()
+        # Fast path: nothing queued ahead and capacity available.
+        if not self._heap and self._admit_wait(tokens, started) == 0:
+            self._start(tokens)
+            self._record_wait(prio_name, 0.0)
+            return 0.0
+
+        fut: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(PRIORITIES.get(prio_name, 0), tokens, fut)
+        heapq.heappush(self._heap, (waiter.priority, next(self._seq), waiter))
+        self._dispatch()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Admitted just as we were cancelled: give the slot back.
+                self.release()
+            raise
+        waited = time.monotonic() - started
+        self._record_wait(prio_name, waited)
+        return waited
+
+    def release(self, *, estimated_tokens: int = 0, actual_tokens: int = 0) -> None:
+        """Free the in-flight slot and reconcile the TPM bucket with actual usage."""
+        self.in_flight = max(0, self.in_flight - 1)
+        if self._tpm and actual_tokens:
+            self._tpm.consume(actual_tokens - estimated_tokens)
+        if self._heap:
+            self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, tokens: int, priority: str | None = None) -> AsyncIterator["Lease"]:
+        lease = Lease(estimated_tokens=tokens)
+        lease.wait_s = await self.acquire(tokens, priority)
+        try:
+            yield lease
+        finally:
+            self.release(estimated_tokens=tokens, actual_tokens=lease.actual_tokens)
+
+    def snapshot(self) -> dict[str, Any]:
+        def _p(values: deque[float], q: float) -> float:
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+        return {
+            "key": self.key,
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, w in self._heap if not w.future.done()),
+            "max_in_flight": self.max_in_flight,
+            "rpm": int(self._rpm.per_minute) if self._rpm else 0,
+            "tpm": int(self._tpm.per_minute) if self._tpm else 0,
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "wait_avg_s": round(self.wait_total_s / self.admitted, 4) if self.admitted else 0.0,
+            "wait_max_s": round(self.wait_max_s, 4),
+            "wait_p95_s": {p: _p(v, 0.95) for p, v in self.recent_waits.items()},
+        }
+
+
+@dataclass
+class Lease:
+    """Handle for an admitted call; set `actual_tokens` once usage is known."""
+
+    estimated_tokens: int
+    actual_tokens: int = 0
+    wait_s: float = 0.0
+
+
+_governors: dict[str, Governor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(key: str, *, rpm: int, tpm: int, max_in_flight: int) -> Governor:
+    """Return the process-wide governor for a provider key (shared across provider instances)."""
+    with _governors_lock:
+        gov = _governors.get(key)
+        if gov is None:
+            gov = Governor(key, rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+            _governors[key] = gov
+        else:
+            gov.configure(rpm=rpm, tpm=tpm, max_in_flight=max_in_flight)
+        return gov
+
+
+def governor_stats() -> list[dict[str, Any]]:
+    """Snapshot of all known provider governors (for status/health output)."""
+    with _governors_lock:
+        return [g.snapshot() for g in _governors.values()]
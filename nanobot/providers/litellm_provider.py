@@ -1,13 +1,104 @@
 """LiteLLM provider implementation for multi-provider support."""
 
+import asyncio
+import contextlib
 import json
 import os
-from typing import Any, AsyncIterator
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
 
 import litellm
 from litellm import acompletion
+from loguru import logger
 
+from nanobot.config.schema import LLMConfig, LLMModelConfig
 from nanobot.providers.base import LLMProvider, LLMResponse, StreamChunk, ToolCallRequest
+from nanobot.providers.cache import (
+    ResponseCache,
+    cache_key,
+    cacheable_ttl,
+    get_response_cache,
+    replay_chunks,
+)
+from nanobot.providers.governor import Governor, current_priority, estimate_tokens, get_governor
+from nanobot.providers.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    StreamStalledError,
+    StreamStats,
+    backoff_delay,
+    get_breaker,
+    get_stream_stats,
+    is_retryable,
+    retry_after_s,
+)
+
+_T = TypeVar("_T")
+
+
+async def _next_chunk(it: AsyncIterator[Any], timeout_s: float, *, phase: str) -> Any:
+    """Next raw stream chunk, raising StreamStalledError after `timeout_s` of silence (0 = wait forever)."""
+    if timeout_s <= 0:
+        return await it.__anext__()
+    try:
+        return await asyncio.wait_for(it.__anext__(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        raise StreamStalledError(phase, timeout_s) from None
+
+
+class _StreamRecorder:
+    """Reassembles a streamed response so it can be stored in the response cache."""
+
+    def __init__(self) -> None:
+        self.content: list[str] = []
+        self.thinking: list[str] = []
+        self.tool_calls: list[ToolCallRequest] = []
+        self.finish_reason: str | None = None
+        self.usage: dict[str, int] = {}
+        self.stalled = False
+
+    def add(self, chunk: StreamChunk) -> None:
+        if chunk.delta:
+            self.content.append(chunk.delta)
+        if chunk.thinking_delta:
+            self.thinking.append(chunk.thinking_delta)
+        for tc in chunk.tool_calls_delta or []:
+            fn = tc.get("function") or {}
+            args = fn.get("arguments")
+            self.tool_calls.append(ToolCallRequest(
+                id=tc.get("id") or "",
+                name=fn.get("name") or "",
+                arguments=args if isinstance(args, dict) else {"raw": args},
+            ))
+        if chunk.event and chunk.event.get("type") == "stream_stalled":
+            # Resumed output may differ from a single clean completion; don't cache it.
+            self.stalled = True
+        if chunk.finish_reason:
+            self.finish_reason = chunk.finish_reason
+            self.usage = dict(chunk.usage or {})
+
+    @property
+    def complete(self) -> bool:
+        return self.finish_reason is not None and self.finish_reason != "error" and not self.stalled
+
+    def response(self) -> LLMResponse:
+        return LLMResponse(
+            content="".join(self.content) or None,
+            tool_calls=self.tool_calls,
+            finish_reason=self.finish_reason or "stop",
+            usage=self.usage,
+            thinking="".join(self.thinking) or None,
+        )
+
+
+async def _close_stream(it: AsyncIterator[Any]) -> None:
+    """Abort an in-flight stream so its HTTP connection is released."""
+    aclose = getattr(it, "aclose", None)
+    if aclose is not None:
+        with contextlib.suppress(Exception):
+            await aclose()
 
 
 class LiteLLMProvider(LLMProvider):
@@ -22,10 +113,12 @@ class LiteLLMProvider(LLMProvider):
         self, 
         api_key: str | None = None, 
         api_base: str | None = None,
-        default_model: str = "anthropic/claude-opus-4-5"
+        default_model: str = "anthropic/claude-opus-4-5",
+        llm_config: LLMConfig | None = None,
     ):
         super().__init__(api_key, api_base)
         self.default_model = default_model
+        self.llm_config = llm_config or LLMConfig()
 
         default_model_l = (default_model or "").lower()
 
@@ -138,6 +231,112 @@ class LiteLLMProvider(LLMProvider):
 
         return kwargs
 
+    def _policy(self, model: str | None) -> LLMModelConfig:
+        return self.llm_config.for_model(model or self.default_model)
+
+    def _provider_key(self, model: str) -> str:
+        """Key for shared per-provider state: LiteLLM provider prefix (+ custom api_base)."""
+        resolved = self._resolve_model(model)
+        key = resolved.split("/", 1)[0] if "/" in resolved else resolved
+        if self.api_base:
+            key = f"{key}@{self.api_base}"
+        return key
+
+    def _breaker(self, model: str, policy: LLMModelConfig) -> CircuitBreaker:
+        return get_breaker(
+            self._provider_key(model),
+            failure_threshold=policy.breaker_failure_threshold,
+            cooldown_s=policy.breaker_cooldown_s,
+        )
+
+    def _governor(self, model: str | None, policy: LLMModelConfig) -> Governor:
+        return get_governor(
+            self._provider_key(model or self.default_model),
+            rpm=policy.rpm,
+            tpm=policy.tpm,
+            max_in_flight=policy.max_in_flight,
+        )
+
+    async def _call_with_retries(
+        self,
+        model: str,
+        policy: LLMModelConfig,
+        call: Callable[[str], Awaitable[_T]],
+        notices: list[dict[str, Any]],
+    ) -> _T:
+        """Run `call(model)` with classified retries, jittered backoff and the provider breaker."""
+        breaker = self._breaker(model, policy)
+        attempt = 0
+        while True:
+            probe = breaker.check()
+            try:
+                result = await call(model)
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    # The provider answered; only the request was rejected (400/401, context length).
+                    breaker.record_success()
+                if not retryable or attempt >= policy.max_retries:
+                    raise
+                attempt += 1
+                delay = retry_after_s(e)
+                if delay is None:
+                    delay = backoff_delay(attempt, policy.backoff_base_s, policy.backoff_max_s)
+                delay = min(delay, policy.backoff_max_s)
+                logger.warning(f"LLM call to {model} failed ({e}); retry {attempt} in {delay:.2f}s")
+                notice = {
+                    "type": "llm_retry",
+                    "model": model,
+                    "attempt": attempt,
+                    "delay_s": round(delay, 3),
+                    "error": str(e)[:500],
+                }
+                if isinstance(e, StreamStalledError):
+                    get_stream_stats(breaker.key).record_stall()
+                    notice.update({"type": "stream_stalled", "phase": e.phase, "idle_s": e.timeout_s, "retrying": True})
+                notices.append(notice)
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                if probe:
+                    # Cancelled probes (e.g. the losing side of a hedge) record no outcome.
+                    breaker.end_probe()
+            breaker.record_success()
+            return result
+
+    async def _call_with_fallback(
+        self,
+        model: str | None,
+        policy: LLMModelConfig,
+        call: Callable[[str], Awaitable[_T]],
+        notices: list[dict[str, Any]],
+    ) -> tuple[_T, str]:
+        """Try the primary model, then the configured fallback model. Returns (result, model used)."""
+        primary = model or self.default_model
+        fallback = policy.fallback_model if policy.fallback_model != primary else ""
+        try:
+            return await self._call_with_retries(primary, policy, call, notices), primary
+        except Exception as e:
+            if not fallback or not (is_retryable(e) or isinstance(e, CircuitOpenError)):
+                raise
+            notices.append({"type": "llm_fallback", "model": fallback, "from_model": primary, "error": str(e)[:500]})
+            return await self._call_with_retries(fallback, self._policy(fallback), call, notices), fallback
+
+    @staticmethod
+    def _resilience_usage(notices: list[dict[str, Any]]) -> dict[str, int]:
+        usage: dict[str, int] = {}
+        retries = sum(1 for n in notices if n.get("type") in ("llm_retry", "stream_stalled"))
+        if retries:
+            usage["retries"] = retries
+        stalls = sum(1 for n in notices if n.get("type") == "stream_stalled")
+        if stalls:
+            usage["stalls"] = stalls
+        if any(n.get("type") in ("llm_fallback", "llm_hedge") for n in notices):
+            usage["fallback"] = 1
+        return usage
+
     async def chat(
         self,
         messages: list[dict[str, Any]],
@@ -147,16 +346,131 @@ class LiteLLMProvider(LLMProvider):
         temperature: float = 0.7,
     ) -> LLMResponse:
         """Send a non-streaming chat completion request via LiteLLM."""
-        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature, stream=False)
-        
+        cache, key = self._cache_for(messages, tools, model, max_tokens, temperature)
+        if cache is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                hit.usage = {"cache_hit": 1}
+                return hit
+
+        policy = self._policy(model)
+        notices: list[dict[str, Any]] = []
+
+        async def _once(m: str) -> Any:
+            return await acompletion(**self._build_kwargs(messages, tools, m, max_tokens, temperature, stream=False))
+
+        governor = self._governor(model, policy)
+        async with governor.slot(estimate_tokens(messages, tools)) as lease:
+            try:
+                response, _used = await self._call_with_fallback(model, policy, _once, notices)
+                parsed = self._parse_response(response)
+                parsed.usage.update(self._resilience_usage(notices))
+            except Exception as e:
+                parsed = LLMResponse(
+                    content=f"Error calling LLM: {str(e)}",
+                    finish_reason="error",
+                    usage=self._resilience_usage(notices),
+                )
+            lease.actual_tokens = int(parsed.usage.get("total_tokens") or 0)
+            if lease.wait_s >= 0.001:
+                parsed.usage["queue_wait_ms"] = int(lease.wait_s * 1000)
+        if cache is not None and parsed.finish_reason != "error":
+            cache.put(key, model or self.default_model, parsed, cacheable_ttl() or 0.0)
+        return parsed
+
+    def _cache_for(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+    ) -> tuple[ResponseCache | None, str]:
+        """Response cache and key for this call, if caching is enabled and the caller opted in."""
+        cfg = self.llm_config.cache
+        if not cfg.enabled or cacheable_ttl() is None or tools:
+            # Tool-calling steps act on live state; replaying a stored decision would be stale.
+            return None, ""
+        if cfg.path:
+            path = Path(cfg.path).expanduser()
+        else:
+            from nanobot.config.loader import get_data_dir
+            path = get_data_dir() / "llm_cache.db"
         try:
-            response = await acompletion(**kwargs)
-            return self._parse_response(response)
-        except Exception as e:
-            return LLMResponse(
-                content=f"Error calling LLM: {str(e)}",
-                finish_reason="error",
-            )
+            cache = get_response_cache(path, ttl_s=cfg.ttl_s, max_entries=cfg.max_entries, max_bytes=cfg.max_bytes)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM response cache unavailable: {e}")
+            return None, ""
+        key = cache_key(self._resolve_model(model), messages, tools, temperature, max_tokens)
+        return cache, key
+
+    async def _open_stream(
+        self,
+        kwargs: dict[str, Any],
+        first_chunk_timeout_s: float = 0.0,
+    ) -> tuple[AsyncIterator[Any], Any]:
+        """Start a streaming completion and wait for its first chunk (TTFT)."""
+        response = await acompletion(**kwargs)
+        it = response.__aiter__()
+        try:
+            first = await _next_chunk(it, first_chunk_timeout_s, phase="first_chunk")
+        except StopAsyncIteration:
+            first = None
+        except StreamStalledError:
+            await _close_stream(it)
+            raise
+        return it, first
+
+    async def _open_stream_hedged(
+        self,
+        model: str | None,
+        policy: LLMModelConfig,
+        open_call: Callable[[str], Awaitable[tuple[AsyncIterator[Any], Any]]],
+        notices: list[dict[str, Any]],
+    ) -> tuple[tuple[AsyncIterator[Any], Any], str]:
+        """Open the primary stream; if TTFT exceeds `hedge_after_s`, race the fallback model."""
+        primary = model or self.default_model
+        fallback = policy.fallback_model if policy.fallback_model != primary else ""
+        if not fallback or policy.hedge_after_s <= 0:
+            return await self._call_with_fallback(primary, policy, open_call, notices)
+
+        primary_task = asyncio.create_task(self._call_with_retries(primary, policy, open_call, notices))
+        tasks: dict[asyncio.Task[Any], str] = {primary_task: primary}
+        winner: asyncio.Task[Any] | None = None
+        try:
+            done, _ = await asyncio.wait({primary_task}, timeout=policy.hedge_after_s)
+            if not done:
+                notices.append({
+                    "type": "llm_hedge",
+                    "model": fallback,
+                    "from_model": primary,
+                    "after_s": policy.hedge_after_s,
+                })
+                hedge_task = asyncio.create_task(
+                    self._call_with_retries(fallback, self._policy(fallback), open_call, notices)
+                )
+                tasks[hedge_task] = fallback
+
+            pending = set(tasks)
+            last_error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        winner = t
+                        return t.result(), tasks[t]
+                    last_error = t.exception()
+            assert last_error is not None
+            raise last_error
+        finally:
+            for t in tasks:
+                if t is winner:
+                    continue
+                if not t.done():
+                    t.cancel()
+                elif not t.cancelled() and t.exception() is None:
+                    # Close the losing stream so its HTTP connection is released.
+                    await _close_stream(t.result()[0])
 
     async def chat_stream(
         self,
@@ -169,88 +483,255 @@ class LiteLLMProvider(LLMProvider):
         """
         Send a streaming chat completion request via LiteLLM.
 
-        Yields StreamChunk instances as they arrive from the model.
-        Falls back to non-streaming if the provider doesn't support it.
+        Yields StreamChunk instances as they arrive from the model. Transient errors
+        before the first chunk are retried with backoff; a configured fallback model is
+        used when retries are exhausted or hedged in when TTFT is too slow.
+        Retry/fallback notices are yielded as `StreamChunk.event`.
+
+        Calls are admitted through the provider's governor (rate limits, max in-flight,
+        priority); the slot is held until the stream finishes. Cacheable calls that hit
+        the response cache are replayed as synthetic chunks.
         """
-        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature, stream=True)
+        cache, key = self._cache_for(messages, tools, model, max_tokens, temperature)
+        if cache is not None:
+            hit = cache.get(key)
+            if hit is not None:
+                for chunk in replay_chunks(hit):
+                    yield chunk
+                return
+        recorded = _StreamRecorder() if cache is not None else None
+
+        policy = self._policy(model)
+        governor = self._governor(model, policy)
+        async with governor.slot(estimate_tokens(messages, tools)) as lease:
+            if lease.wait_s >= 0.05:
+                yield StreamChunk(event={
+                    "type": "llm_queued",
+                    "wait_s": round(lease.wait_s, 3),
+                    "priority": current_priority(),
+                })
+            async for chunk in self._stream_resilient(messages, tools, model, max_tokens, temperature, policy):
+                if chunk.finish_reason:
+                    if chunk.usage:
+                        lease.actual_tokens = int(chunk.usage.get("total_tokens") or 0)
+                    if lease.wait_s >= 0.001:
+                        chunk.usage = {**(chunk.usage or {}), "queue_wait_ms": int(lease.wait_s * 1000)}
+                if recorded is not None:
+                    recorded.add(chunk)
+                yield chunk
+        if cache is not None and recorded is not None and recorded.complete:
+            cache.put(key, model or self.default_model, recorded.response(), cacheable_ttl() or 0.0)
 
-        try:
-            response = await acompletion(**kwargs)
-
-            # Accumulate tool call fragments across chunks
-            tc_buffers: dict[int, dict[str, Any]] = {}  # index -> {id, name, args_str}
-            usage_data: dict[str, int] | None = None
-
-            async for chunk in response:
-                delta = chunk.choices[0].delta if chunk.choices else None
-                finish = chunk.choices[0].finish_reason if chunk.choices else None
-
-                if hasattr(chunk, "usage") and chunk.usage:
-                    usage_data = {
-                        "prompt_tokens": getattr(chunk.usage, "prompt_tokens", 0) or 0,
-                        "completion_tokens": getattr(chunk.usage, "completion_tokens", 0) or 0,
-                        "total_tokens": getattr(chunk.usage, "total_tokens", 0) or 0,
-                    }
-
-                if delta is None:
-                    if finish:
-                        yield StreamChunk(finish_reason=finish, usage=usage_data)
-                    continue
+    async def _stream_resilient(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+        policy: LLMModelConfig,
+    ) -> AsyncIterator[StreamChunk]:
+        """Open the stream with retries/hedging and translate it into StreamChunks.
 
-                # Text content delta
-                text_delta = getattr(delta, "content", None)
-                if text_delta:
-                    yield StreamChunk(delta=text_delta)
-
-                # Thinking/reasoning delta (Claude extended thinking, etc.)
-                thinking = getattr(delta, "reasoning_content", None) or getattr(delta, "thinking", None)
-                if thinking:
-                    yield StreamChunk(thinking_delta=thinking)
-
-                # Tool call deltas (accumulated until complete)
-                if hasattr(delta, "tool_calls") and delta.tool_calls:
-                    for tc_delta in delta.tool_calls:
-                        idx = tc_delta.index if hasattr(tc_delta, "index") else 0
-                        if idx not in tc_buffers:
-                            tc_buffers[idx] = {
-                                "id": "",
-                                "name": "",
-                                "args_str": "",
-                            }
-                        buf = tc_buffers[idx]
-                        if hasattr(tc_delta, "id") and tc_delta.id:
-                            buf["id"] = tc_delta.id
-                        if hasattr(tc_delta, "function"):
-                            fn = tc_delta.function
-                            if hasattr(fn, "name") and fn.name:
-                                buf["name"] = fn.name
-                            if hasattr(fn, "arguments") and fn.arguments:
-                                buf["args_str"] += fn.arguments
+        A stalled stream (no chunk within `chunk_timeout_s`) is aborted and re-requested,
+        asking the model to continue from the text already streamed.
+        """
+        notices: list[dict[str, Any]] = []
+        emitted: list[dict[str, Any]] = []  # notices already yielded (for usage counters)
+        partial: list[str] = []
+        stalls = 0
+
+        def _open_for(msgs: list[dict[str, Any]]) -> Callable[[str], Awaitable[tuple[AsyncIterator[Any], Any]]]:
+            async def _open(m: str) -> tuple[AsyncIterator[Any], Any]:
+                return await self._open_stream(
+                    self._build_kwargs(msgs, tools, m, max_tokens, temperature, stream=True),
+                    policy.first_chunk_timeout_s,
+                )
+            return _open
 
-                if finish:
-                    # Emit accumulated tool calls
-                    if tc_buffers:
-                        calls = []
-                        for _idx, buf in sorted(tc_buffers.items()):
-                            try:
-                                args = json.loads(buf["args_str"]) if buf["args_str"] else {}
-                            except json.JSONDecodeError:
-                                args = {"raw": buf["args_str"]}
-                            calls.append({
-                                "id": buf["id"],
-                                "type": "function",
-                                "function": {"name": buf["name"], "arguments": args},
-                            })
-                        yield StreamChunk(tool_calls_delta=calls)
+        try:
+            (it, first), used = await self._open_stream_hedged(model, policy, _open_for(messages), notices)
+        except Exception as e:
+            for n in notices:
+                yield StreamChunk(event=n)
+            yield StreamChunk(delta=f"Error calling LLM: {str(e)}")
+            yield StreamChunk(finish_reason="error", usage=self._resilience_usage(notices) or None)
+            return
+
+        stats = get_stream_stats(self._provider_key(used))
+        while True:
+            for n in notices:
+                yield StreamChunk(event=n)
+            emitted.extend(notices)
+            notices.clear()
+            extra_usage = self._resilience_usage_total(emitted, stalls)
+
+            try:
+                async for chunk in self._parse_stream(it, first, policy.chunk_timeout_s, stats):
+                    if chunk.delta:
+                        partial.append(chunk.delta)
+                    if chunk.finish_reason and extra_usage:
+                        chunk.usage = {**(chunk.usage or {}), **extra_usage}
+                    yield chunk
+                return
+            except StreamStalledError as e:
+                await _close_stream(it)
+                stalls += 1
+                stats.record_stall()
+                yield StreamChunk(event={
+                    "type": "stream_stalled",
+                    "model": used,
+                    "phase": e.phase,
+                    "idle_s": e.timeout_s,
+                    "partial_chars": sum(len(p) for p in partial),
+                    "retrying": stalls <= policy.max_stall_retries,
+                })
+                if stalls > policy.max_stall_retries:
+                    yield StreamChunk(finish_reason="error", usage=self._resilience_usage_total(emitted, stalls))
+                    return
+            except Exception as e:
+                # Content was already streamed; a transparent retry would duplicate it.
+                logger.warning(f"Stream interrupted after partial output: {e}")
+                yield StreamChunk(event={"type": "llm_error", "error": str(e)[:500], "partial": True})
+                yield StreamChunk(finish_reason="error", usage=extra_usage or None)
+                return
+
+            # Re-request, continuing from the partial assistant text.
+            retry_messages = self._continuation_messages(messages, used, "".join(partial))
+            try:
+                it, first = await self._call_with_retries(used, policy, _open_for(retry_messages), notices)
+            except Exception as e:
+                for n in notices:
+                    yield StreamChunk(event=n)
+                yield StreamChunk(event={"type": "llm_error", "error": str(e)[:500], "partial": bool(partial)})
+                yield StreamChunk(finish_reason="error", usage=self._resilience_usage_total(emitted + notices, stalls))
+                return
+
+    def _resilience_usage_total(self, notices: list[dict[str, Any]], stalls: int) -> dict[str, int]:
+        usage = self._resilience_usage(notices)
+        if stalls:
+            usage["stalls"] = usage.get("stalls", 0) + stalls
+        return usage
+
+    def _continuation_messages(
+        self,
+        messages: list[dict[str, Any]],
+        model: str,
+        partial_text: str,
+    ) -> list[dict[str, Any]]:
+        """Messages for resuming a stalled response from the already streamed text."""
+        if not partial_text:
+            return messages
+        resolved = self._resolve_model(model).lower()
+        if resolved.startswith("anthropic/") or "claude" in resolved:
+            # Assistant prefill: the model continues the last assistant message verbatim.
+            return [*messages, {"role": "assistant", "content": partial_text.rstrip()}]
+        return [
+            *messages,
+            {"role": "assistant", "content": partial_text},
+            {
+                "role": "user",
+                "content": (
+                    "Your previous response was cut off. Continue exactly where it stopped, "
+                    "without repeating any of the text above."
+                ),
+            },
+        ]
+
+    async def _parse_stream(
+        self,
+        it: AsyncIterator[Any],
+        first: Any,
+        chunk_timeout_s: float = 0.0,
+        stats: StreamStats | None = None,
+    ) -> AsyncIterator[StreamChunk]:
+        """Translate raw LiteLLM stream chunks into StreamChunk instances.
 
+        Raises StreamStalledError when no chunk arrives within `chunk_timeout_s`.
+        """
+        # Accumulate tool call fragments across chunks
+        tc_buffers: dict[int, dict[str, Any]] = {}  # index -> {id, name, args_str}
+        usage_data: dict[str, int] | None = None
+
+        async def _raw() -> AsyncIterator[Any]:
+            if first is None:
+                return
+            yield first
+            last = time.monotonic()
+            while True:
+                try:
+                    c = await _next_chunk(it, chunk_timeout_s, phase="inter_chunk")
+                except StopAsyncIteration:
+                    return
+                now = time.monotonic()
+                if stats is not None:
+                    stats.record_gap(now - last)
+                last = now
+                yield c
+
+        async for chunk in _raw():
+            delta = chunk.choices[0].delta if chunk.choices else None
+            finish = chunk.choices[0].finish_reason if chunk.choices else None
+
+            if hasattr(chunk, "usage") and chunk.usage:
+                usage_data = {
+                    "prompt_tokens": getattr(chunk.usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": getattr(chunk.usage, "completion_tokens", 0) or 0,
+                    "total_tokens": getattr(chunk.usage, "total_tokens", 0) or 0,
+                }
+
+            if delta is None:
+                if finish:
                     yield StreamChunk(finish_reason=finish, usage=usage_data)
-
-        except Exception as e:
-            # Fallback: non-streaming
-            from loguru import logger
-            logger.warning(f"Streaming failed, falling back to non-streaming: {e}")
-            async for chunk in super().chat_stream(messages, tools, model, max_tokens, temperature):
-                yield chunk
+                continue
+
+            # Text content delta
+            text_delta = getattr(delta, "content", None)
+            if text_delta:
+                yield StreamChunk(delta=text_delta)
+
+            # Thinking/reasoning delta (Claude extended thinking, etc.)
+            thinking = getattr(delta, "reasoning_content", None) or getattr(delta, "thinking", None)
+            if thinking:
+                yield StreamChunk(thinking_delta=thinking)
+
+            # Tool call deltas (accumulated until complete)
+            if hasattr(delta, "tool_calls") and delta.tool_calls:
+                for tc_delta in delta.tool_calls:
+                    idx = tc_delta.index if hasattr(tc_delta, "index") else 0
+                    if idx not in tc_buffers:
+                        tc_buffers[idx] = {
+                            "id": "",
+                            "name": "",
+                            "args_str": "",
+                        }
+                    buf = tc_buffers[idx]
+                    if hasattr(tc_delta, "id") and tc_delta.id:
+                        buf["id"] = tc_delta.id
+                    if hasattr(tc_delta, "function"):
+                        fn = tc_delta.function
+                        if hasattr(fn, "name") and fn.name:
+                            buf["name"] = fn.name
+                        if hasattr(fn, "arguments") and fn.arguments:
+                            buf["args_str"] += fn.arguments
+
+            if finish:
+                # Emit accumulated tool calls
+                if tc_buffers:
+                    calls = []
+                    for _idx, buf in sorted(tc_buffers.items()):
+                        try:
+                            args = json.loads(buf["args_str"]) if buf["args_str"] else {}
+                        except json.JSONDecodeError:
+                            args = {"raw": buf["args_str"]}
+                        calls.append({
+                            "id": buf["id"],
+                            "type": "function",
+                            "function": {"name": buf["name"], "arguments": args},
+                        })
+                    yield StreamChunk(tool_calls_delta=calls)
+
+                yield StreamChunk(finish_reason=finish, usage=usage_data)
     
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
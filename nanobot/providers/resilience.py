@@ -0,0 +1,219 @@
+"""Retry classification, jittered backoff and per-provider circuit breakers for LLM calls."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+# Error classes (by name) that are worth retrying. Matching by name keeps this module
+# independent of litellm/openai import paths, which move between releases.
+_RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",
+    "Timeout",
+    "APITimeoutError",
+    "APIConnectionError",
+    "ServiceUnavailableError",
+    "InternalServerError",
+    "TimeoutError",
+    "ConnectError",
+    "ReadTimeout",
+    "RemoteProtocolError",
+}
+
+_FATAL_ERROR_NAMES = {
+    "BadRequestError",
+    "AuthenticationError",
+    "PermissionDeniedError",
+    "NotFoundError",
+    "ContextWindowExceededError",
+    "ContentPolicyViolationError",
+    "UnprocessableEntityError",
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a provider's circuit breaker rejects a call."""
+
+    def __init__(self, key: str, retry_in_s: float):
+        super().__init__(f"circuit open for provider '{key}' (retry in {retry_in_s:.0f}s)")
+        self.key = key
+        self.retry_in_s = retry_in_s
+
+
+class StreamStalledError(asyncio.TimeoutError):
+    """Raised when a provider stream produces no chunk within the watchdog timeout."""
+
+    def __init__(self, phase: str, timeout_s: float):
+        super().__init__(f"stream stalled: no {phase.replace('_', ' ')} within {timeout_s:g}s")
+        self.phase = phase
+        self.timeout_s = timeout_s
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Classify an LLM call failure as transient (retry) or permanent (fail fast)."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+
+    status = getattr(exc, "status_code", None)
+    if isinstance(status, int):
+        return status in (408, 409, 425, 429) or status >= 500
+
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    if names & _FATAL_ERROR_NAMES:
+        return False
+    return bool(names & _RETRYABLE_ERROR_NAMES)
+
+
+def retry_after_s(exc: BaseException) -> float | None:
+    """Best-effort Retry-After extraction (seconds) from a provider error."""
+    headers: Any = getattr(exc, "headers", None)
+    if not headers:
+        response = getattr(exc, "response", None)
+        headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        raw = headers.get("retry-after") or headers.get("Retry-After")
+        return max(0.0, float(raw)) if raw is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Full-jitter exponential backoff for the given (1-based) retry attempt."""
+    cap = min(max_s, base_s * (2 ** max(0, attempt - 1)))
+    return random.uniform(0, cap) if cap > 0 else 0.0
+
+
+@dataclass
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker (closed -> open -> half-open -> closed)."""
+
+    key: str
+    failure_threshold: int = 5
+    cooldown_s: float = 30.0
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at <= 0:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_s:
+            return "half_open"
+        return "open"
+
+    def check(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may proceed (one probe in half-open).
+
+        Returns True when the call is the half-open probe; the caller must then
+        call `end_probe()` once the call is over, whatever its outcome.
+        """
+        state = self.state
+        if state == "closed":
+            return False
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        remaining = self.cooldown_s - (time.monotonic() - self.opened_at)
+        raise CircuitOpenError(self.key, max(0.0, remaining))
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.probing or (self.failure_threshold > 0 and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+        self.probing = False
+
+    def end_probe(self) -> None:
+        """Let the next call probe again if this probe ended without an outcome (e.g. cancelled)."""
+        self.probing = False
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"key": self.key, "state": self.state, "failures": self.failures}
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(key: str, *, failure_threshold: int, cooldown_s: float) -> CircuitBreaker:
+    """Return the process-wide breaker for a provider key (shared across provider instances)."""
+    with _breakers_lock:
+        breaker = _breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(key=key, failure_threshold=failure_threshold, cooldown_s=cooldown_s)
+            _breakers[key] = breaker
+        else:
+            breaker.failure_threshold = failure_threshold
+            breaker.cooldown_s = cooldown_s
+        return breaker
+
+
+def breaker_states() -> list[dict[str, Any]]:
+    """Snapshot of all known provider breakers (for status/health output)."""
+    with _breakers_lock:
+        return [b.snapshot() for b in _breakers.values()]
+
+
+@dataclass
+class StreamStats:
+    """Stall counter and recent inter-chunk gaps for one provider's streams."""
+
+    key: str
+    stalls: int = 0
+    gaps: deque[float] = field(default_factory=lambda: deque(maxlen=2048))
+
+    def record_gap(self, gap_s: float) -> None:
+        self.gaps.append(gap_s)
+
+    def record_stall(self) -> None:
+        self.stalls += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self.gaps)
+
+        def _q(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+        return {
+            "key": self.key,
+            "stalls": self.stalls,
+            "gap_samples": len(ordered),
+            "gap_p50_s": _q(0.50),
+            "gap_p99_s": _q(0.99),
+            "gap_max_s": round(ordered[-1], 4) if ordered else 0.0,
+        }
+
+
+_stream_stats: dict[str, StreamStats] = {}
+
+
+def get_stream_stats(key: str) -> StreamStats:
+    with _breakers_lock:
+        stats = _stream_stats.get(key)
+        if stats is None:
+            stats = StreamStats(key=key)
+            _stream_stats[key] = stats
+        return stats
+
+
+def stream_stats() -> list[dict[str, Any]]:
+    """Snapshot of stream watchdog stats per provider (stalls, p99 inter-chunk gap)."""
+    with _breakers_lock:
+        return [s.snapshot() for s in _stream_stats.values()]
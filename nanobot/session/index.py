@@ -0,0 +1,169 @@
+"""SQLite index of session files (key, timestamps, message count, size)."""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+from loguru import logger
+
+_ORDER_COLUMNS = {"updated_at", "created_at", "message_count", "bytes", "key"}
+
+
+class SessionIndex:
+    """
+    Listing index maintained by SessionManager on save/delete.
+
+    The JSONL files stay the source of truth; `rebuild()` recreates the index
+    from them (e.g. after a crash between a file write and the index update).
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30.0)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                key           TEXT PRIMARY KEY,
+                path          TEXT NOT NULL,
+                created_at    TEXT NOT NULL,
+                updated_at    TEXT NOT NULL,
+                message_count INTEGER NOT NULL DEFAULT 0,
+                bytes         INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at);
+            """
+        )
+        self._conn.commit()
+
+    def upsert(
+        self,
+        key: str,
+        path: Path | str,
+        *,
+        created_at: str,
+        updated_at: str,
+        message_count: int,
+        size: int,
+    ) -> None:
+        """Set a session's row (absolute message count)."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (key, path, created_at, updated_at, message_count, bytes)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    path = excluded.path, updated_at = excluded.updated_at,
+                    message_count = excluded.message_count, bytes = excluded.bytes
+                """,
+                (key, str(path), created_at, updated_at, int(message_count), int(size)),
+            )
+            self._conn.commit()
+
+    def record_append(self, key: str, *, added: int, updated_at: str, size: int) -> bool:
+        """Bump a session's row after appending `added` messages. False if the key is not indexed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE sessions SET message_count = message_count + ?, updated_at = ?, bytes = ? WHERE key = ?",
+                (int(added), updated_at, int(size), key),
+            )
+            self._conn.commit()
+            return cur.rowcount > 0
+
+    def set_size(self, key: str, size: int) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE sessions SET bytes = ? WHERE key = ?", (int(size), key))
+            self._conn.commit()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0])
+
+    def list(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
+        """Sorted, paginated session rows."""
+        if order_by not in _ORDER_COLUMNS:
+            raise ValueError(f"order_by must be one of {sorted(_ORDER_COLUMNS)}")
+        sql = (
+            f"SELECT key, path, created_at, updated_at, message_count, bytes FROM sessions "
+            f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}, key ASC LIMIT ? OFFSET ?"
+        )
+        with self._lock:
+            rows = self._conn.execute(sql, (-1 if limit is None else int(limit), max(0, int(offset)))).fetchall()
+        return [dict(r) for r in rows]
+
+    def rebuild(self, paths: Iterable[Path]) -> int:
+        """Recreate the index from session files. Returns the number of sessions indexed."""
+        rows = []
+        for path in paths:
+            info = scan_session_file(path)
+            if info is not None:
+                rows.append(info)
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions")
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sessions (key, path, created_at, updated_at, message_count, bytes) "
+                "VALUES (:key, :path, :created_at, :updated_at, :message_count, :bytes)",
+                rows,
+            )
+            self._conn.commit()
+        logger.info(f"Rebuilt session index: {len(rows)} sessions")
+        return len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def scan_session_file(path: Path) -> dict[str, Any] | None:
+    """Read a session file fully and return its index row (None if unreadable)."""
+    try:
+        stat = path.stat()
+        key = path.stem.replace("_", ":")
+        created_at = updated_at = ""
+        count = 0
+        with open(path, "rb") as f:
+            for raw in f:
+                raw = raw.strip()
+                if not raw:
+                    continue
+                try:
+                    data = json.loads(raw)
+                except json.JSONDecodeError:
+                    continue
+                if data.get("_type") == "metadata":
+                    key = data.get("key") or key
+                    created_at = created_at or data.get("created_at") or ""
+                    updated_at = data.get("updated_at") or updated_at
+                else:
+                    count += 1
+                    updated_at = max(updated_at, data.get("timestamp") or "")
+        mtime = datetime.fromtimestamp(stat.st_mtime).isoformat()
+        return {
+            "key": key,
+            "path": str(path),
+            "created_at": created_at or mtime,
+            "updated_at": updated_at or mtime,
+            "message_count": count,
+            "bytes": stat.st_size,
+        }
+    except OSError as e:
+        logger.warning(f"Cannot index session file {path}: {e}")
+        return None
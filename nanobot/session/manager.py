@@ -1,6 +1,11 @@
 """Session management for conversation history."""
 
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -8,6 +13,7 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.session.index import SessionIndex, scan_session_file
 from nanobot.utils.helpers import ensure_dir, safe_filename
 
 
@@ -17,6 +23,9 @@ class Session:
     A conversation session.
     
     Stores messages in JSONL format for easy reading and persistence.
+    Sessions loaded from disk only hold the most recent messages in memory
+    (see `SessionManager.history_window`); `partial` is True when older
+    messages exist on disk but were not loaded.
     """
     
     key: str  # channel:chat_id
@@ -24,6 +33,16 @@ class Session:
     created_at: datetime = field(default_factory=datetime.now)
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
+    partial: bool = False
+    # Persistence bookkeeping (SessionManager): loaded messages already on disk,
+    # metadata in the file header / last written, superseded records in the file,
+    # pending full rewrite, approximate in-memory size.
+    _persisted: int = field(default=0, repr=False, compare=False)
+    _header_meta: str = field(default="{}", repr=False, compare=False)
+    _persisted_meta: str = field(default="{}", repr=False, compare=False)
+    _superseded: int = field(default=0, repr=False, compare=False)
+    _rewrite: bool = field(default=True, repr=False, compare=False)
+    _bytes: int = field(default=0, repr=False, compare=False)
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -56,19 +75,75 @@ class Session:
         """Clear all messages in the session."""
         self.messages = []
         self.updated_at = datetime.now()
+        self.partial = False
+        self._rewrite = True
+    
+    @property
+    def dirty(self) -> bool:
+        """True when the session has changes that are not on disk yet."""
+        return (
+            self._rewrite
+            or self._persisted != len(self.messages)
+            or json.dumps(self.metadata, sort_keys=True) != self._persisted_meta
+        )
+
+
+def _metadata_record(session: Session) -> dict[str, Any]:
+    return {
+        "_type": "metadata",
+        "key": session.key,
+        "created_at": session.created_at.isoformat(),
+        "updated_at": session.updated_at.isoformat(),
+        "metadata": session.metadata
+    }
 
 
 class SessionManager:
     """
     Manages conversation sessions.
     
-    Sessions are stored as JSONL files in the sessions directory.
+    Sessions are stored as append-only JSONL files in the sessions directory:
+    a metadata header record first, then one line per message. Saving appends
+    only the new messages; while the metadata differs from the header, each
+    save ends with a metadata trailer record (the last metadata record wins on
+    load). Files are fsynced in batches and compacted in the background once
+    enough superseded trailers pile up.
+    
+    Loaded sessions live in an LRU cache bounded by count and approximate
+    bytes; evicted sessions with unsaved changes are written first. Loading
+    reads the header and only the tail of the file (`history_window` messages).
     """
     
-    def __init__(self, workspace: Path):
+    # fsync appended data at most this often per manager (0 = on every save)
+    FSYNC_INTERVAL_S = 1.0
+    # Compact a file once it holds this many superseded metadata records
+    COMPACT_THRESHOLD = 32
+    _TAIL_BLOCK = 64 * 1024
+    
+    def __init__(
+        self,
+        workspace: Path,
+        sessions_dir: Path | None = None,
+        *,
+        max_cached_sessions: int = 256,
+        max_cache_bytes: int = 64 * 1024 * 1024,
+        history_window: int = 200,
+    ):
         self.workspace = workspace
-        self.sessions_dir = ensure_dir(Path.home() / ".fanfan" / "sessions")
-        self._cache: dict[str, Session] = {}
+        self.sessions_dir = ensure_dir(sessions_dir or Path.home() / ".fanfan" / "sessions")
+        self.max_cached_sessions = max(1, int(max_cached_sessions))
+        self.max_cache_bytes = max(0, int(max_cache_bytes))
+        self.history_window = max(1, int(history_window))
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._cache_sizes: dict[str, int] = {}
+        self._cache_bytes = 0
+        self.evictions = 0
+        self._io_lock = threading.Lock()
+        self._unsynced: set[Path] = set()
+        self._last_fsync = time.monotonic()
+        self._compactor: ThreadPoolExecutor | None = None
+        self._compacting: set[str] = set()
+        self.index = SessionIndex(self.sessions_dir / "index.db")
     
     def _get_session_path(self, key: str) -> Path:
         """Get the file path for a session."""
@@ -86,72 +161,312 @@ class SessionManager:
             The session.
         """
         # Check cache
-        if key in self._cache:
-            return self._cache[key]
+        session = self._cache.get(key)
+        if session is not None:
+            self._cache.move_to_end(key)
+            return session
         
         # Try to load from disk
         session = self._load(key)
         if session is None:
             session = Session(key=key)
         
-        self._cache[key] = session
+        self._cache_put(session)
         return session
     
+    # ── LRU cache ─────────────────────────────────────────────────
+    
+    def _cache_put(self, session: Session) -> None:
+        # Sizes are accounted per key: the session's _bytes grows as it is saved.
+        self._cache.pop(session.key, None)
+        self._cache_bytes -= self._cache_sizes.pop(session.key, 0)
+        self._cache[session.key] = session
+        self._cache_sizes[session.key] = session._bytes
+        self._cache_bytes += session._bytes
+        self._evict()
+    
+    def _evict(self) -> None:
+        """Drop least-recently-used sessions beyond the count/byte bounds (write-through)."""
+        while len(self._cache) > 1 and (
+            len(self._cache) > self.max_cached_sessions
+            or (self.max_cache_bytes and self._cache_bytes > self.max_cache_bytes)
+        ):
+            key, session = self._cache.popitem(last=False)
+            self._cache_bytes -= self._cache_sizes.pop(key, 0)
+            self.evictions += 1
+            if session.dirty and (session.messages or self._get_session_path(key).exists()):
+                self._write(session)
+    
+    def cache_stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self._cache),
+            "bytes": self._cache_bytes,
+            "max_sessions": self.max_cached_sessions,
+            "max_bytes": self.max_cache_bytes,
+            "evictions": self.evictions,
+        }
+    
+    # ── Loading ───────────────────────────────────────────────────
+    
     def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
+        """Load a session from disk: the header plus the last `history_window` messages."""
         path = self._get_session_path(key)
         
         if not path.exists():
             return None
         
         try:
-            messages = []
-            metadata = {}
-            created_at = None
+            with self._io_lock, open(path, "rb") as f:
+                header_line = f.readline()
+                header_end = f.tell()
+                tail_lines, reached_header = self._read_tail(f, header_end, self.history_window)
+            
+            header = self._parse_line(key, header_line)
+            if header is not None and header.get("_type") != "metadata":
+                # Header-less file: its first line is a message.
+                tail_lines = tail_lines if not reached_header else [header_line, *tail_lines]
+                header = None
             
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    data = json.loads(line)
-                    
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                    else:
-                        messages.append(data)
+            messages: list[dict[str, Any]] = []
+            nbytes = 0
+            trailer: dict[str, Any] | None = None
+            meta_records = 1 if header else 0
+            for raw in tail_lines:
+                data = self._parse_line(key, raw)
+                if data is None:
+                    continue
+                if data.get("_type") == "metadata":
+                    # Later trailer records win over the header.
+                    meta_records += 1
+                    trailer = data
+                else:
+                    messages.append(data)
+                    nbytes += len(raw)
+            partial = len(messages) > self.history_window or not reached_header
+            if len(messages) > self.history_window:
+                dropped = len(messages) - self.history_window
+                nbytes -= sum(len(json.dumps(m)) for m in messages[:dropped])
+                messages = messages[dropped:]
             
-            return Session(
+            header = header or {}
+            latest = trailer or header
+            metadata = latest.get("metadata", {}) or {}
+            created_at = datetime.fromisoformat(header["created_at"]) if header.get("created_at") else None
+            updated_at = datetime.fromisoformat(latest["updated_at"]) if latest.get("updated_at") else None
+            
+            session = Session(
                 key=key,
                 messages=messages,
                 created_at=created_at or datetime.now(),
-                metadata=metadata
+                updated_at=updated_at or created_at or datetime.now(),
+                metadata=metadata,
+                partial=partial,
             )
+            session._persisted = len(messages)
+            session._header_meta = json.dumps(header.get("metadata", {}) or {}, sort_keys=True)
+            session._persisted_meta = json.dumps(metadata, sort_keys=True)
+            session._superseded = max(0, meta_records - 1)
+            # A header-less file is rewritten on save, unless only its tail is loaded.
+            session._rewrite = not header and not partial
+            session._bytes = max(0, nbytes)
+            return session
         except Exception as e:
             logger.warning(f"Failed to load session {key}: {e}")
             return None
     
+    def _read_tail(self, f: Any, start: int, max_messages: int) -> tuple[list[bytes], bool]:
+        """
+        Read complete lines backwards from EOF until `max_messages` message
+        records (plus the trailing metadata record, if any) are collected.
+        
+        Returns:
+            (lines in file order, whether the scan reached `start`).
+        """
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        buf = b""
+        lines: list[bytes] = []
+        messages = 0
+        while pos > start:
+            size = min(self._TAIL_BLOCK, pos - start)
+            pos -= size
+            f.seek(pos)
+            buf = f.read(size) + buf
+            parts = buf.split(b"\n")
+            # parts[0] may be a partial line unless we reached the start.
+            buf = parts[0] if pos > start else b""
+            complete = parts[1:] if pos > start else parts
+            for raw in reversed(complete):
+                if not raw.strip():
+                    continue
+                lines.append(raw)
+                if not raw.lstrip().startswith(b'{"_type": "metadata"'):
+                    messages += 1
+            if messages > max_messages:
+                lines.reverse()
+                return lines, False
+        lines.reverse()
+        return lines, True
+    
+    @staticmethod
+    def _parse_line(key: str, raw: bytes) -> dict[str, Any] | None:
+        raw = raw.strip()
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            # Torn trailing append after a crash: skip it.
+            logger.warning(f"Skipping unreadable record in session {key}")
+            return None
+    
+    # ── Saving ────────────────────────────────────────────────────
+    
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
+        """
+        Persist a session: append new messages, or rewrite the file after `clear()`.
+        
+        Args:
+            session: The session to save.
+        """
+        self._write(session)
+        self._cache_put(session)
+        if session._superseded >= self.COMPACT_THRESHOLD:
+            self._schedule_compaction(session)
+    
+    def _write(self, session: Session) -> None:
         path = self._get_session_path(session.key)
+        meta_sig = json.dumps(session.metadata, sort_keys=True)
         
-        with open(path, "w") as f:
-            # Write metadata first
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            
-            # Write messages
-            for msg in session.messages:
+        with self._io_lock:
+            if session._rewrite or session._persisted > len(session.messages):
+                self._rewrite_file(path, session)
+            else:
+                new_messages = session.messages[session._persisted:]
+                lines = [json.dumps(m) for m in new_messages]
+                session._bytes += sum(len(line) for line in lines)
+                # While the metadata differs from the header, every append ends with a
+                # trailer record, so a tail read always finds the current metadata.
+                if (lines or meta_sig != session._persisted_meta) and meta_sig != session._header_meta:
+                    lines.append(json.dumps(_metadata_record(session)))
+                    session._superseded += 1
+                if lines:
+                    # One write per save keeps a crash from interleaving partial records.
+                    with open(path, "a") as f:
+                        f.write("\n".join(lines) + "\n")
+                    self._unsynced.add(path)
+                session._persisted += len(new_messages)
+                session._persisted_meta = meta_sig
+                if lines:
+                    self._index_append(path, session, len(new_messages))
+            session._rewrite = False
+            self._maybe_fsync()
+    
+    def _rewrite_file(self, path: Path, session: Session) -> None:
+        """Atomically replace a session file with the in-memory session (caller holds _io_lock)."""
+        messages = list(session.messages)
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w") as f:
+            f.write(json.dumps(_metadata_record(session)) + "\n")
+            for msg in messages:
                 f.write(json.dumps(msg) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._unsynced.discard(path)
+        session._persisted = len(messages)
+        session._header_meta = session._persisted_meta = json.dumps(session.metadata, sort_keys=True)
+        session._superseded = 0
+        session._bytes = sum(len(json.dumps(m)) for m in messages)
+        self.index.upsert(
+            session.key,
+            path,
+            created_at=session.created_at.isoformat(),
+            updated_at=session.updated_at.isoformat(),
+            message_count=len(messages),
+            size=path.stat().st_size,
+        )
+    
+    def _index_append(self, path: Path, session: Session, added: int) -> None:
+        size = path.stat().st_size
+        if not self.index.record_append(session.key, added=added, updated_at=session.updated_at.isoformat(), size=size):
+            # File predates the index (or the index was lost): count it once.
+            info = scan_session_file(path)
+            if info is not None:
+                self.index.upsert(
+                    session.key,
+                    path,
+                    created_at=info["created_at"],
+                    updated_at=session.updated_at.isoformat(),
+                    message_count=info["message_count"],
+                    size=size,
+                )
+    
+    def _maybe_fsync(self, force: bool = False) -> None:
+        """fsync files with appended data, batched to once per FSYNC_INTERVAL_S (caller holds _io_lock)."""
+        now = time.monotonic()
+        if not self._unsynced or (not force and now - self._last_fsync < self.FSYNC_INTERVAL_S):
+            return
+        for path in list(self._unsynced):
+            try:
+                fd = os.open(path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                logger.warning(f"fsync failed for {path}: {e}")
+        self._unsynced.clear()
+        self._last_fsync = now
+    
+    def flush(self) -> None:
+        """Write dirty cached sessions and fsync any appended data that is still pending."""
+        for session in list(self._cache.values()):
+            if session.dirty and (session.messages or self._get_session_path(session.key).exists()):
+                self._write(session)
+        with self._io_lock:
+            self._maybe_fsync(force=True)
+    
+    # ── Compaction ────────────────────────────────────────────────
+    
+    def _schedule_compaction(self, session: Session) -> None:
+        if session.key in self._compacting:
+            return
+        self._compacting.add(session.key)
+        if self._compactor is None:
+            self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-compact")
+        self._compactor.submit(self._compact, session)
+    
+    def _compact(self, session: Session) -> None:
+        """Rewrite a session file without superseded records (runs on the compaction thread).
         
-        self._cache[session.key] = session
+        Streams the file rather than using `session.messages`, which may hold only the tail.
+        """
+        path = self._get_session_path(session.key)
+        tmp = path.with_suffix(".jsonl.tmp")
+        try:
+            with self._io_lock:
+                if not path.exists() or session._superseded < self.COMPACT_THRESHOLD:
+                    return
+                with open(path, "rb") as src, open(tmp, "wb") as dst:
+                    dst.write(json.dumps(_metadata_record(session)).encode() + b"\n")
+                    for raw in src:
+                        data = self._parse_line(session.key, raw)
+                        if data is None or data.get("_type") == "metadata":
+                            continue
+                        dst.write(raw if raw.endswith(b"\n") else raw + b"\n")
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.replace(tmp, path)
+                self._unsynced.discard(path)
+                self.index.set_size(session.key, path.stat().st_size)
+                session._header_meta = session._persisted_meta = json.dumps(session.metadata, sort_keys=True)
+                session._superseded = 0
+                logger.debug(f"Compacted session {session.key}")
+        except Exception as e:
+            logger.warning(f"Failed to compact session {session.key}: {e}")
+        finally:
+            self._compacting.discard(session.key)
     
     def delete(self, key: str) -> bool:
         """
@@ -165,38 +480,48 @@ class SessionManager:
         """
         # Remove from cache
         self._cache.pop(key, None)
+        self._cache_bytes -= self._cache_sizes.pop(key, 0)
         
         # Remove file
         path = self._get_session_path(key)
-        if path.exists():
-            path.unlink()
-            return True
+        with self._io_lock:
+            self._unsynced.discard(path)
+            self.index.remove(key)
+            if path.exists():
+                path.unlink()
+                return True
         return False
     
-    def list_sessions(self) -> list[dict[str, Any]]:
+    def list_sessions(
+        self,
+        limit: int | None = None,
+        offset: int = 0,
+        order_by: str = "updated_at",
+        descending: bool = True,
+    ) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List sessions from the index (no session files are opened).
+        
+        Args:
+            limit: Maximum rows to return (None for all).
+            offset: Rows to skip, for pagination.
+            order_by: updated_at, created_at, message_count, bytes or key.
+            descending: Sort direction.
         
         Returns:
-            List of session info dicts.
+            List of session info dicts (key, created_at, updated_at, message_count, bytes, path).
+        """
+        if self.index.count() == 0 and next(self.sessions_dir.glob("*.jsonl"), None) is not None:
+            # First run with pre-existing session files.
+            self.rebuild_index()
+        return self.index.list(limit=limit, offset=offset, order_by=order_by, descending=descending)
+    
+    def rebuild_index(self) -> int:
         """
-        sessions = []
+        Recreate the session index by scanning every session file.
         
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        Returns:
+            Number of sessions indexed.
+        """
+        with self._io_lock:
+            return self.index.rebuild(sorted(self.sessions_dir.glob("*.jsonl")))
@@ -14,26 +14,48 @@ import os
 import difflib
 import json
 import mimetypes
+import sqlite3
 import time
 import uuid
+import zlib
 from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
 from pathlib import Path
-from typing import Any
+from typing import Annotated, Any
 
-import httpx
-from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi import FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from loguru import logger
 from pydantic import BaseModel, Field
 
+from nanobot.agent.tools.code_search import FS_IGNORE_DIRS
 from nanobot.config.loader import get_config_path, load_config, save_config
-from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.providers.cache import response_cache_stats
+from nanobot.providers.governor import governor_stats
+from nanobot.providers.resilience import breaker_states, stream_stats
+from nanobot.web.compression import CompressionMiddleware, PrecompressedStaticFiles
 from nanobot.web.database import Database
-from nanobot.web.event_bus import EventBus
+from nanobot.web.event_bus import EventBus, EventFilter
+from nanobot.web.fs_tree import FsTreeService
+from nanobot.web.notifier import make_notifier
 from nanobot.web.permissions import PermissionManager
+from nanobot.web.proxy import UpstreamProxy
 from nanobot.web.runner import FanfanWebRunner
+from nanobot.web.scheduler import SchedulerFullError, TurnScheduler
+from nanobot.web.search import search as search_documents
 from nanobot.web.settings import WebSettings, repo_root
+from nanobot.web.snapshots import materialize_turn, replay_events, snapshot_view, turn_snapshots
+from nanobot.web.turns import (
+    LLMNotConfiguredError,
+    build_session_runner,
+    effective_model,
+    execute_turn,
+    model_configured,
+    publish_turn_error,
+)
+from nanobot.web.ws import WsMultiplexer, decode_frame, encode_frame, negotiate_format
 
 
 APP_VERSION = "0.4.3"
@@ -121,8 +143,6 @@ def create_app() -> FastAPI:
         # Copy legacy DB into the instance-local DB path to preserve history without
         # mutating the shared legacy file (safer for multi-instance deployments).
         try:
-            import sqlite3
-
             src = sqlite3.connect(str(legacy_global))
             dst = sqlite3.connect(str(db_path))
             src.backup(dst)
@@ -132,7 +152,14 @@ def create_app() -> FastAPI:
             pass
 
     db = Database(db_path)
-    bus = EventBus(db)
+    if not db.search_available:
+        logger.warning(f"SQLite {sqlite3.sqlite_version} lacks FTS5/trigram; /api/v2/search is disabled")
+    # Worker mode publishes events from other processes, so it always needs the cross-process notifier.
+    notifier_kind = "sqlite" if settings.turn_execution == "worker" else settings.event_notifier
+    bus = EventBus(
+        db,
+        notifier=make_notifier(notifier_kind, db_path, poll_interval_s=settings.event_poll_interval_s),
+    )
     permissions = PermissionManager(db=db, settings=settings)
 
     def _load_cfg():
@@ -160,47 +187,39 @@ def create_app() -> FastAPI:
         return bool(_any_provider_key(cfg) or cfg.agents.defaults.model.startswith("bedrock/"))
 
     def _effective_model(cfg, session_id: str) -> tuple[str, str | None, str]:
-        default_model = cfg.agents.defaults.model
-        override = db.get_session_model_override(session_id) if session_id else None
-        effective = override or default_model
-        return effective, override, default_model
-
-    def _make_provider(cfg, model: str) -> LiteLLMProvider:
-        return LiteLLMProvider(
-            api_key=cfg.get_api_key(model),
-            api_base=cfg.get_api_base(model),
-            default_model=model,
-        )
+        return effective_model(cfg, db, session_id)
+
+    _llm_not_configured = HTTPException(
+        status_code=503,
+        detail=(
+            "LLM not configured. Open Settings and add a provider API key (e.g. GLM/Z.ai), "
+            "then retry."
+        ),
+    )
 
     def _make_runner_for_session(session_id: str) -> tuple[FanfanWebRunner, str]:
-        cfg = _load_cfg()
-        model, _override, _default = _effective_model(cfg, session_id)
-        api_key = cfg.get_api_key(model)
-        is_bedrock = model.startswith("bedrock/")
-        if not api_key and not is_bedrock:
-            raise HTTPException(
-                status_code=503,
-                detail=(
-                    "LLM not configured. Open Settings and add a provider API key (e.g. GLM/Z.ai), "
-                    "then retry."
-                ),
+        try:
+            return build_session_runner(
+                db=db, bus=bus, permissions=permissions, settings=settings, session_id=session_id
             )
-
-        provider = _make_provider(cfg, model)
-        runner = FanfanWebRunner(
-            db=db,
-            bus=bus,
-            permissions=permissions,
-            provider=provider,
-            settings=settings,
-            model=model,
-            max_iterations=cfg.agents.defaults.max_tool_iterations,
-            brave_api_key=cfg.tools.web.search.api_key or None,
+        except LLMNotConfiguredError:
+            raise _llm_not_configured
+
+    worker_mode = settings.turn_execution == "worker"
+    web_workers = int(os.environ.get("WEB_CONCURRENCY") or 1)
+    if not worker_mode and (settings.event_notifier == "sqlite" or web_workers > 1):
+        # The turn scheduler, cancel handles and pending permission prompts live in this
+        # process; a cancel or approval that reaches another web worker would be lost.
+        logger.warning(
+            "Multiple web processes need FANFAN_TURN_EXECUTION=worker: with inprocess turns, cancel "
+            "requests and permission replies only reach the process running the turn. Run "
+            "`fanfan worker` with FANFAN_TURN_EXECUTION=worker, or keep a single web process."
         )
-        return runner, model
-
-    running_tasks: dict[str, asyncio.Task[None]] = {}
-    sessions_lock = asyncio.Lock()
+    scheduler = TurnScheduler(
+        max_concurrent=settings.turn_max_concurrent,
+        max_queue_per_session=settings.turn_max_queue_per_session,
+        max_queue_total=settings.turn_max_queue_total,
+    )
 
     app = FastAPI(title="fanfan web api", version=APP_VERSION)
     app.add_middleware(
@@ -210,6 +229,14 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    if settings.compression_enabled:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.compression_min_bytes,
+            gzip_level=settings.compression_gzip_level,
+            brotli_quality=settings.compression_brotli_quality,
+            compress_sse=settings.compression_sse,
+        )
 
     @app.middleware("http")
     async def _security_headers(request: Request, call_next):
@@ -219,6 +246,10 @@ def create_app() -> FastAPI:
         resp.headers.setdefault("X-Content-Type-Options", "nosniff")
         return resp
 
+    @app.on_event("shutdown")
+    async def _close_event_bus() -> None:
+        await bus.close()
+
     # ── Demo session (startup) ───────────────────────────────────
 
     @app.on_event("startup")
@@ -341,6 +372,7 @@ def create_app() -> FastAPI:
             )
             db.finish_step(step_id, status="completed")
             db.add_message(demo_session_id, "assistant", demo_assistant)
+            materialize_turn(db, turn["id"])
         except Exception:
             # Demo should never block server startup.
             return
@@ -414,6 +446,17 @@ cp ./config.example.json ~/.fanfan/config.json
             "ui_mode": settings.ui_mode,
         }
 
+    def _turn_stats() -> dict[str, Any]:
+        if not worker_mode:
+            return scheduler.stats()
+        queue = db.turn_queue_summary()
+        return {
+            "mode": "worker",
+            "running": sum(v["running"] for v in queue.values()),
+            "queued": sum(v["queue_depth"] for v in queue.values()),
+            "sessions_waiting": sum(1 for v in queue.values() if v["queue_depth"]),
+        }
+
     @app.get("/api/v2/health")
     async def health_v2() -> dict[str, Any]:
         return {
@@ -422,6 +465,13 @@ cp ./config.example.json ~/.fanfan/config.json
             "version": APP_VERSION,
             "llm_configured": _llm_configured(),
             "db_path": str(settings.resolved_db_path()),
+            "turns": _turn_stats(),
+            "llm": {
+                "breakers": breaker_states(),
+                "governors": governor_stats(),
+                "streams": stream_stats(),
+                "cache": response_cache_stats(),
+            },
         }
 
     # Legacy health path
@@ -600,14 +650,111 @@ cp ./config.example.json ~/.fanfan/config.json
 
     # ── Sessions (v1 + v2) ───────────────────────────────────────
 
+    def _worker_queue_status(summary: dict[str, Any] | None) -> dict[str, Any] | None:
+        if not summary:
+            return None
+        oldest = summary.get("oldest_enqueued_at")
+        return {
+            "status": "running" if summary["running"] else "queued",
+            "queue_depth": summary["queue_depth"],
+            "queue_wait_s": round(max(0.0, time.time() - oldest), 3) if oldest else 0.0,
+        }
+
+    # ── Conditional requests (ETag / Last-Modified) ──────────────
+
+    def _etag_matches(request: Request, etag: str) -> bool:
+        # Weak comparison: compressed responses carry W/ versions of strong ETags.
+        header = request.headers.get("if-none-match") or ""
+        if not header:
+            return False
+        bare = etag.removeprefix("W/")
+        return any(tag.strip() == "*" or tag.strip().removeprefix("W/") == bare for tag in header.split(","))
+
+    def _validator_headers(etag: str, last_modified: float | None = None) -> dict[str, str]:
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        # HTTP dates have 1s resolution: only advertise Last-Modified once that second is over,
+        # so a later change can never carry the same date.
+        if last_modified and last_modified < time.time() - 1:
+            headers["Last-Modified"] = formatdate(int(last_modified), usegmt=True)
+        return headers
+
+    def _not_modified(request: Request, etag: str, last_modified: float | None = None) -> Response | None:
+        """304 response if the client's validators still match, else None."""
+        if request.headers.get("if-none-match") is not None:
+            hit = _etag_matches(request, etag)
+        elif last_modified and request.headers.get("if-modified-since"):
+            try:
+                since = parsedate_to_datetime(request.headers["if-modified-since"]).timestamp()
+                hit = int(last_modified) <= since and last_modified < time.time() - 1
+            except (TypeError, ValueError):
+                hit = False
+        else:
+            hit = False
+        if hit:
+            return Response(status_code=304, headers=_validator_headers(etag, last_modified))
+        return None
+
+    def _session_validators(scope: str) -> tuple[str, float]:
+        """ETag and last-change time from the per-session generation (bumped by DB triggers)."""
+        gen, updated_at = db.get_generation(scope)
+        return f'W/"g{db.generation_salt():x}-{gen}"', float(updated_at)
+
+    def _conditional(request: Request, response: Response, scope: str) -> Response | None:
+        etag, last_modified = _session_validators(scope)
+        cached = _not_modified(request, etag, last_modified)
+        if cached is None:
+            response.headers.update(_validator_headers(etag, last_modified))
+        return cached
+
+    def _session_list_validators() -> tuple[str, float] | None:
+        # The list merges runtime status; queue_wait_s keeps changing while anything is queued,
+        # so only offer validators when nothing is waiting.
+        if worker_mode:
+            if any(q.get("queue_depth") for q in db.turn_queue_summary().values()):
+                return None
+            runtime = ""  # running/claimed state lives in turn_queue, which bumps the "*" generation
+        else:
+            if scheduler.queued_total():
+                return None
+            runtime = ",".join(scheduler.running_sessions())
+        gen, updated_at = db.get_generation("*")
+        return f'W/"l{db.generation_salt():x}-{gen}-{zlib.crc32(runtime.encode()):x}"', float(updated_at)
+
+    # ── Keyset pagination ────────────────────────────────────────
+
+    def _wants_page(*params: Any) -> bool:
+        # Without before/after/limit, list endpoints keep returning their original bare lists.
+        return any(p is not None for p in params)
+
+    def _paged(
+        fetch: Any,
+        *args: Any,
+        before: str | None,
+        after: str | None,
+        limit: int | None,
+        default_limit: int,
+    ) -> dict[str, Any]:
+        try:
+            return fetch(*args, before=before, after=after, limit=max(1, min(limit or default_limit, 500)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     def _session_status(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
-        # Merge runtime status from running_tasks
+        # Merge runtime status (running/queued, queue depth and wait) from the scheduler,
+        # or from the SQLite turn queue in worker mode.
+        queue = db.turn_queue_summary() if worker_mode else {}
         out = []
         for item in items:
             d = dict(item)
-            t = running_tasks.get(d["id"])
-            if t and not t.done():
-                d["status"] = "running"
+            if worker_mode:
+                runtime = _worker_queue_status(queue.get(d["id"]))
+            else:
+                runtime = scheduler.session_status(d["id"])
+            if runtime:
+                d.update(runtime)
+            else:
+                d["queue_depth"] = 0
+                d["queue_wait_s"] = 0.0
             out.append(d)
         return out
 
@@ -618,17 +765,67 @@ cp ./config.example.json ~/.fanfan/config.json
         return db.create_session(session_id, title)
 
     @app.get("/api/v2/sessions")
-    async def list_sessions_v2() -> list[dict[str, Any]]:
-        return _session_status(db.list_sessions())
+    async def list_sessions_v2(
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
+        validators = _session_list_validators()
+        if validators is not None:
+            cached = _not_modified(request, *validators)
+            if cached is not None:
+                return cached
+            response.headers.update(_validator_headers(*validators))
+        if not _wants_page(before, after, limit):
+            return _session_status(db.list_sessions())
+        page = _paged(db.list_sessions_page, before=before, after=after, limit=limit, default_limit=50)
+        page["items"] = _session_status(page["items"])
+        return page
 
     @app.get("/api/v2/sessions/{session_id}")
-    async def get_session_v2(session_id: str) -> dict[str, Any]:
+    async def get_session_v2(
+        session_id: str,
+        request: Request,
+        response: Response,
+        messages_limit: int | None = None,
+    ) -> Any:
+        """With `messages_limit`, only the newest messages are embedded; page back via /messages."""
+        if not db.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session not found")
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
         record = db.get_session(session_id)
         if not record:
             raise HTTPException(status_code=404, detail="session not found")
-        record["messages"] = db.get_messages(session_id)
+        if messages_limit is None:
+            record["messages"] = db.get_messages(session_id)
+        else:
+            page = _paged(db.get_messages_page, session_id, before=None, after=None, limit=messages_limit, default_limit=100)
+            record["messages"] = page["items"]
+            record["messages_has_more"] = page["has_more"]
+            record["messages_before"] = page["before"]
         return record
 
+    @app.get("/api/v2/sessions/{session_id}/messages")
+    async def list_messages_v2(
+        session_id: str,
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
+        """Messages oldest first; without a cursor, the newest `limit` (default 100)."""
+        if not db.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session not found")
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
+        return _paged(db.get_messages_page, session_id, before=before, after=after, limit=limit, default_limit=100)
+
     @app.get("/api/v2/sessions/{session_id}/model")
     async def get_session_model_v2(session_id: str) -> dict[str, Any]:
         if not db.session_exists(session_id):
@@ -801,10 +998,10 @@ cp ./config.example.json ~/.fanfan/config.json
     async def delete_session_v2(session_id: str) -> dict[str, Any]:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        async with sessions_lock:
-            task = running_tasks.pop(session_id, None)
-            if task and not task.done():
-                task.cancel()
+        if worker_mode:
+            db.request_turn_cancel(session_id)
+        else:
+            scheduler.cancel(session_id)
         db.delete_session(session_id)
         return {"deleted": True}
 
@@ -814,12 +1011,12 @@ cp ./config.example.json ~/.fanfan/config.json
         return await create_session_v2(payload)
 
     @app.get("/api/v1/sessions")
-    async def list_sessions_v1() -> list[dict[str, Any]]:
-        return await list_sessions_v2()
+    async def list_sessions_v1(request: Request, response: Response) -> Any:
+        return await list_sessions_v2(request, response)
 
     @app.get("/api/v1/sessions/{session_id}")
-    async def get_session_v1(session_id: str) -> dict[str, Any]:
-        return await get_session_v2(session_id)
+    async def get_session_v1(session_id: str, request: Request, response: Response) -> Any:
+        return await get_session_v2(session_id, request, response)
 
     @app.patch("/api/v1/sessions/{session_id}")
     async def patch_session_v1(session_id: str, payload: SessionPatchRequest) -> dict[str, Any]:
@@ -829,106 +1026,112 @@ cp ./config.example.json ~/.fanfan/config.json
     async def delete_session_v1(session_id: str) -> dict[str, Any]:
         return await delete_session_v2(session_id)
 
-    # ── Auto-naming helper ────────────────────────────────────────
-
-    async def _auto_name_session(session_id: str, user_text: str) -> None:
+    # ── Search ───────────────────────────────────────────────────
+
+    @app.get("/api/v2/search")
+    async def search_v2(
+        q: str,
+        session_id: str | None = None,
+        kinds: Annotated[list[str] | None, Query()] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        """
+        Ranked full-text hits across sessions.
+
+        `kinds` (comma-separated) narrows to session / message / turn / final /
+        tool. Each hit carries its session and turn anchors plus an HTML-escaped
+        `snippet` with matches in `<mark>`.
+        """
+        if not db.search_available:
+            raise HTTPException(status_code=501, detail="search needs SQLite with FTS5 and the trigram tokenizer (3.34+)")
+        if session_id and not db.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session not found")
         try:
-            cfg = _load_cfg()
-            eff_model, _override, _default = _effective_model(cfg, session_id)
-            api_key = cfg.get_api_key(eff_model)
-            is_bedrock = eff_model.startswith("bedrock/")
-            if not api_key and not is_bedrock:
-                return
-
-            provider = _make_provider(cfg, eff_model)
-
-            naming_messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "Generate a short chat title (4-12 characters) for the following user message. "
-                        "Reply with ONLY the title, no quotes, no explanation. "
-                        "If the message is in Chinese, reply in Chinese. "
-                        "If the message is in English, reply in English."
-                    ),
-                },
-                {"role": "user", "content": user_text[:200]},
-            ]
-            resp = await provider.chat(messages=naming_messages, tools=[], model=eff_model)
-            title = (resp.content or "").strip().strip('"').strip("'")[:30]
-            if not title:
-                title = user_text[:20].strip()
-        except Exception:
-            title = user_text[:20].strip()
-        if title:
-            db.update_session_title(session_id, title)
+            result = search_documents(
+                db,
+                q,
+                session_id=session_id,
+                kinds=[k.strip() for raw in kinds or [] for k in raw.split(",") if k.strip()] or None,
+                limit=max(1, min(limit, 100)),
+                offset=max(0, offset),
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"query": q, **result}
 
     # ── Turns / Agent Runs ────────────────────────────────────────
 
+    def _check_worker_queue(session_id: str) -> None:
+        """Admission control for worker mode (queue lives in SQLite)."""
+        summary = db.turn_queue_summary()
+        total = sum(v["queue_depth"] for v in summary.values())
+        mine = summary.get(session_id, {}).get("queue_depth", 0)
+        busy = summary.get(session_id, {}).get("running", 0) or total
+        if not busy:
+            return
+        reason = ""
+        if settings.turn_max_queue_per_session and mine >= settings.turn_max_queue_per_session:
+            reason = "too many queued messages for this session"
+        elif settings.turn_max_queue_total and total >= settings.turn_max_queue_total:
+            reason = "server is busy"
+        if reason:
+            retry_after = max(1, int(10 * total / max(1, settings.turn_max_concurrent)))
+            raise HTTPException(status_code=429, detail=reason, headers={"Retry-After": str(retry_after)})
+
     async def _start_turn(session_id: str, content: str) -> dict[str, Any]:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
 
-        async with sessions_lock:
-            existing = running_tasks.get(session_id)
-            if existing and not existing.done():
-                raise HTTPException(status_code=409, detail="session is busy")
-
-        runner_, effective_model = _make_runner_for_session(session_id)
+        if worker_mode:
+            # Thin front end: validate, persist a queued-turn row, let `fanfan worker` run it.
+            _check_worker_queue(session_id)
+            cfg = _load_cfg()
+            effective, _override, _default = _effective_model(cfg, session_id)
+            if not model_configured(cfg, effective):
+                raise _llm_not_configured
+            turn = db.create_turn(session_id, content)
+            db.enqueue_turn(turn["id"], session_id)
+            db.touch_session(session_id)
+            depth = db.turn_queue_summary(session_id).get(session_id, {})
+            return {
+                "accepted": True,
+                "session_id": session_id,
+                "turn_id": turn["id"],
+                "model": effective,
+                "queued": True,
+                "queue_position": int(depth.get("queue_depth", 1)),
+            }
 
-        # Persist user message (history)
-        db.add_message(session_id, "user", content)
-        db.touch_session(session_id)
+        try:
+            scheduler.check_admission(session_id)
+        except SchedulerFullError as exc:
+            raise HTTPException(
+                status_code=429,
+                detail=str(exc),
+                headers={"Retry-After": str(exc.retry_after_s)},
+            )
 
-        # Auto-name on first user message
-        messages = db.get_messages(session_id)
-        user_count = len([m for m in messages if m["role"] == "user"])
-        is_first = user_count == 1
+        runner_, effective_model_ = _make_runner_for_session(session_id)
 
         # Create turn record (v2)
         turn = db.create_turn(session_id, content)
         turn_id = turn["id"]
+        db.touch_session(session_id)
 
         async def run_turn_task() -> None:
-            try:
-                if is_first:
-                    asyncio.create_task(_auto_name_session(session_id, content))
-
-                assistant_text = await runner_.run_turn(session_id=session_id, turn_id=turn_id, user_text=content)
-                if assistant_text:
-                    db.add_message(session_id, "assistant", assistant_text)
-            except asyncio.CancelledError:
-                # Emit a lightweight error event for UI visibility.
-                step = db.create_step(turn_id, idx=9999)
-                await bus.publish(
-                    session_id=session_id,
-                    turn_id=turn_id,
-                    step_id=step["id"],
-                    type="error",
-                    payload={"code": "CANCELLED", "message": "Run cancelled by user"},
-                )
-                db.finish_step(step["id"], status="error")
-                raise
-            except Exception as exc:
-                step = db.create_step(turn_id, idx=9999)
-                await bus.publish(
-                    session_id=session_id,
-                    turn_id=turn_id,
-                    step_id=step["id"],
-                    type="error",
-                    payload={"code": "TURN_ERROR", "message": str(exc)},
-                )
-                db.finish_step(step["id"], status="error")
-            finally:
-                async with sessions_lock:
-                    running_tasks.pop(session_id, None)
-                db.touch_session(session_id)
+            await execute_turn(db=db, bus=bus, runner=runner_, session_id=session_id, turn_id=turn_id, content=content)
 
-        task = asyncio.create_task(run_turn_task())
-        async with sessions_lock:
-            running_tasks[session_id] = task
+        placement = scheduler.submit(session_id, turn_id, run_turn_task)
 
-        return {"accepted": True, "session_id": session_id, "turn_id": turn_id, "model": effective_model}
+        return {
+            "accepted": True,
+            "session_id": session_id,
+            "turn_id": turn_id,
+            "model": effective_model_,
+            "queued": placement["queued"],
+            "queue_position": placement["position"],
+        }
 
     @app.post("/api/v2/sessions/{session_id}/turns")
     async def create_turn_v2(session_id: str, payload: TurnCreateRequest) -> dict[str, Any]:
@@ -940,10 +1143,57 @@ cp ./config.example.json ~/.fanfan/config.json
         return await _start_turn(session_id, payload.content)
 
     @app.get("/api/v2/sessions/{session_id}/turns")
-    async def list_turns_v2(session_id: str) -> list[dict[str, Any]]:
+    async def list_turns_v2(
+        session_id: str,
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return db.list_turns(session_id)
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
+        if not _wants_page(before, after, limit):
+            return db.list_turns(session_id)
+        return _paged(db.list_turns_page, session_id, before=before, after=after, limit=limit, default_limit=50)
+
+    @app.get("/api/v2/sessions/{session_id}/history")
+    async def session_history_v2(
+        session_id: str,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Turns oldest first (newest page by default) for rendering history.
+
+        Finished turns carry their materialized `snapshot` (final text, thinking,
+        tool calls, diffs, usage); a turn still in progress carries its raw
+        `events` instead. `head_id` is where a live `/event?since=` picks up.
+        """
+        if not db.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session not found")
+        head = bus.latest_event_id(session_id)
+        page = _paged(
+            lambda sid, **kw: db.list_turns_page(sid, newest_first=False, **kw),
+            session_id,
+            before=before,
+            after=after,
+            limit=limit,
+            default_limit=20,
+        )
+        snaps = turn_snapshots(db, [t["id"] for t in page["items"]])
+        items = []
+        for turn in page["items"]:
+            row = snaps.get(turn["id"])
+            if row is not None:
+                items.append({**turn, "snapshot": snapshot_view(row)})
+            else:
+                items.append({**turn, "snapshot": None, "events": db.get_turn_events(turn["id"])})
+        return {**page, "items": items, "head_id": head}
 
     @app.get("/api/v2/turns/{turn_id}")
     async def get_turn_v2(turn_id: str) -> dict[str, Any]:
@@ -952,6 +1202,16 @@ cp ./config.example.json ~/.fanfan/config.json
             raise HTTPException(status_code=404, detail="turn not found")
         return rec
 
+    @app.get("/api/v2/turns/{turn_id}/snapshot")
+    async def get_turn_snapshot_v2(turn_id: str, events: bool = False) -> dict[str, Any]:
+        """Materialized view of a finished turn (`events=true` adds its compacted event list)."""
+        if not db.get_turn(turn_id):
+            raise HTTPException(status_code=404, detail="turn not found")
+        row = turn_snapshots(db, [turn_id]).get(turn_id)
+        if row is None:
+            raise HTTPException(status_code=409, detail="turn in progress")
+        return snapshot_view(row, include_events=events)
+
     @app.get("/api/v2/turns/{turn_id}/steps")
     async def list_steps_v2(turn_id: str) -> list[dict[str, Any]]:
         if not db.get_turn(turn_id):
@@ -964,12 +1224,17 @@ cp ./config.example.json ~/.fanfan/config.json
     async def cancel_v2(session_id: str) -> dict[str, Any]:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        async with sessions_lock:
-            task = running_tasks.get(session_id)
-            if task and not task.done():
-                task.cancel()
-                running_tasks.pop(session_id, None)
-                return {"cancelled": True}
+        if worker_mode:
+            # Workers see cancel_requested on their next lease heartbeat.
+            running, dropped = db.request_turn_cancel(session_id)
+            cancelled = running > 0
+        else:
+            cancelled, queued = scheduler.cancel(session_id)
+            dropped = [item.turn_id for item in queued]
+        for turn_id in dropped:
+            await publish_turn_error(db, bus, session_id, turn_id, "CANCELLED", "Queued message cancelled by user")
+        if cancelled or dropped:
+            return {"cancelled": True, "dropped": len(dropped)}
         return {"cancelled": False, "reason": "no active run"}
 
     @app.post("/api/v1/sessions/{session_id}/cancel")
@@ -1127,22 +1392,58 @@ cp ./config.example.json ~/.fanfan/config.json
     # ── Artifacts for Inspector ───────────────────────────────────
 
     @app.get("/api/v2/sessions/{session_id}/file_changes")
-    async def list_file_changes(session_id: str) -> list[dict[str, Any]]:
+    async def list_file_changes(
+        session_id: str,
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return db.list_file_changes(session_id)
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
+        if not _wants_page(before, after, limit):
+            return db.list_file_changes(session_id)
+        return _paged(db.list_file_changes_page, session_id, before=before, after=after, limit=limit, default_limit=50)
 
     @app.get("/api/v2/sessions/{session_id}/terminal")
-    async def list_terminal(session_id: str) -> list[dict[str, Any]]:
+    async def list_terminal(
+        session_id: str,
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return db.list_terminal_chunks(session_id)
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
+        if not _wants_page(before, after, limit):
+            return db.list_terminal_chunks(session_id)
+        return _paged(db.list_terminal_chunks_page, session_id, before=before, after=after, limit=limit, default_limit=500)
 
     @app.get("/api/v2/sessions/{session_id}/context")
-    async def list_context(session_id: str) -> list[dict[str, Any]]:
+    async def list_context(
+        session_id: str,
+        request: Request,
+        response: Response,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return db.list_context_items(session_id)
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
+        if not _wants_page(before, after, limit):
+            return db.list_context_items(session_id)
+        return _paged(db.list_context_items_page, session_id, before=before, after=after, limit=limit, default_limit=100)
 
     @app.post("/api/v2/sessions/{session_id}/context/pin")
     async def pin_context(session_id: str, payload: ContextPinRequest) -> dict[str, Any]:
@@ -1217,20 +1518,7 @@ cp ./config.example.json ~/.fanfan/config.json
 
     fs_root = settings.resolved_fs_root().expanduser().resolve()
 
-    _FS_IGNORE_DIRS = {
-        ".git",
-        ".hg",
-        ".svn",
-        ".venv",
-        "node_modules",
-        "__pycache__",
-        "dist",
-        "build",
-        ".mypy_cache",
-        ".ruff_cache",
-        ".pytest_cache",
-        "data",
-    }
+    _FS_IGNORE_DIRS = FS_IGNORE_DIRS
 
     def _resolve_fs_path(raw: str) -> Path:
         if not raw:
@@ -1257,49 +1545,67 @@ cp ./config.example.json ~/.fanfan/config.json
         except Exception:
             return str(p)
 
-    def _walk_fs_tree(max_files: int = 5000) -> tuple[list[dict[str, Any]], bool]:
-        items: list[dict[str, Any]] = []
-        truncated = False
-
-        for dirpath, dirnames, filenames in os.walk(fs_root):
-            dirnames[:] = [
-                d
-                for d in dirnames
-                if d not in _FS_IGNORE_DIRS and not d.startswith(".")
-            ]
+    fs_tree_service = FsTreeService(
+        fs_root,
+        ignore_dirs=_FS_IGNORE_DIRS,
+        rescan_interval_s=settings.fs_tree_rescan_s,
+    )
 
-            for fn in sorted(filenames):
-                if fn.startswith("."):
-                    continue
-                full = Path(dirpath) / fn
-                try:
-                    rel = _rel_fs_path(full)
-                    if not rel or rel.startswith(".."):
-                        continue
-                    st = full.stat()
-                    items.append({"path": rel, "size": int(st.st_size), "mtime": float(st.st_mtime)})
-                except Exception:
-                    continue
+    def _fs_dir(raw: str) -> str:
+        p = _resolve_fs_path(raw) if raw not in ("", ".") else fs_root
+        try:
+            return fs_tree_service.rel_path(p)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="path is outside allowed root")
 
-                if len(items) >= max_files:
-                    truncated = True
-                    break
+    @app.get("/api/v2/sessions/{session_id}/fs/tree")
+    async def fs_tree(
+        session_id: str,
+        request: Request,
+        response: Response,
+        dir: str | None = None,
+        cursor: str | None = None,
+        limit: int | None = None,
+    ) -> Any:
+        """Without `dir`: flat file list (paginated by path). With `dir`: one directory's entries."""
+        if not db.session_exists(session_id):
+            raise HTTPException(status_code=404, detail="session not found")
+        rel = _fs_dir(dir) if dir is not None else None
 
-            if truncated:
-                break
+        if rel is None:
+            # Walked fresh from disk on every call, so there is no generation to validate against.
+            out = await asyncio.to_thread(fs_tree_service.walk_files, cursor=cursor, limit=limit or 5000)
+            return {"root": ".", **out}
 
-        items.sort(key=lambda x: x.get("path") or "")
-        return items, truncated
+        try:
+            # Rescans only this directory (when due); the rest of the cache is refreshed in the background.
+            out = await asyncio.to_thread(fs_tree_service.list_dir, rel, cursor=cursor, limit=limit or 500)
+        except (FileNotFoundError, NotADirectoryError):
+            raise HTTPException(status_code=404, detail="directory not found")
+        fs_tree_service.ensure_fresh()
+        etag = fs_tree_service.etag_for(out["generation"])
+        cached = _not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response.headers.update(_validator_headers(etag))
+        return out
 
-    @app.get("/api/v2/sessions/{session_id}/fs/tree")
-    async def fs_tree(session_id: str) -> dict[str, Any]:
+    @app.get("/api/v2/sessions/{session_id}/fs/changes")
+    async def fs_changes(
+        session_id: str,
+        since: int = 0,
+        tree_id: str | None = None,
+        limit: int = 1000,
+    ) -> dict[str, Any]:
+        """Tree deltas after generation `since` (from a previous /fs/tree or /fs/changes response)."""
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        items, truncated = _walk_fs_tree()
-        return {"root": ".", "items": items, "truncated": bool(truncated)}
+        return await asyncio.to_thread(
+            fs_tree_service.changes, since, tree_id=tree_id, limit=max(1, min(limit, 10_000))
+        )
 
     @app.get("/api/v2/sessions/{session_id}/fs/read")
-    async def fs_read(session_id: str, path: str) -> dict[str, Any]:
+    async def fs_read(session_id: str, path: str, request: Request, response: Response) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
 
@@ -1308,6 +1614,11 @@ cp ./config.example.json ~/.fanfan/config.json
             raise HTTPException(status_code=404, detail="file not found")
 
         st = p.stat()
+        etag = f'W/"f{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}"'
+        cached = _not_modified(request, etag, st.st_mtime)
+        if cached is not None:
+            return cached
+        response.headers.update(_validator_headers(etag, st.st_mtime))
         # Avoid loading huge files into memory in the UI.
         max_chars = 200_000
         content = p.read_text(encoding="utf-8", errors="replace")
@@ -1325,17 +1636,25 @@ cp ./config.example.json ~/.fanfan/config.json
         }
 
     @app.get("/api/v2/sessions/{session_id}/fs/versions")
-    async def fs_versions(session_id: str, path: str) -> list[dict[str, Any]]:
+    async def fs_versions(session_id: str, path: str, request: Request, response: Response) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
         p = _resolve_fs_path(path)
         rel = _rel_fs_path(p)
+        cached = _conditional(request, response, session_id)
+        if cached is not None:
+            return cached
         return db.list_file_versions(session_id, rel, limit=200)
 
     @app.get("/api/v2/sessions/{session_id}/fs/version/{version_id}")
-    async def fs_get_version(session_id: str, version_id: str) -> dict[str, Any]:
+    async def fs_get_version(session_id: str, version_id: str, request: Request, response: Response) -> Any:
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
+        # Versions are immutable: the id is a strong validator.
+        etag = f'"{version_id}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
 
         rec = db.get_file_version(version_id)
         if not rec or str(rec.get("session_id") or "") != session_id:
@@ -1383,6 +1702,7 @@ cp ./config.example.json ~/.fanfan/config.json
         # Write rollback content
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text(after, encoding="utf-8")
+        fs_tree_service.invalidate(rel)
 
         # Record as an internal v2 turn so artifacts remain consistent.
         turn = db.create_turn(session_id, f"[rollback] {rel} -> v{int(target.get('idx') or 0)}")
@@ -1487,47 +1807,148 @@ cp ./config.example.json ~/.fanfan/config.json
     # ── Events (Replay) ──────────────────────────────────────────
 
     @app.get("/api/v2/sessions/{session_id}/events")
-    async def get_session_events(session_id: str, since: int | None = None, since_seq: int | None = None) -> list[dict[str, Any]]:
+    async def get_session_events(
+        session_id: str,
+        since: int | None = None,
+        since_seq: int | None = None,
+        before: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Forward from `since`/`since_seq` (oldest first), or with `before`: the newest `limit` events older than that id."""
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return db.get_session_events_v2(session_id=session_id, since_id=since, since_seq=since_seq)
+        limit = max(1, min(limit or 2000, 5000))
+        if before is not None:
+            events, _truncated = db.get_events_tail(session_id, before_id=before, limit=limit)
+            return events
+        return db.get_session_events_v2(session_id=session_id, since_id=since, since_seq=since_seq, limit=limit)
 
     # ── SSE: Global Event Stream ──────────────────────────────────
 
-    @app.get("/event")
-    async def stream_event_bus(request: Request, session_id: str | None = None, since: int | None = None):
-        header_last_id = request.headers.get("last-event-id")
-        initial_last_id: int | None = None
+    def _replay_start(
+        session_id: str | None,
+        since: int | None,
+        last_event_id: str | None,
+        since_seq: int | None,
+        from_: str | None,
+    ) -> tuple[str, int | None, int | None]:
+        """Resolve the replay mode to (mode, since_id, since_seq)."""
         if since is not None:
-            initial_last_id = int(since)
-        elif header_last_id:
+            return "since", int(since), None
+        if last_event_id:
             try:
-                initial_last_id = int(header_last_id)
-            except Exception:
-                initial_last_id = None
+                return "since", int(last_event_id), None
+            except ValueError:
+                pass
+        if since_seq is not None:
+            if not session_id:
+                raise HTTPException(status_code=400, detail="since_seq requires session_id")
+            return "since_seq", None, int(since_seq)
+        if not from_:
+            return "recent", None, None
+        if from_ == "tail":
+            return "tail", bus.latest_event_id(session_id), None
+        if from_.startswith("turn:"):
+            turn = db.get_turn(from_[len("turn:"):])
+            if not turn or (session_id and turn["session_id"] != session_id):
+                raise HTTPException(status_code=404, detail="turn not found")
+            first = db.first_turn_event_id(turn["id"])
+            # A turn without events yet (still queued) starts at the tail.
+            return "turn", (first - 1) if first is not None else bus.latest_event_id(session_id), None
+        raise HTTPException(status_code=400, detail="from must be 'tail' or 'turn:<id>'")
 
-        async def event_stream():
-            last_id = initial_last_id
+    @app.get("/event")
+    async def stream_event_bus(
+        request: Request,
+        session_id: str | None = None,
+        since: int | None = None,
+        since_seq: int | None = None,
+        from_: Annotated[str | None, Query(alias="from")] = None,
+        types: Annotated[list[str] | None, Query()] = None,
+        exclude: Annotated[list[str] | None, Query()] = None,
+        fields: Annotated[list[str] | None, Query()] = None,
+        snapshots: bool = False,
+    ):
+        """
+        Replay, then live events.
+
+        `types` / `exclude` (comma-separated event types) select which events
+        are sent and `fields` projects each one (e.g. `fields=turn_id,payload.text`;
+        `id` and `type` are always included). Control events (connected,
+        heartbeat, replay_truncated) are always sent.
+
+        The replay starts after `since` / Last-Event-ID (reconnects), after the
+        per-session `since_seq`, at the first event of `from=turn:<id>`, nowhere
+        for `from=tail`, and otherwise covers the most recent events. Replays
+        keep the newest FANFAN_SSE_REPLAY_MAX_EVENTS events; when older ones
+        are left out a `replay_truncated` event comes first, telling the client
+        to load them via GET /api/v2/sessions/{id}/events?before=<oldest_id>.
+
+        With `snapshots=true` (session streams), finished turns in the replay
+        are sent as their compacted snapshot events, so the replay grows with
+        the number of turns rather than the number of streamed deltas.
+        """
+        mode, start_id, start_seq = _replay_start(
+            session_id, since, request.headers.get("last-event-id"), since_seq, from_
+        )
+        cap = max(1, settings.sse_replay_max_events)
+        event_filter = EventFilter.from_query(types, exclude, fields)
 
-            # connected (not persisted)
-            connected = {
+        def envelope(evt_type: str, payload: dict[str, Any]) -> str:
+            data = {
                 "id": 0,
                 "seq": 0,
                 "ts": _now_ts(),
-                "type": "connected",
+                "type": evt_type,
                 "session_id": session_id or "",
                 "turn_id": "",
                 "step_id": "",
-                "payload": {"server_time": _now_iso(), "latest_id": last_id or 0},
+                "payload": payload,
             }
-            yield f"event: connected\ndata: {json.dumps(connected, ensure_ascii=False)}\n\n"
+            return f"event: {evt_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+        def frame(item: dict[str, Any]) -> str:
+            data = json.dumps(event_filter.project(item), ensure_ascii=False)
+            return f"id: {item.get('id')}\nevent: event\ndata: {data}\n\n"
 
-            # backlog
-            pending = bus.get_events_since(session_id=session_id, since_id=last_id)
-            for item in pending:
-                last_id = int(item.get("id", last_id or 0) or 0)
-                payload = json.dumps(item, ensure_ascii=False)
-                yield f"id: {item.get('id')}\nevent: event\ndata: {payload}\n\n"
+        async def event_stream():
+            head = bus.latest_event_id(session_id)
+
+            # connected (not persisted)
+            yield envelope(
+                "connected",
+                {"server_time": _now_iso(), "latest_id": start_id or 0, "head_id": head, "replay": mode},
+            )
+
+            # backlog: newest `cap` events of the replay range
+            backlog: list[dict[str, Any]] = []
+            if mode != "tail":
+                if snapshots and session_id and start_seq is None:
+                    backlog, truncated = replay_events(db, session_id, start_id, limit=cap, event_filter=event_filter)
+                else:
+                    backlog, truncated = bus.get_events_tail(
+                        session_id=session_id,
+                        since_id=start_id,
+                        since_seq=start_seq,
+                        limit=cap,
+                        event_filter=event_filter,
+                    )
+                if truncated and backlog:
+                    oldest = backlog[0]
+                    yield envelope(
+                        "replay_truncated",
+                        {
+                            "limit": cap,
+                            "oldest_id": oldest["id"],
+                            "oldest_seq": oldest["seq"],
+                            "history_url": (
+                                f"/api/v2/sessions/{session_id}/events?before={oldest['id']}" if session_id else None
+                            ),
+                        },
+                    )
+            for item in backlog:
+                yield frame(item)
+            last_id = backlog[-1]["id"] if backlog else (start_id if start_id is not None else head)
 
             while True:
                 if await request.is_disconnected():
@@ -1535,24 +1956,22 @@ cp ./config.example.json ~/.fanfan/config.json
 
                 has_new = await bus.wait_for_new(timeout_s=settings.sse_wait_timeout_s)
                 if not has_new:
-                    hb = {
-                        "id": 0,
-                        "seq": 0,
-                        "ts": _now_ts(),
-                        "type": "heartbeat",
-                        "session_id": session_id or "",
-                        "turn_id": "",
-                        "step_id": "",
-                        "payload": {},
-                    }
-                    yield f"event: heartbeat\ndata: {json.dumps(hb, ensure_ascii=False)}\n\n"
+                    yield envelope("heartbeat", {})
                     continue
 
-                new_items = bus.get_events_since(session_id=session_id, since_id=last_id)
-                for item in new_items:
-                    last_id = int(item.get("id", last_id or 0) or 0)
-                    payload = json.dumps(item, ensure_ascii=False)
-                    yield f"id: {item.get('id')}\nevent: event\ndata: {payload}\n\n"
+                # Drain everything up to the current head, not just the first page. Advancing
+                # to the head also skips filtered-out events for good instead of rescanning them.
+                head = bus.latest_event_id(session_id)
+                while True:
+                    new_items = bus.get_events_since(
+                        session_id=session_id, since_id=last_id, limit=cap, until_id=head, event_filter=event_filter
+                    )
+                    for item in new_items:
+                        last_id = int(item.get("id", last_id or 0) or 0)
+                        yield frame(item)
+                    if len(new_items) < cap:
+                        last_id = max(last_id or 0, head)
+                        break
 
         return StreamingResponse(
             event_stream(),
@@ -1566,10 +1985,97 @@ cp ./config.example.json ~/.fanfan/config.json
 
     # Legacy per-session SSE path (v1 clients). Uses the v2 event envelope.
     @app.get("/api/v1/sessions/{session_id}/events")
-    async def stream_session_events_v1(session_id: str, request: Request, last_event_id: int | None = None):
+    async def stream_session_events_v1(
+        session_id: str,
+        request: Request,
+        last_event_id: int | None = None,
+        types: Annotated[list[str] | None, Query()] = None,
+        exclude: Annotated[list[str] | None, Query()] = None,
+        fields: Annotated[list[str] | None, Query()] = None,
+    ):
         if not db.session_exists(session_id):
             raise HTTPException(status_code=404, detail="session not found")
-        return await stream_event_bus(request, session_id=session_id, since=last_event_id)
+        return await stream_event_bus(
+            request,
+            session_id=session_id,
+            since=last_event_id,
+            since_seq=None,
+            from_=None,
+            types=types,
+            exclude=exclude,
+            fields=fields,
+            snapshots=False,
+        )
+
+    # ── WebSocket: multiplexed event stream ──────────────────────
+
+    @app.websocket("/ws")
+    async def ws_events(websocket: WebSocket, format: str | None = None):
+        """Many session subscriptions over one connection (protocol in nanobot/web/ws.py)."""
+        fmt, subprotocol = negotiate_format(list(websocket.scope.get("subprotocols") or []), format)
+        await websocket.accept(subprotocol=subprotocol)
+
+        async def send(obj: dict[str, Any]) -> None:
+            frame = encode_frame(fmt, obj)
+            if isinstance(frame, bytes):
+                await websocket.send_bytes(frame)
+            else:
+                await websocket.send_text(frame)
+
+        def resolve_replay(sid: str, since_seq: int | None, from_: str | None) -> tuple[str, int | None, int | None]:
+            if not db.session_exists(sid):
+                raise LookupError("session not found")
+            try:
+                return _replay_start(sid, None, None, since_seq, from_)
+            except HTTPException as e:
+                raise ValueError(e.detail) from None
+
+        mux = WsMultiplexer(
+            bus,
+            send,
+            resolve_replay=resolve_replay,
+            replay_limit=settings.sse_replay_max_events,
+            max_subscriptions=settings.ws_max_subscriptions,
+        )
+
+        async def pump() -> None:
+            while True:
+                if await bus.wait_for_new(timeout_s=settings.sse_wait_timeout_s):
+                    await mux.deliver_new()
+                else:
+                    await send({"op": "heartbeat"})
+
+        def pump_done(task: asyncio.Task) -> None:
+            if task.cancelled() or task.exception() is None:
+                return
+            # Without the pump no events or heartbeats flow; close so the client reconnects.
+            logger.opt(exception=task.exception()).error("/ws event pump failed; closing the connection")
+            asyncio.create_task(close_after_pump_error())
+
+        async def close_after_pump_error() -> None:
+            try:
+                await websocket.close(code=1011, reason="event pump failed")
+            except RuntimeError:
+                pass  # already closed
+
+        await send({"op": "hello", "format": fmt, "server_time": _now_iso()})
+        pump_task = asyncio.create_task(pump())
+        pump_task.add_done_callback(pump_done)
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                try:
+                    msg = decode_frame(message.get("bytes") or message.get("text") or "")
+                except ValueError:
+                    await send({"op": "error", "detail": "invalid frame"})
+                    continue
+                await mux.handle(msg)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            pump_task.cancel()
 
     # ── Config / Provider / Model Management (v2 provider endpoints) ──
 
@@ -1721,28 +2227,6 @@ cp ./config.example.json ~/.fanfan/config.json
 
     mimetypes.add_type("application/manifest+json", ".webmanifest")
 
-    async def _proxy_to(target_base: str, request: Request, full_path: str) -> Response:
-        base = target_base.rstrip("/")
-        path = "/" + full_path if full_path else "/"
-        url = base + path
-        if request.url.query:
-            url = url + "?" + request.url.query
-
-        headers = {
-            k: v
-            for k, v in request.headers.items()
-            if k.lower() not in ("host", "content-length", "connection")
-        }
-        body = await request.body()
-
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
-            r = await client.request(request.method, url, headers=headers, content=body)
-
-        # Avoid hop-by-hop headers
-        excluded = {"content-encoding", "transfer-encoding", "connection", "keep-alive"}
-        out_headers = {k: v for k, v in r.headers.items() if k.lower() not in excluded}
-        return Response(content=r.content, status_code=r.status_code, headers=out_headers)
-
     # Static mode: serve from built dist directory
     dist_dir = settings.resolved_ui_static_dir()
     legacy_static_dir = Path(__file__).parent / "static"
@@ -1750,9 +2234,14 @@ cp ./config.example.json ~/.fanfan/config.json
     if settings.ui_mode == "static" and dist_dir.exists():
         # Serve built assets
         if (dist_dir / "assets").exists():
-            app.mount("/assets", StaticFiles(directory=str(dist_dir / "assets")), name="assets")
+            # Hashed build output: precompressed siblings + immutable caching
+            app.mount(
+                "/assets",
+                PrecompressedStaticFiles(directory=str(dist_dir / "assets"), immutable_hashed=True),
+                name="assets",
+            )
         if (dist_dir / "icons").exists():
-            app.mount("/icons", StaticFiles(directory=str(dist_dir / "icons")), name="icons")
+            app.mount("/icons", PrecompressedStaticFiles(directory=str(dist_dir / "icons")), name="icons")
 
         @app.get("/manifest.webmanifest")
         async def serve_manifest():
@@ -1806,17 +2295,25 @@ cp ./config.example.json ~/.fanfan/config.json
             raise HTTPException(status_code=404)
 
     else:
-        # Proxy mode (remote/dev): proxy all non-API routes to the UI origin.
+        # Proxy mode (remote/dev): stream all non-API routes from the UI origin.
+        ui_proxy = UpstreamProxy(
+            settings.ui_url if settings.ui_mode == "remote" else settings.ui_dev_server_url,
+            connect_timeout_s=settings.ui_proxy_connect_timeout_s,
+            max_connections=settings.ui_proxy_max_connections,
+        )
+
+        @app.on_event("shutdown")
+        async def _close_ui_proxy() -> None:
+            await ui_proxy.aclose()
+
         @app.api_route("/", methods=["GET", "HEAD"])
         async def proxy_root(request: Request):
-            target = settings.ui_url if settings.ui_mode == "remote" else settings.ui_dev_server_url
-            return await _proxy_to(target, request, "")
+            return await ui_proxy.forward(request, "")
 
         @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
         async def proxy_catchall(full_path: str, request: Request):
             if full_path.startswith("api/") or full_path.startswith("docs") or full_path == "openapi.json":
                 raise HTTPException(status_code=404)
-            target = settings.ui_url if settings.ui_mode == "remote" else settings.ui_dev_server_url
-            return await _proxy_to(target, request, full_path)
+            return await ui_proxy.forward(request, full_path)
 
     return app
@@ -0,0 +1,251 @@
+"""Response compression for the fanfan web server.
+
+- `CompressionMiddleware`: negotiates brotli (if the optional `brotli` package
+  is installed) or gzip from Accept-Encoding and compresses text/JSON
+  responses above a size threshold. Streaming responses are compressed chunk by
+  chunk with a sync flush after each chunk, so every chunk reaches the client
+  when it is sent. SSE (`text/event-stream`) is left alone unless per-frame
+  compression is enabled, because some proxies and clients buffer compressed
+  event streams.
+- `PrecompressedStaticFiles`: serves `<file>.br` / `<file>.gz` written at build
+  time (scripts/precompress.py) instead of compressing on every request, and
+  marks content-hashed files under /assets as immutable.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import zlib
+from typing import Any
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+
+_COMPRESSIBLE = re.compile(
+    r"^(text/|application/(json|javascript|xml|manifest\+json|x-ndjson)|image/svg\+xml)", re.IGNORECASE
+)
+# Vite-style content hashes: index-BX3k9aZq.js, vendor.4f3a2b1c.css
+_HASHED_NAME = re.compile(r"[.-][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def brotli_available() -> bool:
+    return brotli is not None
+
+
+def _accepted(accept_encoding: str) -> dict[str, float]:
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str, *, allow_brotli: bool = True) -> str | None:
+    """Best supported content-coding for an Accept-Encoding header (None = identity)."""
+    accepted = _accepted(accept_encoding or "")
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if allow_brotli and brotli is not None else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for enc in candidates:
+        q = accepted.get(enc, wildcard)
+        if q > best_q:
+            best, best_q = enc, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, *, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, *, flush: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        compress_sse: bool = False,
+        allow_brotli: bool = True,
+    ):
+        self.app = app
+        self.minimum_size = max(0, int(minimum_size))
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.compress_sse = compress_sse
+        self.allow_brotli = allow_brotli
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), allow_brotli=self.allow_brotli)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _Responder(self, encoding, send).send)
+
+
+class _Responder:
+    """Per-response state: decide on the first body message, then compress or pass through."""
+
+    def __init__(self, mw: CompressionMiddleware, encoding: str, send: Send):
+        self.mw = mw
+        self.encoding = encoding
+        self._send = send
+        self._start: Message | None = None
+        self._mode = "pending"  # pending | identity | whole | stream
+        self._compressor: _Compressor | None = None
+
+    def _eligible(self, start: Message) -> bool:
+        headers = Headers(raw=start["headers"])
+        if start["status"] < 200 or start["status"] in (204, 206, 304):
+            return False
+        if "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        if content_type.startswith("text/event-stream"):
+            return self.mw.compress_sse
+        return bool(_COMPRESSIBLE.match(content_type))
+
+    def _encoded_start(self, length: int | None) -> Message:
+        assert self._start is not None
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if length is None:
+            del headers["content-length"]
+        else:
+            headers["content-length"] = str(length)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["etag"] = "W/" + etag  # the encoded bytes differ from the identity entity
+        return {**self._start, "headers": headers.raw}
+
+    def _new_compressor(self) -> _Compressor:
+        return _Compressor(self.encoding, gzip_level=self.mw.gzip_level, brotli_quality=self.mw.brotli_quality)
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self._start = message
+            if not self._eligible(message):
+                self._mode = "identity"
+                await self._send(message)
+            return
+        if kind != "http.response.body" or self._mode == "identity":
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+
+        if self._mode == "pending":
+            if not more:
+                if len(body) < self.mw.minimum_size:
+                    self._mode = "identity"
+                    await self._send(self._start)  # type: ignore[arg-type]
+                    await self._send(message)
+                    return
+                self._mode = "whole"
+                comp = self._new_compressor()
+                data = comp.compress(body, flush=False) + comp.finish()
+                await self._send(self._encoded_start(len(data)))
+                await self._send({"type": "http.response.body", "body": data, "more_body": False})
+                return
+            self._mode = "stream"
+            self._compressor = self._new_compressor()
+            await self._send(self._encoded_start(None))
+
+        assert self._compressor is not None
+        data = self._compressor.compress(body, flush=more)
+        if not more:
+            data += self._compressor.finish()
+        if data or not more:
+            await self._send({"type": "http.response.body", "body": data, "more_body": more})
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that prefers build-time `.br`/`.gz` siblings and caches hashed assets forever."""
+
+    def __init__(self, *args: Any, immutable_hashed: bool = False, allow_brotli: bool = True, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.immutable_hashed = immutable_hashed
+        self.allow_brotli = allow_brotli
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await super().get_response(path, scope)
+        if self.immutable_hashed and response.status_code in (200, 304) and _HASHED_NAME.search(path):
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if response.status_code != 200 or not isinstance(response, FileResponse):
+            return response
+
+        request_headers = Headers(scope=scope)
+        accepted = _accepted(request_headers.get("accept-encoding", ""))
+        original = str(response.path)
+        try:
+            original_mtime = os.stat(original).st_mtime
+        except OSError:
+            return response
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding == "br" and not self.allow_brotli:
+                continue
+            if accepted.get(encoding, accepted.get("*", 0.0)) <= 0:
+                continue
+            candidate = original + suffix
+            try:
+                st = os.stat(candidate)
+            except OSError:
+                continue
+            if st.st_mtime < original_mtime:
+                continue  # stale precompressed file
+            encoded = FileResponse(candidate, stat_result=st, media_type=response.media_type)
+            encoded.headers["content-encoding"] = encoding
+            encoded.headers.add_vary_header("Accept-Encoding")
+            if "cache-control" in response.headers:
+                encoded.headers["cache-control"] = response.headers["cache-control"]
+            if self.is_not_modified(encoded.headers, request_headers):
+                return Response(status_code=304, headers={
+                    k: v for k, v in encoded.headers.items()
+                    if k in ("etag", "cache-control", "vary", "content-encoding", "last-modified")
+                })
+            return encoded
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
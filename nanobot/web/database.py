@@ -4,25 +4,179 @@ This file intentionally keeps legacy tables (v1) while introducing a new v2 sche
 The v2 web UI uses:
 - turns/steps for execution structure
 - events (INTEGER id + per-session seq) for SSE replay
+- turn_snapshots (compacted events of finished turns) for history and replay
 - file_changes / terminal_chunks / permissions / context_items for inspector tabs
 """
 
 from __future__ import annotations
 
+import base64
 import json
 import hashlib
+import secrets
 import sqlite3
 import threading
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Sequence
 
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# Change generations (ETag validators for the REST API). Triggers bump a
+# per-session counter on every write to these tables, so writers in other
+# processes (uvicorn workers, `fanfan worker`) invalidate cached responses too.
+# Scope "*" covers the session list. The events table is deliberately excluded.
+_SESSIONS_SCOPE = "*"
+_GENERATION_TRIGGERS: dict[str, tuple[str, ...]] = {
+    # table -> scope expressions (without the NEW./OLD. prefix)
+    "sessions": ("id", f"'{_SESSIONS_SCOPE}'"),
+    "messages": ("session_id",),
+    "turns": ("session_id",),
+    "file_changes": ("session_id",),
+    "file_versions": ("session_id",),
+    "context_items": ("session_id",),
+    "terminal_chunks": ("session_id",),
+    "session_settings": ("session_id",),
+    "permission_requests": ("session_id",),
+    "turn_queue": ("session_id", f"'{_SESSIONS_SCOPE}'"),
+}
+# Tables whose UPDATEs only bump on these columns: a worker renews `lease_until`
+# every lease_s/3, which changes nothing a client can see.
+_GENERATION_UPDATE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "turn_queue": ("status", "cancel_requested"),
+}
+
+
+def _generation_triggers_sql() -> str:
+    stmts = []
+    for table, scopes in _GENERATION_TRIGGERS.items():
+        for op, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            bumps = "".join(
+                f"""
+                    INSERT INTO change_generations (scope, gen, updated_at)
+                    VALUES ({scope if scope.startswith("'") else f"{row}.{scope}"}, 1, CAST(strftime('%s', 'now') AS INTEGER))
+                    ON CONFLICT(scope) DO UPDATE SET gen = gen + 1, updated_at = excluded.updated_at;"""
+                for scope in scopes
+            )
+            event = op
+            if op == "UPDATE" and table in _GENERATION_UPDATE_COLUMNS:
+                event = f"UPDATE OF {', '.join(_GENERATION_UPDATE_COLUMNS[table])}"
+            stmts.append(
+                f"CREATE TRIGGER IF NOT EXISTS gen_{table}_{op.lower()} AFTER {event} ON {table} BEGIN{bumps}\n                END;"
+            )
+    return "\n".join(stmts)
+
+
+# Full-text search. `search_docs` anchors each document (session, turn, kind,
+# ref) and shares its rowid with the FTS5 row holding the text. Turn prompts and
+# session titles are indexed by triggers; final texts and tool outputs are
+# indexed from the turn snapshot when a turn ends, so the event insert path
+# never touches the index. `messages` rows mirror those prompts and finals, so
+# only sessions without turns (pre-v2 history) contribute `message` documents,
+# at backfill. Deleting a session drops its documents. Needs FTS5 with the
+# trigram tokenizer (SQLite 3.34+); without it search is disabled.
+_SEARCH_TRIGGERS = (
+    "search_turns_insert",
+    "search_sessions_insert",
+    "search_sessions_title",
+    "search_sessions_delete",
+    "search_messages_insert",  # dropped: messages are no longer indexed as they are written
+)
+
+_SEARCH_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    rowid       INTEGER PRIMARY KEY,
+    session_id  TEXT NOT NULL,
+    turn_id     TEXT,
+    kind        TEXT NOT NULL,
+    ref_id      TEXT NOT NULL,
+    label       TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_session ON search_docs(session_id);
+CREATE INDEX IF NOT EXISTS idx_search_docs_turn ON search_docs(turn_id, kind);
+CREATE INDEX IF NOT EXISTS idx_search_docs_ref ON search_docs(ref_id, kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(body, tokenize='trigram');
+
+DROP TRIGGER IF EXISTS search_messages_insert;
+CREATE TRIGGER IF NOT EXISTS search_turns_insert AFTER INSERT ON turns BEGIN
+    INSERT INTO search_docs (session_id, turn_id, kind, ref_id, label) VALUES (NEW.session_id, NEW.id, 'turn', NEW.id, 'user');
+    INSERT INTO search_fts (rowid, body) VALUES (last_insert_rowid(), NEW.user_text);
+END;
+CREATE TRIGGER IF NOT EXISTS search_sessions_insert AFTER INSERT ON sessions BEGIN
+    INSERT INTO search_docs (session_id, turn_id, kind, ref_id, label) VALUES (NEW.id, NULL, 'session', NEW.id, '');
+    INSERT INTO search_fts (rowid, body) VALUES (last_insert_rowid(), NEW.title);
+END;
+CREATE TRIGGER IF NOT EXISTS search_sessions_title AFTER UPDATE OF title ON sessions BEGIN
+    UPDATE search_fts SET body = NEW.title
+    WHERE rowid IN (SELECT rowid FROM search_docs WHERE ref_id = NEW.id AND kind = 'session');
+END;
+CREATE TRIGGER IF NOT EXISTS search_sessions_delete AFTER DELETE ON sessions BEGIN
+    DELETE FROM search_fts WHERE rowid IN (SELECT rowid FROM search_docs WHERE session_id = OLD.id);
+    DELETE FROM search_docs WHERE session_id = OLD.id;
+END;
+"""
+
+# Keyset pagination: rows are ordered by (sort column, id). A cursor is the
+# (sort value, id) of a row, base64url-encoded JSON. `before` pages towards
+# older rows, `after` towards newer ones; both are served by the composite
+# (…, sort column, id) indexes below.
+_PAGE_KEYS: dict[str, str] = {
+    "sessions": "updated_at",
+    "messages": "ts",
+    "turns": "created_at",
+    "file_changes": "created_at",
+    "terminal_chunks": "id",
+    "context_items": "created_at",
+}
+
+
+def encode_cursor(value: Any, row_id: Any) -> str:
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Any, Any]:
+    """Inverse of encode_cursor(). Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    if not isinstance(value, (str, int, float)) or not isinstance(row_id, (str, int)):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return value, row_id
+
+
+_EVENT_COLUMNS_NO_PAYLOAD = "id, session_id, turn_id, step_id, seq, ts, type"
+
+
+def _event_dict(row: sqlite3.Row) -> dict[str, Any]:
+    d = dict(row)
+    if "payload_json" not in d:
+        return d  # selected without payload
+    try:
+        d["payload"] = json.loads(d.pop("payload_json", "{}"))
+    except (json.JSONDecodeError, TypeError):
+        d["payload"] = {}
+    return d
+
+
+def _event_type_filter(
+    where: list[str], params: list[Any], types: Sequence[str] | None, exclude: Sequence[str] | None
+) -> None:
+    if types:
+        where.append(f"type IN ({','.join('?' * len(types))})")
+        params.extend(types)
+    if exclude:
+        where.append(f"type NOT IN ({','.join('?' * len(exclude))})")
+        params.extend(exclude)
+
+
 class Database:
     """Thread-safe SQLite DAO for web chat persistence."""
 
@@ -31,6 +185,8 @@ class Database:
         Path(self._db_path).parent.mkdir(parents=True, exist_ok=True)
         self._conn: sqlite3.Connection | None = None
         self._lock = threading.RLock()
+        self._generation_salt: int | None = None
+        self.search_available = False  # FTS5 + trigram tokenizer present (set by _ensure_schema)
         self._ensure_schema()
 
     # ── Connection ────────────────────────────────────────────────
@@ -50,6 +206,53 @@ class Database:
         rows = conn.execute(f"PRAGMA table_info({name})").fetchall()
         return [str(r["name"]) for r in rows]
 
+    def _page(
+        self,
+        table: str,
+        where: str,
+        params: tuple[Any, ...],
+        *,
+        before: str | None,
+        after: str | None,
+        limit: int,
+        newest_first: bool,
+    ) -> dict[str, Any]:
+        """
+        One keyset page of `table` rows matching `where`.
+
+        Items come in the listing's display order (`newest_first` or oldest
+        first). `before`/`after` in the result are the cursors of the oldest and
+        newest item on the page (the request's cursors if the page is empty);
+        `has_more` says whether rows remain beyond the page in the direction
+        being paged (older, or newer when only `after` is given).
+        """
+        key = _PAGE_KEYS[table]
+        limit = max(1, int(limit))
+        conds = [where] if where else []
+        args: list[Any] = list(params)
+        for cursor, op in ((before, "<"), (after, ">")):
+            if cursor is not None:
+                conds.append(f"({key}, id) {op} (?, ?)")
+                args.extend(decode_cursor(cursor))
+        towards_newer = after is not None and before is None
+        order = "ASC" if towards_newer else "DESC"
+        sql = f"SELECT * FROM {table}"
+        if conds:
+            sql += " WHERE " + " AND ".join(conds)
+        sql += f" ORDER BY {key} {order}, id {order} LIMIT ?"
+        with self._lock:
+            conn = self._get_conn()
+            rows = [dict(r) for r in conn.execute(sql, (*args, limit + 1)).fetchall()]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if rows:
+            oldest, newest = (rows[0], rows[-1]) if towards_newer else (rows[-1], rows[0])
+            before = encode_cursor(oldest[key], oldest["id"])
+            after = encode_cursor(newest[key], newest["id"])
+        if towards_newer == newest_first:
+            rows.reverse()
+        return {"items": rows, "has_more": has_more, "before": before, "after": after}
+
     def _ensure_schema(self) -> None:
         """Create/migrate schema (legacy v1 + new v2)."""
         with self._lock:
@@ -72,7 +275,8 @@ class Database:
                     content     TEXT NOT NULL,
                     ts          TEXT NOT NULL
                 );
-                CREATE INDEX IF NOT EXISTS idx_messages_session ON messages(session_id, ts);
+                CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at, id);
+                CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages(session_id, ts, id);
 
                 CREATE TABLE IF NOT EXISTS global_memory (
                     id          TEXT PRIMARY KEY,
@@ -123,7 +327,7 @@ class Database:
                     user_text   TEXT NOT NULL,
                     created_at  TEXT NOT NULL
                 );
-                CREATE INDEX IF NOT EXISTS idx_turns_session ON turns(session_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_turns_session_created ON turns(session_id, created_at, id);
 
                 CREATE TABLE IF NOT EXISTS steps (
                     id          TEXT PRIMARY KEY,
@@ -158,7 +362,7 @@ class Database:
                     diff        TEXT NOT NULL,
                     created_at  TEXT NOT NULL
                 );
-                CREATE INDEX IF NOT EXISTS idx_file_changes_session ON file_changes(session_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_file_changes_session_created ON file_changes(session_id, created_at, id);
 
                 CREATE TABLE IF NOT EXISTS file_versions (
                     id          TEXT PRIMARY KEY,
@@ -205,7 +409,7 @@ class Database:
                     pinned      INTEGER NOT NULL DEFAULT 0,
                     created_at  TEXT NOT NULL
                 );
-                CREATE INDEX IF NOT EXISTS idx_context_items_session ON context_items(session_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_context_items_session_created ON context_items(session_id, created_at, id);
 
                 CREATE TABLE IF NOT EXISTS terminal_chunks (
                     id          INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -218,7 +422,84 @@ class Database:
                     ts          REAL NOT NULL
                 );
                 CREATE INDEX IF NOT EXISTS idx_terminal_chunks_session ON terminal_chunks(session_id, id);
+
+                CREATE TABLE IF NOT EXISTS turn_queue (
+                    turn_id     TEXT PRIMARY KEY REFERENCES turns(id) ON DELETE CASCADE,
+                    session_id  TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+                    status      TEXT NOT NULL DEFAULT 'queued',
+                    enqueued_at REAL NOT NULL,
+                    claimed_by  TEXT,
+                    lease_until REAL,
+                    started_at  REAL,
+                    finished_at REAL,
+                    attempts    INTEGER NOT NULL DEFAULT 0,
+                    cancel_requested INTEGER NOT NULL DEFAULT 0,
+                    error       TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS idx_turn_queue_status ON turn_queue(status, enqueued_at);
+                CREATE INDEX IF NOT EXISTS idx_turn_queue_session ON turn_queue(session_id, status, enqueued_at);
+
+                CREATE TABLE IF NOT EXISTS turn_snapshots (
+                    turn_id        TEXT PRIMARY KEY REFERENCES turns(id) ON DELETE CASCADE,
+                    session_id     TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+                    first_event_id INTEGER NOT NULL,
+                    last_event_id  INTEGER NOT NULL,
+                    event_count    INTEGER NOT NULL,
+                    events_json    TEXT NOT NULL,
+                    updated_at     TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_turn_snapshots_session ON turn_snapshots(session_id, first_event_id);
+                """
+            )
+
+            # Superseded by the (…, id) keyset pagination indexes above.
+            conn.executescript(
+                """
+                DROP INDEX IF EXISTS idx_messages_session;
+                DROP INDEX IF EXISTS idx_turns_session;
+                DROP INDEX IF EXISTS idx_file_changes_session;
+                DROP INDEX IF EXISTS idx_context_items_session;
+                """
+            )
+
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS change_generations (
+                    scope       TEXT PRIMARY KEY,
+                    gen         INTEGER NOT NULL DEFAULT 0,
+                    updated_at  INTEGER NOT NULL DEFAULT 0
+                );
                 """
+                + _generation_triggers_sql()
+            )
+            # Triggers created before _GENERATION_UPDATE_COLUMNS fired on every update; replace
+            # them once. (Only when outdated: schema changes make other connections re-prepare.)
+            for table, columns in _GENERATION_UPDATE_COLUMNS.items():
+                row = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f"gen_{table}_update",)
+                ).fetchone()
+                if row and "UPDATE OF" not in row["sql"]:
+                    conn.execute(f"DROP TRIGGER gen_{table}_update")
+                    conn.executescript(_generation_triggers_sql())
+            self.search_available = self._fts5_trigram_available(conn)
+            if self.search_available:
+                search_is_new = "search_docs" not in {
+                    r["name"] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+                }
+                conn.executescript(_SEARCH_SCHEMA_SQL)
+                if search_is_new:
+                    self._backfill_search(conn)
+            else:
+                # A database indexed by a newer SQLite: its triggers would fail every write here.
+                # Dropping search_docs makes the next capable build rebuild the index from scratch.
+                for name in _SEARCH_TRIGGERS:
+                    conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+                conn.execute("DROP TABLE IF EXISTS search_docs")
+
+            # Random per-database salt so validators never collide with a recreated DB.
+            conn.execute(
+                "INSERT OR IGNORE INTO change_generations (scope, gen, updated_at) VALUES ('#db', ?, 0)",
+                (secrets.randbits(32),),
             )
 
             # v2 migrations: add new columns if missing
@@ -235,6 +516,68 @@ class Database:
 
             conn.commit()
 
+    @staticmethod
+    def _fts5_trigram_available(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(body, tokenize='trigram')")
+            conn.execute("DROP TABLE temp.fts5_probe")
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def _backfill_search(self, conn: sqlite3.Connection) -> None:
+        """Index rows written before the search tables existed (runs once)."""
+        conn.execute("DELETE FROM search_fts")  # rows left behind by an index that was dropped
+        for sql in (
+            "SELECT id AS session_id, NULL AS turn_id, 'session' AS kind, id AS ref_id, '' AS label, title AS body FROM sessions",
+            """
+            SELECT session_id, NULL, 'message', id, role, content FROM messages
+            WHERE session_id NOT IN (SELECT session_id FROM turns)
+            """,
+            "SELECT session_id, id, 'turn', id, 'user', user_text FROM turns",
+            """
+            SELECT session_id, turn_id, 'final', COALESCE(json_extract(payload_json, '$.message_id'), id), 'assistant',
+                   json_extract(payload_json, '$.text')
+            FROM events WHERE type = 'final'
+            """,
+            """
+            SELECT session_id, turn_id, 'tool', COALESCE(json_extract(payload_json, '$.tool_call_id'), id),
+                   COALESCE(json_extract(payload_json, '$.tool_name'), ''),
+                   COALESCE(NULLIF(json_extract(payload_json, '$.output'), ''), json_extract(payload_json, '$.error'))
+            FROM events WHERE type = 'tool_result'
+            """,
+        ):
+            for row in conn.execute(sql).fetchall():
+                if row[5]:
+                    self._add_search_doc(conn, *row)
+
+    @staticmethod
+    def _add_search_doc(
+        conn: sqlite3.Connection, session_id: str, turn_id: str | None, kind: str, ref_id: str, label: str, body: str
+    ) -> None:
+        cur = conn.execute(
+            "INSERT INTO search_docs (session_id, turn_id, kind, ref_id, label) VALUES (?, ?, ?, ?, ?)",
+            (session_id, turn_id, kind, str(ref_id), label or ""),
+        )
+        conn.execute("INSERT INTO search_fts (rowid, body) VALUES (?, ?)", (cur.lastrowid, body))
+
+    # ── Change generations (ETags) ────────────────────────────────
+
+    def get_generation(self, scope: str) -> tuple[int, int]:
+        """(generation, unix time of the last change) for a session id, or "*" for the session list."""
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT gen, updated_at FROM change_generations WHERE scope = ?", (scope,)
+            ).fetchone()
+            return (int(row["gen"]), int(row["updated_at"])) if row else (0, 0)
+
+    def generation_salt(self) -> int:
+        """Random per-database value mixed into ETags."""
+        if self._generation_salt is None:
+            self._generation_salt = self.get_generation("#db")[0]
+        return self._generation_salt
+
     # ── Sessions ──────────────────────────────────────────────────
 
     def create_session(self, session_id: str, title: str = "New Chat") -> dict[str, Any]:
@@ -268,6 +611,14 @@ class Database:
             rows = conn.execute("SELECT * FROM sessions ORDER BY updated_at DESC").fetchall()
             return [{**dict(r), "status": "idle"} for r in rows]
 
+    def list_sessions_page(
+        self, *, before: str | None = None, after: str | None = None, limit: int = 50
+    ) -> dict[str, Any]:
+        """Sessions by updated_at, newest first (see _page)."""
+        page = self._page("sessions", "", (), before=before, after=after, limit=limit, newest_first=True)
+        page["items"] = [{**r, "status": "idle"} for r in page["items"]]
+        return page
+
     def update_session_title(self, session_id: str, title: str) -> bool:
         with self._lock:
             conn = self._get_conn()
@@ -347,6 +698,14 @@ class Database:
             ).fetchall()
             return [dict(r) for r in rows]
 
+    def get_messages_page(
+        self, session_id: str, *, before: str | None = None, after: str | None = None, limit: int = 100
+    ) -> dict[str, Any]:
+        """Messages oldest first; without cursors, the newest `limit` messages."""
+        return self._page(
+            "messages", "session_id = ?", (session_id,), before=before, after=after, limit=limit, newest_first=False
+        )
+
     # ── Events (legacy v1) ────────────────────────────────────────
 
     def add_event(self, event: dict[str, Any]) -> None:
@@ -415,12 +774,160 @@ class Database:
             ).fetchall()
             return [dict(r) for r in rows]
 
+    def list_turns_page(
+        self,
+        session_id: str,
+        *,
+        before: str | None = None,
+        after: str | None = None,
+        limit: int = 50,
+        newest_first: bool = True,
+    ) -> dict[str, Any]:
+        return self._page(
+            "turns", "session_id = ?", (session_id,), before=before, after=after, limit=limit, newest_first=newest_first
+        )
+
     def get_turn(self, turn_id: str) -> dict[str, Any] | None:
         with self._lock:
             conn = self._get_conn()
             row = conn.execute("SELECT * FROM turns WHERE id = ?", (turn_id,)).fetchone()
             return dict(row) if row else None
 
+    # ── Turn queue (worker mode) ──────────────────────────────────
+
+    def enqueue_turn(self, turn_id: str, session_id: str) -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "INSERT INTO turn_queue (turn_id, session_id, status, enqueued_at) VALUES (?, ?, 'queued', ?)",
+                (turn_id, session_id, time.time()),
+            )
+            conn.commit()
+
+    def claim_turn(self, worker_id: str, lease_s: float, max_attempts: int = 3) -> dict[str, Any] | None:
+        """Atomically claim the oldest runnable queued turn (one running turn per session).
+
+        Running turns whose lease expired (worker died) are requeued first, or failed
+        after `max_attempts` claims.
+        """
+        with self._lock:
+            conn = self._get_conn()
+            now = time.time()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(
+                    "UPDATE turn_queue SET status = 'failed', finished_at = ?, error = 'lease expired' "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, int(max_attempts)),
+                )
+                conn.execute(
+                    "UPDATE turn_queue SET status = 'queued', claimed_by = NULL, lease_until = NULL "
+                    "WHERE status = 'running' AND lease_until < ?",
+                    (now,),
+                )
+                row = conn.execute(
+                    """
+                    SELECT q.turn_id, q.session_id, q.attempts, t.user_text
+                    FROM turn_queue q JOIN turns t ON t.id = q.turn_id
+                    WHERE q.status = 'queued'
+                      AND NOT EXISTS (
+                        SELECT 1 FROM turn_queue r
+                        WHERE r.session_id = q.session_id
+                          AND (r.status = 'running' OR (r.status = 'queued' AND r.enqueued_at < q.enqueued_at))
+                      )
+                    ORDER BY q.enqueued_at ASC
+                    LIMIT 1
+                    """
+                ).fetchone()
+                if row is None:
+                    conn.commit()
+                    return None
+                conn.execute(
+                    "UPDATE turn_queue SET status = 'running', claimed_by = ?, lease_until = ?, "
+                    "started_at = COALESCE(started_at, ?), attempts = attempts + 1 WHERE turn_id = ?",
+                    (worker_id, now + float(lease_s), now, row["turn_id"]),
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            return {**dict(row), "attempts": int(row["attempts"]) + 1}
+
+    def heartbeat_turn(self, turn_id: str, worker_id: str, lease_s: float) -> str:
+        """Extend a claimed turn's lease. Returns "ok", "cancel" (cancel requested) or "lost"."""
+        with self._lock:
+            conn = self._get_conn()
+            cur = conn.execute(
+                "UPDATE turn_queue SET lease_until = ? WHERE turn_id = ? AND claimed_by = ? AND status = 'running'",
+                (time.time() + float(lease_s), turn_id, worker_id),
+            )
+            conn.commit()
+            if cur.rowcount == 0:
+                return "lost"
+            row = conn.execute("SELECT cancel_requested FROM turn_queue WHERE turn_id = ?", (turn_id,)).fetchone()
+            return "cancel" if row and int(row["cancel_requested"] or 0) else "ok"
+
+    def finish_queued_turn(self, turn_id: str, worker_id: str, status: str, error: str = "") -> None:
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                "UPDATE turn_queue SET status = ?, finished_at = ?, error = ?, lease_until = NULL "
+                "WHERE turn_id = ? AND claimed_by = ?",
+                (status, time.time(), error[:2000], turn_id, worker_id),
+            )
+            conn.commit()
+
+    def request_turn_cancel(self, session_id: str) -> tuple[int, list[str]]:
+        """Flag running turns for cancellation and cancel queued ones.
+
+        Returns (running turns flagged, queued turn ids cancelled).
+        """
+        with self._lock:
+            conn = self._get_conn()
+            now = time.time()
+            queued = [
+                str(r["turn_id"])
+                for r in conn.execute(
+                    "SELECT turn_id FROM turn_queue WHERE session_id = ? AND status = 'queued' ORDER BY enqueued_at",
+                    (session_id,),
+                ).fetchall()
+            ]
+            conn.execute(
+                "UPDATE turn_queue SET status = 'cancelled', finished_at = ? WHERE session_id = ? AND status = 'queued'",
+                (now, session_id),
+            )
+            cur = conn.execute(
+                "UPDATE turn_queue SET cancel_requested = 1 WHERE session_id = ? AND status = 'running'",
+                (session_id,),
+            )
+            conn.commit()
+            return cur.rowcount, queued
+
+    def turn_queue_summary(self, session_id: str | None = None) -> dict[str, dict[str, Any]]:
+        """Active (queued/running) turns per session: {session_id: {running, queue_depth, oldest_enqueued_at}}."""
+        with self._lock:
+            conn = self._get_conn()
+            sql = (
+                "SELECT session_id, "
+                "SUM(CASE WHEN status = 'running' THEN 1 ELSE 0 END) AS running, "
+                "SUM(CASE WHEN status = 'queued' THEN 1 ELSE 0 END) AS queued, "
+                "MIN(CASE WHEN status = 'queued' THEN enqueued_at END) AS oldest "
+                "FROM turn_queue WHERE status IN ('queued', 'running')"
+            )
+            params: list[Any] = []
+            if session_id is not None:
+                sql += " AND session_id = ?"
+                params.append(session_id)
+            rows = conn.execute(sql + " GROUP BY session_id", params).fetchall()
+            return {
+                str(r["session_id"]): {
+                    "running": int(r["running"] or 0),
+                    "queue_depth": int(r["queued"] or 0),
+                    "oldest_enqueued_at": float(r["oldest"]) if r["oldest"] is not None else None,
+                }
+                for r in rows
+            }
+
     def create_step(self, turn_id: str, idx: int) -> dict[str, Any]:
         with self._lock:
             step_id = f"step_{uuid.uuid4().hex[:12]}"
@@ -513,8 +1020,19 @@ class Database:
         session_id: str | None = None,
         since_id: int | None = None,
         limit: int = 2000,
+        *,
+        session_ids: Sequence[str] | None = None,
+        until_id: int | None = None,
+        types: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        with_payload: bool = True,
     ) -> list[dict[str, Any]]:
-        """Fetch v2 events since global id (exclusive)."""
+        """
+        Fetch v2 events since global id (exclusive), up to `until_id` (inclusive).
+
+        Optionally restricted to one session or several (`session_ids`) and
+        filtered by type.
+        """
         with self._lock:
             conn = self._get_conn()
             params: list[Any] = []
@@ -522,23 +1040,88 @@ class Database:
             if session_id:
                 where.append("session_id = ?")
                 params.append(session_id)
+            elif session_ids:
+                where.append(f"session_id IN ({','.join('?' * len(session_ids))})")
+                params.extend(session_ids)
             if since_id is not None:
                 where.append("id > ?")
                 params.append(int(since_id))
+            if until_id is not None:
+                where.append("id <= ?")
+                params.append(int(until_id))
+            _event_type_filter(where, params, types, exclude)
             where_sql = "WHERE " + " AND ".join(where) if where else ""
+            columns = "*" if with_payload else _EVENT_COLUMNS_NO_PAYLOAD
             rows = conn.execute(
-                f"SELECT * FROM events {where_sql} ORDER BY id ASC LIMIT ?",
+                f"SELECT {columns} FROM events {where_sql} ORDER BY id ASC LIMIT ?",
                 (*params, int(limit)),
             ).fetchall()
-            out: list[dict[str, Any]] = []
-            for r in rows:
-                d = dict(r)
-                try:
-                    d["payload"] = json.loads(d.pop("payload_json", "{}"))
-                except (json.JSONDecodeError, TypeError):
-                    d["payload"] = {}
-                out.append(d)
-            return out
+            return [_event_dict(r) for r in rows]
+
+    def get_events_tail(
+        self,
+        session_id: str | None = None,
+        *,
+        since_id: int | None = None,
+        since_seq: int | None = None,
+        before_id: int | None = None,
+        limit: int = 2000,
+        types: Sequence[str] | None = None,
+        exclude: Sequence[str] | None = None,
+        with_payload: bool = True,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """
+        The newest `limit` events in a range, oldest first.
+
+        The range is after `since_id` / `since_seq` (exclusive; since_seq needs a
+        session) and before `before_id`, restricted to `types` / not `exclude`.
+        Also returns whether older events in the range were left out because of
+        the cap.
+        """
+        where: list[str] = []
+        params: list[Any] = []
+        if session_id:
+            where.append("session_id = ?")
+            params.append(session_id)
+        if since_id is not None:
+            where.append("id > ?")
+            params.append(int(since_id))
+        if since_seq is not None and session_id:
+            where.append("seq > ?")
+            params.append(int(since_seq))
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(int(before_id))
+        _event_type_filter(where, params, types, exclude)
+        where_sql = "WHERE " + " AND ".join(where) if where else ""
+        columns = "*" if with_payload else _EVENT_COLUMNS_NO_PAYLOAD
+        # Within a session seq follows id; ordering by it lets the (session_id, seq) index serve since_seq.
+        order = "seq" if since_seq is not None and session_id else "id"
+        limit = max(1, int(limit))
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(
+                f"SELECT {columns} FROM events {where_sql} ORDER BY {order} DESC LIMIT ?",
+                (*params, limit + 1),
+            ).fetchall()
+        truncated = len(rows) > limit
+        return [_event_dict(r) for r in reversed(rows[:limit])], truncated
+
+    def latest_event_id(self, session_id: str | None = None) -> int:
+        with self._lock:
+            conn = self._get_conn()
+            if session_id:
+                row = conn.execute("SELECT MAX(id) AS m FROM events WHERE session_id = ?", (session_id,)).fetchone()
+            else:
+                row = conn.execute("SELECT MAX(id) AS m FROM events").fetchone()
+            return int(row["m"] or 0)
+
+    def first_turn_event_id(self, turn_id: str) -> int | None:
+        """Id of the first event of a turn (None if it has none)."""
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute("SELECT MIN(id) AS m FROM events WHERE turn_id = ?", (turn_id,)).fetchone()
+            return int(row["m"]) if row and row["m"] is not None else None
 
     def get_session_events_v2(
         self,
@@ -565,16 +1148,166 @@ class Database:
                     "SELECT * FROM events WHERE session_id = ? ORDER BY id ASC LIMIT ?",
                     (session_id, int(limit)),
                 ).fetchall()
+            return [_event_dict(r) for r in rows]
 
-            out: list[dict[str, Any]] = []
-            for r in rows:
-                d = dict(r)
-                try:
-                    d["payload"] = json.loads(d.pop("payload_json", "{}"))
-                except (json.JSONDecodeError, TypeError):
-                    d["payload"] = {}
-                out.append(d)
-            return out
+    def get_turn_events(self, turn_id: str) -> list[dict[str, Any]]:
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute("SELECT * FROM events WHERE turn_id = ? ORDER BY id ASC", (turn_id,)).fetchall()
+            return [_event_dict(r) for r in rows]
+
+    def turn_has_ended(self, turn_id: str) -> bool:
+        """Whether the turn has published a terminal (`final` / `error`) event."""
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute(
+                "SELECT 1 FROM events WHERE turn_id = ? AND type IN ('final', 'error') LIMIT 1", (turn_id,)
+            ).fetchone()
+            return row is not None
+
+    # ── Turn snapshots ────────────────────────────────────────────
+
+    def put_turn_snapshot(
+        self,
+        turn_id: str,
+        session_id: str,
+        events: list[dict[str, Any]],
+        *,
+        first_event_id: int,
+        last_event_id: int,
+        event_count: int,
+    ) -> None:
+        """Store (or replace) the compacted event list of a finished turn."""
+        with self._lock:
+            conn = self._get_conn()
+            conn.execute(
+                """
+                INSERT INTO turn_snapshots
+                    (turn_id, session_id, first_event_id, last_event_id, event_count, events_json, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(turn_id) DO UPDATE SET
+                    first_event_id = excluded.first_event_id,
+                    last_event_id = excluded.last_event_id,
+                    event_count = excluded.event_count,
+                    events_json = excluded.events_json,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    turn_id,
+                    session_id,
+                    int(first_event_id),
+                    int(last_event_id),
+                    int(event_count),
+                    json.dumps(events, ensure_ascii=False),
+                    _now_iso(),
+                ),
+            )
+            conn.commit()
+
+    @staticmethod
+    def _snapshot_dict(row: sqlite3.Row) -> dict[str, Any]:
+        d = dict(row)
+        try:
+            d["events"] = json.loads(d.pop("events_json") or "[]")
+        except (json.JSONDecodeError, TypeError):
+            d["events"] = []
+        return d
+
+    def get_turn_snapshots(self, turn_ids: Sequence[str]) -> dict[str, dict[str, Any]]:
+        if not turn_ids:
+            return {}
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(
+                f"SELECT * FROM turn_snapshots WHERE turn_id IN ({','.join('?' * len(turn_ids))})",
+                tuple(turn_ids),
+            ).fetchall()
+            return {r["turn_id"]: self._snapshot_dict(r) for r in rows}
+
+    def list_turn_snapshots(self, session_id: str, *, after_event_id: int = 0) -> list[dict[str, Any]]:
+        """Snapshots of a session's turns that start after `after_event_id`, in event order."""
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(
+                "SELECT * FROM turn_snapshots WHERE session_id = ? AND first_event_id > ? ORDER BY first_event_id ASC",
+                (session_id, int(after_event_id)),
+            ).fetchall()
+            return [self._snapshot_dict(r) for r in rows]
+
+    # ── Search ────────────────────────────────────────────────────
+
+    def replace_turn_search_docs(self, turn_id: str, session_id: str, docs: list[dict[str, Any]]) -> None:
+        """Replace a turn's indexed outputs (`final` / `tool` docs: kind, ref_id, label, body)."""
+        if not self.search_available:
+            return
+        with self._lock:
+            conn = self._get_conn()
+            old = "SELECT rowid FROM search_docs WHERE turn_id = ? AND kind IN ('final', 'tool')"
+            conn.execute(f"DELETE FROM search_fts WHERE rowid IN ({old})", (turn_id,))
+            conn.execute("DELETE FROM search_docs WHERE turn_id = ? AND kind IN ('final', 'tool')", (turn_id,))
+            for doc in docs:
+                if doc.get("body"):
+                    self._add_search_doc(
+                        conn, session_id, turn_id, doc["kind"], doc["ref_id"], doc.get("label", ""), doc["body"]
+                    )
+            conn.commit()
+
+    def search(
+        self,
+        match: str | None,
+        like_terms: Sequence[str] = (),
+        *,
+        session_id: str | None = None,
+        kinds: Sequence[str] | None = None,
+        limit: int = 20,
+        offset: int = 0,
+        snippet_tokens: int = 64,  # trigram tokens, so roughly characters (FTS5 caps this at 64)
+    ) -> list[dict[str, Any]]:
+        """
+        Ranked hits for an FTS5 `match` expression, also requiring each of
+        `like_terms` (terms too short for trigram matching) as a substring.
+
+        Without `match` only the substring filters apply (newest first, no rank).
+        Snippets mark hits with char(2) ... char(3). Empty when search is unavailable.
+        """
+        if not self.search_available:
+            return []
+        where: list[str] = []
+        params: list[Any] = []
+        if match:
+            where.append("search_fts MATCH ?")
+            params.append(match)
+        for term in like_terms:
+            where.append("search_fts.body LIKE ? ESCAPE '\\'")
+            escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if session_id:
+            where.append("d.session_id = ?")
+            params.append(session_id)
+        if kinds:
+            where.append(f"d.kind IN ({','.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if not where:
+            return []
+        if match:
+            columns = f"snippet(search_fts, 0, char(2), char(3), '…', {int(snippet_tokens)}) AS snippet, bm25(search_fts) AS rank"
+            order = "rank"
+        else:
+            columns = "search_fts.body AS snippet, NULL AS rank"
+            order = "d.rowid DESC"
+        sql = f"""
+            SELECT d.session_id, d.turn_id, d.kind, d.ref_id, d.label, s.title AS session_title, {columns}
+            FROM search_fts
+            JOIN search_docs d ON d.rowid = search_fts.rowid
+            JOIN sessions s ON s.id = d.session_id
+            WHERE {" AND ".join(where)}
+            ORDER BY {order}
+            LIMIT ? OFFSET ?
+        """
+        with self._lock:
+            conn = self._get_conn()
+            rows = conn.execute(sql, (*params, max(1, int(limit)), max(0, int(offset)))).fetchall()
+            return [dict(r) for r in rows]
 
     # ── File changes / Terminal / Context / Permissions ───────────
 
@@ -599,6 +1332,12 @@ class Database:
             ).fetchall()
             return [dict(r) for r in rows]
 
+    def list_file_changes_page(
+        self, session_id: str, *, before: str | None = None, after: str | None = None, limit: int = 50
+    ) -> dict[str, Any]:
+        return self._page(
+            "file_changes", "session_id = ?", (session_id,), before=before, after=after, limit=limit, newest_first=True
+        )
 
     def _hash_text(self, text: str) -> str:
         return hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
@@ -755,6 +1494,14 @@ class Database:
             ).fetchall()
             return [dict(r) for r in rows]
 
+    def list_terminal_chunks_page(
+        self, session_id: str, *, before: str | None = None, after: str | None = None, limit: int = 500
+    ) -> dict[str, Any]:
+        """Terminal output oldest first; without cursors, the newest `limit` chunks."""
+        return self._page(
+            "terminal_chunks", "session_id = ?", (session_id,), before=before, after=after, limit=limit, newest_first=False
+        )
+
     def upsert_tool_permission(self, tool_name: str, policy: str) -> None:
         with self._lock:
             conn = self._get_conn()
@@ -814,6 +1561,12 @@ class Database:
             )
             conn.commit()
 
+    def get_permission_request(self, request_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            conn = self._get_conn()
+            row = conn.execute("SELECT * FROM permission_requests WHERE id = ?", (request_id,)).fetchone()
+            return dict(row) if row else None
+
     def list_pending_permission_requests(self, session_id: str) -> list[dict[str, Any]]:
         with self._lock:
             conn = self._get_conn()
@@ -937,6 +1690,13 @@ class Database:
             ).fetchall()
             return [dict(r) for r in rows]
 
+    def list_context_items_page(
+        self, session_id: str, *, before: str | None = None, after: str | None = None, limit: int = 100
+    ) -> dict[str, Any]:
+        return self._page(
+            "context_items", "session_id = ?", (session_id,), before=before, after=after, limit=limit, newest_first=True
+        )
+
     def set_context_pinned(self, context_id: str, pinned: bool) -> None:
         with self._lock:
             conn = self._get_conn()
@@ -2,22 +2,81 @@
 
 The bus is:
 - persistent: every published event is stored in SQLite (Database.insert_event_v2)
-- realtime: subscribers wait on an asyncio.Condition and poll the DB on wakeups
+- realtime: subscribers wait on a notifier and poll the DB on wakeups
+  (in-process Condition by default; see nanobot/web/notifier.py for multi-worker)
 """
 
 from __future__ import annotations
 
-import asyncio
 import time
+from dataclasses import dataclass
 from typing import Any
 
 from nanobot.web.database import Database
+from nanobot.web.notifier import InProcessNotifier
+
+
+def _csv(values: list[str] | str | None) -> tuple[str, ...]:
+    if not values:
+        return ()
+    if isinstance(values, str):
+        values = [values]
+    return tuple(dict.fromkeys(v.strip() for raw in values for v in raw.split(",") if v.strip()))
+
+
+@dataclass(frozen=True)
+class EventFilter:
+    """
+    Per-subscriber event selection.
+
+    `types` / `exclude` are applied in the SQL query, so skipped events are
+    never decoded or serialized. `fields` projects each event to the listed
+    top-level keys and `payload.<key>` entries; `id` and `type` are always kept.
+    """
+
+    types: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_query(
+        cls,
+        types: list[str] | str | None = None,
+        exclude: list[str] | str | None = None,
+        fields: list[str] | str | None = None,
+    ) -> "EventFilter":
+        """Parse comma-separated (and/or repeated) query values."""
+        return cls(types=_csv(types), exclude=_csv(exclude), fields=_csv(fields))
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        """`types` / `exclude` check for events that did not come from a filtered query."""
+        if self.types and event.get("type") not in self.types:
+            return False
+        return not (self.exclude and event.get("type") in self.exclude)
+
+    @property
+    def needs_payload(self) -> bool:
+        return not self.fields or any(f == "payload" or f.startswith("payload.") for f in self.fields)
+
+    def project(self, event: dict[str, Any]) -> dict[str, Any]:
+        if not self.fields:
+            return event
+        out: dict[str, Any] = {"id": event.get("id"), "type": event.get("type")}
+        payload = event.get("payload") or {}
+        for field in self.fields:
+            if field.startswith("payload."):
+                key = field[len("payload."):]
+                if key in payload:
+                    out.setdefault("payload", {})[key] = payload[key]
+            elif field in event:
+                out[field] = event[field]
+        return out
 
 
 class EventBus:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, notifier: InProcessNotifier | None = None):
         self._db = db
-        self._cond = asyncio.Condition()
+        self._notifier = notifier or InProcessNotifier()
 
     async def publish(
         self,
@@ -37,26 +96,59 @@ class EventBus:
             ts=float(ts if ts is not None else time.time()),
             payload=payload or {},
         )
-        async with self._cond:
-            self._cond.notify_all()
+        await self._notifier.notify()
         return evt
 
     async def wait_for_new(self, timeout_s: float) -> bool:
-        try:
-            async with self._cond:
-                await asyncio.wait_for(self._cond.wait(), timeout=timeout_s)
-            return True
-        except asyncio.TimeoutError:
-            return False
+        return await self._notifier.wait(timeout_s)
+
+    async def close(self) -> None:
+        await self._notifier.close()
 
     def get_events_since(
         self,
         *,
-        session_id: str | None,
+        session_id: str | None = None,
         since_id: int | None,
         limit: int = 2000,
+        until_id: int | None = None,
+        event_filter: EventFilter | None = None,
+        session_ids: list[str] | None = None,
     ) -> list[dict[str, Any]]:
-        return self._db.get_events_v2(session_id=session_id, since_id=since_id, limit=limit)
+        f = event_filter or EventFilter()
+        return self._db.get_events_v2(
+            session_id=session_id,
+            since_id=since_id,
+            limit=limit,
+            session_ids=session_ids,
+            until_id=until_id,
+            types=f.types,
+            exclude=f.exclude,
+            with_payload=f.needs_payload,
+        )
+
+    def get_events_tail(
+        self,
+        *,
+        session_id: str | None,
+        since_id: int | None = None,
+        since_seq: int | None = None,
+        limit: int = 2000,
+        event_filter: EventFilter | None = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        f = event_filter or EventFilter()
+        return self._db.get_events_tail(
+            session_id,
+            since_id=since_id,
+            since_seq=since_seq,
+            limit=limit,
+            types=f.types,
+            exclude=f.exclude,
+            with_payload=f.needs_payload,
+        )
+
+    def latest_event_id(self, session_id: str | None = None) -> int:
+        return self._db.latest_event_id(session_id)
 
     def get_session_events_since(
         self,
@@ -0,0 +1,318 @@
+"""Cached, lazily loaded view of the FS root for the `/fs/tree` endpoints.
+
+Directories are listed (os.scandir) the first time they are requested and
+cached. A request only rescans the directory it lists (at most every
+`rescan_interval_s`); the other cached directories are rescanned by a
+background thread that `ensure_fresh()` starts, so no request waits for a
+whole-tree rescan. Differences against the cache become entries in a bounded
+change feed and bump a tree generation, which is also the ETag of directory
+listings. Only directories someone has looked at are ever cached or
+rescanned, so a huge repository costs nothing until the UI expands into it.
+The flat file list (`walk_files`) is walked fresh per page and not cached.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Iterable
+
+from loguru import logger
+
+
+def _entry(name: str, rel: str, is_dir: bool, st: os.stat_result | None) -> dict[str, Any]:
+    entry: dict[str, Any] = {"name": name, "path": rel, "type": "dir" if is_dir else "file"}
+    if not is_dir:
+        entry["size"] = int(st.st_size) if st else 0
+        entry["mtime"] = float(st.st_mtime) if st else 0.0
+    return entry
+
+
+def _sort_key(entry: dict[str, Any]) -> str:
+    # Directories first, then files; both by name. Also the listing cursor.
+    return ("0:" if entry["type"] == "dir" else "1:") + entry["name"]
+
+
+class FsTreeService:
+    def __init__(
+        self,
+        root: Path,
+        *,
+        ignore_dirs: Iterable[str] = (),
+        rescan_interval_s: float = 2.0,
+        max_changes: int = 10_000,
+    ):
+        self.root = Path(root).expanduser().resolve()
+        self.ignore_dirs = frozenset(ignore_dirs)
+        self.rescan_interval_s = max(0.0, float(rescan_interval_s))
+        self.boot_id = uuid.uuid4().hex[:8]
+        self.generation = 0
+        self._lock = threading.RLock()
+        # rel dir ("" = root) -> {name: entry}
+        self._dirs: dict[str, dict[str, dict[str, Any]]] = {}
+        self._checked: dict[str, float] = {}
+        self._changes: deque[dict[str, Any]] = deque(maxlen=max(1, int(max_changes)))
+        self._feed_floor = 0  # changes after this generation are all still in the feed
+        self._scan_thread: threading.Thread | None = None
+        self._next_rescan = 0.0
+
+    @property
+    def etag(self) -> str:
+        return self.etag_for(self.generation)
+
+    def etag_for(self, generation: int) -> str:
+        return f'W/"tree-{self.boot_id}-{generation}"'
+
+    def rel_path(self, p: Path) -> str:
+        rel = p.resolve().relative_to(self.root).as_posix()
+        return "" if rel == "." else rel
+
+    # ── Scanning ─────────────────────────────────────────────────
+
+    def _visible(self, name: str, is_dir: bool) -> bool:
+        if name.startswith("."):
+            return False
+        return not (is_dir and name in self.ignore_dirs)
+
+    def _list(self, rel: str) -> dict[str, dict[str, Any]]:
+        """List one directory from disk. Does no locking; raises FileNotFoundError/NotADirectoryError."""
+        full = self.root / rel if rel else self.root
+        fresh: dict[str, dict[str, Any]] = {}
+        with os.scandir(full) as it:
+            for de in it:
+                try:
+                    is_dir = de.is_dir(follow_symlinks=False)
+                    if not self._visible(de.name, is_dir):
+                        continue
+                    st = None if is_dir else de.stat()
+                except OSError:
+                    continue
+                child = f"{rel}/{de.name}" if rel else de.name
+                fresh[de.name] = _entry(de.name, child, is_dir, st)
+        return fresh
+
+    def _scan(self, rel: str, *, cached_only: bool = False) -> None:
+        """(Re)list one directory and diff it against the cache.
+
+        The disk I/O runs without the lock. With `cached_only`, a directory
+        that was dropped from the cache meanwhile is not added back.
+        """
+        try:
+            fresh = self._list(rel)
+        except (FileNotFoundError, NotADirectoryError):
+            with self._lock:
+                if rel in self._dirs:
+                    self._forget(rel)
+            raise
+        with self._lock:
+            old = self._dirs.get(rel)
+            if old is None and cached_only:
+                return
+            self._dirs[rel] = fresh
+            self._checked[rel] = time.monotonic()
+            if old is None:
+                return  # first listing fills the cache; nothing changed from the client's point of view
+
+            changes = []
+            for name, entry in fresh.items():
+                prev = old.get(name)
+                if prev is None:
+                    changes.append(("added", entry))
+                elif prev["type"] != entry["type"] or prev.get("size") != entry.get("size") or prev.get("mtime") != entry.get("mtime"):
+                    changes.append(("modified", entry))
+            for name, entry in old.items():
+                if name not in fresh:
+                    changes.append(("removed", entry))
+                    if entry["type"] == "dir":
+                        self._forget(entry["path"])
+            if changes:
+                self.generation += 1
+                for op, entry in changes:
+                    self._record(op, entry)
+
+    def _forget(self, rel: str) -> None:
+        prefix = rel + "/"
+        for d in [d for d in self._dirs if d == rel or d.startswith(prefix)]:
+            self._dirs.pop(d, None)
+            self._checked.pop(d, None)
+
+    def _record(self, op: str, entry: dict[str, Any]) -> None:
+        if len(self._changes) == self._changes.maxlen:
+            self._feed_floor = self._changes[0]["generation"]
+        self._changes.append({"generation": self.generation, "op": op, **entry})
+
+    def _due(self, rel: str) -> bool:
+        checked = self._checked.get(rel)
+        return checked is None or time.monotonic() - checked >= self.rescan_interval_s
+
+    def _ensure(self, rel: str) -> dict[str, dict[str, Any]]:
+        """Cached listing of `rel`, rescanned first if older than the rescan interval."""
+        with self._lock:
+            due = self._due(rel)
+        if due:
+            self._scan(rel)
+        with self._lock:
+            listing = self._dirs.get(rel)
+        if listing is None:  # dropped by a concurrent parent rescan; list it again
+            self._scan(rel)
+            with self._lock:
+                listing = self._dirs.get(rel, {})
+        return listing
+
+    def refresh(self) -> int:
+        """Rescan every cached directory that is due, synchronously. Returns the tree generation."""
+        started = time.monotonic()
+        with self._lock:
+            pending = sorted(self._dirs)
+        for rel in pending:
+            with self._lock:
+                due = rel in self._dirs and self._due(rel)  # a parent rescan may have dropped it
+            if not due:
+                continue
+            try:
+                self._scan(rel, cached_only=True)
+            except (FileNotFoundError, NotADirectoryError):
+                pass
+        # A rescan that takes long (a huge cached tree) is spaced out further.
+        self._next_rescan = time.monotonic() + max(self.rescan_interval_s, 4 * (time.monotonic() - started))
+        return self.generation
+
+    def ensure_fresh(self) -> int:
+        """Start a background rescan of the cached directories when one is due. Returns the tree generation."""
+        if time.monotonic() >= self._next_rescan and not (self._scan_thread is not None and self._scan_thread.is_alive()):
+            self._scan_thread = threading.Thread(target=self._background_refresh, name="fs-tree", daemon=True)
+            self._scan_thread.start()
+        return self.generation
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"fs tree rescan failed: {e}")
+
+    def invalidate(self, rel_path: str) -> None:
+        """Force a rescan of the directory containing `rel_path` (after a server-side write)."""
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        with self._lock:
+            self._checked.pop(parent, None)
+
+    # ── Queries ──────────────────────────────────────────────────
+
+    def list_dir(self, rel: str = "", *, cursor: str | None = None, limit: int = 500) -> dict[str, Any]:
+        """One page of a directory listing. Raises FileNotFoundError/NotADirectoryError."""
+        limit = max(1, min(int(limit), 5000))
+        entries = sorted(self._ensure(rel).values(), key=_sort_key)
+        generation = self.generation
+        if cursor:
+            entries = [e for e in entries if _sort_key(e) > cursor]
+        page = entries[:limit]
+        more = len(entries) > limit
+        return {
+            "dir": rel,
+            "tree_id": self.boot_id,
+            "generation": generation,
+            "items": page,
+            "next_cursor": _sort_key(page[-1]) if more and page else None,
+        }
+
+    def walk_files(self, *, cursor: str | None = None, limit: int = 5000) -> dict[str, Any]:
+        """
+        Flat list of all files (the original /fs/tree shape), paginated by path.
+
+        Walks the disk directly instead of filling the directory cache. Children
+        are visited in path order, so the walk skips whole subtrees before
+        `cursor` and stops after `limit` files: a page costs about as much as
+        the files on it.
+        """
+        limit = max(1, int(limit))
+        items: list[dict[str, Any]] = []
+        more = False
+
+        def walk(rel: str) -> bool:
+            nonlocal more
+            full = self.root / rel if rel else self.root
+            try:
+                with os.scandir(full) as it:
+                    children = []
+                    for de in it:
+                        try:
+                            is_dir = de.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if self._visible(de.name, is_dir):
+                            children.append((de.name + "/" if is_dir else de.name, de))
+            except OSError:
+                return True
+            # "a/x" sorts after "a.txt", so ordering dirs as "name/" keeps the walk in path order.
+            children.sort(key=lambda c: c[0])
+            for key, de in children:
+                path = f"{rel}/{key}" if rel else key
+                if key.endswith("/"):
+                    if cursor and path < cursor and not cursor.startswith(path):
+                        continue  # every file below sorts before the cursor
+                    if not walk(path[:-1]):
+                        return False
+                    continue
+                if cursor and path <= cursor:
+                    continue
+                if len(items) == limit:
+                    more = True
+                    return False
+                try:
+                    st = de.stat()
+                except OSError:
+                    continue
+                items.append({"path": path, "size": int(st.st_size), "mtime": float(st.st_mtime)})
+            return True
+
+        walk("")
+        return {
+            "tree_id": self.boot_id,
+            "generation": self.generation,
+            "items": items,
+            "truncated": more,
+            "next_cursor": items[-1]["path"] if more and items else None,
+        }
+
+    def changes(self, since: int, *, tree_id: str | None = None, limit: int = 1000) -> dict[str, Any]:
+        """
+        Change feed after generation `since`.
+
+        Serves what the cache knows and starts a background rescan when one is
+        due, so changes show up on a later poll. `reset` means the client must
+        refetch its listings: the feed no longer reaches back to `since`, or
+        `tree_id` is from an earlier server process.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            generation = self.generation
+            stale = tree_id is not None and tree_id != self.boot_id
+            if stale or since < self._feed_floor or since > generation:
+                return {"tree_id": self.boot_id, "generation": generation, "reset": True, "changes": [], "more": False}
+            items = [c for c in self._changes if c["generation"] > since]
+        more = False
+        if len(items) > limit:
+            # Page on generation boundaries so `generation` is a valid next `since`.
+            cut = items[limit - 1]["generation"]
+            more = items[-1]["generation"] > cut
+            items = [c for c in items if c["generation"] <= cut]
+            generation = cut
+        return {
+            "tree_id": self.boot_id,
+            "generation": generation,
+            "reset": False,
+            "changes": items,
+            "more": more,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "generation": self.generation,
+                "cached_dirs": len(self._dirs),
+                "feed_size": len(self._changes),
+            }
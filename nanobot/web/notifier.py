@@ -0,0 +1,115 @@
+"""Wakeup notifiers for the web EventBus.
+
+The bus persists every event in SQLite; a notifier only tells waiting SSE
+streams that they should re-query. Backends:
+
+- `InProcessNotifier` (default): asyncio.Condition, single process only.
+- `SQLiteNotifier`: also polls `PRAGMA data_version` on a dedicated connection
+  so events committed by *other* processes (uvicorn workers, `fanfan worker`)
+  wake local subscribers within one poll interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from loguru import logger
+
+
+class InProcessNotifier:
+    """Wake subscribers in this process when an event is published here."""
+
+    def __init__(self) -> None:
+        self._cond = asyncio.Condition()
+        self.generation = 0
+
+    async def notify(self) -> None:
+        async with self._cond:
+            self.generation += 1
+            self._cond.notify_all()
+
+    async def wait(self, timeout_s: float) -> bool:
+        try:
+            async with self._cond:
+                await asyncio.wait_for(self._cond.wait(), timeout=timeout_s)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self) -> None:
+        return None
+
+
+class SQLiteNotifier(InProcessNotifier):
+    """Cross-process notifier: polls the shared database for new events while anyone is waiting."""
+
+    def __init__(self, db_path: str | Path, *, poll_interval_s: float = 0.05) -> None:
+        super().__init__()
+        self._db_path = str(db_path)
+        self._poll_interval_s = max(0.005, float(poll_interval_s))
+        self._conn: sqlite3.Connection | None = None
+        self._waiters = 0
+        self._task: asyncio.Task[None] | None = None
+        self._data_version = -1
+        self._max_event_id = -1
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False, timeout=5.0)
+            self._conn.execute("PRAGMA busy_timeout=5000")
+        return self._conn
+
+    def _changed(self) -> bool:
+        """True when another connection committed new events since the last check."""
+        conn = self._connect()
+        version = int(conn.execute("PRAGMA data_version").fetchone()[0])
+        if version == self._data_version:
+            return False
+        self._data_version = version
+        row = conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        max_id = int(row[0] or 0)
+        if max_id == self._max_event_id:
+            return False
+        first = self._max_event_id < 0
+        self._max_event_id = max_id
+        return not first
+
+    async def _poll(self) -> None:
+        # The last seen event id survives poll restarts, so events committed while
+        # nobody was waiting still produce a (harmless) wakeup on the next wait.
+        try:
+            while self._waiters > 0:
+                try:
+                    changed = self._changed()
+                except sqlite3.Error as e:
+                    logger.debug("event notifier poll failed: {}", str(e))
+                    changed = False
+                if changed:
+                    await self.notify()
+                await asyncio.sleep(self._poll_interval_s)
+        finally:
+            self._task = None
+
+    async def wait(self, timeout_s: float) -> bool:
+        self._waiters += 1
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+        try:
+            return await super().wait(timeout_s)
+        finally:
+            self._waiters -= 1
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def make_notifier(kind: str, db_path: str | Path, *, poll_interval_s: float = 0.05) -> InProcessNotifier:
+    if kind == "sqlite":
+        return SQLiteNotifier(db_path, poll_interval_s=poll_interval_s)
+    return InProcessNotifier()
@@ -28,9 +28,12 @@ class PermissionResult:
 
 
 class PermissionManager:
-    def __init__(self, *, db: Database, settings: WebSettings):
+    def __init__(self, *, db: Database, settings: WebSettings, poll_interval_s: float | None = None):
         self._db = db
         self._settings = settings
+        # Set in `fanfan worker` processes: approvals are resolved by the web process,
+        # so waiters also poll the permission_requests row.
+        self._poll_interval_s = poll_interval_s
         self._pending: dict[str, asyncio.Future[PermissionResult]] = {}
         self._pending_meta: dict[str, dict[str, str]] = {}
         self._session_overrides: dict[str, dict[str, Policy]] = defaultdict(dict)
@@ -87,12 +90,43 @@ class PermissionManager:
         if fut is None:
             return PermissionResult(approved=False, scope="once")
         try:
+            if self._poll_interval_s:
+                return await self._wait_polling(request_id, fut, timeout_s)
             return await asyncio.wait_for(fut, timeout=timeout_s)
         except asyncio.TimeoutError:
             self._db.resolve_permission_request(request_id, status="expired", scope="once")
             await self._finalize(request_id, PermissionResult(approved=False, scope="once"))
             return PermissionResult(approved=False, scope="once")
 
+    async def _wait_polling(
+        self, request_id: str, fut: asyncio.Future[PermissionResult], timeout_s: float
+    ) -> PermissionResult:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout_s
+        interval = float(self._poll_interval_s or 0.5)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            try:
+                return await asyncio.wait_for(asyncio.shield(fut), timeout=min(interval, remaining))
+            except asyncio.TimeoutError:
+                pass
+            rec = self._db.get_permission_request(request_id) or {}
+            status = rec.get("status")
+            if status in ("approved", "denied"):
+                scope = rec.get("scope") or "once"
+                approved = status == "approved"
+                self._remember(
+                    session_id=str(rec.get("session_id") or ""),
+                    tool_name=str(rec.get("tool_name") or ""),
+                    approved=approved,
+                    scope=scope,
+                )
+                result = PermissionResult(approved=approved, scope=scope)
+                await self._finalize(request_id, result)
+                return result
+
     async def resolve(
         self,
         *,
@@ -100,22 +134,28 @@ class PermissionManager:
         status: ResolveStatus,
         scope: ResolveScope,
     ) -> None:
-        meta = self._pending_meta.get(request_id) or {}
-        session_id = meta.get("session_id", "")
-        tool_name = meta.get("tool_name", "")
+        meta = self._pending_meta.get(request_id)
+        if meta is None:
+            # Requested by another process (worker mode): read it back from the row.
+            meta = self._db.get_permission_request(request_id) or {}
+        session_id = str(meta.get("session_id") or "")
+        tool_name = str(meta.get("tool_name") or "")
 
         approved = status == "approved"
         self._db.resolve_permission_request(request_id, status=status, scope=scope)
-
-        # Persist/remember policy by scope
-        if tool_name:
-            if scope == "always":
-                self._db.upsert_tool_permission(tool_name, "allow" if approved else "deny")
-            elif scope == "session" and session_id:
-                self._session_overrides[session_id][tool_name] = "allow" if approved else "deny"
+        self._remember(session_id=session_id, tool_name=tool_name, approved=approved, scope=scope)
 
         await self._finalize(request_id, PermissionResult(approved=approved, scope=scope))
 
+    def _remember(self, *, session_id: str, tool_name: str, approved: bool, scope: str) -> None:
+        # Persist/remember policy by scope
+        if not tool_name:
+            return
+        if scope == "always":
+            self._db.upsert_tool_permission(tool_name, "allow" if approved else "deny")
+        elif scope == "session" and session_id:
+            self._session_overrides[session_id][tool_name] = "allow" if approved else "deny"
+
     async def _finalize(self, request_id: str, result: PermissionResult) -> None:
         async with self._lock:
             fut = self._pending.pop(request_id, None)
@@ -0,0 +1,118 @@
+"""Streaming reverse proxy to the UI origin (ui_mode=remote/dev).
+
+One pooled `httpx.AsyncClient` is shared by all requests. Request and response
+bodies are forwarded chunk by chunk (`aiter_raw`, still encoded), so large
+bundles/source maps never sit in memory and long-lived streaming responses
+(dev-server event streams) pass through as they are produced. Range and
+conditional headers are forwarded unchanged, so upstream 206/304 answers reach
+the client.
+"""
+
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+
+# RFC 9110 §7.6.1 hop-by-hop headers, plus Host/Content-Length which httpx sets itself.
+_HOP_BY_HOP = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "proxy-connection",
+        "te",
+        "trailer",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+_REQUEST_SKIP = _HOP_BY_HOP | {"host", "content-length"}
+
+
+async def _relay(upstream: httpx.Response) -> AsyncIterator[bytes]:
+    # Closing in `finally` also releases the pooled connection when the client disconnects.
+    try:
+        async for chunk in upstream.aiter_raw():
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+
+class UpstreamProxy:
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        connect_timeout_s: float = 10.0,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.connect_timeout_s = connect_timeout_s
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                # No read timeout: streaming responses may stay open indefinitely.
+                timeout=httpx.Timeout(self.connect_timeout_s, read=None),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def url_for(self, full_path: str, query: str = "") -> str:
+        url = self.base_url + "/" + full_path.lstrip("/")
+        return f"{url}?{query}" if query else url
+
+    async def forward(self, request: Request, full_path: str) -> Response:
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in _REQUEST_SKIP]
+        has_body = request.method not in ("GET", "HEAD", "OPTIONS") and (
+            "content-length" in request.headers or "transfer-encoding" in request.headers
+        )
+        upstream_request = self.client.build_request(
+            request.method,
+            self.url_for(full_path, request.url.query),
+            headers=headers,
+            content=request.stream() if has_body else None,
+        )
+        try:
+            upstream = await self.client.send(upstream_request, stream=True)
+        except httpx.TimeoutException:
+            return PlainTextResponse("UI upstream timed out", status_code=504)
+        except httpx.HTTPError as e:
+            return PlainTextResponse(f"UI upstream unavailable: {type(e).__name__}", status_code=502)
+
+        # Body is forwarded still encoded, so Content-Encoding/Content-Length stay valid.
+        out_headers = [
+            (k.encode("latin-1"), v.encode("latin-1"))
+            for k, v in upstream.headers.multi_items()
+            if k.lower() not in _HOP_BY_HOP
+        ]
+        if request.method == "HEAD" or upstream.status_code in (204, 304):
+            await upstream.aclose()
+            response = Response(status_code=upstream.status_code)
+            response.raw_headers = out_headers
+            return response
+
+        response = StreamingResponse(_relay(upstream), status_code=upstream.status_code)
+        response.raw_headers = out_headers
+        return response
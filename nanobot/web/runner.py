@@ -20,12 +20,16 @@ from typing import Any
 from loguru import logger
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.code_search import CodeSearchTool, get_code_index
 from nanobot.agent.context import ContextBuilder
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool
 from nanobot.agent.tools.opencode import HttpFetchTool, SearchTool
 from nanobot.agent.tools.patch import ApplyPatchTool, _extract_files_from_patch
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.config.schema import MemoryConfig
 from nanobot.providers.base import LLMProvider, ToolCallRequest
+from nanobot.providers.cache import llm_cacheable
+from nanobot.providers.governor import llm_priority
 from nanobot.web.database import Database
 from nanobot.web.event_bus import EventBus
 from nanobot.web.permissions import PermissionManager
@@ -169,6 +173,7 @@ class FanfanWebRunner:
         model: str,
         max_iterations: int,
         brave_api_key: str | None = None,
+        memory_config: MemoryConfig | None = None,
     ):
         self._db = db
         self._bus = bus
@@ -181,9 +186,15 @@ class FanfanWebRunner:
         self._brave_api_key = brave_api_key
 
         self._fs_root = settings.resolved_fs_root().expanduser().resolve()
+        self._code_index = get_code_index(
+            self._fs_root,
+            settings.resolved_data_dir() / "code_index.db",
+            rescan_interval_s=settings.code_index_rescan_s,
+            max_file_bytes=settings.code_index_max_file_bytes,
+        )
 
         self._workspace = repo_root() / "workspace"
-        self._context = ContextBuilder(self._workspace)
+        self._context = ContextBuilder(self._workspace, memory_config=memory_config)
 
         self._tools = ToolRegistry()
         self._register_tools(brave_api_key=brave_api_key)
@@ -193,6 +204,7 @@ class FanfanWebRunner:
         self._tools.register(ReadFileTool(root=self._fs_root))
         self._tools.register(WriteFileTool(root=self._fs_root))
         self._tools.register(ApplyPatchTool(allowed_root=self._fs_root))
+        self._tools.register(CodeSearchTool(self._code_index))
         self._tools.register(SearchTool(api_key=brave_api_key))
         self._tools.register(HttpFetchTool())
         self._tools.register(SpawnSubagentTool(self))
@@ -246,16 +258,17 @@ class FanfanWebRunner:
         user = f"Title: {title}\n\nContent:\n{content}"
 
         try:
-            resp = await self._provider.chat(
-                messages=[
-                    {"role": "system", "content": sys},
-                    {"role": "user", "content": user},
-                ],
-                tools=None,
-                model=self._model,
-                max_tokens=900,
-                temperature=0.2,
-            )
+            with llm_priority("background"), llm_cacheable():
+                resp = await self._provider.chat(
+                    messages=[
+                        {"role": "system", "content": sys},
+                        {"role": "user", "content": user},
+                    ],
+                    tools=None,
+                    model=self._model,
+                    max_tokens=900,
+                    temperature=0.2,
+                )
             # Some providers may return tool calls even if tools=None; ignore them.
             return (resp.content or "").strip()
         except Exception as e:
@@ -401,6 +414,7 @@ class FanfanWebRunner:
         # Build LLM messages from DB history to keep one canonical store.
         history_rows = self._db.get_messages(session_id)
         history: list[dict[str, Any]] = [{"role": r["role"], "content": r["content"]} for r in history_rows[-50:]]
+        self._context.memory.set_external_memory(self._db.get_memory())
         messages = self._context.build_messages(
             history=history,
             current_message=user_text,
@@ -416,7 +430,8 @@ class FanfanWebRunner:
 
             messages[0]["content"] += (
                 "\n\n## Web Tools\n"
-                "Available tools: read_file, write_file, apply_patch, search, http_fetch, spawn_subagent.\n"
+                "Available tools: read_file, write_file, apply_patch, code_search, search, http_fetch, spawn_subagent.\n"
+                "Use code_search to find code in the workspace before reading whole files.\n"
                 "Unavailable: exec/run_command (shell), message, cron.\n"
             )
 
@@ -443,6 +458,17 @@ class FanfanWebRunner:
                     tools=self._tools.get_definitions(),
                     model=self._model,
                 ):
+                    if chunk.event:
+                        # Provider notices (retries, fallbacks) surface as their own events.
+                        notice = dict(chunk.event)
+                        await self._bus.publish(
+                            session_id=session_id,
+                            turn_id=turn_id,
+                            step_id=step_id,
+                            type=str(notice.pop("type", "llm_notice")),
+                            payload=notice,
+                        )
+
                     if chunk.delta:
                         content_parts.append(chunk.delta)
                         await self._bus.publish(
@@ -709,6 +735,7 @@ class FanfanWebRunner:
                         # Emit diff + persist file change
                         if ok and tool_name == "write_file" and target_path is not None and before_text is not None:
                             after_text = _read_file_best_effort(target_path)
+                            self._code_index.update_paths([target_path])
                             if before_text != after_text:
                                 display_path = target_display_path or self._display_fs_path(target_path)
                                 diff = _unified_diff(display_path, before_text, after_text)
@@ -743,6 +770,8 @@ class FanfanWebRunner:
                                             before = patch_before.get(path) if patch_before else None
                                             rp = self._resolve_fs_path(path)
                                             after = _read_file_best_effort(rp) if rp is not None else ""
+                                            if rp is not None:
+                                                self._code_index.update_paths([rp])
                                             self._db.record_file_change_versions(
                                                 session_id=session_id,
                                                 turn_id=turn_id,
@@ -931,10 +960,12 @@ class FanfanWebRunner:
         tools.register(ReadFileTool(root=self._fs_root))
         tools.register(WriteFileTool(root=self._fs_root))
         tools.register(ApplyPatchTool(allowed_root=self._fs_root))
+        tools.register(CodeSearchTool(self._code_index))
         tools.register(SearchTool(api_key=self._brave_api_key))
         tools.register(HttpFetchTool())
 
-        sys = self._context.build_system_prompt()
+        self._context.memory.set_external_memory(self._db.get_memory())
+        sys = self._context.build_system_prompt(current_message=task)
         pinned_section = await self._build_pinned_context(session_id=session_id)
         if pinned_section:
             sys += "\n\n---\n\n" + pinned_section
@@ -945,7 +976,7 @@ class FanfanWebRunner:
             "- Stay focused on the given task.\n"
             "- Return a clear final answer.\n"
             "- You may use tools if needed; file writes and patches may require approval.\n\n"
-            "Web tools available: read_file, write_file, apply_patch, search, http_fetch.\n"
+            "Web tools available: read_file, write_file, apply_patch, code_search, search, http_fetch.\n"
             "Shell execution is not available.\n"
         )
 
@@ -1174,6 +1205,7 @@ class FanfanWebRunner:
 
                         if ok and tool_name == "write_file" and target_path is not None and before_text is not None:
                             after_text = _read_file_best_effort(target_path)
+                            self._code_index.update_paths([target_path])
                             if before_text != after_text:
                                 display_path = target_display_path or self._display_fs_path(target_path)
                                 diff = _unified_diff(display_path, before_text, after_text)
@@ -1214,6 +1246,8 @@ class FanfanWebRunner:
                                             before = patch_before.get(path) if patch_before else None
                                             rp = self._resolve_fs_path(path)
                                             after = _read_file_best_effort(rp) if rp is not None else ""
+                                            if rp is not None:
+                                                self._code_index.update_paths([rp])
                                             self._db.record_file_change_versions(
                                                 session_id=session_id,
                                                 turn_id=turn_id,
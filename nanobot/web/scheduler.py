@@ -0,0 +1,189 @@
+"""Turn scheduler for the fanfan web server.
+
+- one running turn per session; follow-up messages wait in a per-session FIFO
+- a global cap on concurrently running turns
+- weighted fair queuing across sessions (virtual finish tags), so one chatty
+  session cannot starve the others
+- admission control: `SchedulerFullError` (-> HTTP 429 + Retry-After) when queues are too deep
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+
+class SchedulerFullError(Exception):
+    """Raised when a turn cannot be queued; `retry_after_s` is a best-effort hint."""
+
+    def __init__(self, reason: str, retry_after_s: int):
+        super().__init__(reason)
+        self.retry_after_s = retry_after_s
+
+
+@dataclass
+class QueuedTurn:
+    session_id: str
+    turn_id: str
+    run: Callable[[], Awaitable[None]]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    finish_tag: float = 0.0
+    started_at: float | None = None
+
+
+@dataclass
+class _SessionQueue:
+    weight: float = 1.0
+    last_tag: float = 0.0
+    pending: deque[QueuedTurn] = field(default_factory=deque)
+    running: QueuedTurn | None = None
+    task: asyncio.Task[None] | None = None
+
+
+class TurnScheduler:
+    def __init__(self, *, max_concurrent: int = 8, max_queue_per_session: int = 5, max_queue_total: int = 100):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue_per_session = max(0, int(max_queue_per_session))
+        self.max_queue_total = max(0, int(max_queue_total))
+        self._sessions: dict[str, _SessionQueue] = {}
+        self._running = 0
+        self._vtime = 0.0
+        self._recent_waits: deque[float] = deque(maxlen=256)
+        self._recent_durations: deque[float] = deque(maxlen=64)
+
+    # ── Submission ───────────────────────────────────────────────
+
+    def submit(
+        self,
+        session_id: str,
+        turn_id: str,
+        run: Callable[[], Awaitable[None]],
+        *,
+        weight: float = 1.0,
+    ) -> dict[str, Any]:
+        """Queue a turn. Returns {"queued": bool, "position": int}. Raises SchedulerFullError."""
+        self.check_admission(session_id)
+        sq = self._sessions.setdefault(session_id, _SessionQueue())
+        sq.weight = max(0.01, float(weight))
+
+        # WFQ: a session's next turn finishes (virtually) 1/weight after its previous one.
+        tag = max(self._vtime, sq.last_tag) + 1.0 / sq.weight
+        sq.last_tag = tag
+        item = QueuedTurn(session_id=session_id, turn_id=turn_id, run=run, finish_tag=tag)
+        sq.pending.append(item)
+        self._dispatch()
+        queued = item.started_at is None
+        return {"queued": queued, "position": len(sq.pending) if queued else 0}
+
+    def check_admission(self, session_id: str) -> None:
+        """Raise SchedulerFullError if a new turn for this session would exceed the queue limits."""
+        sq = self._sessions.get(session_id)
+        busy = (sq is not None and sq.running is not None) or self._running >= self.max_concurrent or self._has_pending()
+        if not busy:
+            return
+        if self.max_queue_per_session and sq is not None and len(sq.pending) >= self.max_queue_per_session:
+            raise SchedulerFullError("too many queued messages for this session", self.retry_after_s())
+        if self.max_queue_total and self.queued_total() >= self.max_queue_total:
+            raise SchedulerFullError("server is busy", self.retry_after_s())
+
+    def _has_pending(self) -> bool:
+        return any(sq.pending for sq in self._sessions.values())
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrent:
+            eligible = [sq for sq in self._sessions.values() if sq.pending and sq.running is None]
+            if not eligible:
+                return
+            sq = min(eligible, key=lambda s: s.pending[0].finish_tag)
+            self._start(sq, sq.pending.popleft())
+
+    def _start(self, sq: _SessionQueue, item: QueuedTurn) -> None:
+        item.started_at = time.monotonic()
+        self._recent_waits.append(item.started_at - item.enqueued_at)
+        self._vtime = max(self._vtime, item.finish_tag)
+        self._running += 1
+        sq.running = item
+        sq.task = asyncio.create_task(self._run(sq, item))
+
+    async def _run(self, sq: _SessionQueue, item: QueuedTurn) -> None:
+        try:
+            await item.run()
+        finally:
+            self._running -= 1
+            if item.started_at is not None:
+                self._recent_durations.append(time.monotonic() - item.started_at)
+            if sq.running is item:
+                sq.running = None
+                sq.task = None
+            if not sq.pending and sq.running is None:
+                self._sessions.pop(item.session_id, None)
+            self._dispatch()
+
+    # ── Control ──────────────────────────────────────────────────
+
+    def cancel(self, session_id: str, *, drop_queued: bool = True) -> tuple[bool, list[QueuedTurn]]:
+        """Cancel the running turn (and by default drop queued ones). Returns (cancelled, dropped)."""
+        sq = self._sessions.get(session_id)
+        if sq is None:
+            return False, []
+        dropped: list[QueuedTurn] = []
+        if drop_queued:
+            dropped = list(sq.pending)
+            sq.pending.clear()
+        cancelled = False
+        if sq.task is not None and not sq.task.done():
+            sq.task.cancel()
+            cancelled = True
+        if sq.running is None and not sq.pending:
+            self._sessions.pop(session_id, None)
+        return cancelled, dropped
+
+    def is_running(self, session_id: str) -> bool:
+        sq = self._sessions.get(session_id)
+        return bool(sq and sq.running is not None)
+
+    def running_sessions(self) -> list[str]:
+        return sorted(sid for sid, sq in self._sessions.items() if sq.running is not None)
+
+    def running_task(self, session_id: str) -> asyncio.Task[None] | None:
+        sq = self._sessions.get(session_id)
+        return sq.task if sq else None
+
+    # ── Metrics ──────────────────────────────────────────────────
+
+    def queued_total(self) -> int:
+        return sum(len(sq.pending) for sq in self._sessions.values())
+
+    def retry_after_s(self) -> int:
+        durations = self._recent_durations
+        avg = sum(durations) / len(durations) if durations else 10.0
+        backlog = self.queued_total() / self.max_concurrent
+        return max(1, int(avg * max(1.0, backlog)))
+
+    def session_status(self, session_id: str) -> dict[str, Any] | None:
+        """Runtime status for `_session_status` (None when the session is idle)."""
+        sq = self._sessions.get(session_id)
+        if sq is None or (sq.running is None and not sq.pending):
+            return None
+        now = time.monotonic()
+        oldest = sq.pending[0].enqueued_at if sq.pending else None
+        return {
+            "status": "running" if sq.running is not None else "queued",
+            "queue_depth": len(sq.pending),
+            "queue_wait_s": round(now - oldest, 3) if oldest is not None else 0.0,
+            "queued_turn_ids": [q.turn_id for q in sq.pending],
+        }
+
+    def stats(self) -> dict[str, Any]:
+        waits = sorted(self._recent_waits)
+        return {
+            "running": self._running,
+            "max_concurrent": self.max_concurrent,
+            "queued": self.queued_total(),
+            "sessions_waiting": sum(1 for sq in self._sessions.values() if sq.pending),
+            "wait_avg_s": round(sum(waits) / len(waits), 3) if waits else 0.0,
+            "wait_p95_s": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))], 3) if waits else 0.0,
+        }
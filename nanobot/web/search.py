@@ -0,0 +1,96 @@
+"""Full-text search over session titles, messages, turn prompts, final answers and tool outputs.
+
+Documents live in the SQLite FTS5 index maintained by `Database` (see
+`_SEARCH_SCHEMA_SQL`). The trigram tokenizer matches substrings in any script,
+including CJK text without word boundaries, but only for terms of 3+
+characters; shorter terms are applied as substring filters instead. Hits are
+ranked by bm25 and come with an HTML-escaped snippet where matches are wrapped
+in `<mark>`.
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Any
+
+from nanobot.web.database import Database
+
+KINDS = ("session", "message", "turn", "final", "tool")
+
+_TERM = re.compile(r'"([^"]+)"|(\S+)')
+_OPEN, _CLOSE = "\x02", "\x03"
+
+
+def parse_query(q: str) -> tuple[str | None, list[str]]:
+    """(FTS5 MATCH expression for 3+ character terms, shorter terms). Quoted phrases stay whole."""
+    terms = [(a or b).strip() for a, b in _TERM.findall(q or "")]
+    terms = [t for t in terms if t]
+    long_terms = [t for t in terms if len(t) >= 3]
+    short_terms = [t for t in terms if len(t) < 3]
+    # Every term is quoted, so user input never reaches the FTS5 query syntax.
+    match = " ".join('"' + t.replace('"', '""') + '"' for t in long_terms) or None
+    return match, short_terms
+
+
+def _mark_window(body: str, terms: list[str], width: int = 120) -> str:
+    """Snippet around the first occurrence of any term, with all occurrences marked."""
+    pattern = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    first = pattern.search(body)
+    start = max(0, (first.start() if first else 0) - width // 3)
+    end = min(len(body), start + width)
+    window = pattern.sub(lambda m: f"{_OPEN}{m.group(0)}{_CLOSE}", body[start:end])
+    return ("…" if start else "") + window + ("…" if end < len(body) else "")
+
+
+def highlight(snippet: str) -> str:
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def turn_documents(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Searchable outputs of a finished turn: its final answer and tool results."""
+    docs: list[dict[str, Any]] = []
+    for event in events:
+        p = event.get("payload") or {}
+        if event.get("type") == "final":
+            docs.append(
+                {"kind": "final", "ref_id": p.get("message_id") or event.get("id"), "label": "assistant", "body": p.get("text") or ""}
+            )
+        elif event.get("type") == "tool_result":
+            docs.append(
+                {
+                    "kind": "tool",
+                    "ref_id": p.get("tool_call_id") or event.get("id"),
+                    "label": p.get("tool_name") or "",
+                    "body": p.get("output") or p.get("error") or "",
+                }
+            )
+    return docs
+
+
+def search(
+    db: Database,
+    q: str,
+    *,
+    session_id: str | None = None,
+    kinds: list[str] | None = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> dict[str, Any]:
+    """Ranked hits with session/turn anchors. Raises ValueError for an empty query or unknown kind."""
+    match, short_terms = parse_query(q)
+    if not match and not short_terms:
+        raise ValueError("query is empty")
+    unknown = [k for k in kinds or () if k not in KINDS]
+    if unknown:
+        raise ValueError(f"unknown kind: {unknown[0]} (expected one of {', '.join(KINDS)})")
+    rows = db.search(
+        match, short_terms, session_id=session_id, kinds=kinds, limit=limit + 1, offset=offset
+    )
+    items = []
+    for row in rows[:limit]:
+        snippet = row.pop("snippet") or ""
+        if not match:
+            snippet = _mark_window(snippet, short_terms)
+        items.append({**row, "snippet": highlight(snippet)})
+    return {"items": items, "has_more": len(rows) > limit, "limit": limit, "offset": offset}
@@ -43,16 +43,48 @@ class WebSettings(BaseSettings):
     # File tools root (read_file/write_file/apply_patch)
     # Defaults to the repo root to prevent accidental reads/writes outside the deployment directory.
     fs_root: str = "."
+    fs_tree_rescan_s: float = 2.0  # Cached /fs/tree directories are rescanned at most this often
+    # code_search trigram index (stored in data_dir/code_index.db)
+    code_index_rescan_s: float = 30.0  # Background rescan for files changed outside the agent
+    code_index_max_file_bytes: int = 1_000_000  # Larger files are not indexed
 
     # UI proxy/serving
     ui_mode: UiMode = "static"
     ui_url: str = ""  # required when ui_mode=remote
     ui_static_dir: str = "nanobot/web/static/dist"
     ui_dev_server_url: str = "http://127.0.0.1:4444"
+    ui_proxy_connect_timeout_s: float = 10.0  # remote/dev: upstream connect timeout (no read timeout)
+    ui_proxy_max_connections: int = 100  # remote/dev: pooled connections to the UI origin
+
+    # Response compression (gzip; brotli too when the optional `brotli` package is installed)
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024  # Smaller responses are sent uncompressed
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    # Compress text/event-stream frame by frame (sync flush per event). Off by default because
+    # some proxies buffer compressed streams until they close.
+    compression_sse: bool = False
+
+    # Turn scheduling
+    # "inprocess": turns run inside the web process; "worker": the web process only queues
+    # turns in SQLite and `fanfan worker` processes run them.
+    turn_execution: Literal["inprocess", "worker"] = "inprocess"
+    worker_concurrency: int = 4  # Turns each `fanfan worker` process runs at once
+    worker_lease_s: float = 30.0  # A claimed turn is requeued if its worker stops heartbeating
+    worker_poll_interval_s: float = 0.5
+    turn_max_concurrent: int = 8  # Turns running at once across all sessions
+    turn_max_queue_per_session: int = 5  # Follow-up messages queued behind a running turn
+    turn_max_queue_total: int = 100  # Beyond this, new turns get 429 + Retry-After
 
     # SSE
     sse_heartbeat_s: float = 15.0
     sse_wait_timeout_s: float = 15.0
+    sse_replay_max_events: int = 2000  # Replay on connect keeps the newest N; older history goes through REST
+    ws_max_subscriptions: int = 200  # Session subscriptions per /ws connection
+    # "memory" (single process) or "sqlite" (fanfan worker processes; multiple uvicorn workers
+    # also need turn_execution="worker")
+    event_notifier: Literal["memory", "sqlite"] = "memory"
+    event_poll_interval_s: float = 0.05
 
     # CSP
     csp: str = "default-src 'self'"
@@ -76,6 +108,7 @@ class WebSettings(BaseSettings):
     tool_policy_write_file: Policy | None = None
     tool_policy_apply_patch: Policy | None = None
     tool_policy_search: Policy | None = None
+    tool_policy_code_search: Policy | None = None
     tool_policy_http_fetch: Policy | None = None
 
     # Tool enable flags
@@ -84,6 +117,7 @@ class WebSettings(BaseSettings):
     tool_enabled_write_file: bool = True
     tool_enabled_apply_patch: bool = True
     tool_enabled_search: bool = True
+    tool_enabled_code_search: bool = True
     tool_enabled_http_fetch: bool = True
 
     def resolved_data_dir(self) -> Path:
@@ -114,6 +148,7 @@ class WebSettings(BaseSettings):
             "write_file": self.tool_policy_write_file,
             "apply_patch": self.tool_policy_apply_patch,
             "search": self.tool_policy_search,
+            "code_search": self.tool_policy_code_search,
             "http_fetch": self.tool_policy_http_fetch,
         }.get(tool_name)
         return override or self.tool_policy_default
@@ -125,5 +160,6 @@ class WebSettings(BaseSettings):
             "write_file": self.tool_enabled_write_file,
             "apply_patch": self.tool_enabled_apply_patch,
             "search": self.tool_enabled_search,
+            "code_search": self.tool_enabled_code_search,
             "http_fetch": self.tool_enabled_http_fetch,
         }.get(tool_name, True)
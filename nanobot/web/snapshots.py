@@ -0,0 +1,241 @@
+"""Materialized turn snapshots.
+
+A streamed turn is stored as thousands of `message_delta` / `thinking` delta
+events. When a turn ends, `materialize_turn` stores a compacted copy of its
+events in `turn_snapshots`:
+
+- consecutive deltas of the same message (or thinking block) are merged into
+  one event carrying the last id/seq of the run;
+- assistant deltas that the turn's `final` event repeats in full are dropped.
+
+The compacted list still drives the UI's event reducer unchanged, and
+`summarize` folds it into the rendered view (final text, thinking, tool calls
+with results, diffs, usage). History and snapshot replay then cost one row
+per finished turn; raw events are only read for the turn still in progress.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventFilter
+from nanobot.web.search import turn_documents
+
+
+def _merge_key(event: dict[str, Any]) -> tuple[str, ...] | None:
+    payload = event.get("payload") or {}
+    if event.get("type") == "message_delta":
+        return ("message_delta", str(payload.get("role") or ""), str(payload.get("message_id") or ""))
+    if event.get("type") == "thinking" and payload.get("status") == "delta":
+        return ("thinking",)
+    return None
+
+
+def compact_events(events: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge delta runs and drop assistant text that a `final` event repeats."""
+    finals = {
+        (e.get("payload") or {}).get("message_id")
+        for e in events
+        if e.get("type") == "final" and (e.get("payload") or {}).get("text")
+    }
+    out: list[dict[str, Any]] = []
+    prev_key: tuple[str, ...] | None = None
+    for event in events:
+        payload = event.get("payload") or {}
+        if (
+            event.get("type") == "message_delta"
+            and payload.get("role") == "assistant"
+            and payload.get("message_id") in finals
+        ):
+            prev_key = None
+            continue
+        key = _merge_key(event)
+        if key is not None and key == prev_key:
+            last = out[-1]
+            field = "delta" if key[0] == "message_delta" else "text"
+            last["payload"][field] = (last["payload"].get(field) or "") + (payload.get(field) or "")
+            last["id"], last["seq"] = event.get("id"), event.get("seq")
+            continue
+        out.append({**event, "payload": dict(payload)})
+        prev_key = key
+    return out
+
+
+def summarize(events: list[dict[str, Any]]) -> dict[str, Any]:
+    """Fold a turn's (compacted) events into its rendered state."""
+    text_parts: list[str] = []
+    final_text: str | None = None
+    thinking: list[str] = []
+    thinking_ms = 0
+    tool_calls: dict[str, dict[str, Any]] = {}
+    diffs: list[dict[str, Any]] = []
+    usage: dict[str, Any] = {}
+    finish_reason = None
+    error = None
+    status = "completed"
+
+    for event in events:
+        etype = event.get("type")
+        p = event.get("payload") or {}
+        if etype == "message_delta" and p.get("role") == "assistant":
+            text_parts.append(str(p.get("delta") or ""))
+        elif etype == "thinking":
+            if p.get("status") == "start" or not thinking:
+                thinking.append("")
+            if p.get("status") == "delta":
+                thinking[-1] += str(p.get("text") or "")
+            elif p.get("status") == "end":
+                thinking_ms += int(p.get("duration_ms") or 0)
+        elif etype == "tool_call":
+            tc_id = str(p.get("tool_call_id") or "")
+            call = tool_calls.setdefault(tc_id, {"tool_call_id": tc_id, "diff_paths": []})
+            call.update({"tool_name": p.get("tool_name"), "input": p.get("input") or {}})
+            call.setdefault("status", p.get("status") or "running")
+        elif etype == "tool_result":
+            tc_id = str(p.get("tool_call_id") or "")
+            call = tool_calls.setdefault(tc_id, {"tool_call_id": tc_id, "diff_paths": []})
+            ok = bool(p.get("ok"))
+            call.update(
+                {
+                    "tool_name": call.get("tool_name") or p.get("tool_name"),
+                    "status": "completed" if ok else "error",
+                    "ok": ok,
+                    "output": p.get("output") or "",
+                    "error": p.get("error") or "",
+                    "duration_ms": p.get("duration_ms"),
+                }
+            )
+        elif etype == "diff":
+            diffs.append({"tool_call_id": p.get("tool_call_id"), "path": p.get("path"), "diff": p.get("diff") or ""})
+            if p.get("tool_call_id") in tool_calls:
+                tool_calls[p["tool_call_id"]]["diff_paths"].append(p.get("path"))
+        elif etype == "final":
+            final_text = str(p.get("text") or "")
+            usage = p.get("usage") or usage
+            finish_reason = p.get("finish_reason")
+            status = "completed"
+        elif etype == "error":
+            error = {"code": p.get("code"), "message": p.get("message")}
+            status = "cancelled" if p.get("code") == "CANCELLED" else "error"
+
+    return {
+        "status": status,
+        "text": final_text if final_text is not None else "".join(text_parts),
+        "thinking": "\n\n".join(t for t in thinking if t),
+        "thinking_ms": thinking_ms,
+        "tool_calls": list(tool_calls.values()),
+        "diffs": diffs,
+        "usage": usage,
+        "finish_reason": finish_reason,
+        "error": error,
+    }
+
+
+def snapshot_view(row: dict[str, Any], *, include_events: bool = False) -> dict[str, Any]:
+    """API shape of a stored snapshot row."""
+    events = row.get("events") or []
+    view = {
+        "turn_id": row["turn_id"],
+        "session_id": row["session_id"],
+        "first_event_id": row["first_event_id"],
+        "last_event_id": row["last_event_id"],
+        "last_seq": events[-1].get("seq") if events else None,
+        "raw_event_count": row["event_count"],
+        **summarize(events),
+    }
+    if include_events:
+        view["events"] = events
+    return view
+
+
+def materialize_turn(db: Database, turn_id: str) -> dict[str, Any] | None:
+    """Build and store the snapshot of a finished turn; returns the stored row (None without events)."""
+    turn = db.get_turn(turn_id)
+    if not turn:
+        return None
+    events = db.get_turn_events(turn_id)
+    if not events:
+        return None
+    compacted = compact_events(events)
+    db.put_turn_snapshot(
+        turn_id,
+        turn["session_id"],
+        compacted,
+        first_event_id=events[0]["id"],
+        last_event_id=events[-1]["id"],
+        event_count=len(events),
+    )
+    # Final answers and tool outputs become searchable once, here, off the event insert path.
+    db.replace_turn_search_docs(turn_id, turn["session_id"], turn_documents(compacted))
+    return {
+        "turn_id": turn_id,
+        "session_id": turn["session_id"],
+        "first_event_id": events[0]["id"],
+        "last_event_id": events[-1]["id"],
+        "event_count": len(events),
+        "events": compacted,
+    }
+
+
+def turn_snapshots(db: Database, turn_ids: list[str]) -> dict[str, dict[str, Any]]:
+    """Stored snapshots for `turn_ids`, materializing ended turns that predate snapshots."""
+    rows = db.get_turn_snapshots(turn_ids)
+    for turn_id in turn_ids:
+        if turn_id not in rows and db.turn_has_ended(turn_id):
+            row = materialize_turn(db, turn_id)
+            if row is not None:
+                rows[turn_id] = row
+    return rows
+
+
+def replay_events(
+    db: Database,
+    session_id: str,
+    since_id: int | None,
+    *,
+    limit: int,
+    event_filter: EventFilter | None = None,
+) -> tuple[list[dict[str, Any]], bool]:
+    """
+    A session's events after `since_id`, with finished turns served from snapshots.
+
+    Turns that start after `since_id` and have a snapshot contribute their
+    compacted events; everything else (the turn in progress, the turn the
+    client stopped in, turns without a snapshot) is read raw. Returns the
+    newest `limit` events, oldest first, and whether older ones were left out.
+    """
+    f = event_filter or EventFilter()
+    limit = max(1, int(limit))
+    cursor = int(since_id or 0)
+    out: list[dict[str, Any]] = []
+    truncated = False
+
+    def raw(before_id: int | None) -> None:
+        nonlocal truncated
+        events, cut = db.get_events_tail(
+            session_id,
+            since_id=cursor,
+            before_id=before_id,
+            limit=limit,
+            types=f.types,
+            exclude=f.exclude,
+            with_payload=f.needs_payload,
+        )
+        if cut:
+            # Only the newest `limit` events are kept below, so older ones are never needed.
+            out.clear()
+            truncated = True
+        out.extend(events)
+
+    for snap in db.list_turn_snapshots(session_id, after_event_id=cursor):
+        if snap["first_event_id"] > cursor + 1:
+            raw(snap["first_event_id"])
+        out.extend(e for e in snap["events"] if f.matches(e))
+        cursor = max(cursor, int(snap["last_event_id"]))
+    raw(None)
+
+    if len(out) > limit:
+        del out[: len(out) - limit]
+        truncated = True
+    return out, truncated
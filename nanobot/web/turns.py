@@ -0,0 +1,170 @@
+"""Turn execution shared by the web server (in-process mode) and `fanfan worker` processes."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+
+from loguru import logger
+
+from nanobot.config.loader import load_config
+from nanobot.providers.cache import llm_cacheable
+from nanobot.providers.governor import llm_priority
+from nanobot.providers.litellm_provider import LiteLLMProvider
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus
+from nanobot.web.permissions import PermissionManager
+from nanobot.web.runner import FanfanWebRunner
+from nanobot.web.settings import WebSettings
+from nanobot.web.snapshots import materialize_turn
+
+
+class LLMNotConfiguredError(RuntimeError):
+    """No API key is configured for the session's effective model."""
+
+
+def effective_model(cfg, db: Database, session_id: str) -> tuple[str, str | None, str]:
+    """(effective model, session override, default model)."""
+    default_model = cfg.agents.defaults.model
+    override = db.get_session_model_override(session_id) if session_id else None
+    return override or default_model, override, default_model
+
+
+def make_provider(cfg, model: str) -> LiteLLMProvider:
+    return LiteLLMProvider(
+        api_key=cfg.get_api_key(model),
+        api_base=cfg.get_api_base(model),
+        default_model=model,
+        llm_config=cfg.llm,
+    )
+
+
+def model_configured(cfg, model: str) -> bool:
+    return bool(cfg.get_api_key(model)) or model.startswith("bedrock/")
+
+
+def build_session_runner(
+    *,
+    db: Database,
+    bus: EventBus,
+    permissions: PermissionManager,
+    settings: WebSettings,
+    session_id: str,
+) -> tuple[FanfanWebRunner, str]:
+    """Create a runner for the session's effective model. Raises LLMNotConfiguredError."""
+    cfg = load_config()
+    model, _override, _default = effective_model(cfg, db, session_id)
+    if not model_configured(cfg, model):
+        raise LLMNotConfiguredError(model)
+
+    runner = FanfanWebRunner(
+        db=db,
+        bus=bus,
+        permissions=permissions,
+        provider=make_provider(cfg, model),
+        settings=settings,
+        model=model,
+        max_iterations=cfg.agents.defaults.max_tool_iterations,
+        brave_api_key=cfg.tools.web.search.api_key or None,
+        memory_config=cfg.agents.defaults.memory,
+    )
+    return runner, model
+
+
+async def auto_name_session(db: Database, session_id: str, user_text: str) -> None:
+    try:
+        cfg = load_config()
+        eff_model, _override, _default = effective_model(cfg, db, session_id)
+        if not model_configured(cfg, eff_model):
+            return
+
+        provider = make_provider(cfg, eff_model)
+
+        naming_messages = [
+            {
+                "role": "system",
+                "content": (
+                    "Generate a short chat title (4-12 characters) for the following user message. "
+                    "Reply with ONLY the title, no quotes, no explanation. "
+                    "If the message is in Chinese, reply in Chinese. "
+                    "If the message is in English, reply in English."
+                ),
+            },
+            {"role": "user", "content": user_text[:200]},
+        ]
+        with llm_priority("background"), llm_cacheable():
+            resp = await provider.chat(messages=naming_messages, tools=[], model=eff_model)
+        title = (resp.content or "").strip().strip('"').strip("'")[:30]
+        if not title:
+            title = user_text[:20].strip()
+    except Exception:
+        title = user_text[:20].strip()
+    if title:
+        db.update_session_title(session_id, title)
+
+
+async def publish_turn_error(db: Database, bus: EventBus, session_id: str, turn_id: str, code: str, message: str) -> None:
+    step = db.create_step(turn_id, idx=9999)
+    await bus.publish(
+        session_id=session_id,
+        turn_id=turn_id,
+        step_id=step["id"],
+        type="error",
+        payload={"code": code, "message": message},
+    )
+    db.finish_step(step["id"], status="error")
+
+
+async def execute_turn(
+    *,
+    db: Database,
+    bus: EventBus,
+    runner: FanfanWebRunner,
+    session_id: str,
+    turn_id: str,
+    content: str,
+    persist_user_message: bool = True,
+    abandoned: Callable[[], bool] | None = None,
+) -> str:
+    """Run one queued turn end to end: persist the user message, run, persist the reply.
+
+    Returns "completed" or "failed" (errors are published as `error` events);
+    cancellation is re-raised after its event. A worker retrying a turn after a
+    lost lease passes `persist_user_message=False` so history is not duplicated.
+
+    `abandoned()` is true when the worker lost the turn's lease: the turn will run
+    again elsewhere, so a cancellation then publishes nothing and writes no snapshot.
+    """
+    try:
+        # Persist the user message when the turn starts, so queued follow-ups
+        # land in history after the previous assistant reply.
+        if persist_user_message:
+            db.add_message(session_id, "user", content)
+
+        # Auto-name on first user message
+        messages: list[dict[str, Any]] = db.get_messages(session_id)
+        if len([m for m in messages if m["role"] == "user"]) == 1:
+            asyncio.create_task(auto_name_session(db, session_id, content))
+
+        assistant_text = await runner.run_turn(session_id=session_id, turn_id=turn_id, user_text=content)
+        if assistant_text:
+            db.add_message(session_id, "assistant", assistant_text)
+        return "completed"
+    except asyncio.CancelledError:
+        if abandoned is not None and abandoned():
+            raise
+        # Emit a lightweight error event for UI visibility.
+        await publish_turn_error(db, bus, session_id, turn_id, "CANCELLED", "Run cancelled by user")
+        raise
+    except Exception as exc:
+        await publish_turn_error(db, bus, session_id, turn_id, "TURN_ERROR", str(exc))
+        return "failed"
+    finally:
+        db.touch_session(session_id)
+        # Finished turns are served from their snapshot instead of thousands of delta events.
+        # An abandoned turn is not finished: its retry writes more events and takes the snapshot.
+        if abandoned is None or not abandoned():
+            try:
+                materialize_turn(db, turn_id)
+            except Exception:
+                logger.exception("failed to materialize snapshot for turn {}", turn_id)
@@ -0,0 +1,152 @@
+"""Agent worker process for fanfan web worker mode (`fanfan worker`).
+
+With FANFAN_TURN_EXECUTION=worker the web server only validates requests and
+persists queued turns (`turn_queue` table). Workers claim turns with a lease,
+run them with the same runner as in-process mode, publish events through the
+shared SQLite event log, and heartbeat the lease:
+
+- a worker that dies stops heartbeating; its turn is requeued once the lease expires
+- cancel requests are picked up on the next heartbeat
+- one running turn per session across all workers (enforced by `Database.claim_turn`)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socket
+import uuid
+
+from loguru import logger
+
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus
+from nanobot.web.permissions import PermissionManager
+from nanobot.web.settings import WebSettings
+from nanobot.web.turns import (
+    LLMNotConfiguredError,
+    build_session_runner,
+    execute_turn,
+    publish_turn_error,
+)
+
+
+class TurnWorker:
+    def __init__(self, settings: WebSettings | None = None, *, concurrency: int | None = None):
+        self.settings = settings or WebSettings()
+        self.concurrency = max(1, int(concurrency or self.settings.worker_concurrency))
+        self.lease_s = max(1.0, float(self.settings.worker_lease_s))
+        self.poll_interval_s = max(0.05, float(self.settings.worker_poll_interval_s))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+        self.settings.resolved_data_dir().mkdir(parents=True, exist_ok=True)
+        self.db = Database(self.settings.resolved_db_path())
+        self.bus = EventBus(self.db)
+        self.permissions = PermissionManager(
+            db=self.db,
+            settings=self.settings,
+            poll_interval_s=self.poll_interval_s,
+        )
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self._lost: set[str] = set()  # turns whose lease another worker took over
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        logger.info(f"fanfan worker {self.worker_id} started (concurrency={self.concurrency})")
+        try:
+            while not self._stopping.is_set():
+                claimed = False
+                while len(self._tasks) < self.concurrency:
+                    job = self.db.claim_turn(self.worker_id, self.lease_s)
+                    if job is None:
+                        break
+                    claimed = True
+                    turn_id = str(job["turn_id"])
+                    self._tasks[turn_id] = asyncio.create_task(self._run_job(job))
+                if not claimed:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval_s)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            # Stop claiming; let running turns finish (their leases keep being renewed).
+            if self._tasks:
+                logger.info(f"fanfan worker draining {len(self._tasks)} running turn(s)")
+                await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            await self.bus.close()
+            logger.info(f"fanfan worker {self.worker_id} stopped")
+
+    async def _run_job(self, job: dict) -> None:
+        turn_id = str(job["turn_id"])
+        session_id = str(job["session_id"])
+        status, error = "failed", ""
+        try:
+            try:
+                runner, _model = build_session_runner(
+                    db=self.db,
+                    bus=self.bus,
+                    permissions=self.permissions,
+                    settings=self.settings,
+                    session_id=session_id,
+                )
+            except LLMNotConfiguredError as exc:
+                error = f"LLM not configured for model {exc}"
+                await publish_turn_error(self.db, self.bus, session_id, turn_id, "LLM_NOT_CONFIGURED", error)
+                return
+
+            task = asyncio.create_task(
+                execute_turn(
+                    db=self.db,
+                    bus=self.bus,
+                    runner=runner,
+                    session_id=session_id,
+                    turn_id=turn_id,
+                    content=str(job.get("user_text") or ""),
+                    persist_user_message=int(job.get("attempts") or 1) == 1,
+                    abandoned=lambda: turn_id in self._lost,
+                )
+            )
+            heartbeat = asyncio.create_task(self._heartbeat(turn_id, task))
+            try:
+                status = await task
+            except asyncio.CancelledError:
+                status = "cancelled"
+            finally:
+                heartbeat.cancel()
+        except Exception as exc:
+            logger.exception(f"worker failed to run turn {turn_id}")
+            error = str(exc)
+        finally:
+            if turn_id in self._lost:
+                # The queue row belongs to the retry now; leave it alone.
+                self._lost.discard(turn_id)
+            else:
+                self.db.finish_queued_turn(turn_id, self.worker_id, status, error)
+            self._tasks.pop(turn_id, None)
+
+    async def _heartbeat(self, turn_id: str, task: asyncio.Task) -> None:
+        while not task.done():
+            await asyncio.sleep(self.lease_s / 3)
+            state = self.db.heartbeat_turn(turn_id, self.worker_id, self.lease_s)
+            if state != "ok":
+                if state == "lost":
+                    logger.warning(f"worker lost the lease on turn {turn_id}; abandoning it")
+                    self._lost.add(turn_id)
+                task.cancel()
+                return
+
+
+async def run_worker(concurrency: int | None = None) -> None:
+    import signal
+
+    worker = TurnWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    await worker.run()
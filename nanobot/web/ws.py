@@ -0,0 +1,217 @@
+"""Multiplexed WebSocket event transport (`/ws`).
+
+One connection carries any number of session subscriptions:
+
+    client -> {"op": "subscribe", "session_id": "...", "since_seq": 41,
+               "types": [...], "exclude": [...], "fields": [...]}
+    client -> {"op": "unsubscribe", "session_id": "..."}
+    client -> {"op": "ping"}
+
+    server -> {"op": "hello", "format": "json", ...}
+    server -> {"op": "subscribed", "session_id": "...", "replay": "since_seq"}
+    server -> {"op": "replay_truncated", "session_id": "...", "oldest_id": ..., "oldest_seq": ...}
+    server -> {"o": "e", "s": session_id, "i": id, "n": seq, "t": type, "u": turn_id,
+               "st": step_id, "ts": ts, "p": payload}
+    server -> {"op": "heartbeat"} / {"op": "pong"} / {"op": "error", "detail": "..."}
+
+Event frames use the short keys above. `since_seq` / `from` / `types` /
+`exclude` / `fields` work as on `/event`. Frames are compact JSON text, or
+msgpack binary frames when the client offers the `fanfan.msgpack` subprotocol
+(or `?format=msgpack`) and the optional `msgpack` package is installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from nanobot.web.event_bus import EventBus, EventFilter
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+SUBPROTOCOL_JSON = "fanfan.json"
+SUBPROTOCOL_MSGPACK = "fanfan.msgpack"
+
+# Envelope key -> event frame key
+_EVENT_KEYS = {
+    "session_id": "s",
+    "id": "i",
+    "seq": "n",
+    "type": "t",
+    "turn_id": "u",
+    "step_id": "st",
+    "ts": "ts",
+    "payload": "p",
+}
+
+
+def negotiate_format(offered_subprotocols: list[str], requested: str | None) -> tuple[str, str | None]:
+    """Pick the frame format: ("json" | "msgpack", subprotocol to accept or None)."""
+    if SUBPROTOCOL_MSGPACK in offered_subprotocols and msgpack is not None:
+        return "msgpack", SUBPROTOCOL_MSGPACK
+    if SUBPROTOCOL_JSON in offered_subprotocols:
+        return "json", SUBPROTOCOL_JSON
+    if requested == "msgpack" and msgpack is not None:
+        return "msgpack", None
+    return "json", None
+
+
+def encode_frame(fmt: str, obj: dict[str, Any]) -> str | bytes:
+    if fmt == "msgpack":
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode_frame(data: str | bytes) -> dict[str, Any]:
+    """Client messages may be JSON text or msgpack binary regardless of the negotiated format."""
+    if isinstance(data, bytes):
+        if msgpack is None:
+            obj = json.loads(data.decode("utf-8"))
+        else:
+            obj = msgpack.unpackb(data, raw=False)
+    else:
+        obj = json.loads(data)
+    if not isinstance(obj, dict):
+        raise ValueError("frame must be an object")
+    return obj
+
+
+def event_frame(event: dict[str, Any], event_filter: EventFilter) -> dict[str, Any]:
+    projected = event_filter.project(event)
+    frame: dict[str, Any] = {"o": "e", "s": event.get("session_id")}
+    for key, value in projected.items():
+        short = _EVENT_KEYS.get(key)
+        if short and short != "s":
+            frame[short] = value
+    return frame
+
+
+@dataclass
+class Subscription:
+    session_id: str
+    event_filter: EventFilter
+    last_id: int
+
+    def wants(self, event: dict[str, Any]) -> bool:
+        return self.event_filter.matches(event)
+
+
+# (session_id, since_seq, from) -> (mode, since_id, since_seq); raises on bad input
+ReplayResolver = Callable[[str, int | None, str | None], tuple[str, int | None, int | None]]
+
+
+class WsMultiplexer:
+    """Subscription state and event delivery for one WebSocket connection."""
+
+    def __init__(
+        self,
+        bus: EventBus,
+        send: Callable[[dict[str, Any]], Awaitable[None]],
+        *,
+        resolve_replay: ReplayResolver,
+        replay_limit: int = 2000,
+        max_subscriptions: int = 200,
+    ):
+        self.bus = bus
+        self.send = send
+        self.resolve_replay = resolve_replay
+        self.replay_limit = max(1, int(replay_limit))
+        self.max_subscriptions = max(1, int(max_subscriptions))
+        self.subs: dict[str, Subscription] = {}
+        # Serializes replay/catch-up with live delivery so no event is sent twice or skipped.
+        self._lock = asyncio.Lock()
+
+    async def handle(self, msg: dict[str, Any]) -> None:
+        op = msg.get("op")
+        if op == "subscribe":
+            await self.subscribe(msg)
+        elif op == "unsubscribe":
+            sid = str(msg.get("session_id") or "")
+            self.subs.pop(sid, None)
+            await self.send({"op": "unsubscribed", "session_id": sid})
+        elif op == "ping":
+            await self.send({"op": "pong"})
+        else:
+            await self.send({"op": "error", "detail": f"unknown op: {op!r}"})
+
+    async def subscribe(self, msg: dict[str, Any]) -> None:
+        sid = str(msg.get("session_id") or "")
+        if not sid:
+            await self.send({"op": "error", "detail": "session_id is required"})
+            return
+        if sid not in self.subs and len(self.subs) >= self.max_subscriptions:
+            await self.send({"op": "error", "session_id": sid, "detail": "too many subscriptions"})
+            return
+        since_seq = msg.get("since_seq")
+        try:
+            mode, start_id, start_seq = self.resolve_replay(
+                sid, int(since_seq) if since_seq is not None else None, msg.get("from")
+            )
+        except (LookupError, ValueError) as e:
+            await self.send({"op": "error", "session_id": sid, "detail": str(e)})
+            return
+        event_filter = EventFilter.from_query(msg.get("types"), msg.get("exclude"), msg.get("fields"))
+
+        async with self._lock:
+            self.subs.pop(sid, None)
+            head = self.bus.latest_event_id(sid)
+            await self.send({"op": "subscribed", "session_id": sid, "replay": mode, "head_id": head})
+            backlog: list[dict[str, Any]] = []
+            if mode != "tail":
+                backlog, truncated = self.bus.get_events_tail(
+                    session_id=sid,
+                    since_id=start_id,
+                    since_seq=start_seq,
+                    limit=self.replay_limit,
+                    event_filter=event_filter,
+                )
+                if truncated and backlog:
+                    await self.send(
+                        {
+                            "op": "replay_truncated",
+                            "session_id": sid,
+                            "limit": self.replay_limit,
+                            "oldest_id": backlog[0]["id"],
+                            "oldest_seq": backlog[0]["seq"],
+                        }
+                    )
+            for event in backlog:
+                await self.send(event_frame(event, event_filter))
+            last_id = backlog[-1]["id"] if backlog else (start_id if start_id is not None else head)
+            sub = Subscription(sid, event_filter, max(int(last_id or 0), 0))
+            self.subs[sid] = sub
+            # Events published while replaying may have woken the pump before this
+            # subscription existed; catch up now.
+            await self._deliver([sub])
+
+    async def deliver_new(self) -> None:
+        async with self._lock:
+            await self._deliver(list(self.subs.values()))
+
+    async def _deliver(self, subs: list[Subscription]) -> None:
+        if not subs:
+            return
+        head = self.bus.latest_event_id()
+        by_session = {s.session_id: s for s in subs}
+        since = min(s.last_id for s in subs)
+        while since < head:
+            events = self.bus.get_events_since(
+                session_ids=list(by_session), since_id=since, until_id=head, limit=self.replay_limit
+            )
+            for event in events:
+                sub = by_session.get(event["session_id"])
+                if sub is None or event["id"] <= sub.last_id:
+                    continue
+                sub.last_id = event["id"]
+                if sub.wants(event):
+                    await self.send(event_frame(event, sub.event_filter))
+            if len(events) < self.replay_limit:
+                break
+            since = events[-1]["id"]
+        for sub in subs:
+            sub.last_id = max(sub.last_id, head)
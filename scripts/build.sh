@@ -6,3 +6,5 @@ cd "$ROOT_DIR/frontend"
 
 npm run build
 
+cd "$ROOT_DIR"
+python3 scripts/precompress.py nanobot/web/static/dist
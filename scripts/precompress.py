@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Write .gz (and .br, if the `brotli` package is installed) next to built UI files.
+
+The web server (PrecompressedStaticFiles) serves these instead of compressing
+assets on every request. Run after `npm run build`; scripts/build.sh does.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".html", ".json", ".svg", ".webmanifest", ".map", ".txt", ".xml"}
+
+
+def precompress(root: Path, *, min_bytes: int = 1024) -> tuple[int, int, int]:
+    """Returns (files written, bytes in, bytes out of the smallest encoding)."""
+    written = total_in = total_out = 0
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE_SUFFIXES:
+            continue
+        data = path.read_bytes()
+        if len(data) < min_bytes:
+            continue
+        outputs = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            outputs[".br"] = brotli.compress(data, quality=11)
+        best = len(data)
+        for suffix, encoded in outputs.items():
+            target = path.with_name(path.name + suffix)
+            if len(encoded) >= len(data):
+                target.unlink(missing_ok=True)
+                continue
+            target.write_bytes(encoded)
+            written += 1
+            best = min(best, len(encoded))
+        total_in += len(data)
+        total_out += best
+    return written, total_in, total_out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", nargs="?", default="nanobot/web/static/dist")
+    parser.add_argument("--min-bytes", type=int, default=1024)
+    args = parser.parse_args()
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"precompress: {root} does not exist", file=sys.stderr)
+        return 1
+    written, total_in, total_out = precompress(root, min_bytes=args.min_bytes)
+    encodings = "gzip+brotli" if brotli is not None else "gzip (pip install brotli for .br)"
+    print(f"precompress: {written} files ({encodings}), {total_in} -> {total_out} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
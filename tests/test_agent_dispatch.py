@@ -0,0 +1,88 @@
+import asyncio
+from pathlib import Path
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+
+class _IdleProvider(LLMProvider):
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        return LLMResponse(content="unused")
+
+    def get_default_model(self) -> str:
+        return "test/model"
+
+
+def _loop(tmp_path: Path, max_concurrent: int) -> AgentLoop:
+    return AgentLoop(bus=MessageBus(), provider=_IdleProvider(), workspace=tmp_path, max_concurrent_sessions=max_concurrent)
+
+
+def _msg(chat_id: str, text: str) -> InboundMessage:
+    return InboundMessage(channel="telegram", sender_id="u", chat_id=chat_id, content=text)
+
+
+async def test_sessions_run_concurrently_but_in_order_within_a_session(tmp_path) -> None:
+    loop = _loop(tmp_path, max_concurrent=2)
+    log: list[str] = []
+    release = asyncio.Event()
+
+    async def process(msg: InboundMessage) -> OutboundMessage:
+        log.append(f"start {msg.chat_id}:{msg.content}")
+        if msg.chat_id == "slow" and msg.content == "1":
+            await release.wait()
+        log.append(f"end {msg.chat_id}:{msg.content}")
+        return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id, content="ok")
+
+    loop._process_message = process  # type: ignore[method-assign]
+    runner = asyncio.create_task(loop.run())
+    for chat_id, text in [("slow", "1"), ("slow", "2"), ("fast", "1")]:
+        await loop.bus.publish_inbound(_msg(chat_id, text))
+
+    for _ in range(100):
+        if "end fast:1" in log:
+            break
+        await asyncio.sleep(0.01)
+    # The fast chat finished while the slow one is still busy; slow:2 waits for slow:1.
+    assert "end fast:1" in log and "start slow:2" not in log
+    assert loop.dispatch_stats()["sessions"]["telegram:slow"]["queued"] == 1
+
+    release.set()
+    for _ in range(100):
+        if "end slow:2" in log:
+            break
+        await asyncio.sleep(0.01)
+    assert log.index("end slow:1") < log.index("start slow:2")
+    assert loop.dispatch_stats()["processed"] == 3
+
+    loop.stop()
+    await runner
+
+
+async def test_cancel_run_cancels_active_message_and_drops_queue(tmp_path) -> None:
+    loop = _loop(tmp_path, max_concurrent=2)
+    started = asyncio.Event()
+
+    async def process(msg: InboundMessage) -> OutboundMessage:
+        started.set()
+        await asyncio.sleep(3600)
+        raise AssertionError("not reached")
+
+    loop._process_message = process  # type: ignore[method-assign]
+    runner = asyncio.create_task(loop.run())
+    await loop.bus.publish_inbound(_msg("c", "1"))
+    await loop.bus.publish_inbound(_msg("c", "2"))
+    await asyncio.wait_for(started.wait(), timeout=2)
+    await asyncio.sleep(0.01)
+
+    assert loop.cancel_run("telegram:c", drop_queued=True)
+    for _ in range(100):
+        if not loop.dispatch_stats()["sessions"]:
+            break
+        await asyncio.sleep(0.01)
+    stats = loop.dispatch_stats()
+    assert stats["cancelled"] == 2 and stats["processed"] == 0
+
+    loop.stop()
+    await runner
@@ -0,0 +1,92 @@
+from nanobot.web.database import Database
+
+
+def test_writes_bump_the_session_generation_but_not_other_sessions(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("a")
+    db.create_session("b")
+    a0, b0 = db.get_generation("a")[0], db.get_generation("b")[0]
+
+    db.add_message("a", "user", "hello")
+    a1 = db.get_generation("a")[0]
+    assert a1 > a0
+    db.add_context_item("a", kind="file", title="x.py", content_ref="x.py")
+    assert db.get_generation("a")[0] > a1
+    assert db.get_generation("b")[0] == b0
+
+
+def test_session_list_generation_tracks_session_rows(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    g0 = db.get_generation("*")[0]
+    db.create_session("a")
+    g1 = db.get_generation("*")[0]
+    db.update_session_title("a", "renamed")
+    g2 = db.get_generation("*")[0]
+    db.delete_session("a")
+    assert g0 < g1 < g2 < db.get_generation("*")[0]
+
+
+def test_generations_are_visible_across_connections_and_salted(tmp_path) -> None:
+    writer = Database(tmp_path / "fanfan.db")
+    reader = Database(tmp_path / "fanfan.db")
+    writer.create_session("a")
+    before = reader.get_generation("a")[0]
+    writer.create_turn("a", "hi")  # e.g. a `fanfan worker` process
+    assert reader.get_generation("a")[0] > before
+    assert reader.generation_salt() == writer.generation_salt()
+    assert Database(tmp_path / "other.db").generation_salt() != writer.generation_salt()
+
+
+
+def test_lease_renewals_do_not_bump_generations(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("a")
+    turn = db.create_turn("a", "hi")
+    db.enqueue_turn(turn["id"], "a")
+    assert db.claim_turn("w1", lease_s=30)["turn_id"] == turn["id"]
+    before = db.get_generation("*")[0], db.get_generation("a")[0]
+
+    assert db.heartbeat_turn(turn["id"], "w1", lease_s=30) == "ok"
+    assert (db.get_generation("*")[0], db.get_generation("a")[0]) == before
+
+    db.finish_queued_turn(turn["id"], "w1", "completed")
+    assert db.get_generation("*")[0] > before[0]
+
+def _app_client(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from nanobot.web.app import create_app
+
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("FANFAN_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("FANFAN_FS_ROOT", str(tmp_path / "fs"))
+    (tmp_path / "fs").mkdir()
+    return TestClient(create_app())
+
+
+def test_session_endpoints_answer_if_none_match_with_304(tmp_path, monkeypatch) -> None:
+    client = _app_client(tmp_path, monkeypatch)
+    sid = client.post("/api/v2/sessions", json={"title": "a"}).json()["id"]
+
+    for path in ("/api/v2/sessions", f"/api/v2/sessions/{sid}"):
+        first = client.get(path)
+        assert first.status_code == 200 and first.headers["etag"]
+        again = client.get(path, headers={"If-None-Match": first.headers["etag"]})
+        assert again.status_code == 304 and again.content == b""
+
+    etag = client.get(f"/api/v2/sessions/{sid}").headers["etag"]
+    client.patch(f"/api/v2/sessions/{sid}", json={"title": "b"})
+    changed = client.get(f"/api/v2/sessions/{sid}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["title"] == "b"
+
+
+def test_v1_session_aliases_share_the_v2_validators(tmp_path, monkeypatch) -> None:
+    client = _app_client(tmp_path, monkeypatch)
+    sid = client.post("/api/v1/sessions", json={"title": "a"}).json()["id"]
+
+    listed = client.get("/api/v1/sessions")
+    assert listed.status_code == 200 and [s["id"] for s in listed.json()] == [sid]
+    one = client.get(f"/api/v1/sessions/{sid}")
+    assert one.status_code == 200 and one.json()["id"] == sid
+    assert client.get(f"/api/v1/sessions/{sid}", headers={"If-None-Match": one.headers["etag"]}).status_code == 304
+    assert client.get("/api/v1/sessions/missing").status_code == 404
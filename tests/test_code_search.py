@@ -0,0 +1,76 @@
+import asyncio
+
+from nanobot.agent.tools.code_search import CodeSearchIndex, CodeSearchTool, required_literals
+
+
+def _tree(root) -> None:
+    (root / "src").mkdir()
+    (root / "src" / "app.py").write_text("import os\n\ndef handle_request(req):\n    return req\n")
+    (root / "src" / "util.py").write_text("def helper():\n    return 'Handle_Request'\n")
+    (root / "node_modules").mkdir()
+    (root / "node_modules" / "dep.js").write_text("handle_request()")
+    (root / "blob.bin").write_bytes(b"handle_request\0\1\2")
+
+
+def test_required_literals_from_regex() -> None:
+    assert required_literals(r"def\s+handle_\w+\(", regex=True) == ["def", "handle_"]
+    assert required_literals(r"foo|barbaz", regex=True) == []
+    assert required_literals("ab", regex=False) == []
+
+
+def test_literal_and_regex_search_respect_ignores_and_case(tmp_path) -> None:
+    root = tmp_path / "repo"
+    root.mkdir()
+    _tree(root)
+    index = CodeSearchIndex(root, tmp_path / "idx.db")
+    assert index.refresh()["files"] == 3  # node_modules skipped, binary kept as unindexed row
+
+    res = index.search("handle_request")
+    assert [(m["path"], m["line"]) for m in res["matches"]] == [("src/app.py", 3)]
+    assert res["indexed"] and res["candidates"] == 2  # trigram filter is case-insensitive
+
+    res = index.search("handle_request", ignore_case=True)
+    assert {m["path"] for m in res["matches"]} == {"src/app.py", "src/util.py"}
+
+    res = index.search(r"def \w+\(\)", regex=True, glob="*.py")
+    assert [m["path"] for m in res["matches"]] == ["src/util.py"]
+
+    res = index.search("re", max_results=2)
+    assert len(res["matches"]) == 2 and res["truncated"] and not res["indexed"]
+
+
+def test_incremental_refresh_and_update_paths(tmp_path) -> None:
+    root = tmp_path / "repo"
+    root.mkdir()
+    _tree(root)
+    index = CodeSearchIndex(root, tmp_path / "idx.db")
+    index.refresh()
+
+    (root / "src" / "util.py").write_text("def renamed_helper():\n    pass\n")
+    index.update_paths([root / "src" / "util.py"])
+    assert index.search("renamed_helper")["matches"][0]["path"] == "src/util.py"
+
+    (root / "src" / "app.py").unlink()
+    (root / "new.py").write_text("NEEDLE = 1\n")
+    stats = index.refresh()
+    assert (stats["added"], stats["updated"], stats["removed"]) == (1, 0, 1)
+    assert index.search("handle_request")["matches"] == []
+    assert index.search("NEEDLE")["matches"][0]["path"] == "new.py"
+
+    # The index persists: a new instance serves it without re-reading unchanged files.
+    index.close()
+    again = CodeSearchIndex(root, tmp_path / "idx.db")
+    assert again.search("NEEDLE")["matches"]
+    assert again.refresh()["updated"] == 0
+
+
+def test_code_search_tool_output(tmp_path) -> None:
+    root = tmp_path / "repo"
+    root.mkdir()
+    _tree(root)
+    tool = CodeSearchTool(CodeSearchIndex(root, tmp_path / "idx.db"))
+
+    out = asyncio.run(tool.execute(query="handle_request"))
+    assert out.splitlines() == ["1 match(es) in 1 file(s)", "src/app.py:3: def handle_request(req):"]
+    assert asyncio.run(tool.execute(query="(", regex=True)).startswith("Error: invalid regular expression")
+    assert asyncio.run(tool.execute(query="zzzzzz")).startswith("No matches")
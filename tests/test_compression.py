@@ -0,0 +1,104 @@
+import gzip
+import os
+import zlib
+
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from nanobot.web.compression import (
+    IMMUTABLE_CACHE_CONTROL,
+    CompressionMiddleware,
+    PrecompressedStaticFiles,
+    choose_encoding,
+)
+
+BIG = b'{"items": [' + b",".join(b'{"id": %d, "text": "hello world"}' % i for i in range(500)) + b"]}"
+
+
+def _client(**kwargs) -> TestClient:
+    api = FastAPI()
+
+    @api.get("/big")
+    def big():
+        return Response(BIG, media_type="application/json", headers={"ETag": '"v1"'})
+
+    @api.get("/small")
+    def small():
+        return Response(b'{"ok": true}', media_type="application/json")
+
+    @api.get("/png")
+    def png():
+        return Response(b"\x89PNG" + b"\0" * 4096, media_type="image/png")
+
+    @api.get("/sse")
+    def sse():
+        def frames():
+            for i in range(3):
+                yield f"id: {i}\ndata: {'x' * 600}\n\n"
+        return StreamingResponse(frames(), media_type="text/event-stream")
+
+    return TestClient(CompressionMiddleware(api, minimum_size=1024, **kwargs))
+
+
+def test_choose_encoding_respects_q_values() -> None:
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") in ("br", "gzip")
+    assert choose_encoding("") is None
+
+
+def test_large_json_is_gzipped_and_small_or_binary_is_not() -> None:
+    client = _client()
+    r = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert int(r.headers["content-length"]) < len(BIG)
+    assert r.content == BIG
+    assert r.headers["etag"] == 'W/"v1"'
+    assert "Accept-Encoding" in r.headers["vary"]
+
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/png", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_sse_is_only_compressed_when_enabled_and_flushes_per_frame() -> None:
+    r = _client().get("/sse", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+    with _client(compress_sse=True, allow_brotli=False).stream("GET", "/sse", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip"
+        raw = list(r.iter_raw())
+    # Every frame is decodable as soon as it arrives (sync flush), without the gzip trailer.
+    decoder = zlib.decompressobj(31)
+    first = decoder.decompress(raw[0])
+    assert first.startswith(b"id: 0\ndata: ") and first.endswith(b"\n\n")
+    assert gzip.decompress(b"".join(raw)).count(b"data: ") == 3
+
+
+def test_precompressed_assets_are_served_with_immutable_caching(tmp_path) -> None:
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    js = b"console.log('fanfan');\n" * 200
+    (assets / "index-BX3k9aZq.js").write_bytes(js)
+    (assets / "index-BX3k9aZq.js.gz").write_bytes(gzip.compress(js))
+    (assets / "plain.js").write_bytes(js)
+
+    api = FastAPI()
+    api.mount("/assets", PrecompressedStaticFiles(directory=str(assets), immutable_hashed=True))
+    client = TestClient(CompressionMiddleware(api))
+
+    r = client.get("/assets/index-BX3k9aZq.js", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert int(r.headers["content-length"]) == os.path.getsize(assets / "index-BX3k9aZq.js.gz")
+    assert r.content == js
+    again = client.get("/assets/index-BX3k9aZq.js", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+
+    r = client.get("/assets/index-BX3k9aZq.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers and r.content == js
+
+    r = client.get("/assets/plain.js", headers={"Accept-Encoding": "gzip"})
+    assert "cache-control" not in r.headers
+    assert r.headers["content-encoding"] == "gzip"  # compressed on the fly instead
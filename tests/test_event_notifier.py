@@ -0,0 +1,75 @@
+import subprocess
+import sys
+import time
+
+from nanobot.web.database import Database
+
+SUBSCRIBER = """
+import asyncio, sys, time
+from pathlib import Path
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus
+from nanobot.web.notifier import SQLiteNotifier
+
+db_path, ready = sys.argv[1], Path(sys.argv[2])
+
+async def main():
+    db = Database(db_path)
+    bus = EventBus(db, notifier=SQLiteNotifier(db_path, poll_interval_s=0.02))
+    last = max([e["id"] for e in bus.get_events_since(session_id="ses_x", since_id=None)] or [0])
+    ready.write_text("1")
+    t0 = time.monotonic()
+    woke = await bus.wait_for_new(timeout_s=10.0)
+    events = bus.get_events_since(session_id="ses_x", since_id=last)
+    print(woke, round(time.monotonic() - t0, 3), [e["type"] for e in events])
+    await bus.close()
+
+asyncio.run(main())
+"""
+
+PUBLISHER = """
+import asyncio, sys, time
+from pathlib import Path
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus
+from nanobot.web.notifier import SQLiteNotifier
+
+db_path, ready, turn_id, step_id = sys.argv[1], Path(sys.argv[2]), sys.argv[3], sys.argv[4]
+while not ready.exists():
+    time.sleep(0.01)
+time.sleep(0.2)
+
+async def main():
+    bus = EventBus(Database(db_path), notifier=SQLiteNotifier(db_path))
+    await bus.publish(session_id="ses_x", turn_id=turn_id, step_id=step_id, type="message_delta", payload={"delta": "hi"})
+
+asyncio.run(main())
+"""
+
+
+def test_sqlite_notifier_wakes_subscriber_in_another_process(tmp_path) -> None:
+    db_path = tmp_path / "fanfan.db"
+    db = Database(db_path)
+    db.create_session("ses_x", title="x")
+    turn = db.create_turn("ses_x", "hello")
+    step = db.create_step(turn["id"], idx=0)
+    ready = tmp_path / "ready"
+
+    subscriber = subprocess.Popen(
+        [sys.executable, "-c", SUBSCRIBER, str(db_path), str(ready)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    publisher = subprocess.Popen(
+        [sys.executable, "-c", PUBLISHER, str(db_path), str(ready), turn["id"], step["id"]],
+    )
+    started = time.monotonic()
+    out, _ = subscriber.communicate(timeout=60)
+    assert publisher.wait(timeout=60) == 0
+    assert subscriber.returncode == 0
+
+    woke, elapsed, types = out.strip().splitlines()[-1].split(" ", 2)
+    assert woke == "True"
+    assert float(elapsed) < 5.0  # well before the 10s wait timeout
+    assert "message_delta" in types
+    assert time.monotonic() - started < 60
@@ -0,0 +1,66 @@
+from nanobot.web.database import Database
+
+
+def _session_with_events(tmp_path, n: int):
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s")
+    turn = db.create_turn("s", "hi")
+    step = db.create_step(turn["id"], 0)
+    events = [db.insert_event_v2("s", turn["id"], step["id"], "message.delta", float(i), {"i": i}) for i in range(n)]
+    return db, turn, step, events
+
+
+def test_tail_keeps_the_newest_events_and_flags_truncation(tmp_path) -> None:
+    db, _turn, _step, events = _session_with_events(tmp_path, 10)
+    ids = [e["id"] for e in events]
+
+    tail, truncated = db.get_events_tail("s", limit=4)
+    assert [e["id"] for e in tail] == ids[-4:] and truncated
+    assert tail[0]["payload"] == {"i": 6}
+
+    tail, truncated = db.get_events_tail("s", since_id=ids[6], limit=4)
+    assert [e["id"] for e in tail] == ids[7:] and not truncated
+
+    tail, truncated = db.get_events_tail("s", since_seq=events[7]["seq"], limit=4)
+    assert [e["id"] for e in tail] == ids[8:] and not truncated
+
+    # Paging older history back from the oldest replayed event
+    older, more = db.get_events_tail("s", before_id=ids[6], limit=4)
+    assert [e["id"] for e in older] == ids[2:6] and more
+
+
+def test_turn_anchor_and_latest_id(tmp_path) -> None:
+    db, turn, _step, events = _session_with_events(tmp_path, 3)
+    second = db.create_turn("s", "again")
+    step = db.create_step(second["id"], 0)
+    later = db.insert_event_v2("s", second["id"], step["id"], "turn.started", 9.0, {})
+
+    assert db.first_turn_event_id(turn["id"]) == events[0]["id"]
+    assert db.first_turn_event_id(second["id"]) == later["id"]
+    assert db.first_turn_event_id("turn_missing") is None
+    assert db.latest_event_id("s") == later["id"] == db.latest_event_id()
+    assert db.latest_event_id("other") == 0
+
+
+def test_type_filters_run_in_sql_and_fields_project(tmp_path) -> None:
+    from nanobot.web.event_bus import EventFilter
+
+    db, turn, step, events = _session_with_events(tmp_path, 5)  # message.delta
+    final = db.insert_event_v2("s", turn["id"], step["id"], "final", 9.0, {"text": "done", "usage": {"tokens": 3}})
+
+    only_final = EventFilter.from_query(types="final,error", fields=["turn_id", "payload.text"])
+    tail, truncated = db.get_events_tail("s", limit=10, types=only_final.types, with_payload=only_final.needs_payload)
+    assert [e["id"] for e in tail] == [final["id"]] and not truncated
+    assert only_final.project(tail[0]) == {"id": final["id"], "type": "final", "turn_id": turn["id"], "payload": {"text": "done"}}
+
+    no_deltas = EventFilter.from_query(exclude=["message.delta"])
+    rows = db.get_events_v2("s", since_id=0, types=no_deltas.types, exclude=no_deltas.exclude)
+    assert [e["id"] for e in rows] == [final["id"]]
+    assert no_deltas.project(rows[0]) is rows[0]  # no projection without fields
+
+    # until_id bounds the scan; without payload in `fields`, payload_json is not read at all
+    ids_only = EventFilter.from_query(fields="seq")
+    assert not ids_only.needs_payload
+    rows = db.get_events_v2("s", since_id=0, until_id=events[1]["id"], with_payload=False)
+    assert [e["id"] for e in rows] == [events[0]["id"], events[1]["id"]]
+    assert "payload" not in rows[0] and "payload_json" not in rows[0]
@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from nanobot.web.fs_tree import FsTreeService
+
+
+def _touch(path, text="x") -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def _service(root) -> FsTreeService:
+    return FsTreeService(root, ignore_dirs={"node_modules"}, rescan_interval_s=0)
+
+
+def test_list_dir_is_lazy_sorted_and_paginated(tmp_path) -> None:
+    for name in ("b.py", "a.py", "c.py"):
+        _touch(tmp_path / name)
+    _touch(tmp_path / "src" / "deep" / "x.py")
+    _touch(tmp_path / "node_modules" / "dep.js")
+    _touch(tmp_path / ".hidden")
+    tree = _service(tmp_path)
+
+    page = tree.list_dir("", limit=2)
+    assert [e["name"] for e in page["items"]] == ["src", "a.py"]
+    rest = tree.list_dir("", cursor=page["next_cursor"], limit=2)
+    assert [e["name"] for e in rest["items"]] == ["b.py", "c.py"] and rest["next_cursor"] is None
+    assert tree.stats()["cached_dirs"] == 1  # src/ not listed yet
+
+    assert [e["path"] for e in tree.list_dir("src")["items"]] == ["src/deep"]
+    with pytest.raises(FileNotFoundError):
+        tree.list_dir("missing")
+
+
+def test_changes_feed_reports_deltas_and_bumps_the_etag(tmp_path) -> None:
+    _touch(tmp_path / "keep.py")
+    _touch(tmp_path / "old.py")
+    _touch(tmp_path / "src" / "mod.py")
+    tree = _service(tmp_path)
+    tree.list_dir("")
+    tree.list_dir("src")
+    since, etag = tree.generation, tree.etag
+
+    (tmp_path / "old.py").unlink()
+    _touch(tmp_path / "new.py")
+    _touch(tmp_path / "src" / "mod.py", "changed content")
+    st = (tmp_path / "src" / "mod.py").stat()
+    os.utime(tmp_path / "src" / "mod.py", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    tree.refresh()
+    feed = tree.changes(since, tree_id=tree.boot_id)
+    assert not feed["reset"] and tree.etag != etag
+    assert {(c["op"], c["path"]) for c in feed["changes"]} == {
+        ("added", "new.py"),
+        ("removed", "old.py"),
+        ("modified", "src/mod.py"),
+    }
+    assert tree.changes(feed["generation"])["changes"] == []
+    assert tree.changes(since, tree_id="other-process")["reset"]
+
+
+def test_walk_files_keeps_the_flat_shape_with_a_cursor(tmp_path) -> None:
+    for i in range(5):
+        _touch(tmp_path / f"d{i % 2}" / f"f{i}.txt")
+    tree = _service(tmp_path)
+
+    first = tree.walk_files(limit=3)
+    assert [f["path"] for f in first["items"]] == ["d0/f0.txt", "d0/f2.txt", "d0/f4.txt"]
+    assert first["truncated"]
+    second = tree.walk_files(cursor=first["next_cursor"], limit=3)
+    assert [f["path"] for f in second["items"]] == ["d1/f1.txt", "d1/f3.txt"]
+    assert not second["truncated"]
+    assert tree.stats()["cached_dirs"] == 0  # the flat walk does not fill the directory cache
+
+
+def test_walk_files_pages_in_path_order(tmp_path) -> None:
+    for rel in ("a.txt", "a/x.txt", "a-b/y.txt", "b.txt", "node_modules/dep.js", ".git/HEAD"):
+        _touch(tmp_path / rel)
+    tree = _service(tmp_path)
+
+    paths, cursor = [], None
+    while True:
+        page = tree.walk_files(cursor=cursor, limit=1)
+        paths += [f["path"] for f in page["items"]]
+        if not page["truncated"]:
+            break
+        cursor = page["next_cursor"]
+    assert paths == sorted(paths) == ["a-b/y.txt", "a.txt", "a/x.txt", "b.txt"]
+
+
+def test_changes_rescan_in_the_background(tmp_path) -> None:
+    _touch(tmp_path / "src" / "mod.py")
+    _touch(tmp_path / "other" / "big.py")
+    tree = _service(tmp_path)
+    tree.list_dir("src")
+    assert tree.stats()["cached_dirs"] == 1  # listing src/ does not scan the root or other/
+
+    _touch(tmp_path / "src" / "new.py")
+    tree.changes(0)  # answers from the cache and starts the rescan behind it
+    tree._scan_thread.join(timeout=5)
+    assert [(c["op"], c["path"]) for c in tree.changes(0)["changes"]] == [("added", "src/new.py")]
+
+
+def test_dropped_feed_history_forces_a_reset(tmp_path) -> None:
+    tree = FsTreeService(tmp_path, rescan_interval_s=0, max_changes=2)
+    tree.list_dir("")
+    for i in range(3):
+        _touch(tmp_path / f"f{i}")
+        tree.refresh()
+    assert tree.changes(0)["reset"]
+    assert not tree.changes(tree.generation - 1)["reset"]
@@ -0,0 +1,250 @@
+import asyncio
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from nanobot.config.schema import LLMCacheConfig, LLMConfig, LLMModelConfig
+from nanobot.providers import cache, governor, litellm_provider, resilience
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+class FakeBadRequestError(Exception):
+    status_code = 400
+
+
+def _response(text: str) -> Any:
+    message = SimpleNamespace(content=text, tool_calls=None)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message, finish_reason="stop")],
+        usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1, total_tokens=2),
+    )
+
+
+@pytest.fixture(autouse=True)
+def _reset_provider_state(monkeypatch):
+    monkeypatch.setattr(resilience, "_breakers", {})
+    monkeypatch.setattr(governor, "_governors", {})
+    monkeypatch.setattr(resilience, "_stream_stats", {})
+
+
+def _provider(**policy: Any) -> LiteLLMProvider:
+    cfg = LLMConfig(defaults=LLMModelConfig(backoff_base_s=0, backoff_max_s=0, **policy))
+    return LiteLLMProvider(default_model="openai/gpt-test", llm_config=cfg)
+
+
+async def test_chat_retries_transient_errors(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs["model"])
+        if len(calls) < 3:
+            raise FakeRateLimitError("slow down")
+        return _response("ok")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    resp = await _provider(max_retries=2).chat([{"role": "user", "content": "hi"}])
+
+    assert resp.content == "ok"
+    assert resp.usage["retries"] == 2
+    assert len(calls) == 3
+
+
+async def test_chat_does_not_retry_fatal_errors(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs["model"])
+        raise FakeBadRequestError("bad")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    resp = await _provider(max_retries=3).chat([{"role": "user", "content": "hi"}])
+
+    assert resp.finish_reason == "error"
+    assert len(calls) == 1
+
+
+async def test_chat_uses_fallback_model_and_opens_breaker(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs["model"])
+        if kwargs["model"].startswith("openai/"):
+            raise FakeRateLimitError("down")
+        return _response("from fallback")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    provider = _provider(max_retries=1, breaker_failure_threshold=2, fallback_model="anthropic/claude-test")
+    resp = await provider.chat([{"role": "user", "content": "hi"}])
+
+    assert resp.content == "from fallback"
+    assert resp.usage["fallback"] == 1
+    assert calls == ["openai/gpt-test", "openai/gpt-test", "anthropic/claude-test"]
+
+    # The openai breaker is now open: the next call skips straight to the fallback.
+    calls.clear()
+    resp = await provider.chat([{"role": "user", "content": "hi"}])
+    assert resp.content == "from fallback"
+    assert calls == ["anthropic/claude-test"]
+
+
+async def test_half_open_probe_always_settles_the_breaker(monkeypatch) -> None:
+    calls: list[str] = []
+    hang = asyncio.Event()
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs["model"])
+        if len(calls) == 1:
+            raise FakeBadRequestError("context too long")
+        if len(calls) == 2:
+            await hang.wait()
+        return _response("ok")
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    provider = _provider(max_retries=0, breaker_cooldown_s=30)
+    breaker = provider._breaker("openai/gpt-test", provider._policy("openai/gpt-test"))
+
+    def half_open() -> None:
+        breaker.failures, breaker.opened_at = 5, time.monotonic() - 60
+        assert breaker.state == "half_open"
+
+    # A non-retryable answer still proves the provider is up.
+    half_open()
+    assert (await provider.chat([{"role": "user", "content": "hi"}])).finish_reason == "error"
+    assert breaker.state == "closed" and not breaker.probing
+
+    # A cancelled probe records nothing, but the next call may probe again.
+    half_open()
+    task = asyncio.create_task(provider.chat([{"role": "user", "content": "hi"}]))
+    while len(calls) < 2:
+        await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert breaker.state == "half_open" and not breaker.probing
+    assert (await provider.chat([{"role": "user", "content": "hi"}])).content == "ok"
+    assert breaker.state == "closed"
+
+
+async def test_governor_admits_interactive_before_background() -> None:
+    gov = governor.Governor("test", max_in_flight=1)
+    order: list[str] = []
+
+    async def call(name: str, priority: str) -> None:
+        async with gov.slot(10, priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async with gov.slot(10, "interactive"):
+        tasks = [
+            asyncio.create_task(call("summary", "background")),
+            asyncio.create_task(call("naming", "background")),
+            asyncio.create_task(call("turn", "interactive")),
+        ]
+        await asyncio.sleep(0.01)
+        assert gov.snapshot()["queued"] == 3
+    await asyncio.gather(*tasks)
+
+    assert order == ["turn", "summary", "naming"]
+    stats = gov.snapshot()
+    assert stats["in_flight"] == 0
+    assert stats["waited"] == 3
+
+
+async def test_governor_rpm_bucket_delays_requests() -> None:
+    gov = governor.Governor("test", rpm=600)  # 10 req/s, burst of 600
+    gov._rpm.tokens = 0
+    wait = await gov.acquire(1)
+    gov.release()
+
+    assert 0.05 <= wait < 0.5
+
+
+class _FakeStream:
+    def __init__(self, parts: list[str], hang_after: bool):
+        self._parts = list(parts)
+        self._hang_after = hang_after
+        self._done = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._parts:
+            text = self._parts.pop(0)
+            return SimpleNamespace(
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=text, tool_calls=None), finish_reason=None)],
+                usage=None,
+            )
+        if self._hang_after:
+            await asyncio.sleep(3600)
+        if self._done:
+            raise StopAsyncIteration
+        self._done = True
+        return SimpleNamespace(
+            choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=None), finish_reason="stop")],
+            usage=None,
+        )
+
+
+async def test_chat_stream_resumes_after_stall(monkeypatch) -> None:
+    requests: list[list[dict[str, Any]]] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        requests.append(kwargs["messages"])
+        if len(requests) == 1:
+            return _FakeStream(["Hello, "], hang_after=True)
+        return _FakeStream(["world"], hang_after=False)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    provider = _provider(chunk_timeout_s=0.05)
+    chunks = [c async for c in provider.chat_stream([{"role": "user", "content": "hi"}])]
+
+    text = "".join(c.delta or "" for c in chunks)
+    events = [c.event for c in chunks if c.event]
+    assert text == "Hello, world"
+    assert events[0]["type"] == "stream_stalled"
+    assert events[0]["partial_chars"] == len("Hello, ")
+    assert requests[1][-2] == {"role": "assistant", "content": "Hello, "}
+    assert chunks[-1].finish_reason == "stop"
+    assert chunks[-1].usage["stalls"] == 1
+    assert resilience.stream_stats()[0]["stalls"] == 1
+
+
+async def test_cacheable_stream_is_replayed_from_cache(monkeypatch, tmp_path) -> None:
+    calls: list[str] = []
+
+    async def fake_acompletion(**kwargs: Any) -> Any:
+        calls.append(kwargs["model"])
+        return _FakeStream(["cached ", "title"], hang_after=False)
+
+    monkeypatch.setattr(litellm_provider, "acompletion", fake_acompletion)
+    monkeypatch.setattr(cache, "_caches", {})
+    cfg = LLMConfig(cache=LLMCacheConfig(enabled=True, path=str(tmp_path / "cache.db")))
+    provider = LiteLLMProvider(default_model="openai/gpt-test", llm_config=cfg)
+    messages = [{"role": "user", "content": "name this chat"}]
+
+    # Not marked cacheable: never stored.
+    [c async for c in provider.chat_stream(messages)]
+    with cache.llm_cacheable():
+        first = [c async for c in provider.chat_stream(messages)]
+        second = [c async for c in provider.chat_stream(messages)]
+
+    assert len(calls) == 2
+    assert "".join(c.delta or "" for c in first) == "cached title"
+    assert "".join(c.delta or "" for c in second) == "cached title"
+    assert second[-1].usage == {"cache_hit": 1}
+    assert cache.response_cache_stats()[0]["entries"] == 1
+
+    # Tool-calling steps (an agent loop) are never served from the cache.
+    tools = [{"type": "function", "function": {"name": "exec", "parameters": {"type": "object"}}}]
+    with cache.llm_cacheable():
+        for _ in range(2):
+            [c async for c in provider.chat_stream(messages, tools=tools)]
+    assert len(calls) == 4
+    assert cache.response_cache_stats()[0]["entries"] == 1
@@ -0,0 +1,78 @@
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory_index import MemoryIndex, chunk_markdown
+from nanobot.config.schema import MemoryConfig
+
+
+def _big_memory(store: MemoryStore) -> None:
+    filler = "\n\n".join(f"## Topic {i}\n" + f"unrelated filler sentence number {i}. " * 20 for i in range(40))
+    store.write_long_term(
+        "## User\nName is Ada; prefers terse answers.\n\n"
+        "## Deploy\nProduction deploys go through the blue-green pipeline on kubernetes.\n\n" + filler
+    )
+
+
+def test_chunk_markdown_splits_on_headings_and_long_sections() -> None:
+    chunks = chunk_markdown("intro\n# A\nalpha\n## B\n" + "\n\n".join(["x" * 50] * 5), max_chars=120)
+    assert chunks[0] == ("", "intro")
+    assert chunks[1] == ("A", "alpha")
+    assert all(h == "B" for h, _ in chunks[2:]) and len(chunks) > 3
+
+
+def test_index_updates_only_changed_sources() -> None:
+    index = MemoryIndex()
+    assert index.update("a.md", "# Cats\ncats purr loudly")
+    assert index.update("b.md", "# Dogs\ndogs bark")
+    assert not index.update("a.md", "# Cats\ncats purr loudly")
+
+    assert index.search("purr")[0][1].source == "a.md"
+    index.update("a.md", "# Cats\ncats sleep")
+    assert index.search("purr") == []
+    index.remove("b.md")
+    assert index.search("bark") == []
+    assert index.stats()["sources"] == 1
+
+
+def test_small_memory_is_included_in_full(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("likes tea")
+    assert store.get_memory_context("anything", token_budget=2000) == "## Long-term Memory\nlikes tea"
+
+
+def test_large_memory_injects_relevant_and_pinned_chunks_within_budget(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    _big_memory(store)
+    store.append_today("Met with Bob about the kubernetes migration.")
+    store.set_external_memory({"editor": "vim with kubernetes plugins", "shell": "zsh"})
+
+    context = store.get_memory_context(
+        "how do we deploy to kubernetes?", token_budget=300, top_k=3, pinned_sections=["user"]
+    )
+    assert context.startswith("## Pinned Memory\n### User\nName is Ada")
+    assert "blue-green pipeline" in context
+    assert "kubernetes migration" in context
+    assert "Global Memory: editor" in context
+    assert "filler" not in context and "zsh" not in context
+    assert len(context) // 4 <= 300
+
+
+def test_index_follows_file_and_global_memory_changes(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    _big_memory(store)
+    store.set_external_memory({"pet": "a parrot named Kiwi"})
+    assert "Kiwi" in store.get_memory_context("parrot", token_budget=200)
+
+    store.set_external_memory({})
+    store.append_today("Adopted a parrot called Mango.")
+    context = store.get_memory_context("parrot", token_budget=200)
+    assert "Kiwi" not in context and "Mango" in context
+
+
+def test_context_builder_uses_current_message_for_retrieval(tmp_path) -> None:
+    builder = ContextBuilder(tmp_path, memory_config=MemoryConfig(token_budget=300, pinned_sections=["User"]))
+    _big_memory(builder.memory)
+
+    prompt = builder.build_messages(history=[], current_message="deploy pipeline?")[0]["content"]
+    assert "blue-green pipeline" in prompt
+    assert "Name is Ada" in prompt
+    assert "Topic 39" not in prompt
@@ -0,0 +1,27 @@
+import os
+
+from nanobot.agent.memory import MemoryStore
+
+
+def test_append_today_adds_header_once_and_keeps_cache_current(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    store.append_today("first")
+    store.append_today("second")
+
+    expected = f"# {store.get_today_file().stem}\n\nfirst\nsecond"
+    assert store.get_today_file().read_text() == expected
+    assert store.read_today() == expected
+    assert store.get_memory_context() == "## Today's Notes\n" + expected
+
+
+def test_memory_context_is_cached_until_a_file_changes(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("likes tea")
+    first = store.get_memory_context()
+    assert store.get_memory_context() is first
+
+    # An edit from outside the store (e.g. the write_file tool) is picked up.
+    store.memory_file.write_text("likes coffee now")
+    st = store.memory_file.stat()
+    os.utime(store.memory_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert store.get_memory_context() == "## Long-term Memory\nlikes coffee now"
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from nanobot.bus.events import InboundMessage
+from nanobot.bus.queue import BusFullError, MessageBus
+
+
+def _msg(channel: str, text: str, **metadata) -> InboundMessage:
+    return InboundMessage(channel=channel, sender_id="u", chat_id="c", content=text, metadata=metadata)
+
+
+async def test_consume_prefers_interactive_then_subagent_then_background() -> None:
+    bus = MessageBus()
+    await bus.publish_inbound(_msg("cron", "job"))
+    await bus.publish_inbound(_msg("system", "announce"))
+    await bus.publish_inbound(_msg("telegram", "hello"))
+    await bus.publish_inbound(_msg("telegram", "digest", lane="background"))
+
+    order = [(await bus.consume_inbound()).content for _ in range(4)]
+
+    assert order == ["hello", "announce", "job", "digest"]
+    stats = bus.stats()
+    assert stats["background"]["consumed"] == 2 and stats["interactive"]["depth"] == 0
+
+
+async def test_full_lane_applies_backpressure() -> None:
+    bus = MessageBus(inbound_maxsize=1)
+    await bus.publish_inbound(_msg("telegram", "first"))
+
+    with pytest.raises(BusFullError):
+        await bus.publish_inbound(_msg("telegram", "rejected"), block=False)
+
+    blocked = asyncio.create_task(bus.publish_inbound(_msg("telegram", "second")))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    # Other lanes are unaffected by a full interactive lane.
+    await bus.publish_inbound(_msg("system", "announce"))
+
+    assert (await bus.consume_inbound()).content == "first"
+    await asyncio.wait_for(blocked, timeout=1)
+    assert (await bus.consume_inbound()).content == "second"
+    assert bus.stats()["interactive"]["blocked"] == 1
+    assert bus.stats()["interactive"]["rejected"] == 1
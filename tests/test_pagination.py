@@ -0,0 +1,75 @@
+import pytest
+
+from nanobot.web.database import Database, decode_cursor, encode_cursor
+
+
+def _db(tmp_path) -> Database:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s")
+    return db
+
+
+def test_cursor_roundtrip_and_validation() -> None:
+    assert decode_cursor(encode_cursor("2026-01-01T00:00:00+00:00", "msg_1")) == ("2026-01-01T00:00:00+00:00", "msg_1")
+    assert decode_cursor(encode_cursor(42, 42)) == (42, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_messages_page_backwards_from_the_newest(tmp_path) -> None:
+    db = _db(tmp_path)
+    ids = [db.add_message("s", "user", f"m{i}") for i in range(25)]
+    all_ids = [m["id"] for m in db.get_messages("s")]
+
+    seen = []
+    page = db.get_messages_page("s", limit=10)
+    assert [m["id"] for m in page["items"]] == all_ids[-10:]  # newest 10, oldest first
+    while True:
+        seen = [m["id"] for m in page["items"]] + seen
+        if not page["has_more"]:
+            break
+        page = db.get_messages_page("s", before=page["before"], limit=10)
+    assert seen == all_ids and sorted(seen) == sorted(ids)
+
+    # Polling forward from the newest cursor picks up only new rows.
+    newest = db.get_messages_page("s", limit=5)["after"]
+    assert db.get_messages_page("s", after=newest)["items"] == []
+    new_id = db.add_message("s", "assistant", "later")
+    page = db.get_messages_page("s", after=newest)
+    assert [m["id"] for m in page["items"]] == [new_id] and not page["has_more"]
+
+
+def test_sessions_page_orders_by_updated_at_and_survives_ties(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    for i in range(12):
+        db.create_session(f"s{i:02d}")
+    conn = db._get_conn()
+    conn.execute("UPDATE sessions SET updated_at = '2026-01-01T00:00:00+00:00'")  # all tied
+    conn.commit()
+    db.touch_session("s05")
+
+    page = db.list_sessions_page(limit=5)
+    assert page["items"][0]["id"] == "s05"
+    got = [r["id"] for r in page["items"]]
+    while page["has_more"]:
+        page = db.list_sessions_page(before=page["before"], limit=5)
+        got += [r["id"] for r in page["items"]]
+    assert len(got) == 12 and len(set(got)) == 12
+
+
+def test_descending_lists_page_turns_and_terminal(tmp_path) -> None:
+    db = _db(tmp_path)
+    turns = [db.create_turn("s", f"t{i}")["id"] for i in range(7)]
+    page = db.list_turns_page("s", limit=3)
+    assert len(page["items"]) == 3 and page["has_more"]
+    rest = db.list_turns_page("s", before=page["before"], limit=10)
+    assert not rest["has_more"]
+    assert sorted(t["id"] for t in page["items"] + rest["items"]) == sorted(turns)
+
+    step = db.create_step(turns[0], 0)
+    for i in range(5):
+        db.add_terminal_chunk("s", turns[0], step["id"], "call", "stdout", f"line {i}\n", float(i))
+    page = db.list_terminal_chunks_page("s", limit=2)
+    assert [c["text"] for c in page["items"]] == ["line 3\n", "line 4\n"]
+    older = db.list_terminal_chunks_page("s", before=page["before"], limit=2)
+    assert [c["text"] for c in older["items"]] == ["line 1\n", "line 2\n"]
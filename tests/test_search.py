@@ -0,0 +1,114 @@
+import pytest
+
+from nanobot.web.database import Database
+from nanobot.web.search import parse_query, search
+from nanobot.web.snapshots import materialize_turn
+
+
+def _turn_with_outputs(db: Database, sid: str, prompt: str, answer: str, tool_output: str) -> str:
+    turn = db.create_turn(sid, prompt)
+    step = db.create_step(turn["id"], 0)["id"]
+    db.insert_event_v2(sid, turn["id"], step, "tool_result", 0.0,
+                       {"tool_call_id": "tc_1", "tool_name": "read_file", "ok": True, "output": tool_output})
+    db.insert_event_v2(sid, turn["id"], step, "final", 0.0, {"message_id": "m_1", "text": answer})
+    return turn["id"]
+
+
+def _count(db: Database) -> int:
+    return db._get_conn().execute("SELECT COUNT(*) FROM search_docs").fetchone()[0]
+
+
+def test_parse_query_quotes_terms_and_splits_short_ones() -> None:
+    assert parse_query('retry "lease lost" AND x 修复') == ('"retry" "lease lost" "AND"', ["x", "修复"])
+    assert parse_query('say "hi"') == ('"say"', ["hi"])
+    assert parse_query("   ") == (None, [])
+
+
+def test_messages_turns_and_outputs_are_ranked_with_anchors(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s1", "Scheduler work")
+    db.create_session("s2", "Other")
+    prompt = "why does the scheduler starve <b>sessions</b>?"
+    turn_id = _turn_with_outputs(db, "s1", prompt, "The scheduler now round-robins.", "def scheduler(): ...")
+    db.add_message("s1", "user", prompt)  # mirrors the turn: not indexed a second time
+    db.add_message("s1", "assistant", "The scheduler now round-robins.")
+    _turn_with_outputs(db, "s2", "x", "y", "scheduler output")  # raw events only, never materialized
+    assert sorted(h["kind"] for h in search(db, "scheduler")["items"]) == ["session", "turn"]
+
+    materialize_turn(db, turn_id)
+    materialize_turn(db, turn_id)  # re-materializing replaces, never duplicates
+    hits = search(db, "scheduler", limit=10)["items"]
+    assert sorted(h["kind"] for h in hits) == ["final", "session", "tool", "turn"]
+    assert all(h["session_id"] == "s1" for h in hits)  # outputs are indexed from snapshots, not raw events
+    tool = next(h for h in hits if h["kind"] == "tool")
+    assert tool["turn_id"] == turn_id and tool["ref_id"] == "tc_1" and tool["label"] == "read_file"
+    turn = next(h for h in hits if h["kind"] == "turn")
+    assert turn["turn_id"] == turn_id
+    assert "<mark>scheduler</mark>" in turn["snippet"] and "&lt;b&gt;" in turn["snippet"]
+
+    page = search(db, "scheduler", kinds=["final", "tool"], limit=1)
+    assert len(page["items"]) == 1 and page["has_more"]
+    assert search(db, "round-robins", session_id="s2")["items"] == []
+    with pytest.raises(ValueError):
+        search(db, "scheduler", kinds=["nope"])
+
+
+def test_short_terms_titles_and_session_delete(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s", "New Chat")
+    db.create_turn("s", "请帮我修复登录页面的问题")
+    hit = search(db, "修复")["items"][0]
+    assert hit["kind"] == "turn" and "<mark>修复</mark>" in hit["snippet"]
+    assert [h["kind"] for h in search(db, "登录页面 修复")["items"]] == ["turn"]
+
+    db.update_session_title("s", "Login bugfix")
+    assert [h["kind"] for h in search(db, "bugfix")["items"]] == ["session"]
+    assert search(db, "New Chat")["items"] == []
+
+    db.delete_session("s")
+    assert _count(db) == 0
+
+
+def test_existing_rows_are_backfilled_once(tmp_path) -> None:
+    path = tmp_path / "fanfan.db"
+    db = Database(path)
+    db.create_session("s", "Old")
+    db.add_message("s", "user", "migrate it")
+    _turn_with_outputs(db, "s", "migrate it", "migrations are done", "ALTER TABLE ...")
+    db.create_session("v1", "Legacy")
+    db.add_message("v1", "user", "legacy question about migrations")  # a session from before turns
+    conn = db._get_conn()
+    conn.executescript("DROP TABLE search_docs; DROP TABLE search_fts;")  # a database from before search
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'search_%'").fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.commit()
+
+    db = Database(path)
+    hits = search(db, "migrat")["items"]
+    assert sorted((h["session_id"], h["kind"]) for h in hits) == [("s", "final"), ("s", "turn"), ("v1", "message")]
+    assert _count(db) == 6  # 2 sessions, turn, final, tool, legacy message
+
+
+def test_search_is_disabled_without_fts5_trigram(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(Database, "_fts5_trigram_available", staticmethod(lambda conn: False))
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s", "Scheduler")
+    db.add_message("s", "user", "scheduler")
+    db.create_turn("s", "scheduler")
+    db.replace_turn_search_docs("t", "s", [{"kind": "final", "ref_id": "m", "body": "scheduler"}])
+    assert not db.search_available and db.search("\"scheduler\"") == []
+
+
+def test_search_endpoint_answers_501_without_fts5(tmp_path, monkeypatch) -> None:
+    from fastapi.testclient import TestClient
+
+    from nanobot.web.app import create_app
+
+    monkeypatch.setattr(Database, "_fts5_trigram_available", staticmethod(lambda conn: False))
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("FANFAN_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("FANFAN_FS_ROOT", str(tmp_path))
+    client = TestClient(create_app())
+
+    assert client.post("/api/v2/sessions", json={"title": "still works"}).status_code == 200
+    assert client.get("/api/v2/search", params={"q": "works"}).status_code == 501
@@ -0,0 +1,121 @@
+import json
+
+from nanobot.session.manager import SessionManager
+
+
+def _records(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def test_save_appends_new_messages_and_metadata_trailers(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions")
+    session = mgr.get_or_create("telegram:1")
+    session.add_message("user", "hi")
+    mgr.save(session)
+    path = mgr._get_session_path("telegram:1")
+    first = path.read_text()
+
+    session.add_message("assistant", "hello")
+    session.metadata["lang"] = "en"
+    mgr.save(session)
+
+    text = path.read_text()
+    assert text.startswith(first)  # append-only
+    assert [r.get("_type", r.get("role")) for r in _records(path)] == ["metadata", "user", "assistant", "metadata"]
+
+    loaded = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions").get_or_create("telegram:1")
+    assert [m["content"] for m in loaded.messages] == ["hi", "hello"]
+    assert loaded.metadata == {"lang": "en"}
+
+
+def test_load_skips_torn_trailing_record_and_clear_rewrites(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions")
+    session = mgr.get_or_create("cli:x")
+    session.add_message("user", "one")
+    mgr.save(session)
+    path = mgr._get_session_path("cli:x")
+    with open(path, "a") as f:
+        f.write('{"role": "user", "cont')
+
+    loaded = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions").get_or_create("cli:x")
+    assert [m["content"] for m in loaded.messages] == ["one"]
+
+    session.clear()
+    session.add_message("user", "two")
+    mgr.save(session)
+    assert [r.get("content") for r in _records(path)] == [None, "two"]
+
+
+def test_superseded_metadata_records_are_compacted(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions")
+    mgr.COMPACT_THRESHOLD = 3
+    session = mgr.get_or_create("cli:m")
+    for i in range(4):
+        session.add_message("user", str(i))
+        session.metadata["n"] = i
+        mgr.save(session)
+    mgr._compactor.shutdown(wait=True)
+
+    records = _records(mgr._get_session_path("cli:m"))
+    assert sum(1 for r in records if r.get("_type") == "metadata") == 1
+    assert [r["content"] for r in records if "role" in r] == ["0", "1", "2", "3"]
+
+
+def test_lazy_load_reads_only_the_tail(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions")
+    session = mgr.get_or_create("telegram:long")
+    session.metadata["topic"] = "x"
+    for i in range(500):
+        session.add_message("user", f"m{i}")
+        if i % 50 == 0:
+            mgr.save(session)
+    mgr.save(session)
+
+    lazy = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions", history_window=20)
+    loaded = lazy.get_or_create("telegram:long")
+    assert loaded.partial
+    assert [m["content"] for m in loaded.messages] == [f"m{i}" for i in range(480, 500)]
+    assert loaded.metadata == {"topic": "x"}
+
+    # Appending to a partially loaded session must not drop older history.
+    loaded.add_message("assistant", "reply")
+    lazy.save(loaded)
+    full = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions", history_window=10_000)
+    assert len(full.get_or_create("telegram:long").messages) == 501
+
+
+def test_lru_evicts_by_count_and_writes_dirty_sessions(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions", max_cached_sessions=2)
+    a = mgr.get_or_create("cli:a")
+    a.add_message("user", "unsaved")
+    mgr.get_or_create("cli:b")
+    mgr.get_or_create("cli:c")  # evicts a (least recently used), writing it first
+
+    assert mgr.cache_stats()["sessions"] == 2
+    assert mgr.evictions == 1
+    reloaded = mgr.get_or_create("cli:a")
+    assert reloaded is not a
+    assert [m["content"] for m in reloaded.messages] == ["unsaved"]
+    # b was never saved and had no messages: no file is created for it.
+    assert not mgr._get_session_path("cli:b").exists()
+
+
+def test_index_tracks_saves_and_deletes_and_can_be_rebuilt(tmp_path) -> None:
+    mgr = SessionManager(tmp_path, sessions_dir=tmp_path / "sessions")
+    for key, n in [("telegram:1", 3), ("telegram:2", 1), ("cli:3", 2)]:
+        session = mgr.get_or_create(key)
+        for i in range(n):
+            session.add_message("user", str(i))
+            mgr.save(session)
+
+    rows = mgr.list_sessions(order_by="message_count")
+    assert [(r["key"], r["message_count"]) for r in rows] == [("telegram:1", 3), ("cli:3", 2), ("telegram:2", 1)]
+    assert [r["key"] for r in mgr.list_sessions(limit=1, offset=1, order_by="message_count")] == ["cli:3"]
+
+    mgr.delete("telegram:2")
+    assert mgr.index.count() == 2
+
+    # Lose the index rows; a rebuild recovers them from the files.
+    mgr.index.remove("telegram:1")
+    assert mgr.rebuild_index() == 2
+    assert {r["key"]: r["message_count"] for r in mgr.list_sessions()} == {"telegram:1": 3, "cli:3": 2}
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from nanobot.web import worker as worker_module
+from nanobot.web.database import Database
+from nanobot.web.settings import WebSettings
+
+
+def _queue(db: Database, session_id: str, text: str) -> str:
+    if not db.session_exists(session_id):
+        db.create_session(session_id)
+    turn = db.create_turn(session_id, text)
+    db.enqueue_turn(turn["id"], session_id)
+    time.sleep(0.001)  # distinct enqueued_at
+    return turn["id"]
+
+
+def test_claim_is_fifo_and_one_running_turn_per_session(tmp_path) -> None:
+    db = Database(tmp_path / "q.db")
+    a1 = _queue(db, "a", "first")
+    a2 = _queue(db, "a", "second")
+    b1 = _queue(db, "b", "other")
+
+    first = db.claim_turn("w1", lease_s=30)
+    assert first is not None and first["turn_id"] == a1 and first["user_text"] == "first"
+    # a2 must wait for a1, so the next claim skips to session b.
+    assert db.claim_turn("w2", lease_s=30)["turn_id"] == b1
+    assert db.claim_turn("w2", lease_s=30) is None
+
+    summary = db.turn_queue_summary()
+    assert summary["a"]["running"] == 1 and summary["a"]["queue_depth"] == 1
+
+    db.finish_queued_turn(a1, "w1", "completed")
+    assert db.claim_turn("w1", lease_s=30)["turn_id"] == a2
+
+
+def test_expired_lease_is_requeued_and_cancel_is_seen_on_heartbeat(tmp_path) -> None:
+    db = Database(tmp_path / "q.db")
+    t1 = _queue(db, "s", "hello")
+    t2 = _queue(db, "s", "follow-up")
+
+    assert db.claim_turn("dead", lease_s=0)["turn_id"] == t1
+    time.sleep(0.01)
+    retry = db.claim_turn("w1", lease_s=30)
+    assert retry["turn_id"] == t1 and retry["attempts"] == 2
+    assert db.heartbeat_turn(t1, "dead", lease_s=30) == "lost"
+    assert db.heartbeat_turn(t1, "w1", lease_s=30) == "ok"
+
+    running, dropped = db.request_turn_cancel("s")
+    assert running == 1 and dropped == [t2]
+    assert db.heartbeat_turn(t1, "w1", lease_s=30) == "cancel"
+
+
+async def test_worker_that_lost_its_lease_leaves_the_turn_to_the_retry(tmp_path, monkeypatch) -> None:
+    w = worker_module.TurnWorker(WebSettings(data_dir=str(tmp_path), worker_lease_s=1.0))
+    db = w.db
+    turn_id = _queue(db, "s", "hello")
+
+    class HangingRunner:
+        async def run_turn(self, *, session_id: str, turn_id: str, user_text: str) -> str:
+            step = db.create_step(turn_id, 0)["id"]
+            await w.bus.publish(session_id=session_id, turn_id=turn_id, step_id=step, type="message_delta",
+                                payload={"role": "assistant", "message_id": "m", "delta": "hel"})
+            await asyncio.Event().wait()
+            return ""
+
+    monkeypatch.setattr(worker_module, "build_session_runner", lambda **_: (HangingRunner(), "m"))
+    job = db.claim_turn(w.worker_id, lease_s=1.0)
+    conn = db._get_conn()
+    conn.execute("UPDATE turn_queue SET claimed_by = 'other' WHERE turn_id = ?", (turn_id,))  # the retry's claim
+    conn.commit()
+
+    await asyncio.wait_for(w._run_job(job), timeout=5)
+    await w.bus.close()
+
+    assert [e["type"] for e in db.get_turn_events(turn_id)] == ["message_delta"]  # no CANCELLED error
+    assert db.get_turn_snapshots([turn_id]) == {}
+    row = conn.execute("SELECT status, claimed_by FROM turn_queue WHERE turn_id = ?", (turn_id,)).fetchone()
+    assert (row["status"], row["claimed_by"]) == ("running", "other")
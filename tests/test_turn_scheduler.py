@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from nanobot.web.scheduler import SchedulerFullError, TurnScheduler
+
+
+async def test_fair_queuing_interleaves_sessions_and_keeps_fifo() -> None:
+    sched = TurnScheduler(max_concurrent=1, max_queue_per_session=5, max_queue_total=10)
+    order: list[str] = []
+    gate = asyncio.Event()
+
+    def turn(name: str, wait: bool = False):
+        async def run() -> None:
+            order.append(name)
+            if wait:
+                await gate.wait()
+        return run
+
+    sched.submit("busy", "t0", turn("busy-0", wait=True))
+    await asyncio.sleep(0)
+    for i in range(1, 4):
+        sched.submit("busy", f"t{i}", turn(f"busy-{i}"))
+    sched.submit("quiet", "q1", turn("quiet-1"))
+
+    status = sched.session_status("quiet")
+    assert status is not None and status["status"] == "queued" and status["queue_depth"] == 1
+
+    gate.set()
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+    # The quiet session is not stuck behind the busy session's whole backlog.
+    assert order == ["busy-0", "busy-1", "quiet-1", "busy-2", "busy-3"]
+    assert sched.stats()["running"] == 0
+
+
+async def test_admission_control_rejects_deep_queues() -> None:
+    sched = TurnScheduler(max_concurrent=1, max_queue_per_session=1, max_queue_total=10)
+    gate = asyncio.Event()
+
+    async def blocked() -> None:
+        await gate.wait()
+
+    sched.submit("s", "t0", blocked)
+    assert sched.submit("s", "t1", blocked) == {"queued": True, "position": 1}
+    with pytest.raises(SchedulerFullError) as exc:
+        sched.submit("s", "t2", blocked)
+    assert exc.value.retry_after_s >= 1
+
+    cancelled, dropped = sched.cancel("s")
+    assert cancelled and [t.turn_id for t in dropped] == ["t1"]
+    gate.set()
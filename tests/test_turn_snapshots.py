@@ -0,0 +1,116 @@
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus, EventFilter
+from nanobot.web.snapshots import materialize_turn, replay_events, snapshot_view, turn_snapshots
+from nanobot.web.turns import execute_turn
+
+
+def _emit(db: Database, sid: str, turn_id: str, step_id: str, type_: str, **payload) -> dict:
+    return db.insert_event_v2(sid, turn_id, step_id, type_, 0.0, payload)
+
+
+def _streamed_turn(db: Database, sid: str, *, finish: bool = True, tokens: int = 50) -> str:
+    turn = db.create_turn(sid, "fix the bug")
+    step = db.create_step(turn["id"], 0)["id"]
+    t = turn["id"]
+    _emit(db, sid, t, step, "message_delta", role="user", message_id="u1", delta="fix the bug")
+    _emit(db, sid, t, step, "thinking", status="start")
+    for i in range(tokens):
+        _emit(db, sid, t, step, "thinking", status="delta", text=f"t{i} ")
+    _emit(db, sid, t, step, "thinking", status="end", duration_ms=40)
+    for i in range(tokens):
+        _emit(db, sid, t, step, "message_delta", role="assistant", message_id="a1", delta=f"w{i} ")
+    _emit(db, sid, t, step, "tool_call", tool_call_id="tc1", tool_name="write_file", input={"path": "x.py"}, status="running")
+    _emit(db, sid, t, step, "tool_result", tool_call_id="tc1", tool_name="write_file", ok=True, output="ok", duration_ms=3)
+    _emit(db, sid, t, step, "diff", tool_call_id="tc1", path="x.py", diff="+x\n")
+    if finish:
+        for i in range(tokens):
+            _emit(db, sid, t, step, "message_delta", role="assistant", message_id="a2", delta="done " if i == 0 else "")
+        _emit(db, sid, t, step, "final", role="assistant", message_id="a2", text="done", finish_reason="stop", usage={"total_tokens": 9})
+    return t
+
+
+def test_snapshot_compacts_deltas_and_summarizes_the_turn(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s")
+    turn_id = _streamed_turn(db, "s")
+
+    row = materialize_turn(db, turn_id)
+    assert row["event_count"] == 157
+    # user, thinking start/delta/end, one merged a1 delta, tool_call, tool_result, diff, final (a2 deltas dropped)
+    assert [e["type"] for e in row["events"]] == [
+        "message_delta", "thinking", "thinking", "thinking", "message_delta", "tool_call", "tool_result", "diff", "final",
+    ]
+    merged = row["events"][2]
+    assert merged["payload"]["text"].startswith("t0 t1") and merged["id"] == row["events"][3]["id"] - 1
+
+    view = snapshot_view(db.get_turn_snapshots([turn_id])[turn_id])
+    assert view["status"] == "completed" and view["text"] == "done"
+    assert view["thinking"].startswith("t0 ") and view["thinking_ms"] == 40
+    assert view["tool_calls"] == [
+        {
+            "tool_call_id": "tc1", "diff_paths": ["x.py"], "tool_name": "write_file", "input": {"path": "x.py"},
+            "status": "completed", "ok": True, "output": "ok", "error": "", "duration_ms": 3,
+        }
+    ]
+    assert view["diffs"] == [{"tool_call_id": "tc1", "path": "x.py", "diff": "+x\n"}]
+    assert view["usage"] == {"total_tokens": 9} and view["last_event_id"] == db.latest_event_id("s")
+
+
+def test_replay_serves_finished_turns_from_snapshots(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s")
+    first = _streamed_turn(db, "s")
+    second = _streamed_turn(db, "s")
+    for t in (first, second):
+        materialize_turn(db, t)
+    running = _streamed_turn(db, "s", finish=False, tokens=3)
+
+    events, truncated = replay_events(db, "s", None, limit=2000)
+    assert not truncated
+    assert [e["turn_id"] for e in events].count(first) == 9
+    assert [e["turn_id"] for e in events].count(running) == 12  # raw
+    assert [e["id"] for e in events] == sorted(e["id"] for e in events)
+
+    # Resuming inside the first turn reads the rest of it raw, then the snapshot of the second.
+    mid = db.get_turn_events(first)[100]["id"]
+    events, _ = replay_events(db, "s", mid, limit=2000)
+    assert all(e["id"] > mid for e in events)
+    assert [e["turn_id"] for e in events].count(first) == 157 - 101
+    assert [e["turn_id"] for e in events].count(second) == 9
+
+    events, truncated = replay_events(db, "s", None, limit=4, event_filter=EventFilter.from_query("final,tool_call"))
+    assert truncated and [e["type"] for e in events] == ["final", "tool_call", "final", "tool_call"]
+
+
+def test_ended_turns_without_snapshot_are_materialized_on_read(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    db.create_session("s")
+    ended = _streamed_turn(db, "s", tokens=2)
+    running = _streamed_turn(db, "s", finish=False, tokens=2)
+
+    rows = turn_snapshots(db, [ended, running])
+    assert set(rows) == {ended}
+    assert set(db.get_turn_snapshots([ended, running])) == {ended}
+
+
+async def test_execute_turn_writes_the_snapshot(tmp_path) -> None:
+    db = Database(tmp_path / "fanfan.db")
+    bus = EventBus(db)
+    db.create_session("s")
+    turn = db.create_turn("s", "hi")
+
+    class Runner:
+        async def run_turn(self, *, session_id: str, turn_id: str, user_text: str) -> str:
+            step = db.create_step(turn_id, 0)["id"]
+            for word in ("hel", "lo"):
+                await bus.publish(session_id=session_id, turn_id=turn_id, step_id=step, type="message_delta",
+                                  payload={"role": "assistant", "message_id": "m", "delta": word})
+            await bus.publish(session_id=session_id, turn_id=turn_id, step_id=step, type="final",
+                              payload={"role": "assistant", "message_id": "m", "text": "hello", "usage": {}})
+            return "hello"
+
+    status = await execute_turn(db=db, bus=bus, runner=Runner(), session_id="s", turn_id=turn["id"], content="hi",
+                                persist_user_message=False)
+    assert status == "completed"
+    view = snapshot_view(db.get_turn_snapshots([turn["id"]])[turn["id"]])
+    assert view["text"] == "hello" and view["raw_event_count"] == 3
@@ -0,0 +1,95 @@
+import gzip
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from nanobot.web.proxy import UpstreamProxy
+
+BUNDLE = b"export const x = 1;\n" * 5000
+
+
+def _upstream() -> FastAPI:
+    up = FastAPI()
+
+    @up.api_route("/assets/app.js", methods=["GET", "HEAD"])
+    def bundle(request: Request):
+        rng = request.headers.get("range")
+        if rng:
+            start, end = (int(x) for x in rng.removeprefix("bytes=").split("-"))
+            return Response(
+                BUNDLE[start : end + 1],
+                status_code=206,
+                media_type="application/javascript",
+                headers={"Content-Range": f"bytes {start}-{end}/{len(BUNDLE)}"},
+            )
+        return Response(BUNDLE, media_type="application/javascript")
+
+    @up.get("/gz")
+    def already_encoded():
+        return Response(gzip.compress(BUNDLE), media_type="application/javascript", headers={"Content-Encoding": "gzip"})
+
+    @up.get("/stream")
+    def stream():
+        return StreamingResponse((f"data: {i}\n\n" for i in range(3)), media_type="text/event-stream")
+
+    @up.get("/echo")
+    def echo(request: Request):
+        return {"query": request.url.query, "host": request.headers.get("host"), "x": request.headers.get("x-test")}
+
+    return up
+
+
+def _client(proxy: UpstreamProxy) -> TestClient:
+    app = FastAPI()
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def catchall(full_path: str, request: Request):
+        return await proxy.forward(request, full_path)
+
+    return TestClient(app)
+
+
+def _proxy() -> UpstreamProxy:
+    return UpstreamProxy("http://ui.local/", transport=httpx.ASGITransport(app=_upstream()))
+
+
+def test_proxy_forwards_bodies_headers_and_query() -> None:
+    proxy = _proxy()
+    client = _client(proxy)
+    r = client.get("/assets/app.js")
+    assert r.status_code == 200 and r.content == BUNDLE
+    assert r.headers["content-length"] == str(len(BUNDLE))
+
+    r = client.get("/echo?a=1&b=2", headers={"X-Test": "yes"})
+    assert r.json() == {"query": "a=1&b=2", "host": "ui.local", "x": "yes"}
+
+    r = client.get("/stream")
+    assert r.text == "data: 0\n\ndata: 1\n\ndata: 2\n\n"
+    # One client for every request
+    assert proxy.client is proxy.client
+
+
+def test_proxy_supports_head_range_and_passes_encoded_bodies_through() -> None:
+    client = _client(_proxy())
+    r = client.head("/assets/app.js")
+    assert r.status_code == 200 and r.content == b""
+    assert r.headers["content-length"] == str(len(BUNDLE))
+
+    r = client.get("/assets/app.js", headers={"Range": "bytes=0-99"})
+    assert r.status_code == 206
+    assert r.content == BUNDLE[:100]
+    assert r.headers["content-range"] == f"bytes 0-99/{len(BUNDLE)}"
+
+    r = client.get("/gz", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.content == BUNDLE  # decoded by the test client, i.e. forwarded intact
+
+
+def test_unreachable_upstream_is_a_502() -> None:
+    def refuse(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    client = _client(UpstreamProxy("http://ui.local", transport=httpx.MockTransport(refuse)))
+    assert client.get("/").status_code == 502
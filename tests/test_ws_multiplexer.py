@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from nanobot.web.database import Database
+from nanobot.web.event_bus import EventBus
+from nanobot.web.ws import WsMultiplexer, decode_frame, encode_frame, negotiate_format
+
+
+def _setup(tmp_path):
+    db = Database(tmp_path / "fanfan.db")
+    bus = EventBus(db)
+    steps = {}
+    for sid in ("a", "b", "c"):
+        db.create_session(sid)
+        turn = db.create_turn(sid, "hi")
+        steps[sid] = (turn["id"], db.create_step(turn["id"], 0)["id"])
+    sent: list[dict] = []
+
+    async def send(obj):
+        sent.append(obj)
+
+    def resolve(sid, since_seq, from_):
+        if since_seq is not None:
+            return "since_seq", None, since_seq
+        if from_ == "tail":
+            return "tail", db.latest_event_id(sid), None
+        return "recent", None, None
+
+    mux = WsMultiplexer(bus, send, resolve_replay=resolve, replay_limit=3, max_subscriptions=2)
+    return db, bus, steps, sent, mux
+
+
+async def _publish(bus, steps, sid, type_="message_delta", **payload):
+    turn_id, step_id = steps[sid]
+    return await bus.publish(session_id=sid, turn_id=turn_id, step_id=step_id, type=type_, payload=payload)
+
+
+async def test_subscribe_resumes_from_seq_and_multiplexes_live_events(tmp_path) -> None:
+    db, bus, steps, sent, mux = _setup(tmp_path)
+    first = [await _publish(bus, steps, "a", i=i) for i in range(3)]
+    await _publish(bus, steps, "b", i=0)
+
+    await mux.handle({"op": "subscribe", "session_id": "a", "since_seq": first[0]["seq"]})
+    await mux.handle({"op": "subscribe", "session_id": "b", "from": "tail", "types": ["final"], "fields": ["payload.text"]})
+    assert sent[0]["op"] == "subscribed"
+    assert [f["n"] for f in sent if f.get("o") == "e"] == [first[1]["seq"], first[2]["seq"]]
+    sent.clear()
+
+    await _publish(bus, steps, "a", i=9)
+    await _publish(bus, steps, "b", i=1)  # filtered out
+    final = await _publish(bus, steps, "b", "final", text="done", usage=1)
+    await _publish(bus, steps, "c", i=0)  # not subscribed
+    await mux.deliver_new()
+    assert [(f["s"], f["t"]) for f in sent] == [("a", "message_delta"), ("b", "final")]
+    assert sent[1] == {"o": "e", "s": "b", "i": final["id"], "t": "final", "p": {"text": "done"}}
+
+    sent.clear()
+    await mux.handle({"op": "unsubscribe", "session_id": "a"})
+    await _publish(bus, steps, "a", i=10)
+    await mux.deliver_new()
+    assert sent == [{"op": "unsubscribed", "session_id": "a"}]
+
+
+async def test_replay_cap_and_subscription_limit(tmp_path) -> None:
+    db, bus, steps, sent, mux = _setup(tmp_path)
+    events = [await _publish(bus, steps, "a", i=i) for i in range(5)]
+    await mux.handle({"op": "subscribe", "session_id": "a"})
+    assert sent[1]["op"] == "replay_truncated" and sent[1]["oldest_id"] == events[2]["id"]
+    assert [f["i"] for f in sent[2:]] == [e["id"] for e in events[2:]]
+
+    await mux.handle({"op": "subscribe", "session_id": "b"})
+    await mux.handle({"op": "subscribe", "session_id": "c"})
+    assert sent[-1]["op"] == "error" and sent[-1]["session_id"] == "c"
+    await mux.handle({"op": "nope"})
+    assert sent[-1]["op"] == "error"
+
+
+def test_frames_and_format_negotiation() -> None:
+    assert negotiate_format([], None) == ("json", None)
+    assert negotiate_format(["fanfan.json"], "json") == ("json", "fanfan.json")
+    frame = encode_frame("json", {"o": "e", "s": "a", "p": {"text": "hé"}})
+    assert frame == '{"o":"e","s":"a","p":{"text":"hé"}}'
+    assert decode_frame(frame) == json.loads(frame)
+
+
+def test_ws_closes_with_1011_when_the_event_pump_fails(tmp_path, monkeypatch) -> None:
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    from nanobot.web.app import create_app
+
+    async def new_events(self, timeout_s: float) -> bool:
+        return True
+
+    async def broken_delivery(self) -> None:
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(EventBus, "wait_for_new", new_events)
+    monkeypatch.setattr(WsMultiplexer, "deliver_new", broken_delivery)
+    monkeypatch.setenv("HOME", str(tmp_path / "home"))
+    monkeypatch.setenv("FANFAN_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setenv("FANFAN_FS_ROOT", str(tmp_path))
+
+    with TestClient(create_app()).websocket_connect("/ws") as ws:
+        assert json.loads(ws.receive_text())["op"] == "hello"
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_text()
+    assert exc.value.code == 1011